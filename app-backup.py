@@ -7,6 +7,7 @@ import openpyxl
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 import numpy as np
 import gspread
+from gsheets_loader import convert_serial_dates, load_sheets
 
 # Page configuration
 st.set_page_config(
@@ -146,30 +147,14 @@ def load_data():
         # Open spreadsheet by ID
         spreadsheet = gc.open_by_key(spreadsheet_id)
 
-        # Load main data from 'Export' sheet
-        # Use value_render_option='UNFORMATTED_VALUE' to get raw values instead of formatted strings
-        sheet_export = spreadsheet.worksheet('Export')
-        data_export = sheet_export.get_all_records(value_render_option='UNFORMATTED_VALUE')
-        df = pd.DataFrame(data_export)
+        # Ambil ketiga sheet sekaligus (batch per kolom, UNFORMATTED_VALUE);
+        # tidak di-fetch ulang selama revisi spreadsheet tidak berubah
+        sheets = load_sheets(spreadsheet, ['Export', 'Target Kanwil', 'Target Kancab'])
+        df = sheets['Export']
 
         # Convert date columns - Google Sheets dates come as serial numbers (days since 1899-12-30)
-        # Excel epoch: 1899-12-30, so we need to convert from that origin
-        def convert_gsheet_date(value):
-            """Convert Google Sheets serial date to datetime"""
-            if pd.isna(value):
-                return pd.NaT
-            try:
-                # If it's already a string in date format, parse it
-                if isinstance(value, str):
-                    return pd.to_datetime(value, errors='coerce')
-                # If it's a number (serial date), convert from Excel epoch
-                # Google Sheets uses same serial date as Excel (days since 1899-12-30)
-                return pd.to_datetime('1899-12-30') + pd.Timedelta(days=float(value))
-            except:
-                return pd.NaT
-
-        df['Tanggal PO'] = df['Tanggal PO'].apply(convert_gsheet_date)
-        df['Tanggal Penerimaan'] = df['Tanggal Penerimaan'].apply(convert_gsheet_date)
+        df['Tanggal PO'] = convert_serial_dates(df['Tanggal PO'])
+        df['Tanggal Penerimaan'] = convert_serial_dates(df['Tanggal Penerimaan'])
 
         # Convert numeric columns to proper types
         numeric_columns = ['No. ID Pemasok', 'Tahun Stok', 'Kuantum PO (Kg)', 'In / Out',
@@ -179,18 +164,14 @@ def load_data():
                 df[col] = pd.to_numeric(df[col], errors='coerce')
 
         # Load target data from 'Target Kanwil' sheet
-        sheet_target_kanwil = spreadsheet.worksheet('Target Kanwil')
-        data_target_kanwil = sheet_target_kanwil.get_all_records(value_render_option='UNFORMATTED_VALUE')
-        df_target_kanwil = pd.DataFrame(data_target_kanwil)
+        df_target_kanwil = sheets['Target Kanwil']
 
         # Convert numeric columns in target tables
         if 'Target Setara Beras' in df_target_kanwil.columns:
             df_target_kanwil['Target Setara Beras'] = pd.to_numeric(df_target_kanwil['Target Setara Beras'], errors='coerce')
 
         # Load target data from 'Target Kancab' sheet
-        sheet_target_kancab = spreadsheet.worksheet('Target Kancab')
-        data_target_kancab = sheet_target_kancab.get_all_records(value_render_option='UNFORMATTED_VALUE')
-        df_target_kancab = pd.DataFrame(data_target_kancab)
+        df_target_kancab = sheets['Target Kancab']
 
         # Convert numeric columns in target kancab
         if len(df_target_kancab) > 0 and 'Target Setara Beras' in df_target_kancab.columns:
@@ -8,6 +8,7 @@ from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 import numpy as np
 import gspread
 import time
+from excel_store import STORE as EXCEL_STORE, compute_row_hashes, prepare_segment
 
 # Page configuration
 st.set_page_config(
@@ -146,13 +147,10 @@ st.markdown("""
 
 @st.cache_data(ttl=300)
 def load_main_data():
-    """Load and cache main data from local Excel file"""
+    """Load and cache main data from the local segment store (bootstrap dari hasil_gabungan.xlsx)"""
     try:
-        # Define file path
-        file_path = 'assets/hasil_gabungan.xlsx'
-
-        # Load main data from 'Realisasi' sheet
-        df_realisasi = pd.read_excel(file_path, sheet_name='Export', engine='openpyxl')
+        # Union semua segment Parquet sheet 'Export'
+        df_realisasi = EXCEL_STORE.read('Export')
         print("df_realisasi loaded")
         print(f"Loaded {len(df_realisasi)} rows from 'Export' sheet.")
 
@@ -212,11 +210,10 @@ def load_main_data():
 
 @st.cache_data(ttl=300)
 def load_target_kanwil():
-    """Load and cache target kanwil data from local Excel file"""
+    """Load and cache target kanwil data from the local segment store"""
     try:
-        file_path = 'assets/hasil_gabungan.xlsx'
         # Load target data from 'Target Kanwil' sheet
-        df_target_kanwil = pd.read_excel(file_path, sheet_name='Target Kanwil', engine='openpyxl')
+        df_target_kanwil = EXCEL_STORE.read('Target Kanwil')
         print(f"Loaded {len(df_target_kanwil)} rows from 'Target Kanwil' sheet.")
         if 'Target Setara Beras' in df_target_kanwil.columns:
             df_target_kanwil['Target Setara Beras'] = pd.to_numeric(df_target_kanwil['Target Setara Beras'], errors='coerce')
@@ -228,11 +225,10 @@ def load_target_kanwil():
 
 @st.cache_data(ttl=300)
 def load_target_kancab():
-    """Load and cache target kancab data from local Excel file"""
+    """Load and cache target kancab data from the local segment store"""
     try:
-        file_path = 'assets/hasil_gabungan.xlsx'
         # Load target data from 'Target Kancab' sheet
-        df_target_kancab = pd.read_excel(file_path, sheet_name='Target Kancab', engine='openpyxl')
+        df_target_kancab = EXCEL_STORE.read('Target Kancab')
         if len(df_target_kancab) > 0 and 'Target Setara Beras' in df_target_kancab.columns:
             df_target_kancab['Target Setara Beras'] = pd.to_numeric(df_target_kancab['Target Setara Beras'], errors='coerce')
         return df_target_kancab
@@ -2122,6 +2118,33 @@ def main():
 
         st.success(f"✅ {selected_dataframe} dimuat: **{len(df_existing):,}** records")
 
+        # Storage: segment Parquet per sheet + compaction + export workbook
+        with st.expander("🗄️ Storage Data (segment Parquet)", expanded=False):
+            st.caption(f"Lokasi store: `{EXCEL_STORE.root}`. Setiap append menambah 1 segment; "
+                       f"compact otomatis saat segment > {EXCEL_STORE.compact_threshold}.")
+            st.dataframe(EXCEL_STORE.info(), use_container_width=True, hide_index=True)
+
+            col_compact, col_export = st.columns(2)
+            with col_compact:
+                if st.button("🗜️ Compact Segment", use_container_width=True):
+                    with st.spinner("Menggabungkan segment..."):
+                        compacted = EXCEL_STORE.compact()
+                    st.cache_data.clear()
+                    st.success("✅ Compact selesai: " + ", ".join(f"{sheet} ({count} → 1)" for sheet, count in compacted.items() if count > 1)
+                               if any(count > 1 for count in compacted.values()) else "✅ Semua sheet sudah 1 segment")
+            with col_export:
+                if st.button("📥 Export ke xlsx", use_container_width=True):
+                    with st.spinner("Membuat workbook..."):
+                        st.session_state.workbook_export = EXCEL_STORE.export_workbook()
+                if st.session_state.get('workbook_export'):
+                    st.download_button(
+                        label="💾 Download hasil_gabungan.xlsx",
+                        data=st.session_state.workbook_export,
+                        file_name="hasil_gabungan.xlsx",
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        use_container_width=True
+                    )
+
         # File upload section
         st.markdown("---")
         st.markdown('<h3 style="color: #1f497d;">📤 Upload File Excel</h3>', unsafe_allow_html=True)
@@ -2236,32 +2259,22 @@ def main():
                     st.markdown('<h4 style="color: #1f497d;">🔍 Analisis Duplikasi</h4>', unsafe_allow_html=True)
 
                     # Ensure both dataframes have same columns for comparison
-                    common_cols = list(set(df_existing.columns) & set(df_new.columns))
+                    common_cols = sorted(set(df_existing.columns) & set(df_new.columns))
 
                     # Progress bar untuk analisis duplikasi
                     dup_progress = st.progress(0, "🔍 Memulai analisis duplikasi...")
 
-                    # OPTIMIZED: Gunakan hash untuk perbandingan lebih cepat
-                    # Create hash dari semua kolom untuk setiap baris
-                    def create_row_hash(row):
-                        """Create hash dari semua nilai dalam row"""
-                        return hash(tuple(str(v) for v in row))
-
-                    dup_progress.progress(20, "📊 Membuat hash untuk data existing...")
-                    # Create hash untuk data existing
-                    df_existing_subset = df_existing[common_cols].copy()
-                    existing_hashes = set(
-                        df_existing_subset.apply(create_row_hash, axis=1)
-                    )
+                    # OPTIMIZED: hash data existing sudah tersimpan di segment store,
+                    # jadi hanya data baru yang di-hash (vectorized, tanpa apply per baris)
+                    dup_progress.progress(20, "📊 Membaca hash data existing...")
+                    existing_hashes = EXCEL_STORE.row_hashes(selected_sheet_name, common_cols)
 
                     dup_progress.progress(50, "🆕 Membuat hash untuk data baru...")
-                    # Create hash untuk data baru dan cek duplikasi
-                    df_new_subset = df_new[common_cols].copy()
-                    new_hashes = df_new_subset.apply(create_row_hash, axis=1)
+                    new_hashes = compute_row_hashes(prepare_segment(df_new), common_cols)
 
                     dup_progress.progress(75, "🔍 Mengidentifikasi data unik...")
                     # Identify unique rows (hash tidak ada di existing)
-                    unique_mask = ~new_hashes.isin(existing_hashes)
+                    unique_mask = ~np.isin(new_hashes, existing_hashes)
 
                     num_unique = unique_mask.sum()
                     num_duplicates = len(df_new) - num_unique
@@ -2289,60 +2302,13 @@ def main():
                                     # Progress bar untuk proses append
                                     append_progress = st.progress(0, "🔄 Memulai proses append...")
 
-                                    # Combine data
-                                    append_progress.progress(10, f"📊 Menggabungkan {len(df_existing):,} + {num_unique:,} records...")
-                                    df_combined = pd.concat([df_existing, df_unique], ignore_index=True)
-
-                                    # AGGRESSIVE data cleaning untuk prevent corruption
-                                    append_progress.progress(30, "🧹 Membersihkan data untuk Excel...")
-
-                                    # 1. Replace infinity values
-                                    df_combined = df_combined.replace([np.inf, -np.inf], np.nan)
-
-                                    # 2. Clean each column based on type
-                                    append_progress.progress(40, "🔧 Mengonversi tipe data...")
-                                    for col in df_combined.columns:
-                                        # Handle numeric columns
-                                        if pd.api.types.is_numeric_dtype(df_combined[col]):
-                                            df_combined[col] = df_combined[col].where(pd.notna(df_combined[col]), None)
-                                        # Handle datetime columns - convert to string
-                                        elif pd.api.types.is_datetime64_any_dtype(df_combined[col]):
-                                            df_combined[col] = df_combined[col].astype(str).replace('NaT', '')
-                                        # Handle object columns - convert all to string
-                                        elif df_combined[col].dtype == 'object':
-                                            df_combined[col] = df_combined[col].astype(str).replace('nan', '').replace('None', '')
-
-                                    # 3. Prepare all dataframes for saving
-                                    append_progress.progress(60, "📋 Menyiapkan semua sheet...")
-                                    # Update the selected dataframe
-                                    if selected_df_name == "df_realisasi":
-                                        df_to_save_export = df_combined
-                                        df_to_save_kanwil = df_target_kanwil
-                                        df_to_save_kancab = df_target_kancab
-                                    elif selected_df_name == "df_target_kanwil":
-                                        df_to_save_export = df_realisasi
-                                        df_to_save_kanwil = df_combined
-                                        df_to_save_kancab = df_target_kancab
-                                    else:  # df_target_kancab
-                                        df_to_save_export = df_realisasi
-                                        df_to_save_kanwil = df_target_kanwil
-                                        df_to_save_kancab = df_combined
-
-                                    # Clean all dataframes
-                                    for df_clean in [df_to_save_export, df_to_save_kanwil, df_to_save_kancab]:
-                                        df_clean.replace([np.inf, -np.inf], np.nan, inplace=True)
-                                        for col in df_clean.columns:
-                                            if df_clean[col].dtype == 'object':
-                                                df_clean[col] = df_clean[col].astype(str).replace('nan', '').replace('None', '')
-
-                                    # Save to Excel
-                                    output_file = "assets/hasil_gabungan.xlsx"
-                                    append_progress.progress(80, f"💾 Menyimpan ke {output_file}...")
-
-                                    with pd.ExcelWriter(output_file, engine='openpyxl', mode='w') as writer:
-                                        df_to_save_export.to_excel(writer, sheet_name='Export', index=False)
-                                        df_to_save_kanwil.to_excel(writer, sheet_name='Target Kanwil', index=False)
-                                        df_to_save_kancab.to_excel(writer, sheet_name='Target Kancab', index=False)
+                                    # Hanya data unik yang ditulis sebagai segment baru,
+                                    # data existing tidak ditulis ulang
+                                    append_progress.progress(30, f"🧹 Menyiapkan {num_unique:,} records baru...")
+                                    total_after = len(df_existing) + num_unique
+
+                                    append_progress.progress(60, f"💾 Menulis segment baru untuk sheet '{selected_sheet_name}'...")
+                                    segment = EXCEL_STORE.append(selected_sheet_name, df_unique, source=uploaded_file.name)
 
                                     append_progress.progress(100, "✅ Append selesai!")
                                     append_progress.empty()
@@ -2352,8 +2318,8 @@ def main():
                                     - Dataframe: **{selected_dataframe}**
                                     - Total data sebelumnya: **{len(df_existing):,}** records
                                     - Data unik ditambahkan: **{num_unique:,}** records
-                                    - Total data sekarang: **{len(df_combined):,}** records
-                                    - File disimpan: `{output_file}`
+                                    - Total data sekarang: **{total_after:,}** records
+                                    - Segment baru: `{segment['file']}`
                                     """)
 
                                     st.balloons()
@@ -2375,10 +2341,10 @@ def main():
                                     # Show problematic data info
                                     st.warning("Mencoba analisis data...")
                                     try:
-                                        st.write("Tipe data di df_combined:")
-                                        st.write(df_combined.dtypes)
+                                        st.write("Tipe data di df_unique:")
+                                        st.write(df_unique.dtypes)
                                         st.write("Info nilai NaN:")
-                                        st.write(df_combined.isna().sum())
+                                        st.write(df_unique.isna().sum())
                                     except:
                                         pass
                     else:
@@ -2428,37 +2394,9 @@ def main():
                                         except:
                                             pass
 
-                                # Prepare all dataframes for saving
-                                replace_progress.progress(60, "📋 Menyiapkan semua sheet...")
-                                # Update the selected dataframe
-                                if selected_df_name == "df_realisasi":
-                                    df_to_save_export = df_new_clean
-                                    df_to_save_kanwil = df_target_kanwil
-                                    df_to_save_kancab = df_target_kancab
-                                elif selected_df_name == "df_target_kanwil":
-                                    df_to_save_export = df_realisasi
-                                    df_to_save_kanwil = df_new_clean
-                                    df_to_save_kancab = df_target_kancab
-                                else:  # df_target_kancab
-                                    df_to_save_export = df_realisasi
-                                    df_to_save_kanwil = df_target_kanwil
-                                    df_to_save_kancab = df_new_clean
-
-                                # Clean all dataframes
-                                for df_clean in [df_to_save_export, df_to_save_kanwil, df_to_save_kancab]:
-                                    df_clean.replace([np.inf, -np.inf], np.nan, inplace=True)
-                                    for col in df_clean.columns:
-                                        if df_clean[col].dtype == 'object':
-                                            df_clean[col] = df_clean[col].astype(str).replace('nan', '').replace('None', '')
-
-                                # Save new data
-                                output_file = "assets/hasil_gabungan.xlsx"
-                                replace_progress.progress(80, f"💾 Menyimpan ke {output_file}...")
-
-                                with pd.ExcelWriter(output_file, engine='openpyxl', mode='w') as writer:
-                                    df_to_save_export.to_excel(writer, sheet_name='Export', index=False)
-                                    df_to_save_kanwil.to_excel(writer, sheet_name='Target Kanwil', index=False)
-                                    df_to_save_kancab.to_excel(writer, sheet_name='Target Kancab', index=False)
+                                # Hanya sheet yang dipilih yang ditulis ulang (1 segment baru)
+                                replace_progress.progress(80, f"💾 Menulis ulang sheet '{selected_sheet_name}'...")
+                                segment = EXCEL_STORE.replace(selected_sheet_name, df_new_clean, source=uploaded_file.name)
 
                                 replace_progress.progress(100, "✅ Replace selesai!")
                                 replace_progress.empty()
@@ -2468,7 +2406,7 @@ def main():
                                 - Dataframe: **{selected_dataframe}**
                                 - Data lama dihapus: **{len(df_existing):,}** records
                                 - Data baru disimpan: **{len(df_new):,}** records
-                                - File disimpan: `{output_file}`
+                                - Segment: `{segment['file']}`
                                 """)
 
                                 st.balloons()
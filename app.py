@@ -8,12 +8,32 @@ import openpyxl
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 import numpy as np
 import time
-from supabase import create_client, Client
 import sys
 from collections import defaultdict
 import json
 import traceback
 import hashlib
+from ingestion.dimensions import get_dimensions
+from ingestion.http_pool import create_pooled_client, pool_snapshot, reset_pool_metrics
+from ingestion.jobs import JobStore, UploadLedger, is_job_active, start_job_thread
+from ingestion.ledger import IDENTICAL, row_hashes
+from ingestion.records import REALISASI_DECIMAL_COLUMNS, decimal_values, map_unique
+from ingestion.delta import MAX_SCOPE_MONTHS, DeltaSyncIncomplete, DeltaSyncUnavailable, ScopeTooWide, scope_months
+from ingestion.scoped import ScopedReplaceUnavailable
+from ingestion.pipeline import (
+    TABLES,
+    load_mappings,
+    rollback_replace,
+    run_delta_sync,
+    run_replace,
+    run_scoped_replace,
+)
+from ingestion.shadow import previous_table_name, shadow_table_name
+from ingestion.sniff import SniffUnavailable, sheet_content_hash, sniff_workbook
+from ingestion.stats import ThroughputStats, summary_to_csv
+from kanwil_registry import LAINNYA, SENTRA, display_name, index_by_code, kanwil_codes, kanwil_options
+from rpc_profiler import PROFILER, profiled_rpc
+from rpc_columnar import ColumnarClient
 
 # Page configuration
 st.set_page_config(
@@ -162,8 +182,45 @@ except:
     st.info("Pastikan file .streamlit/secrets.toml sudah dikonfigurasi dengan benar")
     st.stop()
 
+# Service role key (opsional) untuk client bulk: RPC replace / delta / scoped / partisi
+# hanya di-grant ke service_role (shadow_swap_functions.sql dkk.)
+try:
+    SUPABASE_SERVICE_KEY = st.secrets["supabase"]["service_key"]
+except Exception:
+    SUPABASE_SERVICE_KEY = None
+
+# Koneksi PostgreSQL langsung (opsional): dipakai untuk COPY jika dikonfigurasi
+try:
+    DATABASE_URL = st.secrets["database"]["url"]
+except Exception:
+    DATABASE_URL = None
+
+# Override pool HTTP per profil dari [http.read] / [http.bulk] (opsional)
+try:
+    HTTP_POOL_OVERRIDES = {name: dict(values) for name, values in st.secrets["http"].items()}
+except Exception:
+    HTTP_POOL_OVERRIDES = None
+
+
+@st.cache_resource
+def get_supabase_clients(url, key, service_key=None):
+    """
+    Client Supabase dibuat sekali per proses (bukan setiap rerun) dan dipakai semua
+    session: "read" untuk dashboard, "bulk" untuk upload/migrasi. Pool HTTP terpisah
+    sehingga upload besar tidak membuat query dashboard mengantri. Client bulk memakai
+    service role key jika ada.
+    """
+    return (
+        create_pooled_client(url, key, profile='read', overrides=HTTP_POOL_OVERRIDES),
+        create_pooled_client(url, service_key or key, profile='bulk', overrides=HTTP_POOL_OVERRIDES),
+    )
+
+
 # Inisialisasi Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+supabase, supabase_bulk = get_supabase_clients(SUPABASE_URL, SUPABASE_KEY, SUPABASE_SERVICE_KEY)
+
+# Response RPC/tabel didecode langsung ke kolom DataFrame (COPY / CSV / JSON)
+columnar = ColumnarClient(supabase, database_url=DATABASE_URL)
 
 # ===== HELPER FUNCTIONS UNTUK MIGRASI DATA =====
 def clean_value(value):
@@ -216,7 +273,21 @@ def prepare_realisasi_for_db(df, kanwil_map, kancab_map):
     """Prepare dataframe realisasi untuk insert ke database"""
     data_to_insert = []
 
-    for idx, row in df.iterrows():
+    def column(name):
+        return df[name] if name in df.columns else pd.Series(None, index=df.index, dtype=object)
+
+    # Kolom desimal (dibaca sebagai str) diparse sekali per kolom, bukan Decimal per sel;
+    # kolom tanggal cukup dikonversi sekali per nilai unik
+    decimals = {
+        db_col: decimal_values(column(excel_col), {}, excel_col)
+        for db_col, excel_col in REALISASI_DECIMAL_COLUMNS.items()
+    }
+    dates = {
+        excel_col: map_unique(column(excel_col), convert_to_date)
+        for excel_col in ('Tanggal PO', 'Tanggal Penerimaan', 'Tanggal Kirim Keuangan')
+    }
+
+    for pos, (idx, row) in enumerate(df.iterrows()):
         # Map nama ke ID
         kanwil_name = clean_value(row.get('kanwil'))
         kancab_name = clean_value(row.get('Entitas'))
@@ -231,25 +302,25 @@ def prepare_realisasi_for_db(df, kanwil_map, kancab_map):
             "lokasi_persediaan": clean_value(row.get('Lokasi Persediaan')),
             "id_pemasok": convert_to_int(row.get('No. ID Pemasok')),
             "nama_pemasok": clean_value(row.get('Nama Pemasok')),
-            "tanggal_po": convert_to_date(row.get('Tanggal PO')),
+            "tanggal_po": dates['Tanggal PO'][pos],
             "nomor_po": clean_value(row.get('Nomor PO')),
             "produk": clean_value(row.get('Produk')),
             "no_jurnal": clean_value(row.get('No Jurnal')),
             "no_in_out": clean_value(row.get('Nomor IN / OUT')),
-            "tanggal_penerimaan": convert_to_date(row.get('Tanggal Penerimaan')),
+            "tanggal_penerimaan": dates['Tanggal Penerimaan'][pos],
             "komoditi": clean_value(row.get('Komoditi')),
             "spesifikasi": clean_value(row.get('spesifikasi')),
             "tahun_stok": convert_to_int(row.get('Tahun Stok')),
-            "tanggal_kirim_keuangan": convert_to_date(row.get('Tanggal Kirim Keuangan')),
+            "tanggal_kirim_keuangan": dates['Tanggal Kirim Keuangan'][pos],
             "jenis_transaksi": clean_value(row.get('Jenis Transaksi')),
             "akun_analitik": clean_value(row.get('Akun Analitik')),
             "jenis_pengadaan": clean_value(row.get('Jenis Pengadaan')),
             "satuan": clean_value(row.get('Satuan')),
             "uom_po": clean_value(row.get('uom_po')),
-            "kuantum_po_kg": float(convert_to_decimal(row.get('Kuantum PO (Kg)'))) if convert_to_decimal(row.get('Kuantum PO (Kg)')) else None,
-            "qty_in_out": float(convert_to_decimal(row.get('In / Out'))) if convert_to_decimal(row.get('In / Out')) else None,
-            "harga_include_ppn": float(convert_to_decimal(row.get('Harga Include ppn'))) if convert_to_decimal(row.get('Harga Include ppn')) else None,
-            "nominal_realisasi_incl_ppn": float(convert_to_decimal(row.get('Nominal Realisasi Incl ppn'))) if convert_to_decimal(row.get('Nominal Realisasi Incl ppn')) else None,
+            "kuantum_po_kg": decimals['kuantum_po_kg'][pos] or None,
+            "qty_in_out": decimals['qty_in_out'][pos] or None,
+            "harga_include_ppn": decimals['harga_include_ppn'][pos] or None,
+            "nominal_realisasi_incl_ppn": decimals['nominal_realisasi_incl_ppn'][pos] or None,
             "status": clean_value(row.get('Status'))
         }
 
@@ -323,87 +394,63 @@ def load_all_realisasi_from_db_with_progress(supabase):
         print("[WARNING] Table is empty")
         return pd.DataFrame(), {}, {}
 
-    # Step 2: Load kanwil and kancab mappings
+    # Step 2: Kanwil & Kancab dari cache dimensi (tidak dimuat ulang jika tabel tidak berubah)
     st.info("🔄 Step 2: Loading mapping Kanwil & Kancab...")
-    kanwil_map = {}  # nama_kanwil -> kanwil_id (untuk prepare function)
-    kancab_map = {}  # nama_kancab -> kancab_id (untuk prepare function)
-    kanwil_id_to_name = {}  # kanwil_id -> nama_kanwil (untuk add columns to df)
-    kancab_id_to_name = {}  # kancab_id -> nama_kancab (untuk add columns to df)
-
-    kanwil_result = supabase.table('kanwil').select('*').execute()
-    for kw in kanwil_result.data:
-        kanwil_map[kw['nama_kanwil']] = kw['kanwil_id']  # nama -> id
-        kanwil_id_to_name[kw['kanwil_id']] = kw['nama_kanwil']  # id -> nama
-
-    kancab_result = supabase.table('kancab').select('*').execute()
-    for kc in kancab_result.data:
-        kancab_map[kc['nama_kancab']] = kc['kancab_id']  # nama -> id
-        kancab_id_to_name[kc['kancab_id']] = kc['nama_kancab']  # id -> nama
+    dimensions = get_dimensions(supabase)
+    kanwil_map = dimensions.kanwil  # nama_kanwil -> kanwil_id (untuk prepare function)
+    kancab_map = dimensions.kancab  # nama_kancab -> kancab_id (untuk prepare function)
 
     st.success(f"✅ Loaded {len(kanwil_map)} Kanwil & {len(kancab_map)} Kancab mappings")
     print(f"[STEP 2] Loaded {len(kanwil_map)} Kanwil & {len(kancab_map)} Kancab mappings")
 
-    # Step 3: Load data per 1000 rows
-    st.info("🔄 Step 3: Loading data dari database per 1000 baris...")
+    # Step 3: Load data per 1000 rows (CSV per halaman, atau 1x COPY jika koneksi langsung tersedia)
+    st.info(f"🔄 Step 3: Loading data dari database (transport: {columnar.transport()})...")
     batch_size = 1000
     total_batches = (total_records + batch_size - 1) // batch_size
 
-    print(f"[STEP 3] Will load {total_batches} batches of {batch_size} records each")
+    print(f"[STEP 3] Will load {total_batches} batches of {batch_size} records each via {columnar.transport()}")
     print("-" * 80)
 
-    all_data = []
     progress_bar = st.progress(0, f"Loading batch 1/{total_batches}...")
 
     # Create placeholder for real-time updates
     status_placeholder = st.empty()
+    batch_state = {'num': 0, 'start': time.time()}
 
-    for batch_num in range(total_batches):
-        batch_start = time.time()
-        offset = batch_num * batch_size
-
-        # Fetch batch
-        result = supabase.table('realisasi')\
-            .select('*')\
-            .range(offset, offset + batch_size - 1)\
-            .execute()
-
-        # Add to list
-        batch_count = len(result.data)
-        all_data.extend(result.data)
-
-        batch_elapsed = time.time() - batch_start
+    def on_page(rows_loaded):
+        batch_state['num'] += 1
+        batch_elapsed = time.time() - batch_state['start']
+        batch_state['start'] = time.time()
 
         # Update progress
-        progress = ((batch_num + 1) / total_batches)
+        progress = min(rows_loaded / total_records, 1.0)
         progress_bar.progress(
             progress,
-            f"Loading batch {batch_num + 1}/{total_batches} - {len(all_data):,}/{total_records:,} records"
+            f"Loading batch {batch_state['num']}/{total_batches} - {rows_loaded:,}/{total_records:,} records"
         )
 
         # Print to console
-        print(f"[BATCH {batch_num + 1}/{total_batches}] Loaded {batch_count:,} records (offset {offset:,}) - "
-              f"Total so far: {len(all_data):,}/{total_records:,} ({progress*100:.1f}%) - "
-              f"Time: {batch_elapsed:.2f}s")
+        print(f"[BATCH {batch_state['num']}/{total_batches}] Total so far: {rows_loaded:,}/{total_records:,} "
+              f"({progress*100:.1f}%) - Time: {batch_elapsed:.2f}s")
 
         # Update status
-        status_placeholder.info(f"📊 Loaded {len(all_data):,} / {total_records:,} records ({progress*100:.1f}%)")
+        status_placeholder.info(f"📊 Loaded {rows_loaded:,} / {total_records:,} records ({progress*100:.1f}%)")
+
+    # Step 4: Kolom langsung dibangun dari CSV (tanpa list of dict per baris)
+    df = columnar.table_frame('realisasi', page_size=batch_size, progress_callback=on_page)
 
     progress_bar.empty()
     status_placeholder.empty()
 
     print("-" * 80)
-    print(f"[STEP 3 COMPLETE] Total records loaded: {len(all_data):,}")
+    print(f"[STEP 3 COMPLETE] Total records loaded: {len(df):,}")
 
-    # Step 4: Convert to DataFrame and add nama columns
-    st.info("🔄 Step 4: Converting ke DataFrame dan menambahkan nama_kanwil & nama_kancab...")
-    print("[STEP 4] Converting to DataFrame...")
-
-    df = pd.DataFrame(all_data)
+    st.info("🔄 Step 4: Menambahkan nama_kanwil & nama_kancab...")
     print(f"[STEP 4] DataFrame created with shape: {df.shape}")
 
     # Add nama_kanwil and nama_kancab columns (using id -> nama mapping)
-    df['nama_kanwil'] = df['kanwil_id'].map(kanwil_id_to_name)
-    df['nama_kancab'] = df['kancab_id'].map(kancab_id_to_name)
+    df['nama_kanwil'] = df['kanwil_id'].map(dimensions.series('kanwil_names'))
+    df['nama_kancab'] = df['kancab_id'].map(dimensions.series('kancab_names'))
 
     print(f"[STEP 4] Added nama_kanwil and nama_kancab columns")
     print(f"[STEP 4] Final DataFrame columns: {df.columns.tolist()}")
@@ -453,7 +500,7 @@ def find_unique_records(df_db, df_new, kanwil_map, kancab_map):
     df_new_keys = df_new_prepared.copy()
     df_new_keys['nomor_po'] = df_new_prepared['Nomor PO'].apply(clean_value)
     df_new_keys['no_in_out'] = df_new_prepared['Nomor IN / OUT'].apply(clean_value)
-    df_new_keys['tanggal_penerimaan'] = df_new_prepared['Tanggal Penerimaan'].apply(convert_to_date)
+    df_new_keys['tanggal_penerimaan'] = map_unique(df_new_prepared['Tanggal Penerimaan'], convert_to_date)
     df_new_keys['komoditi'] = df_new_prepared['Komoditi'].apply(clean_value)
     df_new_keys['spesifikasi'] = df_new_prepared['spesifikasi'].apply(clean_value)
 
@@ -483,7 +530,7 @@ def find_unique_records(df_db, df_new, kanwil_map, kancab_map):
                 except:
                     return str(val)
 
-        df_db_cleaned['tanggal_penerimaan'] = df_db['tanggal_penerimaan'].apply(normalize_date)
+        df_db_cleaned['tanggal_penerimaan'] = map_unique(df_db['tanggal_penerimaan'], normalize_date)
         df_db_cleaned['komoditi'] = df_db['komoditi'].apply(clean_value)
         df_db_cleaned['spesifikasi'] = df_db['spesifikasi'].apply(clean_value)
         # kanwil_id dan kancab_id sudah integer, tidak perlu clean
@@ -633,43 +680,6 @@ def truncate_table_realisasi(supabase):
 
 # ===== FUNGSI ALGORITMA NEW COMPARISON (dari new_comparison_algorithm.py) =====
 
-def generate_row_hash(record):
-    """
-    Generate SHA256 hash from record data for duplicate detection.
-    Excludes auto-generated fields like id and created_at.
-    """
-    hash_data = {
-        'kanwil_id': record.get('kanwil_id'),
-        'kancab_id': record.get('kancab_id'),
-        'lokasi_persediaan': record.get('lokasi_persediaan'),
-        'id_pemasok': record.get('id_pemasok'),
-        'nama_pemasok': record.get('nama_pemasok'),
-        'tanggal_po': record.get('tanggal_po'),
-        'nomor_po': record.get('nomor_po'),
-        'produk': record.get('produk'),
-        'no_jurnal': record.get('no_jurnal'),
-        'no_in_out': record.get('no_in_out'),
-        'tanggal_penerimaan': record.get('tanggal_penerimaan'),
-        'komoditi': record.get('komoditi'),
-        'spesifikasi': record.get('spesifikasi'),
-        'tahun_stok': record.get('tahun_stok'),
-        'tanggal_kirim_keuangan': record.get('tanggal_kirim_keuangan'),
-        'jenis_transaksi': record.get('jenis_transaksi'),
-        'akun_analitik': record.get('akun_analitik'),
-        'jenis_pengadaan': record.get('jenis_pengadaan'),
-        'satuan': record.get('satuan'),
-        'uom_po': record.get('uom_po'),
-        'kuantum_po_kg': record.get('kuantum_po_kg'),
-        'qty_in_out': record.get('qty_in_out'),
-        'harga_include_ppn': record.get('harga_include_ppn'),
-        'nominal_realisasi_incl_ppn': record.get('nominal_realisasi_incl_ppn'),
-        'status': record.get('status'),
-    }
-
-    json_string = json.dumps(hash_data, sort_keys=True, default=str)
-    return hashlib.sha256(json_string.encode()).hexdigest()
-
-
 def add_log(message, level="info"):
     """Add log message to session state for persistent logging"""
     if 'process_logs' not in st.session_state:
@@ -685,1102 +695,227 @@ def add_log(message, level="info"):
     st.session_state.process_logs.append(log_entry)
 
 
-def migrate_to_realisasi_compare_streamlit(supabase, df, kanwil_mapping, kancab_mapping, kancab_column='Entitas'):
-    """
-    Migrate data from DataFrame to realisasi_compare table (Streamlit version).
-    Returns: total_inserted, skipped_kanwil, skipped_kancab
-
-    Parameters:
-    - kancab_column: Nama kolom kancab di Excel ('Entitas' untuk Realisasi, 'kancab' untuk Target Kancab)
-    """
-    add_log("📥 Starting Migration to realisasi_compare...", "info")
-    st.info("📥 Starting Migration to realisasi_compare...")
-
-    # Clear table first
-    add_log("🗑️ Clearing realisasi_compare table...", "warning")
-    st.warning("🗑️  Clearing realisasi_compare table...")
-    try:
-        truncate_table_with_reset(supabase, "realisasi_compare")
-        add_log("✅ realisasi_compare table cleared successfully", "success")
-    except Exception as e:
-        add_log(f"❌ Error clearing table: {e}", "error")
-        st.error(f"❌ Error clearing table: {e}")
-
-    # Migrate data
-    add_log(f"📥 Migrating {len(df):,} records to realisasi_compare...", "info")
-    st.info("📥 Migrating data to realisasi_compare...")
-    realisasi_compare_data = []
-    batch_size = 1000
-    total_inserted = 0
-    skipped_kanwil = 0
-    skipped_kancab = 0
-
-    progress_bar = st.progress(0, "Processing records...")
-
-    for idx, row in df.iterrows():
-        try:
-            kanwil_name = str(row['kanwil']) if pd.notna(row['kanwil']) else None
-            kancab_name = str(row[kancab_column]) if pd.notna(row.get(kancab_column)) else None
-
-            kanwil_id = kanwil_mapping.get(kanwil_name)
-            kancab_id = kancab_mapping.get((kanwil_name, kancab_name))
-
-            if not kanwil_id:
-                skipped_kanwil += 1
-            if not kancab_id and kancab_name:
-                skipped_kancab += 1
-
-            tanggal_po = pd.to_datetime(row['Tanggal PO']).date() if pd.notna(row['Tanggal PO']) else None
-            tanggal_penerimaan = pd.to_datetime(row['Tanggal Penerimaan']).date() if pd.notna(row['Tanggal Penerimaan']) else None
-            tanggal_kirim = pd.to_datetime(row['Tanggal Kirim Keuangan']).date() if pd.notna(row['Tanggal Kirim Keuangan']) else None
-
-            record = {
-                'kanwil_id': kanwil_id,
-                'kancab_id': kancab_id,
-                'lokasi_persediaan': str(row['Lokasi Persediaan']) if pd.notna(row['Lokasi Persediaan']) else None,
-                'id_pemasok': int(row['No. ID Pemasok']) if pd.notna(row['No. ID Pemasok']) else None,
-                'nama_pemasok': str(row['Nama Pemasok']) if pd.notna(row['Nama Pemasok']) else None,
-                'tanggal_po': tanggal_po.isoformat() if tanggal_po else None,
-                'nomor_po': str(row['Nomor PO']) if pd.notna(row['Nomor PO']) else None,
-                'produk': str(row['Produk']) if pd.notna(row['Produk']) else None,
-                'no_jurnal': str(row['No Jurnal']) if pd.notna(row['No Jurnal']) else None,
-                'no_in_out': str(row['Nomor IN / OUT']) if pd.notna(row['Nomor IN / OUT']) else None,
-                'tanggal_penerimaan': tanggal_penerimaan.isoformat() if tanggal_penerimaan else None,
-                'komoditi': str(row['Komoditi']) if pd.notna(row['Komoditi']) else None,
-                'spesifikasi': str(row['spesifikasi']) if pd.notna(row['spesifikasi']) else None,
-                'tahun_stok': int(row['Tahun Stok']) if pd.notna(row['Tahun Stok']) else None,
-                'tanggal_kirim_keuangan': tanggal_kirim.isoformat() if tanggal_kirim else None,
-                'jenis_transaksi': str(row['Jenis Transaksi']) if pd.notna(row['Jenis Transaksi']) else None,
-                'akun_analitik': str(row['Akun Analitik']) if pd.notna(row['Akun Analitik']) else None,
-                'jenis_pengadaan': str(row['Jenis Pengadaan']) if pd.notna(row['Jenis Pengadaan']) else None,
-                'satuan': str(row['Satuan']) if pd.notna(row['Satuan']) else None,
-                'uom_po': str(row['uom_po']) if pd.notna(row['uom_po']) else None,
-                'kuantum_po_kg': float(row['Kuantum PO (Kg)']) if pd.notna(row['Kuantum PO (Kg)']) else None,
-                'qty_in_out': float(row['In / Out']) if pd.notna(row['In / Out']) else None,
-                'harga_include_ppn': float(row['Harga Include ppn']) if pd.notna(row['Harga Include ppn']) else None,
-                'nominal_realisasi_incl_ppn': float(row['Nominal Realisasi Incl ppn']) if pd.notna(row['Nominal Realisasi Incl ppn']) else None,
-                'status': str(row['Status']) if pd.notna(row['Status']) else None,
-            }
-
-            record['row_hash'] = generate_row_hash(record)
-            realisasi_compare_data.append(record)
-
-            if len(realisasi_compare_data) >= batch_size:
-                supabase.table('realisasi_compare').insert(realisasi_compare_data).execute()
-                total_inserted += len(realisasi_compare_data)
-                progress = (idx + 1) / len(df) * 100
-                add_log(f"✅ Batch inserted: {total_inserted:,} records ({progress:.1f}%)", "success")
-                progress_bar.progress(int(progress) / 100, f"Inserted {total_inserted:,} records...")
-                realisasi_compare_data = []
-
-        except Exception as e:
-            add_log(f"⚠️ Error at row {idx}: {e}", "warning")
-            st.warning(f"⚠️  Error at row {idx}: {e}")
-            continue
-
-    if realisasi_compare_data:
-        supabase.table('realisasi_compare').insert(realisasi_compare_data).execute()
-        total_inserted += len(realisasi_compare_data)
-        add_log(f"✅ Final batch inserted: {total_inserted:,} total records", "success")
-
-    progress_bar.progress(100, "✅ Migration completed")
-    progress_bar.empty()
-
-    add_log(f"📊 Migration Summary - Inserted: {total_inserted:,}, Skipped Kanwil: {skipped_kanwil:,}, Skipped Kancab: {skipped_kancab:,}", "success")
-    st.success(f"""
-    📊 Migration Summary:
-    - Total records inserted: **{total_inserted:,}**
-    - Skipped (kanwil not found): **{skipped_kanwil:,}**
-    - Skipped (kancab not found): **{skipped_kancab:,}**
-    """)
-
-    return total_inserted, skipped_kanwil, skipped_kancab
-
-
-def migrate_to_realisasi_direct_streamlit(supabase, df, kanwil_mapping, kancab_mapping, kancab_column='Entitas'):
-    """
-    Migrate data from DataFrame directly to realisasi table (REPLACE MODE - Streamlit version).
-    Returns: total_inserted, skipped_kanwil, skipped_kancab
-
-    Parameters:
-    - kancab_column: Nama kolom kancab di Excel ('Entitas' untuk Realisasi, 'kancab' untuk Target Kancab)
-    """
-    add_log("📥 Starting Direct Migration to realisasi (REPLACE MODE)...", "warning")
-    st.warning("📥 Starting Direct Migration to realisasi (REPLACE MODE)...")
-
-    # Reset realisasi table
-    add_log("🗑️ Resetting realisasi table and sequence...", "warning")
-    st.info("🗑️  Resetting realisasi table...")
-    if not truncate_table_with_reset(supabase, "realisasi"):
-        add_log("❌ Failed to reset realisasi table. Aborting.", "error")
-        st.error("❌ Failed to reset realisasi table. Aborting.")
-        return 0, 0, 0
-    add_log("✅ realisasi table reset successfully", "success")
-
-    # Migrate data
-    add_log(f"📥 Migrating {len(df):,} records to realisasi...", "info")
-    st.info("📥 Migrating data to realisasi...")
-    realisasi_data = []
-    batch_size = 1000
-    total_inserted = 0
-    skipped_kanwil = 0
-    skipped_kancab = 0
-
-    progress_bar = st.progress(0, "Processing records...")
-
-    for idx, row in df.iterrows():
-        try:
-            kanwil_name = str(row['kanwil']) if pd.notna(row['kanwil']) else None
-            kancab_name = str(row[kancab_column]) if pd.notna(row.get(kancab_column)) else None
-
-            kanwil_id = kanwil_mapping.get(kanwil_name)
-            kancab_id = kancab_mapping.get((kanwil_name, kancab_name))
-
-            if not kanwil_id:
-                skipped_kanwil += 1
-            if not kancab_id and kancab_name:
-                skipped_kancab += 1
-
-            tanggal_po = pd.to_datetime(row['Tanggal PO']).date() if pd.notna(row['Tanggal PO']) else None
-            tanggal_penerimaan = pd.to_datetime(row['Tanggal Penerimaan']).date() if pd.notna(row['Tanggal Penerimaan']) else None
-            tanggal_kirim = pd.to_datetime(row['Tanggal Kirim Keuangan']).date() if pd.notna(row['Tanggal Kirim Keuangan']) else None
-
-            record = {
-                'kanwil_id': kanwil_id,
-                'kancab_id': kancab_id,
-                'lokasi_persediaan': str(row['Lokasi Persediaan']) if pd.notna(row['Lokasi Persediaan']) else None,
-                'id_pemasok': int(row['No. ID Pemasok']) if pd.notna(row['No. ID Pemasok']) else None,
-                'nama_pemasok': str(row['Nama Pemasok']) if pd.notna(row['Nama Pemasok']) else None,
-                'tanggal_po': tanggal_po.isoformat() if tanggal_po else None,
-                'nomor_po': str(row['Nomor PO']) if pd.notna(row['Nomor PO']) else None,
-                'produk': str(row['Produk']) if pd.notna(row['Produk']) else None,
-                'no_jurnal': str(row['No Jurnal']) if pd.notna(row['No Jurnal']) else None,
-                'no_in_out': str(row['Nomor IN / OUT']) if pd.notna(row['Nomor IN / OUT']) else None,
-                'tanggal_penerimaan': tanggal_penerimaan.isoformat() if tanggal_penerimaan else None,
-                'komoditi': str(row['Komoditi']) if pd.notna(row['Komoditi']) else None,
-                'spesifikasi': str(row['spesifikasi']) if pd.notna(row['spesifikasi']) else None,
-                'tahun_stok': int(row['Tahun Stok']) if pd.notna(row['Tahun Stok']) else None,
-                'tanggal_kirim_keuangan': tanggal_kirim.isoformat() if tanggal_kirim else None,
-                'jenis_transaksi': str(row['Jenis Transaksi']) if pd.notna(row['Jenis Transaksi']) else None,
-                'akun_analitik': str(row['Akun Analitik']) if pd.notna(row['Akun Analitik']) else None,
-                'jenis_pengadaan': str(row['Jenis Pengadaan']) if pd.notna(row['Jenis Pengadaan']) else None,
-                'satuan': str(row['Satuan']) if pd.notna(row['Satuan']) else None,
-                'uom_po': str(row['uom_po']) if pd.notna(row['uom_po']) else None,
-                'kuantum_po_kg': float(row['Kuantum PO (Kg)']) if pd.notna(row['Kuantum PO (Kg)']) else None,
-                'qty_in_out': float(row['In / Out']) if pd.notna(row['In / Out']) else None,
-                'harga_include_ppn': float(row['Harga Include ppn']) if pd.notna(row['Harga Include ppn']) else None,
-                'nominal_realisasi_incl_ppn': float(row['Nominal Realisasi Incl ppn']) if pd.notna(row['Nominal Realisasi Incl ppn']) else None,
-                'status': str(row['Status']) if pd.notna(row['Status']) else None,
-            }
-
-            record['row_hash'] = generate_row_hash(record)
-            realisasi_data.append(record)
-
-            if len(realisasi_data) >= batch_size:
-                supabase.table('realisasi').insert(realisasi_data).execute()
-                total_inserted += len(realisasi_data)
-                progress = (idx + 1) / len(df) * 100
-                add_log(f"✅ Batch inserted to realisasi: {total_inserted:,} records ({progress:.1f}%)", "success")
-                progress_bar.progress(int(progress) / 100, f"Inserted {total_inserted:,} records...")
-                realisasi_data = []
-
-        except Exception as e:
-            add_log(f"⚠️ Error at row {idx}: {e}", "warning")
-            st.warning(f"⚠️  Error at row {idx}: {e}")
-            continue
-
-    if realisasi_data:
-        supabase.table('realisasi').insert(realisasi_data).execute()
-        total_inserted += len(realisasi_data)
-        add_log(f"✅ Final batch inserted to realisasi: {total_inserted:,} total records", "success")
-
-    progress_bar.progress(100, "✅ Migration completed")
-    progress_bar.empty()
-
-    add_log(f"📊 REPLACE MODE Summary - Inserted: {total_inserted:,}, Skipped Kanwil: {skipped_kanwil:,}, Skipped Kancab: {skipped_kancab:,}", "success")
-    st.success(f"""
-    📊 Migration Summary (REPLACE MODE):
-    - Total records inserted: **{total_inserted:,}**
-    - Skipped (kanwil not found): **{skipped_kanwil:,}**
-    - Skipped (kancab not found): **{skipped_kancab:,}**
-    """)
-
-    return total_inserted, skipped_kanwil, skipped_kancab
-
-
-def fetch_with_retry_streamlit(supabase, last_id, limit, max_retries=3, retry_delay=2, retries=0):
-    """
-    Fetch data from RPC with automatic retry on timeout (Streamlit version).
-    Implements exponential backoff retry strategy.
-    """
-    try:
-        res = supabase.rpc(
-            "get_realisasi_compare_not_exists_page",
-            {"p_last_id": last_id, "p_limit": limit}
-        ).execute()
-        return res.data
-    except Exception as e:
-        if retries < max_retries:
-            delay = retry_delay * (2 ** retries)  # Exponential backoff
-            add_log(f"⚠️ Error pada last_id={last_id}, retry ke-{retries + 1}/{max_retries} - waiting {delay}s", "warning")
-            st.warning(f"⚠️  Error pada last_id={last_id}, retry ke-{retries + 1}/{max_retries}")
-            st.info(f"⏳ Waiting {delay} seconds before retry...")
-            time.sleep(delay)
-            return fetch_with_retry_streamlit(supabase, last_id, limit, max_retries, retry_delay, retries + 1)
-        else:
-            add_log(f"❌ Gagal setelah {max_retries} retry pada last_id={last_id}: {e}", "error")
-            st.error(f"❌ Gagal setelah {max_retries} retry pada last_id={last_id}: {e}")
-            raise e
-
-
-def process_comparison_with_rpc_streamlit(supabase):
-    """
-    Process comparison using RPC get_realisasi_compare_not_exists_page (Streamlit version).
-    Returns list of IDs that don't exist in realisasi table.
-    """
-    add_log("🔍 Step 2: Starting RPC comparison process...", "info")
-    st.info("🔍 Step 2: Comparing data with database using RPC...")
-
-    # Configuration
-    max_retries = 3
-    retry_delay = 2
-    limit = 1000
-
-    # Get total rows
-    try:
-        result = supabase.table("realisasi_compare").select("id", count="exact").limit(1).execute()
-        total_rows = result.count
-        add_log(f"📊 Total rows in realisasi_compare: {total_rows:,}", "info")
-    except Exception as e:
-        add_log(f"❌ Error getting total rows: {e}", "error")
-        st.error(f"Error getting total rows: {e}")
-        return []
-
-    # Get min ID
-    try:
-        res = supabase.table("realisasi_compare").select("id").order("id", desc=False).limit(1).execute()
-        min_id = res.data[0]["id"] if res.data else 0
-        add_log(f"🔢 Starting from ID: {min_id}", "info")
-    except Exception as e:
-        add_log(f"❌ Error getting min id: {e}", "error")
-        st.error(f"Error getting min id: {e}")
-        return []
-
-    if total_rows is None or total_rows == 0:
-        add_log("📊 No data in realisasi_compare to process", "info")
-        st.info("📊 No data in realisasi_compare to process")
-        return []
-
-    st.info(f"📊 Total rows in realisasi_compare: **{total_rows:,}**")
-    st.info(f"🔢 Starting from ID: **{min_id}**")
-
-    last_id = min_id
-    processed_count = 0
-    all_results = []
-
-    progress_bar = st.progress(0, "Comparing data...")
-
-    while True:
-        try:
-            # Call RPC with retry mechanism
-            data = fetch_with_retry_streamlit(supabase, last_id, limit, max_retries, retry_delay)
-
-            if data and len(data) > 0:
-                all_results.extend(data)
-                processed_count += len(data)
-                last_id = max([row['realisasi_compare_id'] for row in data])
-
-                progress = (processed_count / total_rows) * 100 if total_rows > 0 else 0
-                add_log(f"✅ RPC batch: {len(data)} records found - Total unique: {len(all_results):,} ({progress:.1f}%)", "success")
-                progress_bar.progress(min(int(progress) / 100, 0.99), f"Progress: {processed_count:,}/{total_rows:,} ({progress:.1f}%)")
-            else:
-                # Empty result
-                if last_id >= (min_id + total_rows):
-                    add_log(f"✅ Reached end of data at last_id={last_id}", "success")
-                    st.info(f"✅ Reached end of data at last_id={last_id}")
-                    break
-
-                # Try advancing last_id
-                last_id += limit
-                add_log(f"🔍 Empty batch, advancing to last_id={last_id}", "info")
-
-                # Safety check to avoid infinite loop
-                if last_id > (min_id + total_rows + limit * 10):
-                    add_log("⚠️ Exceeded maximum range, stopping iteration", "warning")
-                    st.warning("⚠️  Exceeded maximum range, stopping iteration")
-                    break
-
-        except Exception as e:
-            add_log(f"❌ Fatal error that couldn't be retried: {e}", "error")
-            st.error(f"❌ Fatal error that couldn't be retried: {e}")
-            with st.expander("🔍 Error Details"):
-                st.code(str(e))
-            break
-
-        time.sleep(0.2)  # Rate limiting
-
-    progress_bar.progress(100, "✅ Comparison completed")
-    progress_bar.empty()
-
-    add_log(f"📊 RPC Comparison Complete - Found {len(all_results):,} unique records to migrate", "success")
-    st.success(f"✅ Found **{len(all_results):,}** unique records to migrate")
-
-    return all_results
-
-
-def migrate_from_compare_to_realisasi_streamlit(supabase, comparison_results):
+def render_job_telemetry(job_id, telemetry):
     """
-    Migrate data from realisasi_compare to realisasi based on comparison results (Streamlit version).
-    Returns: migrated_count
+    Chart telemetry job: durasi per fase (Excel parsing, hashing, network, compare server)
+    dan latency setiap batch, plus download JSON/CSV.
     """
-    if not comparison_results:
-        add_log("ℹ️ No data to migrate", "info")
-        st.info("ℹ️  No data to migrate")
-        return 0
-
-    add_log(f"📥 Step 3: Starting migration of {len(comparison_results):,} records to realisasi...", "info")
-    st.info(f"📥 Step 3: Migrating {len(comparison_results):,} records to realisasi...")
-
-    ids_to_migrate = [r['realisasi_compare_id'] for r in comparison_results]
-    batch_size = 1000
-    migrated_count = 0
-    total_batches = (len(ids_to_migrate) + batch_size - 1) // batch_size
-
-    progress_bar = st.progress(0, "Migrating data...")
-
-    for i in range(0, len(ids_to_migrate), batch_size):
-        batch_ids = ids_to_migrate[i:i + batch_size]
-        batch_num = i // batch_size + 1
-
-        try:
-            # Fetch from realisasi_compare
-            response = supabase.table("realisasi_compare").select("*").in_("id", batch_ids).execute()
-            data_to_insert = response.data
-
-            if not data_to_insert:
-                continue
-
-            # Remove 'id' column
-            for row in data_to_insert:
-                if 'id' in row:
-                    del row['id']
-
-            # Insert to realisasi
-            supabase.table("realisasi").insert(data_to_insert).execute()
-            migrated_count += len(data_to_insert)
-
-            progress = (migrated_count / len(ids_to_migrate)) * 100
-            add_log(f"✅ Migration batch {batch_num}/{total_batches}: {len(data_to_insert)} records - Total: {migrated_count:,}/{len(ids_to_migrate):,} ({progress:.1f}%)", "success")
-            progress_bar.progress(int(progress) / 100, f"Migrated: {migrated_count:,}/{len(ids_to_migrate):,} ({progress:.1f}%)")
-
-            time.sleep(0.2)
-
-        except Exception as e:
-            add_log(f"❌ Error on batch {batch_num}: {e}", "error")
-            st.error(f"❌ Error on batch {batch_num}: {e}")
-            continue
-
-    progress_bar.progress(100, "✅ Migration completed")
-    progress_bar.empty()
-
-    add_log(f"📊 Migration Complete - Successfully migrated {migrated_count:,} records to realisasi", "success")
-    st.success(f"✅ Successfully migrated **{migrated_count:,}** records to realisasi")
-
-    return migrated_count
-
-
-# ===== FUNGSI ALGORITMA UNTUK TARGET_KANWIL =====
+    phases = telemetry.get('phases', {})
+    with st.expander("📈 Telemetry Job", expanded=True):
+        col1, col2 = st.columns(2)
+        with col1:
+            names = list(phases)
+            fig = go.Figure(go.Bar(
+                x=[phases[name]['seconds'] for name in names],
+                y=names,
+                orientation='h',
+                text=[f"{phases[name]['seconds']:.1f}s" for name in names],
+                marker_color='#1f497d',
+            ))
+            fig.update_layout(title="Durasi per Fase (detik)", height=300, margin=dict(l=10, r=10, t=40, b=10))
+            st.plotly_chart(fig, use_container_width=True)
+        with col2:
+            events = pd.DataFrame(telemetry.get('events', []))
+            fig = go.Figure()
+            if not events.empty:
+                for phase_name, group in events.groupby('phase', sort=False):
+                    fig.add_trace(go.Scatter(x=group['t'], y=group['latency_ms'], mode='markers', name=phase_name))
+            fig.update_layout(title="Latency per Batch (ms)", xaxis_title="detik sejak mulai", height=300,
+                              margin=dict(l=10, r=10, t=40, b=10))
+            st.plotly_chart(fig, use_container_width=True)
+
+        table = pd.DataFrame([
+            {
+                'Fase': name,
+                'Rows': entry['rows'],
+                'Detik': entry['seconds'],
+                'Rows/detik': entry['rows_per_second'],
+                'MB terkirim': round(entry['bytes_sent'] / 1_000_000, 2),
+                'Batch': entry['batches'],
+                'Retry': entry['retries'],
+                'p50 ms': entry['latency_p50_ms'],
+                'p95 ms': entry['latency_p95_ms'],
+                'p99 ms': entry['latency_p99_ms'],
+            }
+            for name, entry in phases.items()
+        ])
+        st.dataframe(table, use_container_width=True, hide_index=True)
 
-def generate_target_kanwil_hash(record):
-    """Generate SHA256 hash from target_kanwil record data for duplicate detection."""
-    hash_data = {
-        'kanwil_id': record.get('kanwil_id'),
-        'target_setara_beras': record.get('target_setara_beras'),
-    }
-    json_string = json.dumps(hash_data, sort_keys=True, default=str)
-    return hashlib.sha256(json_string.encode()).hexdigest()
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("📥 Download Telemetry (JSON)", data=json.dumps(telemetry, indent=2),
+                               file_name=f"telemetry_{job_id}.json", mime="application/json",
+                               key=f"telemetry_json_{job_id}", use_container_width=True)
+        with col2:
+            st.download_button("📥 Download Telemetry (CSV)", data=summary_to_csv(telemetry),
+                               file_name=f"telemetry_{job_id}.csv", mime="text/csv",
+                               key=f"telemetry_csv_{job_id}", use_container_width=True)
 
 
-def migrate_to_target_kanwil_compare_streamlit(supabase, df, kanwil_mapping):
+def running_append_job(job_store, table_name):
     """
-    Migrate data from DataFrame to target_kanwil_compare table (Streamlit version).
-    Returns: total_inserted, skipped_kanwil
+    Job append tabel ini yang thread-nya masih berjalan, atau None. Job tersebut memakai
+    <table>_compare, jadi mode lain yang men-stage ulang tabel compare harus menunggu.
     """
-    add_log("📥 Starting Migration to target_kanwil_compare...", "info")
-    st.info("📥 Starting Migration to target_kanwil_compare...")
+    running = [job for job in job_store.incomplete_jobs(table_name) if is_job_active(job['job_id'])]
+    return running[0] if running else None
 
-    # Clear table first
-    add_log("🗑️ Clearing target_kanwil_compare table...", "warning")
-    st.warning("🗑️  Clearing target_kanwil_compare table...")
-    try:
-        truncate_table_with_reset(supabase, "target_kanwil_compare")
-        add_log("✅ target_kanwil_compare table cleared successfully", "success")
-    except Exception as e:
-        add_log(f"❌ Error clearing table: {e}", "error")
-        st.error(f"❌ Error clearing table: {e}")
-
-    # Migrate data
-    add_log(f"📥 Migrating {len(df):,} records to target_kanwil_compare...", "info")
-    st.info("📥 Migrating data to target_kanwil_compare...")
-    target_kanwil_compare_data = []
-    batch_size = 1000
-    total_inserted = 0
-    skipped_kanwil = 0
-
-    progress_bar = st.progress(0, "Processing records...")
-
-    for idx, row in df.iterrows():
-        try:
-            kanwil_name = str(row['kanwil']) if pd.notna(row['kanwil']) else None
-            kanwil_id = kanwil_mapping.get(kanwil_name)
 
-            if not kanwil_id:
-                skipped_kanwil += 1
-                continue
-
-            # Use current date for database (but not for hash comparison)
-            import datetime
-            target_date = datetime.datetime.now().date()
-
-            record = {
-                'kanwil_id': kanwil_id,
-                'target_setara_beras': str(row['Target Setara Beras']) if pd.notna(row.get('Target Setara Beras')) else None,
-                'date': target_date.isoformat(),
-            }
-
-            record['row_hash'] = generate_target_kanwil_hash(record)
-            target_kanwil_compare_data.append(record)
-
-            if len(target_kanwil_compare_data) >= batch_size:
-                supabase.table('target_kanwil_compare').insert(target_kanwil_compare_data).execute()
-                total_inserted += len(target_kanwil_compare_data)
-                progress = (idx + 1) / len(df) * 100
-                add_log(f"✅ Batch inserted: {total_inserted:,} records ({progress:.1f}%)", "success")
-                progress_bar.progress(int(progress) / 100, f"Inserted {total_inserted:,} records...")
-                target_kanwil_compare_data = []
-
-        except Exception as e:
-            add_log(f"⚠️ Error at row {idx}: {e}", "warning")
-            st.warning(f"⚠️  Error at row {idx}: {e}")
-            continue
-
-    if target_kanwil_compare_data:
-        supabase.table('target_kanwil_compare').insert(target_kanwil_compare_data).execute()
-        total_inserted += len(target_kanwil_compare_data)
-        add_log(f"✅ Final batch inserted: {total_inserted:,} total records", "success")
-
-    progress_bar.progress(100, "✅ Migration completed")
-    progress_bar.empty()
-
-    add_log(f"📊 Migration Summary - Inserted: {total_inserted:,}, Skipped Kanwil: {skipped_kanwil:,}", "success")
-    st.success(f"""
-    📊 Migration Summary:
-    - Total records inserted: **{total_inserted:,}**
-    - Skipped (kanwil not found): **{skipped_kanwil:,}**
-    """)
-
-    return total_inserted, skipped_kanwil
-
-
-def migrate_to_target_kanwil_direct_streamlit(supabase, df, kanwil_mapping):
+def render_append_job(supabase, job_store, job_id):
     """
-    Migrate data from DataFrame directly to target_kanwil table (REPLACE MODE - Streamlit version).
-    Returns: total_inserted, skipped_kanwil
+    Tampilkan status job append (berjalan di background thread) dari JobStore.
+    Selama job berjalan halaman di-refresh otomatis; job gagal/terputus bisa dilanjutkan.
     """
-    add_log("📥 Starting Direct Migration to target_kanwil (REPLACE MODE)...", "warning")
-    st.warning("📥 Starting Direct Migration to target_kanwil (REPLACE MODE)...")
-
-    # Reset target_kanwil table
-    add_log("🗑️ Resetting target_kanwil table and sequence...", "warning")
-    st.info("🗑️  Resetting target_kanwil table...")
-    if not truncate_table_with_reset(supabase, "target_kanwil"):
-        add_log("❌ Failed to reset target_kanwil table. Aborting.", "error")
-        st.error("❌ Failed to reset target_kanwil table. Aborting.")
-        return 0, 0
-    add_log("✅ target_kanwil table reset successfully", "success")
-
-    # Migrate data
-    add_log(f"📥 Migrating {len(df):,} records to target_kanwil...", "info")
-    st.info("📥 Migrating data to target_kanwil...")
-    target_kanwil_data = []
-    batch_size = 1000
-    total_inserted = 0
-    skipped_kanwil = 0
-
-    progress_bar = st.progress(0, "Processing records...")
-
-    for idx, row in df.iterrows():
-        try:
-            kanwil_name = str(row['kanwil']) if pd.notna(row['kanwil']) else None
-            kanwil_id = kanwil_mapping.get(kanwil_name)
+    job = job_store.get_job(job_id)
 
-            if not kanwil_id:
-                skipped_kanwil += 1
-                continue
-
-            # Use current date for database
-            import datetime
-            target_date = datetime.datetime.now().date()
-
-            record = {
-                'kanwil_id': kanwil_id,
-                'target_setara_beras': str(row['Target Setara Beras']) if pd.notna(row.get('Target Setara Beras')) else None,
-                'date': target_date.isoformat(),
-            }
-
-            target_kanwil_data.append(record)
-
-            if len(target_kanwil_data) >= batch_size:
-                supabase.table('target_kanwil').insert(target_kanwil_data).execute()
-                total_inserted += len(target_kanwil_data)
-                progress = (idx + 1) / len(df) * 100
-                add_log(f"✅ Batch inserted to target_kanwil: {total_inserted:,} records ({progress:.1f}%)", "success")
-                progress_bar.progress(int(progress) / 100, f"Inserted {total_inserted:,} records...")
-                target_kanwil_data = []
-
-        except Exception as e:
-            add_log(f"⚠️ Error at row {idx}: {e}", "warning")
-            st.warning(f"⚠️  Error at row {idx}: {e}")
-            continue
-
-    if target_kanwil_data:
-        supabase.table('target_kanwil').insert(target_kanwil_data).execute()
-        total_inserted += len(target_kanwil_data)
-        add_log(f"✅ Final batch inserted to target_kanwil: {total_inserted:,} total records", "success")
-
-    progress_bar.progress(100, "✅ Migration completed")
-    progress_bar.empty()
-
-    add_log(f"📊 REPLACE MODE Summary - Inserted: {total_inserted:,}, Skipped Kanwil: {skipped_kanwil:,}", "success")
-    st.success(f"""
-    📊 Migration Summary (REPLACE MODE):
-    - Total records inserted: **{total_inserted:,}**
-    - Skipped (kanwil not found): **{skipped_kanwil:,}**
-    """)
-
-    return total_inserted, skipped_kanwil
-
-
-# ===== FUNGSI ALGORITMA UNTUK TARGET_KANCAB =====
-
-def generate_target_kancab_hash(record):
-    """Generate SHA256 hash from target_kancab record data for duplicate detection."""
-    hash_data = {
-        'kancab_id': record.get('kancab_id'),
-        'target_setara_beras': record.get('target_setara_beras'),
+    phase_labels = {
+        'stage': "📥 Step 1: Staging data ke tabel compare",
+        'compare': "🔍 Step 2-3: Compare via RPC + migrasi data unik (bersamaan)",
+        'migrate': "📤 Step 3: Migrasi ulang data unik yang gagal",
+        'cleanup': "🗑️ Step 4: Cleanup tabel compare",
+        'done': "✅ Selesai",
     }
-    json_string = json.dumps(hash_data, sort_keys=True, default=str)
-    return hashlib.sha256(json_string.encode()).hexdigest()
-
-
-def migrate_to_target_kancab_compare_streamlit(supabase, df, kancab_mapping):
-    """
-    Migrate data from DataFrame to target_kancab_compare table (Streamlit version).
-    Returns: total_inserted, skipped_kancab
-    """
-    add_log("📥 Starting Migration to target_kancab_compare...", "info")
-    st.info("📥 Starting Migration to target_kancab_compare...")
-
-    # Clear table first
-    add_log("🗑️ Clearing target_kancab_compare table...", "warning")
-    st.warning("🗑️  Clearing target_kancab_compare table...")
-    try:
-        truncate_table_with_reset(supabase, "target_kancab_compare")
-        add_log("✅ target_kancab_compare table cleared successfully", "success")
-    except Exception as e:
-        add_log(f"❌ Error clearing table: {e}", "error")
-        st.error(f"❌ Error clearing table: {e}")
-
-    # Migrate data
-    add_log(f"📥 Migrating {len(df):,} records to target_kancab_compare...", "info")
-    st.info("📥 Migrating data to target_kancab_compare...")
-    target_kancab_compare_data = []
-    batch_size = 1000
-    total_inserted = 0
-    skipped_kancab = 0
-
-    progress_bar = st.progress(0, "Processing records...")
-
-    for idx, row in df.iterrows():
-        try:
-            kancab_name = str(row['kancab']) if pd.notna(row['kancab']) else None
-            kancab_id = kancab_mapping.get(kancab_name)
-
-            if not kancab_id:
-                skipped_kancab += 1
-                continue
-
-            # Use current date for database (but not for hash comparison)
-            import datetime
-            target_date = datetime.datetime.now().date()
-
-            record = {
-                'kancab_id': kancab_id,
-                'target_setara_beras': str(row['Target Setara Beras']) if pd.notna(row.get('Target Setara Beras')) else None,
-                'date': target_date.isoformat(),
-            }
-
-            record['row_hash'] = generate_target_kancab_hash(record)
-            target_kancab_compare_data.append(record)
-
-            if len(target_kancab_compare_data) >= batch_size:
-                supabase.table('target_kancab_compare').insert(target_kancab_compare_data).execute()
-                total_inserted += len(target_kancab_compare_data)
-                progress = (idx + 1) / len(df) * 100
-                add_log(f"✅ Batch inserted: {total_inserted:,} records ({progress:.1f}%)", "success")
-                progress_bar.progress(int(progress) / 100, f"Inserted {total_inserted:,} records...")
-                target_kancab_compare_data = []
-
-        except Exception as e:
-            add_log(f"⚠️ Error at row {idx}: {e}", "warning")
-            st.warning(f"⚠️  Error at row {idx}: {e}")
-            continue
-
-    if target_kancab_compare_data:
-        supabase.table('target_kancab_compare').insert(target_kancab_compare_data).execute()
-        total_inserted += len(target_kancab_compare_data)
-        add_log(f"✅ Final batch inserted: {total_inserted:,} total records", "success")
-
-    progress_bar.progress(100, "✅ Migration completed")
-    progress_bar.empty()
-
-    add_log(f"📊 Migration Summary - Inserted: {total_inserted:,}, Skipped Kancab: {skipped_kancab:,}", "success")
-    st.success(f"""
-    📊 Migration Summary:
-    - Total records inserted: **{total_inserted:,}**
-    - Skipped (kancab not found): **{skipped_kancab:,}**
-    """)
-
-    return total_inserted, skipped_kancab
-
-
-def migrate_to_target_kancab_direct_streamlit(supabase, df, kancab_mapping):
-    """
-    Migrate data from DataFrame directly to target_kancab table (REPLACE MODE - Streamlit version).
-    Returns: total_inserted, skipped_kancab
-    """
-    add_log("📥 Starting Direct Migration to target_kancab (REPLACE MODE)...", "warning")
-    st.warning("📥 Starting Direct Migration to target_kancab (REPLACE MODE)...")
-
-    # Reset target_kancab table
-    add_log("🗑️ Resetting target_kancab table and sequence...", "warning")
-    st.info("🗑️  Resetting target_kancab table...")
-    if not truncate_table_with_reset(supabase, "target_kancab"):
-        add_log("❌ Failed to reset target_kancab table. Aborting.", "error")
-        st.error("❌ Failed to reset target_kancab table. Aborting.")
-        return 0, 0
-    add_log("✅ target_kancab table reset successfully", "success")
-
-    # Migrate data
-    add_log(f"📥 Migrating {len(df):,} records to target_kancab...", "info")
-    st.info("📥 Migrating data to target_kancab...")
-    target_kancab_data = []
-    batch_size = 1000
-    total_inserted = 0
-    skipped_kancab = 0
-
-    progress_bar = st.progress(0, "Processing records...")
-
-    for idx, row in df.iterrows():
-        try:
-            kancab_name = str(row['kancab']) if pd.notna(row['kancab']) else None
-            kancab_id = kancab_mapping.get(kancab_name)
-
-            if not kancab_id:
-                skipped_kancab += 1
-                continue
-
-            # Use current date for database
-            import datetime
-            target_date = datetime.datetime.now().date()
-
-            record = {
-                'kancab_id': kancab_id,
-                'target_setara_beras': str(row['Target Setara Beras']) if pd.notna(row.get('Target Setara Beras')) else None,
-                'date': target_date.isoformat(),
-            }
-
-            target_kancab_data.append(record)
-
-            if len(target_kancab_data) >= batch_size:
-                supabase.table('target_kancab').insert(target_kancab_data).execute()
-                total_inserted += len(target_kancab_data)
-                progress = (idx + 1) / len(df) * 100
-                add_log(f"✅ Batch inserted to target_kancab: {total_inserted:,} records ({progress:.1f}%)", "success")
-                progress_bar.progress(int(progress) / 100, f"Inserted {total_inserted:,} records...")
-                target_kancab_data = []
-
-        except Exception as e:
-            add_log(f"⚠️ Error at row {idx}: {e}", "warning")
-            st.warning(f"⚠️  Error at row {idx}: {e}")
-            continue
-
-    if target_kancab_data:
-        supabase.table('target_kancab').insert(target_kancab_data).execute()
-        total_inserted += len(target_kancab_data)
-        add_log(f"✅ Final batch inserted to target_kancab: {total_inserted:,} total records", "success")
-
-    progress_bar.progress(100, "✅ Migration completed")
-    progress_bar.empty()
-
-    add_log(f"📊 REPLACE MODE Summary - Inserted: {total_inserted:,}, Skipped Kancab: {skipped_kancab:,}", "success")
-    st.success(f"""
-    📊 Migration Summary (REPLACE MODE):
-    - Total records inserted: **{total_inserted:,}**
-    - Skipped (kancab not found): **{skipped_kancab:,}**
-    """)
-
-    return total_inserted, skipped_kancab
-
-
-# ===== RPC COMPARISON FUNCTIONS FOR TARGET_KANWIL =====
-
-def fetch_with_retry_target_kanwil_streamlit(supabase, last_id, limit, max_retries=3, retry_delay=2, retries=0):
-    """
-    Fetch data from RPC with automatic retry on timeout (target_kanwil version).
-    Implements exponential backoff retry strategy.
-    """
-    try:
-        res = supabase.rpc(
-            "get_target_kanwil_compare_not_exists_page",
-            {"p_last_id": last_id, "p_limit": limit}
-        ).execute()
-        return res.data
-    except Exception as e:
-        if retries < max_retries:
-            delay = retry_delay * (2 ** retries)  # Exponential backoff
-            add_log(f"⚠️ Error pada last_id={last_id}, retry ke-{retries + 1}/{max_retries} - waiting {delay}s", "warning")
-            st.warning(f"⚠️  Error pada last_id={last_id}, retry ke-{retries + 1}/{max_retries}")
-            st.info(f"⏳ Waiting {delay} seconds before retry...")
-            time.sleep(delay)
-            return fetch_with_retry_target_kanwil_streamlit(supabase, last_id, limit, max_retries, retry_delay, retries + 1)
+    st.markdown(f'<h4 style="color: #1f497d;">🧾 Job Append {job_id} - {job["table_name"]}</h4>', unsafe_allow_html=True)
+    st.caption(f"File: {job['source_name'] or '-'} | Status: **{job['status']}** | Fase: {phase_labels.get(job['phase'], job['phase'])}")
+
+    total_rows = max(job['total_rows'], 1)
+    st.progress(min(job['staged_rows'] / total_rows, 1.0), f"Staged {job['staged_rows']:,} / {job['total_rows']:,} records")
+    if job['phase'] in ('migrate', 'cleanup', 'done'):
+        found = max(job['found_count'], 1)
+        st.progress(min(job['migrated_count'] / found, 1.0), f"Migrated {job['migrated_count']:,} / {job['found_count']:,} unique records")
+    elif job['phase'] == 'compare':
+        st.info(f"🔍 Compare berjalan... last_id={job['last_compared_id']}, unique ditemukan: {job['found_count']:,}")
+        if job['found_count']:
+            st.progress(min(job['migrated_count'] / job['found_count'], 1.0), f"Migrated {job['migrated_count']:,} / {job['found_count']:,} unique records (sejauh ini)")
+
+    if job['telemetry']:
+        render_job_telemetry(job_id, job['telemetry'])
+
+    with st.expander("📜 Log Job", expanded=job['status'] in ('failed', 'interrupted')):
+        logs = job_store.get_logs(job_id)
+        st.code("\n".join(
+            f"[{datetime.fromtimestamp(entry['ts']).strftime('%H:%M:%S')}] {entry['message']}" for entry in logs
+        ) or "Belum ada log", language=None)
+
+    if job['status'] == 'done':
+        summary = job['summary'] or {}
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("📊 Total Data Baru", f"{summary.get('total_rows', 0):,}")
+        with col2:
+            st.metric("✅ Data Unik", f"{summary.get('migrated', 0):,}")
+        with col3:
+            st.metric("⚠️ Data Duplikat", f"{summary.get('duplicates', 0) + summary.get('collapsed', 0):,}")
+        if summary.get('collapsed'):
+            st.caption(f"🧹 {summary['collapsed']:,} baris duplikat dalam file digabung sebelum staging")
+        if summary.get('migrated'):
+            st.success(f"""
+            ✅ **Append berhasil!**
+            - Tabel: **{job['table_name']}**
+            - Data berhasil ditambahkan: **{summary['migrated']:,}** records
+            - Data duplikat (diabaikan): **{summary.get('duplicates', 0):,}** records
+            - Duplikat dalam file (digabung): **{summary.get('collapsed', 0):,}** records
+            """)
+            st.info("🔄 Refresh halaman untuk melihat data terbaru")
         else:
-            add_log(f"❌ Gagal setelah {max_retries} retry pada last_id={last_id}: {e}", "error")
-            st.error(f"❌ Gagal setelah {max_retries} retry pada last_id={last_id}: {e}")
-            raise e
-
-
-def process_comparison_target_kanwil_with_rpc_streamlit(supabase):
-    """
-    Process comparison using RPC get_target_kanwil_compare_not_exists_page (Streamlit version).
-    Returns list of IDs that don't exist in target_kanwil table.
-    """
-    add_log("🔍 Step 2: Starting RPC comparison process for target_kanwil...", "info")
-    st.info("🔍 Step 2: Comparing data with database using RPC...")
-
-    # Configuration
-    max_retries = 3
-    retry_delay = 2
-    limit = 1000
-
-    # Get total rows
-    try:
-        result = supabase.table("target_kanwil_compare").select("id", count="exact").limit(1).execute()
-        total_rows = result.count
-        add_log(f"📊 Total rows in target_kanwil_compare: {total_rows:,}", "info")
-    except Exception as e:
-        add_log(f"❌ Error getting total rows: {e}", "error")
-        st.error(f"Error getting total rows: {e}")
-        return []
-
-    # Get min ID
-    try:
-        res = supabase.table("target_kanwil_compare").select("id").order("id", desc=False).limit(1).execute()
-        min_id = res.data[0]["id"] if res.data else 0
-        add_log(f"🔢 Starting from ID: {min_id}", "info")
-    except Exception as e:
-        add_log(f"❌ Error getting min id: {e}", "error")
-        st.error(f"Error getting min id: {e}")
-        return []
-
-    if total_rows is None or total_rows == 0:
-        add_log("📊 No data in target_kanwil_compare to process", "info")
-        st.info("📊 No data in target_kanwil_compare to process")
-        return []
-
-    st.info(f"📊 Total rows in target_kanwil_compare: **{total_rows:,}**")
-    st.info(f"🔢 Starting from ID: **{min_id}**")
-
-    last_id = min_id - 1
-    processed_count = 0
-    all_results = []
+            st.warning("⚠️ Tidak ada data unik untuk ditambahkan.")
+    elif job['status'] in ('failed', 'interrupted'):
+        st.error(f"❌ Job berhenti pada fase '{job['phase']}': {job['error'] or 'proses terputus'}")
+        if st.button("▶️ Lanjutkan dari Checkpoint", type="primary", key=f"resume_{job_id}"):
+            start_job_thread(supabase, job_store, job_id)
+            st.rerun()
+    else:
+        # Job masih berjalan di background: refresh status secara berkala
+        time.sleep(2)
+        st.rerun()
+    return job
+
+
+def render_file_scope(df, key):
+    """
+    Tampilkan bulan tanggal penerimaan dan kanwil di file yang akan disentuh Delta Sync /
+    Scoped Replace sebelum diterapkan. Lebih dari MAX_SCOPE_MONTHS bulan (biasanya tanggal
+    salah ketik) harus dikonfirmasi. Returns max_months untuk ingestion.pipeline (None = tanpa batas).
+    """
+    dates = df['Tanggal Penerimaan'] if 'Tanggal Penerimaan' in df.columns else pd.Series(dtype=object)
+    months = scope_months(pd.to_datetime(dates, errors='coerce'))
+    kanwil_count = df['kanwil'].dropna().nunique() if 'kanwil' in df.columns else 0
+    labels = ', '.join(str(month) for month in months[:MAX_SCOPE_MONTHS])
+    if len(months) > MAX_SCOPE_MONTHS:
+        labels += ', ...'
+    empty_dates = int(dates.isna().sum())
+    st.info(f"🗓️ Scope file: **{len(months)} bulan** ({labels or '-'}), **{kanwil_count} kanwil**"
+            + (f", {empty_dates:,} baris tanggal kosong" if empty_dates else "")
+            + " - bulan yang tidak ada di file tidak disentuh")
+    if len(months) <= MAX_SCOPE_MONTHS:
+        return MAX_SCOPE_MONTHS
+    st.warning(f"⚠️ File mencakup {len(months)} bulan ({months[0]} s/d {months[-1]}), lebih dari batas "
+               f"{MAX_SCOPE_MONTHS} bulan. Periksa tanggal penerimaan yang salah ketik.")
+    if st.checkbox(f"Izinkan scope {len(months)} bulan", value=False, key=f"{key}_wide_scope"):
+        return None
+    return MAX_SCOPE_MONTHS
 
-    progress_bar = st.progress(0, "Comparing data...")
 
-    while True:
+def render_replace_rollback(supabase, table_name, job_store):
+    """Tombol rollback ke data sebelum Replace terakhir (<table>_prev)"""
+    if st.button(f"↩️ Rollback {table_name} ke data sebelum Replace terakhir", key=f"rollback_{table_name}"):
         try:
-            # Call RPC with retry mechanism
-            data = fetch_with_retry_target_kanwil_streamlit(supabase, last_id, limit, max_retries, retry_delay)
-
-            if data and len(data) > 0:
-                all_results.extend(data)
-                processed_count += len(data)
-                last_id = max([row['target_kanwil_compare_id'] for row in data])
-
-                progress = (processed_count / total_rows) * 100 if total_rows > 0 else 0
-                add_log(f"✅ RPC batch: {len(data)} records found - Total unique: {len(all_results):,} ({progress:.1f}%)", "success")
-                progress_bar.progress(min(int(progress) / 100, 0.99), f"Progress: {processed_count:,}/{total_rows:,} ({progress:.1f}%)")
-            else:
-                # Empty result - finished
-                add_log(f"✅ Reached end of data at last_id={last_id}", "success")
-                break
-
+            # Isi tabel kembali ke sebelum Replace: riwayat upload tidak berlaku lagi
+            rows = rollback_replace(supabase, table_name, log=add_log,
+                                    ledger=UploadLedger(job_store, table_name))
+            st.cache_data.clear()
+            st.success(f"✅ {table_name} dikembalikan ({rows:,} records)")
         except Exception as e:
-            add_log(f"❌ Fatal error that couldn't be retried: {e}", "error")
-            st.error(f"❌ Fatal error that couldn't be retried: {e}")
-            with st.expander("🔍 Error Details"):
-                st.code(str(e))
-            break
-
-        time.sleep(0.2)  # Rate limiting
-
-    progress_bar.progress(100, "✅ Comparison completed")
-    progress_bar.empty()
-
-    add_log(f"📊 RPC Comparison Complete - Found {len(all_results):,} unique records to migrate", "success")
-    st.success(f"✅ Found **{len(all_results):,}** unique records to migrate")
+            add_log(f"❌ Rollback {table_name} gagal: {e}", "error")
+            st.error(f"❌ Rollback gagal (tidak ada {previous_table_name(table_name)}?): {e}")
 
-    return all_results
 
-
-def migrate_from_target_kanwil_compare_to_target_kanwil_streamlit(supabase, comparison_results):
+def replace_table_streamlit(supabase, table_name, df, mappings, ledger=None):
     """
-    Migrate data from target_kanwil_compare to target_kanwil based on comparison results (Streamlit version).
-    Returns: migrated_count
+    REPLACE MODE (Streamlit version) untuk tabel apa pun di ingestion.pipeline.TABLES:
+    ingestion.pipeline.run_replace (COPY / shadow swap / TRUNCATE + insert) dengan log
+    dan progress bar Streamlit. ledger: UploadLedger yang diperbarui run_replace.
+    Returns: total_inserted, failed_total, summary run_replace
+    failed_total > 0: replace tidak lengkap (swap dibatalkan, atau sebagian batch gagal setelah TRUNCATE);
+    summary['replaced'] False jika swap dibatalkan (data lama utuh)
     """
-    if not comparison_results:
-        add_log("ℹ️ No data to migrate", "info")
-        st.info("ℹ️  No data to migrate")
-        return 0
-
-    add_log(f"📥 Step 3: Starting migration of {len(comparison_results):,} records to target_kanwil...", "info")
-    st.info(f"📥 Step 3: Migrating {len(comparison_results):,} records to target_kanwil...")
-
-    ids_to_migrate = [r['target_kanwil_compare_id'] for r in comparison_results]
-    batch_size = 1000
-    migrated_count = 0
-    total_batches = (len(ids_to_migrate) + batch_size - 1) // batch_size
-
-    progress_bar = st.progress(0, "Migrating data...")
-
-    for i in range(0, len(ids_to_migrate), batch_size):
-        batch_ids = ids_to_migrate[i:i + batch_size]
-        batch_num = i // batch_size + 1
-
-        try:
-            # Fetch from target_kanwil_compare
-            response = supabase.table("target_kanwil_compare").select("*").in_("id", batch_ids).execute()
-            data_to_insert = response.data
-
-            if not data_to_insert:
-                continue
-
-            # Remove 'id', 'created_at', 'row_hash' columns
-            for row in data_to_insert:
-                if 'id' in row:
-                    del row['id']
-                if 'created_at' in row:
-                    del row['created_at']
-                if 'row_hash' in row:
-                    del row['row_hash']
-
-            # Insert to target_kanwil
-            supabase.table("target_kanwil").insert(data_to_insert).execute()
-            migrated_count += len(data_to_insert)
+    config = TABLES[table_name]
+    add_log(f"📥 Starting Direct Migration to {table_name} (REPLACE MODE)...", "warning")
+    st.warning(f"📥 Starting Direct Migration to {table_name} (REPLACE MODE)...")
 
-            progress = (migrated_count / len(ids_to_migrate)) * 100
-            add_log(f"✅ Migration batch {batch_num}/{total_batches}: {len(data_to_insert)} records - Total: {migrated_count:,}/{len(ids_to_migrate):,} ({progress:.1f}%)", "success")
-            progress_bar.progress(int(progress) / 100, f"Migrated: {migrated_count:,}/{len(ids_to_migrate):,} ({progress:.1f}%)")
-
-            time.sleep(0.2)
-
-        except Exception as e:
-            add_log(f"❌ Error on batch {batch_num}: {e}", "error")
-            st.error(f"❌ Error on batch {batch_num}: {e}")
-            continue
-
-    progress_bar.progress(100, "✅ Migration completed")
-    progress_bar.empty()
-
-    add_log(f"📊 Migration Complete - Successfully migrated {migrated_count:,} records to target_kanwil", "success")
-    st.success(f"✅ Successfully migrated **{migrated_count:,}** records to target_kanwil")
-
-    return migrated_count
-
-
-# ===== RPC COMPARISON FUNCTIONS FOR TARGET_KANCAB =====
-
-def fetch_with_retry_target_kancab_streamlit(supabase, last_id, limit, max_retries=3, retry_delay=2, retries=0):
-    """
-    Fetch data from RPC with automatic retry on timeout (target_kancab version).
-    Implements exponential backoff retry strategy.
-    """
-    try:
-        res = supabase.rpc(
-            "get_target_kancab_compare_not_exists_page",
-            {"p_last_id": last_id, "p_limit": limit}
-        ).execute()
-        return res.data
-    except Exception as e:
-        if retries < max_retries:
-            delay = retry_delay * (2 ** retries)  # Exponential backoff
-            add_log(f"⚠️ Error pada last_id={last_id}, retry ke-{retries + 1}/{max_retries} - waiting {delay}s", "warning")
-            st.warning(f"⚠️  Error pada last_id={last_id}, retry ke-{retries + 1}/{max_retries}")
-            st.info(f"⏳ Waiting {delay} seconds before retry...")
-            time.sleep(delay)
-            return fetch_with_retry_target_kancab_streamlit(supabase, last_id, limit, max_retries, retry_delay, retries + 1)
-        else:
-            add_log(f"❌ Gagal setelah {max_retries} retry pada last_id={last_id}: {e}", "error")
-            st.error(f"❌ Gagal setelah {max_retries} retry pada last_id={last_id}: {e}")
-            raise e
-
-
-def process_comparison_target_kancab_with_rpc_streamlit(supabase):
-    """
-    Process comparison using RPC get_target_kancab_compare_not_exists_page (Streamlit version).
-    Returns list of IDs that don't exist in target_kancab table.
-    """
-    add_log("🔍 Step 2: Starting RPC comparison process for target_kancab...", "info")
-    st.info("🔍 Step 2: Comparing data with database using RPC...")
-
-    # Configuration
-    max_retries = 3
-    retry_delay = 2
-    limit = 1000
-
-    # Get total rows
-    try:
-        result = supabase.table("target_kancab_compare").select("id", count="exact").limit(1).execute()
-        total_rows = result.count
-        add_log(f"📊 Total rows in target_kancab_compare: {total_rows:,}", "info")
-    except Exception as e:
-        add_log(f"❌ Error getting total rows: {e}", "error")
-        st.error(f"Error getting total rows: {e}")
-        return []
-
-    # Get min ID
-    try:
-        res = supabase.table("target_kancab_compare").select("id").order("id", desc=False).limit(1).execute()
-        min_id = res.data[0]["id"] if res.data else 0
-        add_log(f"🔢 Starting from ID: {min_id}", "info")
-    except Exception as e:
-        add_log(f"❌ Error getting min id: {e}", "error")
-        st.error(f"Error getting min id: {e}")
-        return []
-
-    if total_rows is None or total_rows == 0:
-        add_log("📊 No data in target_kancab_compare to process", "info")
-        st.info("📊 No data in target_kancab_compare to process")
-        return []
-
-    st.info(f"📊 Total rows in target_kancab_compare: **{total_rows:,}**")
-    st.info(f"🔢 Starting from ID: **{min_id}**")
-
-    last_id = min_id - 1
-    processed_count = 0
-    all_results = []
-
-    progress_bar = st.progress(0, "Comparing data...")
-
-    while True:
-        try:
-            # Call RPC with retry mechanism
-            data = fetch_with_retry_target_kancab_streamlit(supabase, last_id, limit, max_retries, retry_delay)
-
-            if data and len(data) > 0:
-                all_results.extend(data)
-                processed_count += len(data)
-                last_id = max([row['target_kancab_compare_id'] for row in data])
-
-                progress = (processed_count / total_rows) * 100 if total_rows > 0 else 0
-                add_log(f"✅ RPC batch: {len(data)} records found - Total unique: {len(all_results):,} ({progress:.1f}%)", "success")
-                progress_bar.progress(min(int(progress) / 100, 0.99), f"Progress: {processed_count:,}/{total_rows:,} ({progress:.1f}%)")
-            else:
-                # Empty result - finished
-                add_log(f"✅ Reached end of data at last_id={last_id}", "success")
-                break
-
-        except Exception as e:
-            add_log(f"❌ Fatal error that couldn't be retried: {e}", "error")
-            st.error(f"❌ Fatal error that couldn't be retried: {e}")
-            with st.expander("🔍 Error Details"):
-                st.code(str(e))
-            break
+    progress_bar = st.progress(0, "Processing records...")
 
-        time.sleep(0.2)  # Rate limiting
+    def on_progress(inserted, total):
+        progress = inserted / total * 100 if total else 100
+        add_log(f"✅ Batch inserted to {table_name}: {inserted:,} records ({progress:.1f}%)", "success")
+        progress_bar.progress(int(progress) / 100, f"Inserted {inserted:,} records...")
 
-    progress_bar.progress(100, "✅ Comparison completed")
+    summary = run_replace(supabase, table_name, df, log=add_log, database_url=DATABASE_URL,
+                          mappings=mappings, progress_callback=on_progress, ledger=ledger)
     progress_bar.empty()
 
-    add_log(f"📊 RPC Comparison Complete - Found {len(all_results):,} unique records to migrate", "success")
-    st.success(f"✅ Found **{len(all_results):,}** unique records to migrate")
-
-    return all_results
-
-
-def migrate_from_target_kancab_compare_to_target_kancab_streamlit(supabase, comparison_results):
-    """
-    Migrate data from target_kancab_compare to target_kancab based on comparison results (Streamlit version).
-    Returns: migrated_count
-    """
-    if not comparison_results:
-        add_log("ℹ️ No data to migrate", "info")
-        st.info("ℹ️  No data to migrate")
-        return 0
-
-    add_log(f"📥 Step 3: Starting migration of {len(comparison_results):,} records to target_kancab...", "info")
-    st.info(f"📥 Step 3: Migrating {len(comparison_results):,} records to target_kancab...")
-
-    ids_to_migrate = [r['target_kancab_compare_id'] for r in comparison_results]
-    batch_size = 1000
-    migrated_count = 0
-    total_batches = (len(ids_to_migrate) + batch_size - 1) // batch_size
-
-    progress_bar = st.progress(0, "Migrating data...")
-
-    for i in range(0, len(ids_to_migrate), batch_size):
-        batch_ids = ids_to_migrate[i:i + batch_size]
-        batch_num = i // batch_size + 1
-
-        try:
-            # Fetch from target_kancab_compare
-            response = supabase.table("target_kancab_compare").select("*").in_("id", batch_ids).execute()
-            data_to_insert = response.data
-
-            if not data_to_insert:
-                continue
-
-            # Remove 'id', 'created_at', 'row_hash' columns
-            for row in data_to_insert:
-                if 'id' in row:
-                    del row['id']
-                if 'created_at' in row:
-                    del row['created_at']
-                if 'row_hash' in row:
-                    del row['row_hash']
-
-            # Insert to target_kancab
-            supabase.table("target_kancab").insert(data_to_insert).execute()
-            migrated_count += len(data_to_insert)
-
-            progress = (migrated_count / len(ids_to_migrate)) * 100
-            add_log(f"✅ Migration batch {batch_num}/{total_batches}: {len(data_to_insert)} records - Total: {migrated_count:,}/{len(ids_to_migrate):,} ({progress:.1f}%)", "success")
-            progress_bar.progress(int(progress) / 100, f"Migrated: {migrated_count:,}/{len(ids_to_migrate):,} ({progress:.1f}%)")
-
-            time.sleep(0.2)
-
-        except Exception as e:
-            add_log(f"❌ Error on batch {batch_num}: {e}", "error")
-            st.error(f"❌ Error on batch {batch_num}: {e}")
-            continue
-
-    progress_bar.progress(100, "✅ Migration completed")
-    progress_bar.empty()
-
-    add_log(f"📊 Migration Complete - Successfully migrated {migrated_count:,} records to target_kancab", "success")
-    st.success(f"✅ Successfully migrated **{migrated_count:,}** records to target_kancab")
-
-    return migrated_count
+    total_inserted, failed_total = summary['inserted'], summary['failed']
+    if summary['invalid_rows']:
+        st.warning(f"⚠️ {summary['invalid_rows']:,} baris tidak valid dilewati (detail di log proses)")
+    if failed_total and not summary['replaced']:
+        st.error(f"❌ {failed_total:,} records gagal masuk {shadow_table_name(table_name)}, "
+                 f"swap dibatalkan - {table_name} tetap berisi data lama")
+    elif failed_total:
+        st.error(f"❌ {failed_total:,} records gagal di-insert ke {table_name}")
+    elif summary['transport'] == 'copy':
+        st.success(f"✅ {table_name} diganti dalam satu transaksi (COPY): **{total_inserted:,}** records")
+    elif summary['swapped']:
+        st.success(f"✅ {table_name} di-swap: **{total_inserted:,}** records "
+                   f"(data lama disimpan di {previous_table_name(table_name)})")
+
+    skipped = {name: summary[f"skipped_{name}"] for name in config['skipped']}
+    add_log(f"📊 REPLACE MODE Summary - Inserted: {total_inserted:,}, "
+            + ", ".join(f"Skipped {name.capitalize()}: {count:,}" for name, count in skipped.items()), "success")
+    (st.warning if failed_total else st.success)("📊 Migration Summary (REPLACE MODE):\n"
+               f"- Total records inserted: **{total_inserted:,}**\n"
+               + "\n".join(f"- Skipped ({name} not found): **{count:,}**" for name, count in skipped.items()))
+
+    return total_inserted, failed_total, summary
 
 
 # ===== FUNGSI RPC SUPABASE =====
@@ -1872,7 +1007,8 @@ def get_metric_card_data(p_nama_kanwil, p_akun_analitik, p_start_date, p_end_dat
     Dict dengan keys: total_setara_beras_rentang, total_setara_beras_hari_ini, target_setara_beras, sisa_target
     """
     try:
-        response = supabase.rpc(
+        response = profiled_rpc(
+            supabase,
             "get_realisasi_setara_beras",
             {
                 "p_nama_kanwil": p_nama_kanwil,
@@ -1880,8 +1016,9 @@ def get_metric_card_data(p_nama_kanwil, p_akun_analitik, p_start_date, p_end_dat
                 "p_start_date": p_start_date,
                 "p_end_date": p_end_date,
                 "p_today": p_today
-            }
-        ).execute()
+            },
+            caller="get_metric_card_data",
+        )
 
         if response.data and len(response.data) > 0:
             return response.data[0]
@@ -1914,16 +1051,15 @@ def get_tabel_realisasi_kanwil(p_akun_analitik, p_start_date, p_end_date):
     DataFrame dengan kolom: kanwil, target_setara_beras, beras, gkg, gkp, setara_beras, capaian_persen
     """
     try:
-        response = supabase.rpc(
+        df = columnar.rpc_frame(
             "get_overview_setara_beras_all_kanwil",
             {
                 "p_akun_analitik": p_akun_analitik,
                 "p_start_date": p_start_date,
                 "p_end_date": p_end_date
-            }
-        ).execute()
-
-        df = pd.DataFrame(response.data)
+            },
+            caller="get_tabel_realisasi_kanwil",
+        )
         if not df.empty:
             df["capaian_persen"] = df["capaian_persen"].round(1)
         return df
@@ -1949,17 +1085,16 @@ def get_tabel_realisasi_kancab(p_nama_kanwil, p_akun_analitik, p_start_date, p_e
         print(f"DEBUG get_tabel_realisasi_kancab - p_nama_kanwil: {p_nama_kanwil}")
         print(f"DEBUG get_tabel_realisasi_kancab - p_akun_analitik: {p_akun_analitik}")
 
-        response = supabase.rpc(
+        df = columnar.rpc_frame(
             "get_overview_setara_beras_kancab",
             {
                 "p_nama_kanwil": p_nama_kanwil,
                 "p_akun_analitik": p_akun_analitik,
                 "p_start_date": p_start_date,
                 "p_end_date": p_end_date
-            }
-        ).execute()
-
-        df = pd.DataFrame(response.data)
+            },
+            caller="get_tabel_realisasi_kancab",
+        )
         print(f"DEBUG get_tabel_realisasi_kancab - Rows returned: {len(df)}")
         if not df.empty:
             print(f"DEBUG get_tabel_realisasi_kancab - Sample kancab: {df['kancab'].head(3).tolist() if 'kancab' in df.columns else 'No kancab column'}")
@@ -1988,17 +1123,16 @@ def get_tren_realisasi_kanwil(p_nama_kanwil, p_akun_analitik, p_start_date, p_en
     DataFrame dengan kolom: tanggal, nama_kanwil, beras, gkg, gkp, setara_beras
     """
     try:
-        response = supabase.rpc(
+        df = columnar.rpc_frame(
             "get_realisasi_harian_setara_beras",
             {
                 "p_nama_kanwil": p_nama_kanwil,
                 "p_akun_analitik": p_akun_analitik,
                 "p_start_date": p_start_date,
                 "p_end_date": p_end_date
-            }
-        ).execute()
-
-        df = pd.DataFrame(response.data)
+            },
+            caller="get_tren_realisasi_kanwil",
+        )
         return df
     except Exception as e:
         handle_rpc_error(e, "get_tren_realisasi_kanwil")
@@ -2026,17 +1160,16 @@ def get_realisasi_7_hari_terakhir(p_nama_kanwil, p_akun_analitik, p_end_date):
 
         start_date_7days = end_date_obj - timedelta(days=6)  # 7 hari termasuk hari ini
 
-        response = supabase.rpc(
+        df = columnar.rpc_frame(
             "get_realisasi_harian_setara_beras",
             {
                 "p_nama_kanwil": p_nama_kanwil,
                 "p_akun_analitik": p_akun_analitik,
                 "p_start_date": start_date_7days.strftime('%Y-%m-%d'),
                 "p_end_date": p_end_date if isinstance(p_end_date, str) else p_end_date.strftime('%Y-%m-%d')
-            }
-        ).execute()
-
-        df = pd.DataFrame(response.data)
+            },
+            caller="get_realisasi_7_hari_terakhir",
+        )
         return df
     except Exception as e:
         handle_rpc_error(e, "get_realisasi_7_hari_terakhir")
@@ -2048,122 +1181,34 @@ def create_summary_table_from_rpc(p_akun_analitik, p_start_date, p_end_date):
     Menggunakan data dari RPC get_overview_setara_beras_all_kanwil
     Shows: No, Kanwil, Target Setara Beras, Realisasi (Beras, GKG, GKP, Setara Beras, Capaian %)
     """
-    # List kanwil sentra produksi
-    kanwil_sentra = [
-        '08001 - KANTOR WILAYAH LAMPUNG',
-        '21001 - KANTOR WILAYAH SULSEL SULBAR',
-        '20001 - KANTOR WILAYAH SULTRA',
-        '12001 - KANTOR WILAYAH DI YOGYAKARTA',
-        '09001 - KANTOR WILAYAH DKI JAKARTA BANTEN',
-        '23001 - KANTOR WILAYAH N.T.B',
-        '13001 - KANTOR WILAYAH JATIM',
-        '10001 - KANTOR WILAYAH JABAR',
-        '01001 - KANTOR WILAYAH ACEH',
-        '06001 - KANTOR WILAYAH SUMSEL',
-        '11001 - KANTOR WILAYAH JATENG'
-    ]
-
-    # List kanwil lainnya
-    kanwil_lainnya = [
-        '15001 - KANTOR WILAYAH KALTIM KALTARA',
-        '25001 - KANTOR WILAYAH MALUKU MALUT',
-        '26001 - KANTOR WILAYAH PAPUA PABAR',
-        '02001 - KANTOR WILAYAH SUMUT',
-        '04001 - KANTOR WILAYAH SUMBAR',
-        '17001 - KANTOR WILAYAH KALTENG',
-        '16001 - KANTOR WILAYAH KALSEL',
-        '14001 - KANTOR WILAYAH KALBAR',
-        '18001 - KANTOR WILAYAH SULUT GORONTALO',
-        '05001 - KANTOR WILAYAH JAMBI',
-        '19001 - KANTOR WILAYAH SULTENG',
-        '24001 - KANTOR WILAYAH N.T.T',
-        '03001 - KANTOR WILAYAH RIAU DAN KEPRI',
-        '22001 - KANTOR WILAYAH BALI',
-        '07001 - KANTOR WILAYAH BENGKULU'
-    ]
-
     # Ambil data dari RPC
     df_all_kanwil = get_tabel_realisasi_kanwil(p_akun_analitik, p_start_date, p_end_date)
 
     if df_all_kanwil.empty:
         return [], []
 
-    # Build data for Kanwil Sentra Produksi
-    data_sentra = []
-    for kanwil in kanwil_sentra:
-        # Cari data kanwil di DataFrame
-        # Format di database: "16 - 15001 - KANTOR WILAYAH KALTIM KALTARA"
-        # Format di aplikasi: "15001 - KANTOR WILAYAH KALTIM KALTARA"
-        # Kita cari dengan menggunakan kode kanwil (misal: "08001")
-        kode_kanwil = kanwil.split(' - ')[0]  # Ambil kode seperti "08001"
-        kanwil_data = df_all_kanwil[df_all_kanwil['kanwil'].str.contains(f" {kode_kanwil} ", na=False)]
-
-        if not kanwil_data.empty:
-            row = kanwil_data.iloc[0]
-            data_sentra.append({
-                'Kanwil': kanwil,
-                'Target Setara Beras': row['target_setara_beras'],
-                'Beras (a)': row['beras'],
-                'GKG (b)': row['gkg'],
-                'GKP (c)': row['gkp'],
-                'Setara Beras (d)': row['setara_beras'],
-                'Capaian (%)': row['capaian_persen']
-            })
-        else:
-            # Jika tidak ada data, buat row dengan nilai 0
-            data_sentra.append({
-                'Kanwil': kanwil,
-                'Target Setara Beras': 0,
-                'Beras (a)': 0,
-                'GKG (b)': 0,
-                'GKP (c)': 0,
-                'Setara Beras (d)': 0,
-                'Capaian (%)': 0
-            })
-
-    # Sort by Capaian (%) descending
-    data_sentra = sorted(data_sentra, key=lambda x: x['Capaian (%)'], reverse=True)
-    # Re-assign No after sorting
-    for idx, row in enumerate(data_sentra, 1):
-        row['No'] = idx
-
-    # Build data for Kanwil Lainnya
-    data_lainnya = []
-    for kanwil in kanwil_lainnya:
-        # Cari data kanwil di DataFrame dengan kode kanwil
-        kode_kanwil = kanwil.split(' - ')[0]  # Ambil kode seperti "15001"
-        kanwil_data = df_all_kanwil[df_all_kanwil['kanwil'].str.contains(f" {kode_kanwil} ", na=False)]
-
-        if not kanwil_data.empty:
-            row = kanwil_data.iloc[0]
-            data_lainnya.append({
-                'Kanwil': kanwil,
-                'Target Setara Beras': row['target_setara_beras'],
-                'Beras (a)': row['beras'],
-                'GKG (b)': row['gkg'],
-                'GKP (c)': row['gkp'],
-                'Setara Beras (d)': row['setara_beras'],
-                'Capaian (%)': row['capaian_persen']
-            })
-        else:
-            # Jika tidak ada data, buat row dengan nilai 0
-            data_lainnya.append({
-                'Kanwil': kanwil,
-                'Target Setara Beras': 0,
-                'Beras (a)': 0,
-                'GKG (b)': 0,
-                'GKP (c)': 0,
-                'Setara Beras (d)': 0,
-                'Capaian (%)': 0
-            })
-
-    # Sort by Capaian (%) descending
-    data_lainnya = sorted(data_lainnya, key=lambda x: x['Capaian (%)'], reverse=True)
-    # Re-assign No after sorting
-    for idx, row in enumerate(data_lainnya, 1):
-        row['No'] = idx
-
-    return data_sentra, data_lainnya
+    # Satu reindex per kode kanwil (registry), kanwil tanpa data -> 0
+    source_columns = {
+        'target_setara_beras': 'Target Setara Beras',
+        'beras': 'Beras (a)',
+        'gkg': 'GKG (b)',
+        'gkp': 'GKP (c)',
+        'setara_beras': 'Setara Beras (d)',
+        'capaian_persen': 'Capaian (%)',
+    }
+    by_code = index_by_code(df_all_kanwil)[list(source_columns)].reindex(kanwil_codes(), fill_value=0)
+    table = by_code.rename(columns=source_columns)
+    table.insert(0, 'Kanwil', [display_name(code) for code in table.index])
+
+    def build_rows(group):
+        # Sort by Capaian (%) descending (stabil: urutan registry untuk nilai sama), No setelah sort
+        rows = table.loc[kanwil_codes(group)].sort_values('Capaian (%)', ascending=False, kind='stable')
+        rows = rows.to_dict('records')
+        for idx, row in enumerate(rows, 1):
+            row['No'] = idx
+        return rows
+
+    return build_rows(SENTRA), build_rows(LAINNYA)
 
 def create_kancab_table_from_rpc(p_nama_kanwil, p_akun_analitik, p_start_date, p_end_date):
     """
@@ -3482,6 +2527,66 @@ def create_excel_export(df, tanggal_kemarin, tanggal_hari_ini):
     output.seek(0)
     return output
 
+def render_rpc_profiler_page():
+    """
+    Halaman admin: latency RPC dashboard (p50/p95/p99) per RPC dan per kombinasi filter,
+    plus daftar panggilan paling lambat. Data dari store in-process rpc_profiler.PROFILER
+    dan metrik pool HTTP (ingestion.http_pool).
+    """
+    st.markdown('<div class="chart-title" style="font-size: 30px; font-weight: bold;">⏱️ Profiler RPC Dashboard</div>', unsafe_allow_html=True)
+    calls = PROFILER.to_dataframe()
+    st.caption(f"{len(calls):,} panggilan RPC tercatat sejak server start (maks {PROFILER.calls.maxlen:,} terakhir)")
+
+    col1, col2 = st.columns([1, 5])
+    with col1:
+        if st.button("🗑️ Reset Data Profiler", use_container_width=True):
+            PROFILER.clear()
+            reset_pool_metrics()
+            st.rerun()
+
+    st.markdown('<h4 style="color: #1f497d;">🔌 Pool Koneksi HTTP</h4>', unsafe_allow_html=True)
+    st.caption("read = dashboard, bulk = upload/migrasi. 'queued' > 0 atau pool timeout berarti pool penuh; "
+               "naikkan max_connections di [http.read] / [http.bulk] secrets.toml")
+    pools = pd.DataFrame(pool_snapshot())
+    if not pools.empty:
+        st.dataframe(pools, use_container_width=True, hide_index=True)
+
+    if calls.empty:
+        st.info("ℹ️ Belum ada panggilan RPC. Buka menu Dashboard Realisasi terlebih dahulu.")
+        return
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("📞 Total Panggilan", f"{len(calls):,}")
+    with col2:
+        st.metric("⏱️ p95 (ms)", f"{calls['ms'].quantile(0.95):,.0f}")
+    with col3:
+        st.metric("⏱️ Timeout", f"{(calls['status'] == 'timeout').sum():,}")
+    with col4:
+        st.metric("❌ Error Lain", f"{(calls['status'] == 'error').sum():,}")
+
+    st.markdown('<h4 style="color: #1f497d;">📊 Latency per RPC</h4>', unsafe_allow_html=True)
+    per_rpc = PROFILER.summary(by=('rpc',))
+    fig = go.Figure()
+    for label, column in (("p50", 'p50_ms'), ("p95", 'p95_ms'), ("p99", 'p99_ms')):
+        fig.add_trace(go.Bar(name=label, x=per_rpc['rpc'], y=per_rpc[column]))
+    fig.update_layout(barmode='group', yaxis_title="ms", height=350, margin=dict(l=10, r=10, t=20, b=10))
+    st.plotly_chart(fig, use_container_width=True)
+    st.dataframe(per_rpc, use_container_width=True, hide_index=True)
+
+    st.markdown('<h4 style="color: #1f497d;">🎛️ Latency per Kombinasi Filter</h4>', unsafe_allow_html=True)
+    st.caption("Kombinasi dengan p95 tinggi adalah kandidat rollup / index sebelum muncul banner Request Timeout")
+    st.dataframe(PROFILER.summary(by=('rpc', 'filter')), use_container_width=True, hide_index=True)
+
+    st.markdown('<h4 style="color: #1f497d;">🐢 Panggilan Paling Lambat</h4>', unsafe_allow_html=True)
+    slowest = PROFILER.slowest(20)
+    slowest['timestamp'] = slowest['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    st.dataframe(slowest, use_container_width=True, hide_index=True)
+
+    st.download_button("📥 Download Semua Panggilan (CSV)", data=calls.to_csv(index=False),
+                       file_name=f"rpc_profiler_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv", mime="text/csv")
+
+
 def main():
     # Header with gradient background
     st.markdown("""
@@ -3496,10 +2601,15 @@ def main():
         st.markdown("### 📋 Menu")
         menu_option = st.radio(
             "Pilih Menu:",
-            options=["📊 Dashboard Realisasi", "📁 Kelola Data"],
+            options=["📊 Dashboard Realisasi", "📁 Kelola Data", "⏱️ Profiler RPC"],
             label_visibility="collapsed"
         )
 
+    # ===== MENU: PROFILER RPC (ADMIN) =====
+    if menu_option == "⏱️ Profiler RPC":
+        render_rpc_profiler_page()
+        return
+
     # ===== MENU: KELOLA DATA =====
     if menu_option == "📁 Kelola Data":
         # CSS khusus untuk page Kelola Data - text berwarna gelap
@@ -3901,6 +3011,8 @@ def main():
                         del st.session_state.validated_file_key
                     if 'available_sheets' in st.session_state:
                         del st.session_state.available_sheets
+                    if 'workbook_sniff' in st.session_state:
+                        del st.session_state.workbook_sniff
                     if 'loaded_sheet_key' in st.session_state:
                         del st.session_state.loaded_sheet_key
                     if 'df_new' in st.session_state:
@@ -3911,23 +3023,54 @@ def main():
 
         with form2:
             st.markdown('<p style="color: black; font-size: 16px; margin-bottom: -1px;">📂 Pilih Tabel</p>', unsafe_allow_html=True)
+            # Label, sheet default dan alur upload per tabel dari ingestion.pipeline.TABLES
+            table_map = {config['label']: (name, config['sheet']) for name, config in TABLES.items()}
             selected_table = st.radio(
                 ".",
-                options=["📈 Realisasi", "🎯 Target Kanwil", "🏢 Target Kancab"],
+                options=list(table_map),
                 help="Pilih tabel mana yang akan diupdate/replace",
                 horizontal=True,
                 key="select_table",
                 label_visibility="collapsed"
             )
 
-            table_map = {
-                "📈 Realisasi": ("realisasi", "Export"),
-                "🎯 Target Kanwil": ("target_kanwil", "Target Kanwil"),
-                "🏢 Target Kancab": ("target_kancab", "Target Kancab")
-            }
             table_name, expected_sheet_name = table_map[selected_table]
         
 
+        # Job append (background + checkpoint): tampil tanpa perlu upload ulang file
+        job_store = JobStore()
+        job_store.mark_interrupted()  # Job 'running' tanpa thread hidup (mis. server restart)
+        if st.session_state.get('active_job_id'):
+            st.markdown("---")
+            try:
+                active_job = render_append_job(supabase_bulk, job_store, st.session_state.active_job_id)
+                if active_job['status'] == 'done' and st.button("✖️ Tutup Status Job", key="close_job"):
+                    del st.session_state.active_job_id
+                    st.rerun()
+            except KeyError:
+                del st.session_state.active_job_id
+            st.markdown("---")
+
+        unfinished_jobs = [job for job in job_store.incomplete_jobs()
+                           if job['job_id'] != st.session_state.get('active_job_id')]
+        if unfinished_jobs:
+            with st.expander(f"⏸️ {len(unfinished_jobs)} Job Append Belum Selesai", expanded=False):
+                for job in unfinished_jobs:
+                    col1, col2, col3 = st.columns([4, 1, 1])
+                    with col1:
+                        st.write(f"**{job['job_id']}** - {job['table_name']} - {job['source_name'] or '-'} "
+                                 f"(fase: {job['phase']}, status: {job['status']}, staged {job['staged_rows']:,}/{job['total_rows']:,})")
+                    with col2:
+                        if st.button("▶️ Lanjutkan", key=f"resume_list_{job['job_id']}", use_container_width=True):
+                            start_job_thread(supabase_bulk, job_store, job['job_id'])
+                            st.session_state.active_job_id = job['job_id']
+                            st.rerun()
+                    with col3:
+                        if st.button("🗑️ Hapus", key=f"delete_job_{job['job_id']}", use_container_width=True,
+                                     disabled=is_job_active(job['job_id'])):
+                            job_store.delete_job(job['job_id'])
+                            st.rerun()
+
         if uploaded_file is not None:
             try:
                 # Generate unique key untuk file yang di-upload
@@ -3938,13 +3081,23 @@ def main():
                     # File baru atau berbeda - lakukan validasi
                     progress_bar = st.progress(0, "🔍 Memvalidasi file Excel...")
 
-                    # Read Excel file to get sheet names
-                    excel_file = pd.ExcelFile(uploaded_file, engine='openpyxl')
-                    available_sheets = excel_file.sheet_names
+                    # Nama sheet + header tiap sheet tanpa parse data (ingestion.sniff);
+                    # file .xls lama kembali ke pd.ExcelFile
+                    sniff_start = time.perf_counter()
+                    try:
+                        workbook = sniff_workbook(uploaded_file)
+                        available_sheets = [sheet['name'] for sheet in workbook['sheets']]
+                    except SniffUnavailable as e:
+                        print(f"[SNIFF] {e}, fallback ke pd.ExcelFile")
+                        workbook = None
+                        excel_file = pd.ExcelFile(uploaded_file, engine='openpyxl')
+                        available_sheets = excel_file.sheet_names
+                    print(f"[SNIFF] {len(available_sheets)} sheet dibaca dalam {time.perf_counter() - sniff_start:.3f}s")
                     progress_bar.progress(20, "📋 Mendeteksi sheet yang tersedia...")
 
                     # Simpan ke session state
                     st.session_state.available_sheets = available_sheets
+                    st.session_state.workbook_sniff = workbook
                     st.session_state.validated_file_key = file_key
 
                     progress_bar.progress(40, "✅ Validasi selesai")
@@ -3952,6 +3105,11 @@ def main():
                 else:
                     # File sudah divalidasi, ambil dari session state
                     available_sheets = st.session_state.available_sheets
+                    workbook = st.session_state.get('workbook_sniff')
+
+                # Sheet default: sheet yang header-nya cocok dengan tabel terpilih
+                sniffed_sheets = {sheet['name']: sheet for sheet in workbook['sheets']} if workbook else {}
+                default_sheet = workbook['detected'].get(table_name, expected_sheet_name) if workbook else expected_sheet_name
 
                 # Pilihan sheet jika ada lebih dari satu
                 if len(available_sheets) > 1:
@@ -3959,36 +3117,67 @@ def main():
                     selected_sheet = st.selectbox(
                         "Pilih sheet yang akan diproses:",
                         options=available_sheets,
-                        index=available_sheets.index(expected_sheet_name) if expected_sheet_name in available_sheets else 0,
+                        index=available_sheets.index(default_sheet) if default_sheet in available_sheets else 0,
                         key="select_sheet"
                     )
                 else:
                     selected_sheet = available_sheets[0]
                     st.info(f"📋 Menggunakan sheet: **{selected_sheet}**")
 
+                # Validasi kolom dari header sebelum sheet dibaca penuh
+                sheet_info = sniffed_sheets.get(selected_sheet)
+                if sheet_info is not None:
+                    missing_columns = sheet_info['missing'][table_name]
+                    if missing_columns:
+                        st.error(f"❌ Sheet **'{selected_sheet}'** tidak cocok untuk {selected_table}, "
+                                 f"kolom tidak ditemukan: {', '.join(missing_columns)}")
+                        if table_name in workbook['detected']:
+                            st.info(f"💡 Sheet yang cocok untuk {selected_table}: **'{workbook['detected'][table_name]}'**")
+                        elif sheet_info['table']:
+                            st.info(f"💡 Sheet ini terdeteksi sebagai data {TABLES[sheet_info['table']]['label']}")
+                        st.stop()
+                    rows_label = f"{sheet_info['rows']:,}" if sheet_info['rows_exact'] else f"±{sheet_info['rows']:,}"
+                    st.info(f"🔎 Header sheet **'{selected_sheet}'** cocok untuk {selected_table}: "
+                            f"{len(sheet_info['columns'])} kolom, {rows_label} baris")
+
                 # Generate key untuk sheet yang dipilih
                 sheet_key = f"{file_key}_{selected_sheet}"
 
+                # Ledger upload: sheet identik dengan upload yang sudah selesai dikenali dari
+                # hash isi zip, sebelum sheet dibaca penuh
+                dimension_version = get_dimensions(supabase).version
+                if st.session_state.get('content_hash_key') != sheet_key:
+                    try:
+                        st.session_state.content_hash = sheet_content_hash(uploaded_file, selected_sheet)
+                    except SniffUnavailable:
+                        st.session_state.content_hash = None
+                    st.session_state.content_hash_key = sheet_key
+                content_hash = st.session_state.content_hash
+                identical_upload = job_store.find_upload_by_content(table_name, content_hash, dimension_version)
+                if identical_upload is not None and st.session_state.get('loaded_sheet_key') != sheet_key:
+                    st.success(f"✅ Sheet ini identik dengan upload **{identical_upload['source_name'] or '-'}** "
+                               f"({datetime.fromtimestamp(identical_upload['created_at']):%d-%m-%Y %H:%M}, "
+                               f"{identical_upload['row_count']:,} baris) yang sudah selesai diproses - "
+                               f"tidak ada data baru untuk Append")
+                    if not st.checkbox("Tetap baca file ini (mis. untuk Replace)", key=f"force_read_{sheet_key}"):
+                        st.stop()
+
                 # Cek apakah data dari sheet ini sudah pernah dibaca
                 if 'loaded_sheet_key' not in st.session_state or st.session_state.loaded_sheet_key != sheet_key:
                     # Sheet baru atau berbeda - baca data
                     progress_bar = st.progress(0, f"📖 Membaca data dari sheet '{selected_sheet}'...")
 
-                    # Read with preservasi presisi numeric (seperti di migrate script)
-                    dtype_map = {}
-                    if table_name == "realisasi":
-                        dtype_map = {
-                            'Kuantum PO (Kg)': str,
-                            'In / Out': str,
-                            'Harga Include ppn': str,
-                            'Nominal Realisasi Incl ppn': str
-                        }
+                    # Read with preservasi presisi numeric (excel_dtypes di TABLES)
+                    dtype_map = TABLES[table_name]['excel_dtypes']
 
+                    read_start = time.perf_counter()
                     df_new = pd.read_excel(uploaded_file, sheet_name=selected_sheet, engine='openpyxl', dtype=dtype_map)
 
                     # Simpan ke session state
                     st.session_state.df_new = df_new
                     st.session_state.loaded_sheet_key = sheet_key
+                    st.session_state.read_excel_seconds = time.perf_counter() - read_start
+                    st.session_state.row_hashes = row_hashes(df_new)
 
                     progress_bar.progress(100, "✅ Data berhasil dibaca")
                     progress_bar.empty()
@@ -4008,12 +3197,26 @@ def main():
                 if 'process_logs' not in st.session_state:
                     st.session_state.process_logs = []
 
+                # Ledger upload untuk Delta / Scoped / Replace (diperbarui ingestion.pipeline
+                # setelah isi tabel berubah, sama dengan CLI)
+                upload_ledger = UploadLedger(job_store, table_name, list(df_new.columns), st.session_state.row_hashes,
+                                             content_hash=content_hash, source_name=uploaded_file.name,
+                                             sheet_name=selected_sheet, dimension_version=dimension_version)
+
                 # Mode selection
                 st.markdown('<h4 style="color: #1f497d;">⚙️ Mode Upload</h4>', unsafe_allow_html=True)
+                mode_options = ["🔄 Append (Tambahkan data baru)", "🔁 Replace (Ganti semua data)"]
+                if TABLES[table_name]['delta_rpc']:
+                    mode_options.insert(1, "🔀 Delta Sync (Sinkron perubahan)")
+                if TABLES[table_name]['scoped_rpc']:
+                    mode_options.insert(-1, "✂️ Scoped Replace (Ganti per bulan/kanwil)")
                 upload_mode = st.radio(
                     "Pilih mode upload:",
-                    options=["🔄 Append (Tambahkan data baru)", "🔁 Replace (Ganti semua data)"],
-                    help="Append: Tambahkan hanya data unik ke database | Replace: Hapus semua data lama dan ganti dengan data baru",
+                    options=mode_options,
+                    help="Append: Tambahkan hanya data unik ke database | "
+                         "Delta Sync: Tambah, koreksi dan hapus baris sesuai file (per nomor PO / IN-OUT / produk / tanggal) | "
+                         "Scoped Replace: Ganti hanya bulan dan kanwil yang ada di file | "
+                         "Replace: Hapus semua data lama dan ganti dengan data baru",
                     horizontal=True
                 )
                 if upload_mode == "🔄 Append (Tambahkan data baru)":
@@ -4024,231 +3227,206 @@ def main():
                     - Data existing tetap aman
                     """)
 
+                    # Ledger upload: isi sama -> tidak ada yang diproses; perpanjangan upload
+                    # lama -> hanya baris tambahan di akhir yang masuk job
+                    upload_columns = list(df_new.columns)
+                    match_kind, previous_upload, row_offset = job_store.find_upload(
+                        table_name, upload_columns, st.session_state.row_hashes, dimension_version
+                    )
+                    full_reprocess = False
+                    if match_kind is not None:
+                        previous_label = (f"**{previous_upload['source_name'] or '-'}** "
+                                          f"({datetime.fromtimestamp(previous_upload['created_at']):%d-%m-%Y %H:%M})")
+                        if match_kind == IDENTICAL:
+                            st.success(f"✅ Isi data sama dengan upload {previous_label} yang sudah selesai - "
+                                       f"tidak ada data baru")
+                        else:
+                            st.info(f"⏩ {row_offset:,} baris pertama sama dengan upload {previous_label}; "
+                                    f"hanya **{len(df_new) - row_offset:,}** baris baru yang akan diproses")
+                        full_reprocess = st.checkbox("Proses ulang semua baris (abaikan riwayat upload)",
+                                                     key="append_full_reprocess")
+                    if full_reprocess or match_kind is None:
+                        row_offset = 0
+                    elif match_kind == IDENTICAL:
+                        st.stop()
+                    df_job = df_new.iloc[row_offset:]
+
                     # Add button to start append process
                     st.markdown("---")
                     if not st.button("▶️ Mulai Proses Append", type="primary", use_container_width=True, key="start_append"):
                         st.info("👆 Klik tombol di atas untuk memulai proses append data")
                         st.stop()
 
-                    # Process started
+                    # Jalankan append sebagai job background dengan checkpoint (bisa di-resume)
+                    running_job = running_append_job(job_store, table_name)
+                    if running_job:
+                        st.error(f"⚠️ Job {running_job['job_id']} untuk tabel {table_name} masih berjalan. Tunggu hingga selesai.")
+                        st.stop()
+
+                    # Telemetry job dimulai dengan waktu parsing Excel
+                    job_stats = ThroughputStats()
+                    job_stats.add_time('read_excel', st.session_state.get('read_excel_seconds', 0.0), rows=len(df_new))
+                    job_id = job_store.create_job(table_name, df_job, source_name=uploaded_file.name, stats=job_stats)
+                    job_store.record_upload(table_name, 'append', upload_columns, st.session_state.row_hashes,
+                                            content_hash=content_hash, source_name=uploaded_file.name,
+                                            sheet_name=selected_sheet, row_offset=row_offset, job_id=job_id,
+                                            dimension_version=dimension_version, status='pending')
                     add_log("="*60, "info")
-                    add_log(f"🚀 APPEND MODE STARTED - Table: {table_name}", "info")
+                    add_log(f"🚀 APPEND MODE STARTED - Table: {table_name} (job {job_id})", "info")
                     add_log(f"📊 Total records from Excel: {len(df_new):,}", "info")
+                    if row_offset:
+                        add_log(f"⏩ {row_offset:,} baris pertama sudah di-upload sebelumnya, diproses: {len(df_job):,}", "info")
                     add_log("="*60, "info")
+                    start_job_thread(supabase_bulk, job_store, job_id)
+                    st.session_state.active_job_id = job_id
+                    st.rerun()
 
-                    # Load mapping IDs
+                elif upload_mode == "🔀 Delta Sync (Sinkron perubahan)":
+                    st.info(f"""
+                    **Mode Delta Sync:**
+                    - Baris dicocokkan per **nomor PO, nomor IN/OUT, produk, tanggal penerimaan**
+                    - Baris baru ditambahkan, baris yang nilainya berubah **dikoreksi**, baris yang tidak ada lagi di file **dihapus**
+                    - Hanya kanwil dan bulan tanggal penerimaan yang ada di file yang disentuh; data lain di **{table_name}** tetap
+                    """)
+                    delta_max_months = render_file_scope(df_new, "delta")
+                    delta_preview = st.checkbox("Preview saja (hitung perubahan tanpa mengubah data)", value=True,
+                                                key="delta_preview")
                     st.markdown("---")
-                    st.markdown('<h4 style="color: #1f497d;">📋 Loading Mapping IDs</h4>', unsafe_allow_html=True)
-
-                    kanwil_map = {}
-                    kancab_map = {}
-
-                    add_log("🔄 Loading mapping Kanwil dari database...", "info")
-                    st.info("🔄 Loading mapping Kanwil dari database...")
-                    kanwil_result = supabase.table('kanwil').select('*').execute()
-                    for kw in kanwil_result.data:
-                        kanwil_map[kw['nama_kanwil']] = kw['kanwil_id']
-                    add_log(f"✅ Loaded {len(kanwil_map)} Kanwil mappings", "success")
-                    st.success(f"✅ Loaded {len(kanwil_map)} Kanwil mappings")
-
-                    add_log("🔄 Loading mapping Kancab dari database...", "info")
-                    st.info("🔄 Loading mapping Kancab dari database...")
-                    kancab_result = supabase.table('kancab').select('*').execute()
-                    for kc in kancab_result.data:
-                        kancab_map[kc['nama_kancab']] = kc['kancab_id']
-                    add_log(f"✅ Loaded {len(kancab_map)} Kancab mappings", "success")
-                    st.success(f"✅ Loaded {len(kancab_map)} Kancab mappings")
-
-                    # Use NEW COMPARISON ALGORITHM for realisasi
-                    if table_name == "realisasi":
-                        st.markdown("---")
-                        st.markdown('<h4 style="color: #1f497d;">🔄 Using NEW COMPARISON ALGORITHM (APPEND MODE)</h4>', unsafe_allow_html=True)
-
-                        # Step 1: Migrate to realisasi_compare
-                        st.info("📥 Step 1: Migrating Excel data to realisasi_compare...")
-
-                        # Prepare kancab mapping with kanwil
-                        kancab_mapping_full = {}
-                        kancab_result_full = supabase.table('kancab').select('*, kanwil!inner(nama_kanwil)').execute()
-                        for k in kancab_result_full.data:
-                            key = (k['kanwil']['nama_kanwil'], k['nama_kancab'])
-                            kancab_mapping_full[key] = k['kancab_id']
-
-                        total_inserted, skipped_kanwil, skipped_kancab = migrate_to_realisasi_compare_streamlit(
-                            supabase, df_new, kanwil_map, kancab_mapping_full, kancab_column='Entitas'
-                        )
-
-                        # Step 2: Compare using RPC
-                        comparison_results = process_comparison_with_rpc_streamlit(supabase)
-
-                        # Step 3: Migrate unique data to realisasi
-                        if comparison_results:
-                            num_unique = migrate_from_compare_to_realisasi_streamlit(supabase, comparison_results)
-
-                            # Step 4: Cleanup realisasi_compare
-                            add_log("🗑️ Step 4: Cleaning up realisasi_compare...", "info")
-                            st.info("🗑️ Step 4: Cleaning up realisasi_compare...")
-                            try:
-                                truncate_table_with_reset(supabase, "realisasi_compare")
-                                st.success("✅ realisasi_compare table cleaned up")
-                            except Exception as e:
-                                add_log(f"⚠️ Error cleaning up realisasi_compare: {e}", "warning")
-                                st.warning(f"⚠️ Error cleaning up realisasi_compare: {e}")
-
-                            # Set unique_data for display (empty since we already migrated)
-                            unique_data = []
-                            num_duplicates = len(df_new) - len(comparison_results)
+                    if not st.button("🔀 Hitung Perubahan" if delta_preview else "🔀 Terapkan Delta Sync",
+                                     type="primary", use_container_width=True, key="start_delta"):
+                        st.stop()
 
-                            # Log final summary
-                            add_log("="*60, "success")
-                            add_log(f"✅ APPEND PROCESS COMPLETED!", "success")
-                            add_log(f"📊 Total Excel records: {len(df_new):,}", "info")
-                            add_log(f"✅ Unique records added: {num_unique:,}", "success")
-                            add_log(f"⚠️ Duplicate records skipped: {num_duplicates:,}", "warning")
-                            add_log("="*60, "success")
-                        else:
-                            st.info("✅ No unique data to migrate")
-                            num_unique = 0
-                            num_duplicates = len(df_new)
-                            unique_data = []
+                    # Delta men-stage ulang <table>_compare yang sedang dipakai job append
+                    running_job = running_append_job(job_store, table_name)
+                    if running_job:
+                        st.error(f"⚠️ Job {running_job['job_id']} untuk tabel {table_name} masih berjalan. Tunggu hingga selesai.")
+                        st.stop()
 
-                            # Log final summary
-                            add_log("="*60, "info")
-                            add_log(f"ℹ️ APPEND PROCESS COMPLETED - No new data", "info")
-                            add_log(f"📊 All {len(df_new):,} records already exist in database", "info")
-                            add_log("="*60, "info")
+                    add_log("="*60, "info")
+                    add_log(f"🔀 DELTA SYNC {'PREVIEW ' if delta_preview else ''}STARTED - Table: {table_name}", "info")
+                    add_log(f"📊 Total records from Excel: {len(df_new):,}", "info")
+                    add_log("="*60, "info")
+                    try:
+                        with st.spinner("🔀 Staging data dan menghitung perubahan..."):
+                            delta_summary = run_delta_sync(supabase_bulk, table_name, df_new, log=add_log,
+                                                           database_url=DATABASE_URL, apply=not delta_preview,
+                                                           ledger=upload_ledger, max_months=delta_max_months)
+                    except ScopeTooWide as e:
+                        st.error(f"❌ {e} - delta sync tidak dijalankan, {table_name} tidak berubah")
+                        st.stop()
+                    except DeltaSyncUnavailable as e:
+                        st.error(f"❌ Delta sync belum tersedia: {e}")
+                        st.info("Jalankan delta_sync_functions.sql di database terlebih dahulu")
+                        st.stop()
+                    except DeltaSyncIncomplete as e:
+                        add_log(f"❌ DELTA SYNC INCOMPLETE: {e}", "error")
+                        st.error(f"❌ Delta sync berhenti di bulan **{e.failed}**: {e.__cause__ or e}")
+                        if e.applied:
+                            # Bulan yang sudah diterapkan tetap berubah (riwayat upload sudah dihapus run_delta_sync)
+                            st.cache_data.clear()
+                            st.warning(f"⚠️ Bulan yang sudah diterapkan: **{', '.join(e.applied)}**. "
+                                       f"Jalankan delta sync lagi untuk bulan sisanya (window yang sudah sama tidak berubah).")
+                        else:
+                            st.info(f"Tidak ada bulan yang diterapkan, {table_name} tidak berubah")
+                        st.stop()
+                    except Exception as e:
+                        add_log(f"❌ FATAL ERROR during delta sync: {str(e)}", "error")
+                        st.error(f"❌ Error saat delta sync: {str(e)}")
+                        with st.expander("🔍 Detail Error"):
+                            st.code(str(e))
+                            st.code(traceback.format_exc())
+                        st.stop()
 
+                    col1, col2, col3, col4 = st.columns(4)
+                    with col1:
+                        st.metric("🆕 Ditambahkan", f"{delta_summary['inserted']:,}")
+                    with col2:
+                        st.metric("✏️ Dikoreksi", f"{delta_summary['updated']:,}")
+                    with col3:
+                        st.metric("🗑️ Dihapus", f"{delta_summary['deleted']:,}")
+                    with col4:
+                        st.metric("✅ Tidak Berubah", f"{delta_summary['unchanged']:,}")
+                    if delta_preview:
+                        st.info("👆 Hapus centang Preview lalu klik Terapkan untuk menulis perubahan ke database")
                     else:
-                        # For target tables, use NEW COMPARISON ALGORITHM (same as realisasi)
-                        st.markdown("---")
-                        st.markdown('<h4 style="color: #1f497d;">🔄 Using NEW COMPARISON ALGORITHM (APPEND MODE)</h4>', unsafe_allow_html=True)
+                        st.cache_data.clear()
+                        st.success(f"✅ **Delta sync selesai** ({delta_summary['windows']} bulan, "
+                                   f"transport: {delta_summary.get('transport', '-')})")
 
-                        if table_name == "target_kanwil":
-                            # Step 1: Migrate to target_kanwil_compare
-                            st.info("📥 Step 1: Migrating Excel data to target_kanwil_compare...")
+                elif upload_mode == "✂️ Scoped Replace (Ganti per bulan/kanwil)":
+                    st.warning(f"""
+                    **✂️ Mode Scoped Replace:**
+                    - Hanya **bulan tanggal penerimaan** dan **kanwil** yang ada di file yang diganti (hapus + muat ulang dalam satu transaksi)
+                    - Bulan dan kanwil lain di **{table_name}** tidak disentuh
+                    - Cocok untuk file koreksi satu bulan / satu kanwil
+                    """)
+                    scoped_max_months = render_file_scope(df_new, "scoped")
+                    scoped_all_kanwil = st.checkbox(
+                        "Ganti bulan tersebut untuk semua kanwil (file berisi data nasional)",
+                        value=False, key="scoped_all_kanwil",
+                        help="Kanwil yang tidak ada di file ikut dihapus pada bulan yang dicakup file"
+                    )
+                    confirm_scoped = st.checkbox(
+                        f"⚠️ Saya mengerti bahwa data {table_name} di bulan"
+                        f"{'' if scoped_all_kanwil else ' dan kanwil'} yang ada di file akan diganti",
+                        value=False, key="confirm_scoped"
+                    )
+                    st.markdown("---")
+                    if not st.button("✂️ Ganti Data di Scope File", type="primary", disabled=not confirm_scoped,
+                                     use_container_width=True, key="start_scoped"):
+                        st.stop()
 
-                            total_inserted, skipped_kanwil = migrate_to_target_kanwil_compare_streamlit(
-                                supabase, df_new, kanwil_map
-                            )
+                    # Scoped replace men-stage ulang <table>_compare yang sedang dipakai job append
+                    running_job = running_append_job(job_store, table_name)
+                    if running_job:
+                        st.error(f"⚠️ Job {running_job['job_id']} untuk tabel {table_name} masih berjalan. Tunggu hingga selesai.")
+                        st.stop()
 
-                            # Step 2: Compare using RPC
-                            comparison_results = process_comparison_target_kanwil_with_rpc_streamlit(supabase)
-
-                            # Step 3: Migrate unique data to target_kanwil
-                            if comparison_results:
-                                num_unique = migrate_from_target_kanwil_compare_to_target_kanwil_streamlit(supabase, comparison_results)
-
-                                # Step 4: Cleanup target_kanwil_compare
-                                add_log("🗑️ Step 4: Cleaning up target_kanwil_compare...", "info")
-                                st.info("🗑️ Step 4: Cleaning up target_kanwil_compare...")
-                                try:
-                                    truncate_table_with_reset(supabase, "target_kanwil_compare")
-                                    st.success("✅ target_kanwil_compare table cleaned up")
-                                except Exception as e:
-                                    add_log(f"⚠️ Error cleaning up target_kanwil_compare: {e}", "warning")
-                                    st.warning(f"⚠️ Error cleaning up target_kanwil_compare: {e}")
-
-                                # Set unique_data for display (empty since we already migrated)
-                                unique_data = []
-                                num_duplicates = len(df_new) - len(comparison_results)
-
-                                # Log final summary
-                                add_log("="*60, "success")
-                                add_log(f"✅ APPEND PROCESS COMPLETED!", "success")
-                                add_log(f"📊 Total Excel records: {len(df_new):,}", "info")
-                                add_log(f"✅ Unique records added: {num_unique:,}", "success")
-                                add_log(f"⚠️ Duplicate records skipped: {num_duplicates:,}", "warning")
-                                add_log("="*60, "success")
-                            else:
-                                st.info("✅ No unique data to migrate")
-                                num_unique = 0
-                                num_duplicates = len(df_new)
-                                unique_data = []
-
-                                # Log final summary
-                                add_log("="*60, "info")
-                                add_log(f"ℹ️ APPEND PROCESS COMPLETED - No new data", "info")
-                                add_log(f"📊 All {len(df_new):,} records already exist in database", "info")
-                                add_log("="*60, "info")
-
-                        else:  # target_kancab
-                            # Step 1: Migrate to target_kancab_compare
-                            st.info("📥 Step 1: Migrating Excel data to target_kancab_compare...")
-
-                            total_inserted, skipped_kancab = migrate_to_target_kancab_compare_streamlit(
-                                supabase, df_new, kancab_map
-                            )
+                    add_log("="*60, "warning")
+                    add_log(f"✂️ SCOPED REPLACE STARTED - Table: {table_name}", "warning")
+                    add_log(f"📊 Total records from Excel: {len(df_new):,}", "info")
+                    add_log("="*60, "warning")
+                    try:
+                        with st.spinner("✂️ Staging data dan mengganti scope file..."):
+                            scoped_summary = run_scoped_replace(supabase_bulk, table_name, df_new, log=add_log,
+                                                                database_url=DATABASE_URL,
+                                                                all_kanwil=scoped_all_kanwil,
+                                                                ledger=upload_ledger, max_months=scoped_max_months)
+                    except ScopeTooWide as e:
+                        st.error(f"❌ {e} - scoped replace tidak dijalankan, {table_name} tidak berubah")
+                        st.stop()
+                    except ScopedReplaceUnavailable as e:
+                        st.error(f"❌ Scoped replace belum tersedia: {e}")
+                        st.info("Jalankan scoped_replace_functions.sql di database terlebih dahulu")
+                        st.stop()
+                    except Exception as e:
+                        # Scope diganti dalam satu transaksi: gagal berarti data lama tetap utuh
+                        add_log(f"❌ FATAL ERROR during scoped replace: {str(e)}", "error")
+                        st.error(f"❌ Error saat scoped replace: {str(e)} - data {table_name} tidak berubah")
+                        with st.expander("🔍 Detail Error"):
+                            st.code(str(e))
+                            st.code(traceback.format_exc())
+                        st.stop()
 
-                            # Step 2: Compare using RPC
-                            comparison_results = process_comparison_target_kancab_with_rpc_streamlit(supabase)
-
-                            # Step 3: Migrate unique data to target_kancab
-                            if comparison_results:
-                                num_unique = migrate_from_target_kancab_compare_to_target_kancab_streamlit(supabase, comparison_results)
-
-                                # Step 4: Cleanup target_kancab_compare
-                                add_log("🗑️ Step 4: Cleaning up target_kancab_compare...", "info")
-                                st.info("🗑️ Step 4: Cleaning up target_kancab_compare...")
-                                try:
-                                    truncate_table_with_reset(supabase, "target_kancab_compare")
-                                    st.success("✅ target_kancab_compare table cleaned up")
-                                except Exception as e:
-                                    add_log(f"⚠️ Error cleaning up target_kancab_compare: {e}", "warning")
-                                    st.warning(f"⚠️ Error cleaning up target_kancab_compare: {e}")
-
-                                # Set unique_data for display (empty since we already migrated)
-                                unique_data = []
-                                num_duplicates = len(df_new) - len(comparison_results)
-
-                                # Log final summary
-                                add_log("="*60, "success")
-                                add_log(f"✅ APPEND PROCESS COMPLETED!", "success")
-                                add_log(f"📊 Total Excel records: {len(df_new):,}", "info")
-                                add_log(f"✅ Unique records added: {num_unique:,}", "success")
-                                add_log(f"⚠️ Duplicate records skipped: {num_duplicates:,}", "warning")
-                                add_log("="*60, "success")
-                            else:
-                                st.info("✅ No unique data to migrate")
-                                num_unique = 0
-                                num_duplicates = len(df_new)
-                                unique_data = []
-
-                                # Log final summary
-                                add_log("="*60, "info")
-                                add_log(f"ℹ️ APPEND PROCESS COMPLETED - No new data", "info")
-                                add_log(f"📊 All {len(df_new):,} records already exist in database", "info")
-                                add_log("="*60, "info")
-
-                    # Show metrics for all tables
-                    st.markdown("---")
                     col1, col2, col3 = st.columns(3)
                     with col1:
-                        st.metric("📊 Total Data Baru", f"{len(df_new):,}")
+                        st.metric("🗑️ Dihapus", f"{scoped_summary['deleted']:,}")
                     with col2:
-                        st.metric("✅ Data Unik", f"{num_unique:,}")
+                        st.metric("🆕 Dimuat", f"{scoped_summary['inserted']:,}")
                     with col3:
-                        st.metric("⚠️ Data Duplikat", f"{num_duplicates:,}")
-
-                    if num_unique > 0:
-                        # For all tables using NEW ALGORITHM, show summary (already migrated)
-                        st.success(f"""
-                        ✅ **Append berhasil!**
-                        - Tabel: **{selected_table}**
-                        - Data berhasil ditambahkan: **{num_unique:,}** records
-                        - Data duplikat (diabaikan): **{num_duplicates:,}** records
-                        """)
-                        st.balloons()
-                        st.info("🔄 Refresh halaman untuk melihat data terbaru")
-                    else:
-                        st.warning("⚠️ Tidak ada data unik untuk ditambahkan.")
+                        st.metric("🗂️ Partisi Ditukar", f"{scoped_summary['swapped_partitions']:,}")
+                    st.cache_data.clear()
+                    st.success(f"✅ **Scoped replace selesai** ({scoped_summary['scope'] or '-'}, "
+                               f"transport: {scoped_summary.get('transport', '-')})")
 
                 else:  # Replace mode
                     st.warning(f"""
                     **⚠️ Mode Replace:**
-                    - Semua data di tabel **{table_name}** akan **DIHAPUS**
-                    - Data baru akan menggantikan sepenuhnya
-                    - **TIDAK BISA dibatalkan!**
+                    - Semua data di tabel **{table_name}** akan **diganti** dengan data baru
+                    - Data baru dimuat ke **{table_name}_next**, dashboard tetap memakai data lama sampai swap
+                    - Data lama disimpan di **{previous_table_name(table_name)}** dan bisa di-rollback
                     """)
+                    render_replace_rollback(supabase_bulk, table_name, job_store)
 
                     st.markdown("---")
                     st.markdown('<h4 style="color: #1f497d;">📊 Debug: Info Data untuk Replace</h4>', unsafe_allow_html=True)
@@ -4280,6 +3458,12 @@ def main():
                         disabled=not confirm_replace,
                         use_container_width=True
                     ):
+                        # Replace mengosongkan / menukar tabel yang sedang diisi job append
+                        running_job = running_append_job(job_store, table_name)
+                        if running_job:
+                            st.error(f"⚠️ Job {running_job['job_id']} untuk tabel {table_name} masih berjalan. Tunggu hingga selesai.")
+                            st.stop()
+
                         try:
                             import time
                             start_time = time.time()
@@ -4301,65 +3485,21 @@ def main():
                             replace_progress.progress(10, "📋 Loading mapping IDs dari database...")
                             print("[STEP 1] Loading mapping IDs...")
                             add_log("📋 Step 1: Loading mapping IDs...", "info")
-                            kanwil_map = {}
-                            kancab_map = {}
-
-                            kanwil_result = supabase.table('kanwil').select('*').execute()
-                            for kw in kanwil_result.data:
-                                kanwil_map[kw['nama_kanwil']] = kw['kanwil_id']
-                            add_log(f"✅ Loaded {len(kanwil_map)} Kanwil mappings", "success")
-                            st.info(f"✅ Loaded {len(kanwil_map)} Kanwil mappings dari database")
-                            print(f"[STEP 1] Loaded {len(kanwil_map)} Kanwil mappings")
-
-                            kancab_result = supabase.table('kancab').select('*').execute()
-                            for kc in kancab_result.data:
-                                kancab_map[kc['nama_kancab']] = kc['kancab_id']
-                            add_log(f"✅ Loaded {len(kancab_map)} Kancab mappings", "success")
-                            st.info(f"✅ Loaded {len(kancab_map)} Kancab mappings dari database")
-                            print(f"[STEP 1] Loaded {len(kancab_map)} Kancab mappings")
-
-                            # Step 2-4: Use NEW COMPARISON ALGORITHM for realisasi
-                            if table_name == "realisasi":
-                                # Use migrate_to_realisasi_direct_streamlit (same as new_comparison_algorithm.py)
-                                replace_progress.progress(20, "🔧 Using NEW COMPARISON ALGORITHM (REPLACE MODE)...")
-                                print(f"[STEP 2-4] Using migrate_to_realisasi_direct for {len(df_new):,} records")
-
-                                # Prepare kancab mapping with kanwil
-                                kancab_mapping_full = {}
-                                kancab_result_full = supabase.table('kancab').select('*, kanwil!inner(nama_kanwil)').execute()
-                                for k in kancab_result_full.data:
-                                    key = (k['kanwil']['nama_kanwil'], k['nama_kancab'])
-                                    kancab_mapping_full[key] = k['kancab_id']
-
-                                # Call the new function
-                                inserted_total, skipped_kanwil, skipped_kancab = migrate_to_realisasi_direct_streamlit(
-                                    supabase, df_new, kanwil_map, kancab_mapping_full, kancab_column='Entitas'
-                                )
-                                failed_total = 0
-
-                            elif table_name == "target_kanwil":
-                                # Use migrate_to_target_kanwil_direct_streamlit (same as new_comparison_algorithm.py)
-                                replace_progress.progress(20, "🔧 Using NEW COMPARISON ALGORITHM (REPLACE MODE)...")
-                                print(f"[STEP 2-4] Using migrate_to_target_kanwil_direct for {len(df_new):,} records")
-
-                                # Call the new function
-                                inserted_total, skipped_kanwil = migrate_to_target_kanwil_direct_streamlit(
-                                    supabase, df_new, kanwil_map
-                                )
-                                failed_total = 0
-
-                            else:  # target_kancab
-                                # Use migrate_to_target_kancab_direct_streamlit (same as new_comparison_algorithm.py)
-                                replace_progress.progress(20, "🔧 Using NEW COMPARISON ALGORITHM (REPLACE MODE)...")
-                                print(f"[STEP 2-4] Using migrate_to_target_kancab_direct for {len(df_new):,} records")
-
-                                # Call the new function
-                                inserted_total, skipped_kancab = migrate_to_target_kancab_direct_streamlit(
-                                    supabase, df_new, kancab_map
-                                )
-                                failed_total = 0
-
-                            replace_progress.progress(100, "✅ Replace selesai!")
+                            mappings = load_mappings(supabase)
+                            add_log(f"✅ Loaded {len(mappings['kanwil'])} Kanwil mappings, {len(mappings['kancab'])} Kancab mappings", "success")
+                            st.info(f"✅ Loaded {len(mappings['kanwil'])} Kanwil & {len(mappings['kancab'])} Kancab mappings dari database")
+                            print(f"[STEP 1] Loaded {len(mappings['kanwil'])} Kanwil, {len(mappings['kancab'])} Kancab mappings")
+
+                            # Step 2-4: COPY / shadow swap / TRUNCATE + insert (replace_table_streamlit)
+                            replace_progress.progress(20, "🔧 Using NEW COMPARISON ALGORITHM (REPLACE MODE)...")
+                            print(f"[STEP 2-4] Using replace_table_streamlit for {len(df_new):,} records")
+                            # Ledger upload diperbarui run_replace: riwayat lama hanya dihapus jika isi tabel
+                            # benar-benar berubah, file ini dicatat jika replace lengkap
+                            inserted_total, failed_total, replace_summary = replace_table_streamlit(
+                                supabase_bulk, table_name, df_new, mappings, ledger=upload_ledger
+                            )
+
+                            replace_progress.progress(100, "❌ Replace tidak lengkap" if failed_total else "✅ Replace selesai!")
                             replace_progress.empty()
 
                             total_elapsed = time.time() - start_time
@@ -4371,24 +3511,38 @@ def main():
                             print("=" * 80)
 
                             # Log final summary
-                            add_log("="*60, "success")
-                            add_log(f"✅ REPLACE PROCESS COMPLETED!", "success")
+                            add_log("="*60, "error" if failed_total else "success")
+                            if failed_total:
+                                add_log(f"❌ REPLACE PROCESS INCOMPLETE!", "error")
+                            else:
+                                add_log(f"✅ REPLACE PROCESS COMPLETED!", "success")
                             add_log(f"⏱️ Total time: {total_elapsed:.2f}s ({total_elapsed/60:.2f} min)", "info")
                             add_log(f"✅ Successfully inserted: {inserted_total:,} records", "success")
                             add_log(f"❌ Failed: {failed_total:,} records", "error" if failed_total > 0 else "info")
                             add_log(f"⚡ Average speed: {inserted_total/total_elapsed if total_elapsed > 0 else 0:.0f} records/second", "info")
-                            add_log("="*60, "success")
-
-                            st.success(f"""
-                            ✅ **Replace berhasil!**
-                            - Tabel: **{selected_table}**
-                            - Data baru disimpan: **{inserted_total:,}** records
-                            - Data gagal: **{failed_total:,}** records
-                            - Waktu: **{total_elapsed:.2f}** detik
-                            """)
+                            add_log("="*60, "error" if failed_total else "success")
+
+                            if failed_total:
+                                st.error(f"""
+                                ❌ **Replace gagal / tidak lengkap!**
+                                - Tabel: **{selected_table}**
+                                - Data baru disimpan: **{inserted_total:,}** records
+                                - Data gagal: **{failed_total:,}** records
+                                - Waktu: **{total_elapsed:.2f}** detik
+
+                                Lihat log proses untuk detail; jika swap dibatalkan, tabel masih berisi data lama.
+                                """)
+                            else:
+                                st.success(f"""
+                                ✅ **Replace berhasil!**
+                                - Tabel: **{selected_table}**
+                                - Data baru disimpan: **{inserted_total:,}** records
+                                - Data gagal: **{failed_total:,}** records
+                                - Waktu: **{total_elapsed:.2f}** detik
+                                """)
 
-                            st.balloons()
-                            st.info("🔄 Refresh halaman untuk melihat data terbaru")
+                                st.balloons()
+                                st.info("🔄 Refresh halaman untuk melihat data terbaru")
 
                         except Exception as e:
                             add_log(f"❌ FATAL ERROR during replace: {str(e)}", "error")
@@ -4518,40 +3672,17 @@ def main():
     # Filter 2: Kanwil (untuk Line Chart & Tabel Kancab)
     with colB:
         st.markdown("#### Kanwil")
-        # Daftar kanwil (fixed 26 kanwil)
-        all_kanwil = [
-            "01001 - KANTOR WILAYAH ACEH",
-            "02001 - KANTOR WILAYAH SUMUT",
-            "03001 - KANTOR WILAYAH RIAU DAN KEPRI",
-            "04001 - KANTOR WILAYAH SUMBAR",
-            "05001 - KANTOR WILAYAH JAMBI",
-            "06001 - KANTOR WILAYAH SUMSEL",
-            "07001 - KANTOR WILAYAH BENGKULU",
-            "08001 - KANTOR WILAYAH LAMPUNG",
-            "09001 - KANTOR WILAYAH DKI JAKARTA BANTEN",
-            "10001 - KANTOR WILAYAH JABAR",
-            "11001 - KANTOR WILAYAH JATENG",
-            "12001 - KANTOR WILAYAH DI YOGYAKARTA",
-            "13001 - KANTOR WILAYAH JATIM",
-            "14001 - KANTOR WILAYAH KALBAR",
-            "15001 - KANTOR WILAYAH KALTIM KALTARA",
-            "16001 - KANTOR WILAYAH KALSEL",
-            "17001 - KANTOR WILAYAH KALTENG",
-            "18001 - KANTOR WILAYAH SULUT GORONTALO",
-            "19001 - KANTOR WILAYAH SULTENG",
-            "20001 - KANTOR WILAYAH SULTRA",
-            "21001 - KANTOR WILAYAH SULSEL SULBAR",
-            "22001 - KANTOR WILAYAH BALI",
-            "23001 - KANTOR WILAYAH N.T.B",
-            "24001 - KANTOR WILAYAH N.T.T",
-            "25001 - KANTOR WILAYAH MALUKU MALUT",
-            "26001 - KANTOR WILAYAH PAPUA PABAR"
-        ]
+        # Daftar kanwil dari registry (urut kode), dibatasi kanwil yang ada di tabel kanwil database
+        try:
+            all_kanwil = kanwil_options(get_dimensions(supabase).kanwil)
+        except Exception as e:
+            print(f"⚠️ Dimensi kanwil tidak bisa dimuat, memakai registry lengkap: {e}")
+            all_kanwil = kanwil_options()
 
         selected_kanwil = st.multiselect(
             "Pilih Kanwil:",
             options=all_kanwil,
-            default=["13001 - KANTOR WILAYAH JATIM"],
+            default=[display_name('13001')],
             label_visibility="collapsed",
             key="filter_kanwil"
         )
@@ -0,0 +1,15 @@
+"""
+Benchmark hot path dashboard & ingestion dengan data BULOG sintetis.
+
+    python -m benchmarks run --sizes 10k,100k
+    python -m benchmarks run --sizes 1m --only build_realisasi_records,generate_row_hash
+    python -m benchmarks compare benchmarks/results/old.json benchmarks/results/new.json
+"""
+from .synthetic import (
+    KANWIL_LIST,
+    generate_realisasi,
+    generate_target_kancab,
+    generate_target_kanwil,
+    mappings,
+    parse_size,
+)
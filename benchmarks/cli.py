@@ -0,0 +1,87 @@
+"""
+CLI benchmark.
+
+Contoh:
+    python -m benchmarks run --sizes 10k,100k
+    python -m benchmarks run --sizes 5m --only calculate_setara_beras,build_realisasi_records
+    python -m benchmarks list
+    python -m benchmarks compare benchmarks/results/a.json benchmarks/results/b.json
+    python -m benchmarks partitions --database-url postgresql://postgres@localhost/postgres --rows 10m
+"""
+import argparse
+import json
+import sys
+
+from .partitions import run_partition_benchmark
+from .suite import BENCHMARKS, compare_results, default_output_path, run_suite, save_results
+from .synthetic import parse_size
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="benchmarks", description="Benchmark hot path dengan data BULOG sintetis")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Jalankan benchmark dan simpan hasil JSON")
+    run.add_argument("--sizes", default="10k,100k", help="Ukuran data, pisahkan koma: 10k,100k,1m,5m")
+    run.add_argument("--only", default=None, help="Nama benchmark (pisahkan koma); default semua")
+    run.add_argument("--repeats", type=int, default=None, help="Jumlah pengulangan (default 3, atau 1 untuk >= 1M rows)")
+    run.add_argument("--seed", type=int, default=42, help="Seed generator data sintetis")
+    run.add_argument("--no-limit", action="store_true", help="Abaikan batas rows benchmark lambat (find_unique_records, generate_row_hash)")
+    run.add_argument("--output", default=None, help="Path file JSON (default benchmarks/results/<waktu>_<commit>.json)")
+
+    sub.add_parser("list", help="Daftar benchmark")
+
+    compare = sub.add_parser("compare", help="Bandingkan dua file hasil JSON")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=1.2, help="Rasio waktu yang dianggap regresi (default 1.2 = 20%% lebih lambat)")
+
+    partitions = sub.add_parser("partitions", help="Partisi bulanan vs tabel biasa di PostgreSQL (butuh psycopg2)")
+    partitions.add_argument("--database-url", required=True, help="PostgreSQL tujuan (schema bench_partitions dibuat ulang)")
+    partitions.add_argument("--rows", default="10m", help="Jumlah baris per tabel (default 10m)")
+    partitions.add_argument("--repeats", type=int, default=5, help="Pengulangan per query (median)")
+    partitions.add_argument("--keep", action="store_true", help="Jangan hapus schema bench_partitions setelah selesai")
+    partitions.add_argument("--output", default=None, help="Path file JSON (default benchmarks/results/<waktu>_<commit>_partitions.json)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.command == "list":
+        for name, (source, _, max_rows) in BENCHMARKS.items():
+            limit = f"(maks {max_rows:,} rows)" if max_rows else ""
+            print(f"{name:<30} {source:<10} {limit}")
+        return 0
+
+    if args.command == "compare":
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        with open(args.current, encoding="utf-8") as f:
+            current = json.load(f)
+        print(f"Baseline: {baseline['meta']['git']['commit']} ({baseline['meta']['timestamp']})")
+        print(f"Current : {current['meta']['git']['commit']} ({current['meta']['timestamp']})")
+        print(f"{'Benchmark':<30} {'Rows':>10} {'Baseline s':>11} {'Current s':>11} {'Ratio':>7}")
+        regressions = 0
+        for name, rows, before, after, ratio, regression in compare_results(baseline, current, args.threshold):
+            flag = " ⚠️ REGRESI" if regression else ""
+            regressions += regression
+            print(f"{name:<30} {rows:>10,} {before:>11.3f} {after:>11.3f} {ratio:>6.2f}x{flag}")
+        return 1 if regressions else 0
+
+    if args.command == "partitions":
+        result = run_partition_benchmark(args.database_url, parse_size(args.rows), repeats=args.repeats, keep=args.keep)
+        path = save_results(result, args.output or default_output_path(result).replace(".json", "_partitions.json"))
+        print(f"💾 Hasil disimpan ke {path}")
+        return 0
+
+    sizes = [parse_size(size) for size in args.sizes.split(",") if size.strip()]
+    names = [name.strip() for name in args.only.split(",")] if args.only else None
+    result = run_suite(sizes, names=names, repeats=args.repeats, seed=args.seed, no_limit=args.no_limit)
+    path = save_results(result, args.output)
+    print(f"💾 Hasil disimpan ke {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
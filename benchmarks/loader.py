@@ -0,0 +1,98 @@
+"""
+Ambil fungsi murni dari app.py / app-excel.py tanpa menjalankan script Streamlit-nya.
+
+app.py dan app-excel.py langsung memanggil st.set_page_config, membaca secrets dan
+membuat client Supabase saat di-import, jadi fungsi yang mau di-benchmark diambil
+lewat ast (hanya definisi fungsinya) lalu di-compile di namespace terpisah.
+"""
+import ast
+import os
+from datetime import datetime, timedelta
+from io import BytesIO
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class SilentStreamlit:
+    """
+    Pengganti modul st saat benchmark: semua elemen UI (st.info, st.progress, ...)
+    menjadi no-op supaya yang terukur hanya komputasi datanya.
+    """
+
+    def __init__(self):
+        self.session_state = {}
+
+    def __getattr__(self, name):
+        return _NoOp()
+
+    def columns(self, spec, **kwargs):
+        count = spec if isinstance(spec, int) else len(spec)
+        return [_NoOp() for _ in range(count)]
+
+    def tabs(self, labels):
+        return [_NoOp() for _ in labels]
+
+
+class _NoOp:
+    def __call__(self, *args, **kwargs):
+        return _NoOp()
+
+    def __getattr__(self, name):
+        return _NoOp()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def base_namespace():
+    return {
+        'pd': pd,
+        'np': np,
+        'datetime': datetime,
+        'timedelta': timedelta,
+        'BytesIO': BytesIO,
+        'openpyxl': openpyxl,
+        'Font': Font,
+        'PatternFill': PatternFill,
+        'Alignment': Alignment,
+        'Border': Border,
+        'Side': Side,
+        'st': SilentStreamlit(),
+    }
+
+
+def load_functions(filename, names, namespace=None):
+    """
+    Compile definisi fungsi `names` dari file script (relatif ke root repo).
+    Returns dict nama -> function (semua berbagi satu namespace, jadi fungsi
+    bisa saling memanggil).
+    """
+    path = os.path.join(REPO_ROOT, filename)
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    wanted = set(names)
+    nodes = [
+        node for node in tree.body
+        if isinstance(node, ast.FunctionDef) and node.name in wanted
+    ]
+    missing = wanted - {node.name for node in nodes}
+    if missing:
+        raise LookupError(f"Fungsi tidak ditemukan di {filename}: {', '.join(sorted(missing))}")
+
+    for node in nodes:
+        # Decorator Streamlit (@st.cache_data) tidak dibutuhkan untuk benchmark
+        node.decorator_list = []
+
+    module = ast.Module(body=nodes, type_ignores=[])
+    namespace = namespace if namespace is not None else base_namespace()
+    exec(compile(module, path, 'exec'), namespace)
+    return {name: namespace[name] for name in names}
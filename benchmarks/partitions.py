@@ -0,0 +1,225 @@
+"""
+Benchmark partisi bulanan realisasi di PostgreSQL lokal (lihat partition_functions.sql).
+
+Dua tabel dengan kolom yang dipakai dashboard dan index yang sama dibuat di schema
+bench_partitions dan diisi server-side (generate_series, tanpa transfer data):
+
+- realisasi_plain : tabel biasa (kondisi sebelum migrasi)
+- realisasi_part  : RANGE per bulan pada tanggal_penerimaan + partisi default
+
+tanggal_penerimaan tersebar ~3 tahun (skew ke panen raya Mar-Mei seperti
+benchmarks.synthetic), 26 kanwil, sebagian kecil tanggal NULL. Yang diukur:
+
+- query dashboard (sum per kanwil, trend harian satu kanwil) untuk 30 hari
+  terakhir dan YTD: median ms + jumlah partisi yang dibaca (EXPLAIN JSON)
+- VACUUM (ANALYZE) satu bulan vs seluruh tabel biasa
+
+Butuh psycopg2 dan database_url ke PostgreSQL yang boleh dibuatkan schema:
+    python -m benchmarks partitions --database-url postgresql://postgres@localhost/postgres --rows 10m
+"""
+import statistics
+import time
+from datetime import date
+
+from .suite import environment_info
+
+SCHEMA = 'bench_partitions'
+END_DATE = date(2025, 12, 31)
+YEARS = 3
+KANWIL_COUNT = 26
+
+COLUMNS = """
+    id bigserial,
+    kanwil_id integer,
+    kancab_id integer,
+    nomor_po text,
+    no_in_out text,
+    produk text,
+    tanggal_penerimaan date,
+    komoditi text,
+    spesifikasi text,
+    kuantum_po_kg numeric,
+    qty_in_out numeric,
+    nominal_realisasi_incl_ppn numeric,
+    row_hash text
+"""
+
+# Sama dengan index realisasi setelah delta_sync_functions.sql / partition_table_by_month
+INDEXES = (
+    "CREATE INDEX ON {table} (tanggal_penerimaan, kanwil_id)",
+    "CREATE INDEX ON {table} (kanwil_id)",
+)
+
+# Hari ke-n dalam rentang: campuran uniform dan panen raya (Mar-Mei) per tahun
+FILL = """
+INSERT INTO {table} (kanwil_id, kancab_id, nomor_po, no_in_out, produk, tanggal_penerimaan,
+                     komoditi, spesifikasi, kuantum_po_kg, qty_in_out, nominal_realisasi_incl_ppn, row_hash)
+SELECT k, k * 100 + (g %% 7), 'PO/' || g, 'IN/' || g, 'P' || (g %% 500),
+       CASE WHEN g %% 200 = 0 THEN NULL
+            WHEN g %% 3 = 0 THEN make_date((%(first_year)s + (g / 3) %% %(years)s)::integer, 3, 1) + ((g * 7919) %% 92)::integer
+            ELSE %(start)s::date + ((g * 104729) %% %(days)s)::integer END,
+       CASE g %% 10 WHEN 0 THEN 'BERAS PREMIUM' WHEN 1 THEN 'BERAS MEDIUM' WHEN 2 THEN 'BERAS MEDIUM' ELSE 'GABAH' END,
+       CASE WHEN g %% 5 = 0 THEN 'GKG' ELSE 'GKP' END,
+       1000 + (g %% 9000), 1000 + (g %% 9000), (1000 + (g %% 9000)) * 12000, md5(g::text)
+FROM generate_series(%(lo)s::bigint, %(hi)s::bigint) AS g,
+     LATERAL (SELECT 1 + ((g * 31) %% %(kanwil)s)::integer AS k) AS kanwil
+"""
+
+QUERIES = {
+    'sum_per_kanwil_30d': (
+        "SELECT kanwil_id, sum(kuantum_po_kg), sum(nominal_realisasi_incl_ppn) FROM {table} "
+        "WHERE tanggal_penerimaan BETWEEN %(from_30d)s AND %(to)s GROUP BY kanwil_id"
+    ),
+    'sum_per_kanwil_ytd': (
+        "SELECT kanwil_id, sum(kuantum_po_kg), sum(nominal_realisasi_incl_ppn) FROM {table} "
+        "WHERE tanggal_penerimaan BETWEEN %(from_ytd)s AND %(to)s GROUP BY kanwil_id"
+    ),
+    'trend_kanwil_30d': (
+        "SELECT tanggal_penerimaan, sum(kuantum_po_kg) FROM {table} "
+        "WHERE kanwil_id = 11 AND tanggal_penerimaan BETWEEN %(from_30d)s AND %(to)s GROUP BY 1 ORDER BY 1"
+    ),
+    'trend_kanwil_ytd': (
+        "SELECT tanggal_penerimaan, sum(kuantum_po_kg) FROM {table} "
+        "WHERE kanwil_id = 11 AND tanggal_penerimaan BETWEEN %(from_ytd)s AND %(to)s GROUP BY 1 ORDER BY 1"
+    ),
+}
+
+TABLES = ('realisasi_plain', 'realisasi_part')
+FILL_CHUNK_ROWS = 1_000_000
+
+
+def _connect(database_url):
+    try:
+        import psycopg2
+    except ImportError as e:
+        raise SystemExit("psycopg2 belum terpasang (pip install psycopg2-binary)") from e
+    conn = psycopg2.connect(database_url)
+    conn.autocommit = True
+    return conn
+
+
+def _months(start, end):
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        yield date(year, month, 1)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def create_tables(cursor, rows, log=print):
+    """Buat ulang schema bench dan isi kedua tabel. Returns detik load per tabel."""
+    start = date(END_DATE.year - YEARS + 1, 1, 1)
+    cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+    cursor.execute(f"SET search_path = {SCHEMA}")
+    cursor.execute(f"CREATE TABLE realisasi_plain ({COLUMNS}, PRIMARY KEY (id))")
+    cursor.execute(f"CREATE TABLE realisasi_part ({COLUMNS}, UNIQUE (id, tanggal_penerimaan)) "
+                   f"PARTITION BY RANGE (tanggal_penerimaan)")
+    for month in _months(start, END_DATE):
+        upper = date(month.year + 1, 1, 1) if month.month == 12 else date(month.year, month.month + 1, 1)
+        cursor.execute(f"CREATE TABLE realisasi_part_p{month:%Y_%m} PARTITION OF realisasi_part "
+                       f"FOR VALUES FROM ('{month}') TO ('{upper}')")
+    cursor.execute("CREATE TABLE realisasi_part_pdefault PARTITION OF realisasi_part DEFAULT")
+
+    params = {'first_year': start.year, 'years': YEARS, 'start': start,
+              'days': (END_DATE - start).days + 1, 'kanwil': KANWIL_COUNT}
+    load_seconds = {}
+    for table in TABLES:
+        began = time.perf_counter()
+        for lo in range(1, rows + 1, FILL_CHUNK_ROWS):
+            hi = min(lo + FILL_CHUNK_ROWS - 1, rows)
+            cursor.execute(FILL.format(table=table), {**params, 'lo': lo, 'hi': hi})
+            log(f"  {table}: {hi:,}/{rows:,} rows")
+        for statement in INDEXES:
+            cursor.execute(statement.format(table=table))
+        cursor.execute(f"VACUUM (ANALYZE) {table}")
+        load_seconds[table] = round(time.perf_counter() - began, 2)
+        log(f"✅ {table} dimuat dalam {load_seconds[table]:.1f}s")
+    return load_seconds
+
+
+def _scanned_partitions(plan):
+    """Nama relasi yang dibaca di plan EXPLAIN (FORMAT JSON)"""
+    names = set()
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if 'Relation Name' in node:
+            names.add(node['Relation Name'])
+        stack.extend(node.get('Plans', []))
+    return names
+
+
+def time_queries(cursor, repeats=5, log=print):
+    year_start = date(END_DATE.year, 1, 1)
+    params = {'to': END_DATE, 'from_30d': date.fromordinal(END_DATE.toordinal() - 29), 'from_ytd': year_start}
+    results = []
+    for name, query in QUERIES.items():
+        for table in TABLES:
+            statement = query.format(table=table)
+            cursor.execute("EXPLAIN (FORMAT JSON) " + statement, params)
+            plan = cursor.fetchone()[0][0]['Plan']
+            cursor.execute(statement, params)  # cache hangat
+            cursor.fetchall()
+            timings = []
+            for _ in range(repeats):
+                began = time.perf_counter()
+                cursor.execute(statement, params)
+                cursor.fetchall()
+                timings.append((time.perf_counter() - began) * 1000)
+            result = {
+                'query': name,
+                'table': table,
+                'median_ms': round(statistics.median(timings), 2),
+                'best_ms': round(min(timings), 2),
+                'relations_scanned': len(_scanned_partitions(plan)),
+            }
+            results.append(result)
+            log(f"{name:<22} {table:<16} {result['median_ms']:>10.1f} ms  "
+                f"({result['relations_scanned']} relasi dibaca)")
+    return results
+
+
+def time_maintenance(cursor, log=print):
+    """VACUUM (ANALYZE) satu bulan terakhir di tabel partisi vs seluruh tabel biasa"""
+    # Update kecil di bulan terakhir supaya VACUUM punya pekerjaan di kedua tabel
+    month = date(END_DATE.year, END_DATE.month, 1)
+    results = {}
+    for table, target in (('realisasi_plain', 'realisasi_plain'),
+                          ('realisasi_part', f"realisasi_part_p{month:%Y_%m}")):
+        cursor.execute(f"UPDATE {table} SET qty_in_out = qty_in_out + 1 "
+                       f"WHERE tanggal_penerimaan >= %s AND id %% 10 = 0", [month])
+        began = time.perf_counter()
+        cursor.execute(f"VACUUM (ANALYZE) {target}")
+        results[target] = round((time.perf_counter() - began) * 1000, 1)
+        log(f"🧹 VACUUM (ANALYZE) {target:<28} {results[target]:>10.1f} ms")
+    return results
+
+
+def run_partition_benchmark(database_url, rows, repeats=5, keep=False, log=print):
+    conn = _connect(database_url)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SHOW server_version")
+            server_version = cursor.fetchone()[0]
+            log(f"🗂️ Memuat {rows:,} rows ke {SCHEMA} (PostgreSQL {server_version})...")
+            load_seconds = create_tables(cursor, rows, log=log)
+            cursor.execute("SELECT pg_total_relation_size('realisasi_plain'), "
+                           "(SELECT sum(pg_total_relation_size(inhrelid)) FROM pg_inherits "
+                           "WHERE inhparent = 'realisasi_part'::regclass)")
+            plain_bytes, part_bytes = cursor.fetchone()
+            queries = time_queries(cursor, repeats=repeats, log=log)
+            maintenance = time_maintenance(cursor, log=log)
+            if not keep:
+                cursor.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+    finally:
+        conn.close()
+
+    return {
+        'meta': {**environment_info(), 'postgres': server_version, 'rows': rows, 'repeats': repeats,
+                 'date_range': [f"{END_DATE.year - YEARS + 1}-01-01", END_DATE.isoformat()]},
+        'load_seconds': load_seconds,
+        'size_mb': {'realisasi_plain': round(plain_bytes / 1024 / 1024, 1),
+                    'realisasi_part': round(int(part_bytes) / 1024 / 1024, 1)},
+        'queries': queries,
+        'vacuum_ms': maintenance,
+    }
@@ -0,0 +1,168 @@
+"""
+Stand-in PostgREST lokal yang di-throttle, untuk benchmark insert tanpa Supabase.
+
+Server HTTP sederhana (POST /<tabel> dengan body JSON array) yang meniru batasan
+Supabase yang relevan untuk ukuran batch:
+
+- latency per request = overhead jaringan + biaya per baris
+- hanya `capacity` statement berjalan bersamaan (pool koneksi database); sisanya antri
+- statement lebih lama dari statement_timeout -> 500 dengan kode 57014
+- body lebih besar dari max_payload_bytes -> 413
+- lebih dari rate_limit request/detik -> 429 dengan Retry-After
+
+StandInClient menyediakan client.table(nama).insert(rows).execute() seperti
+supabase-py sehingga ingestion.writer.insert_batches bisa dipakai apa adanya.
+"""
+import http.client
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StandInError(Exception):
+    """Response error dari stand-in (status, body, retry_after); code dari body seperti APIError PostgREST"""
+
+    def __init__(self, status, body, retry_after=None):
+        super().__init__(f"{status} {body}")
+        self.status = status
+        self.retry_after = retry_after
+        try:
+            self.code = json.loads(body).get('code')
+        except (ValueError, AttributeError):
+            self.code = None
+
+
+class ThrottledPostgrest:
+    def __init__(self, base_latency=0.12, per_row_seconds=0.00003, capacity=6, statement_timeout=1.0,
+                 max_payload_bytes=2 * 1024 * 1024, rate_limit=30):
+        self.base_latency = base_latency
+        self.per_row_seconds = per_row_seconds
+        self.capacity = threading.BoundedSemaphore(capacity)
+        self.statement_timeout = statement_timeout
+        self.max_payload_bytes = max_payload_bytes
+        self.rate_limit = rate_limit
+        self.lock = threading.Lock()
+        self.tokens = float(rate_limit)
+        self.refilled_at = time.monotonic()
+        self.counts = {'requests': 0, 'rows': 0, 'status_413': 0, 'status_429': 0, 'status_57014': 0}
+        self.server = None
+
+    def take_token(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate_limit, self.tokens + (now - self.refilled_at) * self.rate_limit)
+            self.refilled_at = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def count(self, key, value=1):
+        with self.lock:
+            self.counts[key] += value
+
+    def handle(self, body):
+        """Returns (status, body, headers)"""
+        self.count('requests')
+        if not self.take_token():
+            self.count('status_429')
+            return 429, '{"message":"Too Many Requests"}', {'Retry-After': '0.5'}
+        if len(body) > self.max_payload_bytes:
+            self.count('status_413')
+            return 413, '{"message":"Payload Too Large"}', {}
+        rows = len(json.loads(body))
+        time.sleep(self.base_latency)
+        with self.capacity:
+            seconds = rows * self.per_row_seconds
+            if seconds > self.statement_timeout:
+                time.sleep(self.statement_timeout)
+                self.count('status_57014')
+                return 500, '{"code":"57014","message":"canceling statement due to statement timeout"}', {}
+            time.sleep(seconds)
+        self.count('rows', rows)
+        return 201, '', {}
+
+    def start(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                status, content, headers = standin.handle(body)
+                content = content.encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+class _Insert:
+    def __init__(self, client, table_name, rows):
+        self.client = client
+        self.table_name = table_name
+        self.rows = rows
+
+    def execute(self):
+        return self.client.post(f"/{self.table_name}", json.dumps(self.rows, default=str))
+
+
+class _Table:
+    def __init__(self, client, table_name):
+        self.client = client
+        self.table_name = table_name
+
+    def insert(self, rows):
+        return _Insert(self.client, self.table_name, rows)
+
+
+class StandInClient:
+    """Client minimal (table().insert().execute()) dengan koneksi keep-alive per thread"""
+
+    def __init__(self, port):
+        self.port = port
+        self.local = threading.local()
+
+    def connection(self):
+        if getattr(self.local, 'conn', None) is None:
+            self.local.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+        return self.local.conn
+
+    def post(self, path, body):
+        conn = self.connection()
+        try:
+            conn.request('POST', path, body=body.encode(), headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            content = response.read().decode()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            self.local.conn = None
+            raise
+        if response.status >= 400:
+            raise StandInError(response.status, content, response.getheader('Retry-After'))
+        return content
+
+    def table(self, table_name):
+        return _Table(self, table_name)
@@ -0,0 +1,435 @@
+"""
+Daftar benchmark hot path dashboard & ingestion beserta runner-nya.
+
+Setiap benchmark punya setup(ctx) yang menyiapkan argumen (tidak ikut diukur)
+dan fungsi yang diukur. Hasil disimpan sebagai JSON agar bisa dibandingkan
+antar commit (lihat compare_results).
+"""
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from ingestion.adaptive import AdaptiveController, FixedController
+from ingestion.hashing import REALISASI_HASH_FIELDS, add_row_hashes, generate_row_hash
+from ingestion.records import (
+    REALISASI_DECIMAL_COLUMNS,
+    RecordBatch,
+    build_realisasi_records,
+    build_target_kancab_records,
+    build_target_kanwil_records,
+    collapse_duplicates,
+    decimal_values,
+    float_values,
+    map_unique,
+)
+from ingestion.writer import insert_batches
+from rpc_columnar import decode_csv, decode_json
+
+from . import synthetic
+from .loader import REPO_ROOT, load_functions
+from .standin import StandInClient, ThrottledPostgrest
+
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+STANDIN_STATEMENT_TIMEOUT = 1.0
+
+APP_EXCEL_FUNCTIONS = [
+    'calculate_setara_beras',
+    'create_summary_table',
+    'create_kancab_table',
+    'create_complex_table',
+    'render_summary_table_html',
+    'create_summary_excel_export',
+    'create_kancab_excel_export',
+    'create_excel_export',
+]
+APP_FUNCTIONS = ['clean_value', 'convert_to_date', 'convert_to_decimal', 'find_unique_records']
+
+
+class Context:
+    """Data sintetis untuk satu ukuran (dibuat sekali, dipakai semua benchmark)"""
+
+    def __init__(self, rows, seed=42):
+        self.rows = rows
+        self.seed = seed
+        self._cache = {}
+
+    def get(self, key, factory):
+        if key not in self._cache:
+            self._cache[key] = factory()
+        return self._cache[key]
+
+    @property
+    def realisasi(self):
+        """Realisasi seperti hasil load_main_data (tanggal datetime, numerik float)"""
+        return self.get('realisasi', lambda: synthetic.generate_realisasi(self.rows, seed=self.seed))
+
+    @property
+    def realisasi_upload(self):
+        """Realisasi seperti hasil read_excel upload (kolom numerik presisi sebagai str)"""
+        def factory():
+            df = self.realisasi.copy()
+            for column in ('Kuantum PO (Kg)', 'In / Out', 'Harga Include ppn', 'Nominal Realisasi Incl ppn'):
+                df[column] = df[column].astype(str)
+            return df
+        return self.get('realisasi_upload', factory)
+
+    @property
+    def mappings(self):
+        return self.get('mappings', lambda: synthetic.mappings(self.seed))
+
+    @property
+    def target_kanwil(self):
+        return self.get('target_kanwil', lambda: synthetic.generate_target_kanwil(self.seed))
+
+    @property
+    def target_kancab(self):
+        return self.get('target_kancab', lambda: synthetic.generate_target_kancab(self.seed))
+
+    @property
+    def selected_date(self):
+        return self.realisasi['Tanggal Penerimaan'].max().date()
+
+    @property
+    def rpc_trend(self):
+        return self.get('rpc_trend', lambda: synthetic.generate_rpc_trend(self.rows, seed=self.seed))
+
+    @property
+    def records(self):
+        """Records realisasi siap insert (tanpa row_hash)"""
+        return self.get('records', lambda: build_realisasi_records(
+            self.realisasi_upload, self.mappings['kanwil'], self.mappings['kancab_full'], with_hash=False
+        ).records)
+
+    @property
+    def standin(self):
+        """Stand-in PostgREST ter-throttle (dijalankan sekali per ukuran data)"""
+        return self.get('standin', lambda: ThrottledPostgrest(statement_timeout=STANDIN_STATEMENT_TIMEOUT).start())
+
+    def tiled(self, df):
+        """Ulangi DataFrame kecil (target) sampai sejumlah rows"""
+        repeats = -(-self.rows // len(df))
+        return pd.concat([df] * repeats, ignore_index=True).iloc[:self.rows]
+
+
+def _app_excel():
+    return load_functions('app-excel.py', APP_EXCEL_FUNCTIONS)
+
+
+def _app():
+    return load_functions('app.py', APP_FUNCTIONS)
+
+
+# ---- setup per benchmark: return (callable, args) ----
+
+def setup_calculate_setara_beras(ctx, fn):
+    return fn['calculate_setara_beras'], (ctx.realisasi,)
+
+
+def setup_create_summary_table(ctx, fn):
+    return fn['create_summary_table'], (ctx.realisasi, ctx.target_kanwil)
+
+
+def setup_create_kancab_table(ctx, fn):
+    return fn['create_kancab_table'], (ctx.realisasi, ctx.target_kancab)
+
+
+def setup_create_complex_table(ctx, fn):
+    return fn['create_complex_table'], (ctx.realisasi, ctx.selected_date, synthetic.KANWIL_LIST)
+
+
+def setup_create_summary_excel_export(ctx, fn):
+    data_sentra, data_lainnya = fn['create_summary_table'](ctx.realisasi, ctx.target_kanwil)
+    start_date = ctx.realisasi['Tanggal Penerimaan'].min().date()
+    _, *totals = fn['render_summary_table_html'](data_sentra, data_lainnya, start_date, ctx.selected_date)
+    return fn['create_summary_excel_export'], (data_sentra, data_lainnya, start_date, ctx.selected_date, *totals)
+
+
+def setup_create_kancab_excel_export(ctx, fn):
+    kancab_df = fn['create_kancab_table'](ctx.realisasi, ctx.target_kancab)
+    return fn['create_kancab_excel_export'], (kancab_df, ctx.selected_date)
+
+
+def setup_create_excel_export(ctx, fn):
+    complex_df, tanggal_kemarin, tanggal_hari_ini = fn['create_complex_table'](
+        ctx.realisasi, ctx.selected_date, synthetic.KANWIL_LIST
+    )
+    return fn['create_excel_export'], (complex_df, tanggal_kemarin, tanggal_hari_ini)
+
+
+def setup_find_unique_records(ctx, fn):
+    # Separuh data sudah ada di database -> separuh hasil compare adalah duplikat
+    half = ctx.realisasi_upload.iloc[: ctx.rows // 2]
+    records = build_realisasi_records(half, ctx.mappings['kanwil'], ctx.mappings['kancab_full'], with_hash=False)
+    df_db = pd.DataFrame(records.records)
+    return fn['find_unique_records'], (df_db, ctx.realisasi_upload, ctx.mappings['kanwil'], ctx.mappings['kancab'])
+
+
+def setup_generate_row_hash(ctx, fn):
+    return (lambda items: [generate_row_hash(record) for record in items]), (ctx.records,)
+
+
+def setup_collapse_duplicates(ctx, fn):
+    # ~30% baris identik dengan baris lain di upload yang sama
+    unique = [dict(record) for record in ctx.records[:max(len(ctx.records) * 7 // 10, 1)]]
+    add_row_hashes(unique, REALISASI_HASH_FIELDS)
+    records = (unique + unique)[:len(ctx.records)]
+    return (lambda items: collapse_duplicates(RecordBatch(list(items)))), (records,)
+
+
+def setup_build_realisasi_records(ctx, fn):
+    return build_realisasi_records, (ctx.realisasi_upload, ctx.mappings['kanwil'], ctx.mappings['kancab_full'])
+
+
+def setup_build_target_kanwil_records(ctx, fn):
+    return build_target_kanwil_records, (ctx.tiled(ctx.target_kanwil), ctx.mappings['kanwil'])
+
+
+def setup_build_target_kancab_records(ctx, fn):
+    return build_target_kancab_records, (ctx.tiled(ctx.target_kancab), ctx.mappings['kancab'])
+
+
+def _decimal_columns(ctx):
+    return [ctx.realisasi_upload[excel_col] for excel_col in REALISASI_DECIMAL_COLUMNS.values()]
+
+
+def setup_normalize_decimal_legacy(ctx, fn):
+    # prepare_realisasi_for_db lama: convert_to_decimal dua kali per sel
+    convert = fn['convert_to_decimal']
+
+    def run(columns):
+        return [[float(convert(value)) if convert(value) else None for value in column] for column in columns]
+    return run, (_decimal_columns(ctx),)
+
+
+def setup_normalize_decimal_float(ctx, fn):
+    # Pembanding astype(float): 'nan' tetap NaN (bukan None seperti clean_value)
+    return (lambda columns: [float_values(column, {}) for column in columns]), (_decimal_columns(ctx),)
+
+
+def setup_normalize_decimal(ctx, fn):
+    return (lambda columns: [decimal_values(column, {}) for column in columns]), (_decimal_columns(ctx),)
+
+
+def _text_date_columns(ctx):
+    # Tanggal sebagai teks (sel Excel berformat teks) -> jalur pd.to_datetime per nilai
+    def factory():
+        return [ctx.realisasi_upload[column].dt.strftime('%Y-%m-%d').astype(object)
+                for column in ('Tanggal PO', 'Tanggal Penerimaan', 'Tanggal Kirim Keuangan')]
+    return ctx.get('text_date_columns', factory)
+
+
+def setup_normalize_date_legacy(ctx, fn):
+    convert = fn['convert_to_date']
+    return (lambda columns: [column.apply(convert) for column in columns]), (_text_date_columns(ctx),)
+
+
+def setup_normalize_date(ctx, fn):
+    convert = fn['convert_to_date']
+    return (lambda columns: [map_unique(column, convert) for column in columns]), (_text_date_columns(ctx),)
+
+
+def setup_decode_rpc_json(ctx, fn):
+    # Body response PostgREST default: JSON array of objects
+    payload = ctx.get('rpc_json', lambda: ctx.rpc_trend.to_json(orient='records').encode())
+    return decode_json, (payload,)
+
+
+def setup_decode_rpc_csv(ctx, fn):
+    # Body response PostgREST dengan Accept: text/csv (atau output COPY ... CSV HEADER)
+    payload = ctx.get('rpc_csv', lambda: ctx.rpc_trend.to_csv(index=False).encode())
+    return decode_csv, (payload,)
+
+
+def _standin_insert(ctx, make_controller):
+    client = StandInClient(ctx.standin.port)
+
+    def run(records):
+        return insert_batches(client, 'realisasi', records, controller=make_controller(), log=lambda *args: None)
+    return run, (ctx.records,)
+
+
+def setup_insert_standin_fixed_sleep(ctx, fn):
+    # Loop lama app.py: batch 1000 berurutan + time.sleep(0.2)
+    return _standin_insert(ctx, lambda: FixedController(size=1000, concurrency=1, interval=0.2))
+
+
+def setup_insert_standin_fixed(ctx, fn):
+    # insert_batches lama: batch 1000 x 4 worker tetap
+    return _standin_insert(ctx, lambda: FixedController(size=1000, concurrency=4))
+
+
+def setup_insert_standin_adaptive(ctx, fn):
+    return _standin_insert(ctx, lambda: AdaptiveController(initial_size=1000, initial_concurrency=4,
+                                                           statement_timeout=STANDIN_STATEMENT_TIMEOUT))
+
+
+# nama -> (sumber fungsi, setup, batas rows default; None = tanpa batas)
+BENCHMARKS = {
+    'calculate_setara_beras': ('app-excel', setup_calculate_setara_beras, None),
+    'create_summary_table': ('app-excel', setup_create_summary_table, None),
+    'create_kancab_table': ('app-excel', setup_create_kancab_table, None),
+    'create_complex_table': ('app-excel', setup_create_complex_table, None),
+    'create_summary_excel_export': ('app-excel', setup_create_summary_excel_export, None),
+    'create_kancab_excel_export': ('app-excel', setup_create_kancab_excel_export, None),
+    'create_excel_export': ('app-excel', setup_create_excel_export, None),
+    'find_unique_records': ('app', setup_find_unique_records, 1_000_000),
+    'generate_row_hash': ('ingestion', setup_generate_row_hash, 1_000_000),
+    'collapse_duplicates': ('ingestion', setup_collapse_duplicates, None),
+    'build_realisasi_records': ('ingestion', setup_build_realisasi_records, None),
+    'build_target_kanwil_records': ('ingestion', setup_build_target_kanwil_records, None),
+    'build_target_kancab_records': ('ingestion', setup_build_target_kancab_records, None),
+    'normalize_decimal_legacy': ('app', setup_normalize_decimal_legacy, 1_000_000),
+    'normalize_decimal_float': ('ingestion', setup_normalize_decimal_float, None),
+    'normalize_decimal': ('ingestion', setup_normalize_decimal, None),
+    'normalize_date_legacy': ('app', setup_normalize_date_legacy, 100_000),
+    'normalize_date': ('app', setup_normalize_date, None),
+    'decode_rpc_json': ('rpc', setup_decode_rpc_json, None),
+    'decode_rpc_csv': ('rpc', setup_decode_rpc_csv, None),
+    'insert_standin_fixed_sleep': ('standin', setup_insert_standin_fixed_sleep, 100_000),
+    'insert_standin_fixed': ('standin', setup_insert_standin_fixed, 1_000_000),
+    'insert_standin_adaptive': ('standin', setup_insert_standin_adaptive, 1_000_000),
+}
+
+# Benchmark yang juga diukur puncak alokasi memorinya (tracemalloc, 1x run tambahan)
+MEMORY_BENCHMARKS = {'decode_rpc_json', 'decode_rpc_csv'}
+
+
+def git_info():
+    def run(*args):
+        try:
+            return subprocess.run(['git', *args], cwd=REPO_ROOT, capture_output=True, text=True, timeout=30).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return ''
+    return {'commit': run('rev-parse', '--short', 'HEAD') or None,
+            'dirty': bool(run('status', '--porcelain', '--untracked-files=no'))}
+
+
+def environment_info():
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git': git_info(),
+        'python': sys.version.split()[0],
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def time_call(func, args, repeats):
+    timings = []
+    for _ in range(repeats):
+        # Fungsi app.py/app-excel.py banyak print debug; jangan ikut diukur ke terminal
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func(*args)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def peak_memory_mb(func, args):
+    """Puncak alokasi memori Python/numpy selama func(*args), dalam MB"""
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def run_suite(sizes, names=None, repeats=None, seed=42, no_limit=False, log=print):
+    """
+    Jalankan benchmark untuk setiap ukuran.
+    repeats default: 3 untuk < 1M rows, 1 untuk >= 1M rows.
+    Returns dict hasil (siap disimpan sebagai JSON).
+    """
+    names = names or list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        raise ValueError(f"Benchmark tidak dikenal: {', '.join(sorted(unknown))}")
+
+    sources = {}
+    results = []
+    for rows in sizes:
+        log(f"📦 Generating {rows:,} synthetic rows...")
+        ctx = Context(rows, seed=seed)
+        generate_start = time.perf_counter()
+        ctx.realisasi
+        log(f"   done in {time.perf_counter() - generate_start:.1f}s")
+
+        for name in names:
+            source, setup, max_rows = BENCHMARKS[name]
+            if max_rows is not None and rows > max_rows and not no_limit:
+                results.append({'benchmark': name, 'rows': rows, 'skipped': f"rows > {max_rows:,} (pakai --no-limit)"})
+                log(f"   ⏭️  {name:<30} skipped (> {max_rows:,} rows)")
+                continue
+            if source not in sources:
+                sources[source] = _app_excel() if source == 'app-excel' else _app() if source == 'app' else {}
+            with contextlib.redirect_stdout(io.StringIO()):
+                func, args = setup(ctx, sources[source])
+            count = repeats or (3 if rows < 1_000_000 else 1)
+            timings = time_call(func, args, count)
+            best = min(timings)
+            result = {
+                'benchmark': name,
+                'rows': rows,
+                'repeats': count,
+                'seconds_best': round(best, 4),
+                'seconds_mean': round(sum(timings) / len(timings), 4),
+                'rows_per_second': round(rows / best, 1) if best > 0 else None,
+            }
+            memory = ''
+            if name in MEMORY_BENCHMARKS:
+                result['peak_memory_mb'] = round(peak_memory_mb(func, args), 1)
+                memory = f"  peak {result['peak_memory_mb']:,.1f} MB"
+            results.append(result)
+            log(f"   ⏱️  {name:<30} {best:>9.3f}s  ({rows / best if best > 0 else 0:,.0f} rows/s){memory}")
+
+    return {'meta': {**environment_info(), 'seed': seed, 'sizes': list(sizes)}, 'results': results}
+
+
+def default_output_path(result):
+    meta = result['meta']
+    commit = meta['git']['commit'] or 'nogit'
+    if meta['git']['dirty']:
+        commit += '-dirty'
+    stamp = meta['timestamp'].replace(':', '').replace('-', '')
+    return os.path.join(RESULTS_DIR, f"{stamp}_{commit}.json")
+
+
+def save_results(result, path=None):
+    path = path or default_output_path(result)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    return path
+
+
+def compare_results(baseline, current, threshold=1.2):
+    """
+    Bandingkan dua hasil JSON. Returns list baris
+    (benchmark, rows, baseline_s, current_s, ratio, regression) untuk pasangan yang ada di keduanya.
+    regression=True jika current lebih lambat dari baseline * threshold.
+    """
+    def index(result):
+        return {(r['benchmark'], r['rows']): r for r in result['results'] if 'seconds_best' in r}
+
+    base, curr = index(baseline), index(current)
+    rows = []
+    for key in sorted(set(base) & set(curr), key=lambda k: (k[1], k[0])):
+        before, after = base[key]['seconds_best'], curr[key]['seconds_best']
+        ratio = after / before if before > 0 else float('inf')
+        rows.append((key[0], key[1], before, after, ratio, ratio > threshold))
+    return rows
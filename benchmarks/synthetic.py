@@ -0,0 +1,260 @@
+"""
+Generator data sintetis BULOG (realisasi, target_kanwil, target_kancab).
+
+Kolom sama dengan sheet Export / Target Kanwil / Target Kancab pada file Excel upload.
+Distribusi dibuat mendekati data asli:
+- 26 kanwil (daftar dari filter Kanwil di app.py), kanwil sentra produksi lebih dominan
+- Komoditi: GABAH, BERAS MEDIUM, BERAS PREMIUM (+ sedikit komoditi lain)
+- spesifikasi GABAH didominasi GKP, sisanya GKG
+- Tanggal Penerimaan skew ke musim panen raya (Mar-Mei) dan ke tanggal terbaru
+"""
+import numpy as np
+import pandas as pd
+
+KANWIL_LIST = [
+    "01001 - KANTOR WILAYAH ACEH",
+    "02001 - KANTOR WILAYAH SUMUT",
+    "03001 - KANTOR WILAYAH RIAU DAN KEPRI",
+    "04001 - KANTOR WILAYAH SUMBAR",
+    "05001 - KANTOR WILAYAH JAMBI",
+    "06001 - KANTOR WILAYAH SUMSEL",
+    "07001 - KANTOR WILAYAH BENGKULU",
+    "08001 - KANTOR WILAYAH LAMPUNG",
+    "09001 - KANTOR WILAYAH DKI JAKARTA BANTEN",
+    "10001 - KANTOR WILAYAH JABAR",
+    "11001 - KANTOR WILAYAH JATENG",
+    "12001 - KANTOR WILAYAH DI YOGYAKARTA",
+    "13001 - KANTOR WILAYAH JATIM",
+    "14001 - KANTOR WILAYAH KALBAR",
+    "15001 - KANTOR WILAYAH KALTIM KALTARA",
+    "16001 - KANTOR WILAYAH KALSEL",
+    "17001 - KANTOR WILAYAH KALTENG",
+    "18001 - KANTOR WILAYAH SULUT GORONTALO",
+    "19001 - KANTOR WILAYAH SULTENG",
+    "20001 - KANTOR WILAYAH SULTRA",
+    "21001 - KANTOR WILAYAH SULSEL SULBAR",
+    "22001 - KANTOR WILAYAH BALI",
+    "23001 - KANTOR WILAYAH N.T.B",
+    "24001 - KANTOR WILAYAH N.T.T",
+    "25001 - KANTOR WILAYAH MALUKU MALUT",
+    "26001 - KANTOR WILAYAH PAPUA PABAR",
+]
+
+# Bobot relatif volume per kanwil (sentra produksi lebih besar)
+KANWIL_WEIGHTS = {
+    "13001 - KANTOR WILAYAH JATIM": 14,
+    "11001 - KANTOR WILAYAH JATENG": 12,
+    "10001 - KANTOR WILAYAH JABAR": 10,
+    "21001 - KANTOR WILAYAH SULSEL SULBAR": 9,
+    "08001 - KANTOR WILAYAH LAMPUNG": 6,
+    "06001 - KANTOR WILAYAH SUMSEL": 6,
+    "23001 - KANTOR WILAYAH N.T.B": 5,
+    "01001 - KANTOR WILAYAH ACEH": 4,
+    "09001 - KANTOR WILAYAH DKI JAKARTA BANTEN": 4,
+    "20001 - KANTOR WILAYAH SULTRA": 3,
+    "12001 - KANTOR WILAYAH DI YOGYAKARTA": 3,
+}
+DEFAULT_KANWIL_WEIGHT = 1
+
+# Komoditi -> (probabilitas, daftar spesifikasi, probabilitas spesifikasi, harga/kg)
+KOMODITI = {
+    'GABAH': (0.46, ['GKP', 'GKG', 'GKP Kualitas Khusus'], [0.72, 0.25, 0.03], 6500),
+    'BERAS MEDIUM': (0.36, ['Beras Medium Broken 25%', 'Beras Medium Broken 20%'], [0.8, 0.2], 12000),
+    'BERAS PREMIUM': (0.14, ['Beras Premium Broken 15%', 'Beras Premium Broken 10%'], [0.7, 0.3], 13500),
+    'JAGUNG': (0.03, ['Jagung Pipil Kering'], [1.0], 5500),
+    'GULA': (0.01, ['Gula Kristal Putih'], [1.0], 14500),
+}
+
+AKUN_ANALITIK = (['PSO', 'CBP'], [0.75, 0.25])
+JENIS_PENGADAAN = (['Pengadaan Dalam Negeri', 'Pengadaan Komersial'], [0.9, 0.1])
+
+SIZES = {
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+    '5m': 5_000_000,
+}
+
+
+def parse_size(value):
+    """'100k' / '1M' / '2500' -> int"""
+    text = str(value).strip().lower().replace('_', '')
+    if text in SIZES:
+        return SIZES[text]
+    if text.endswith('k'):
+        return int(float(text[:-1]) * 1_000)
+    if text.endswith('m'):
+        return int(float(text[:-1]) * 1_000_000)
+    return int(text)
+
+
+def kancab_names(kanwil_name, count):
+    """Nama kancab sintetis untuk satu kanwil, mis. '13002 - KANTOR CABANG JATIM 1'"""
+    code = kanwil_name[:2]
+    region = kanwil_name.split('KANTOR WILAYAH ')[-1]
+    return [f"{code}{i + 2:03d} - KANTOR CABANG {region} {i + 1}" for i in range(count)]
+
+
+def kancab_map(seed=0):
+    """kanwil -> list nama kancab (3-8 per kanwil, deterministik)"""
+    rng = np.random.default_rng(seed)
+    return {kanwil: kancab_names(kanwil, int(rng.integers(3, 9))) for kanwil in KANWIL_LIST}
+
+
+def _choice(rng, options, probabilities, size):
+    probabilities = np.asarray(probabilities, dtype=float)
+    return np.asarray(options, dtype=object)[rng.choice(len(options), size=size, p=probabilities / probabilities.sum())]
+
+
+def _skewed_dates(rng, size, start, end):
+    """
+    Tanggal dengan skew: 55% musim panen raya (Mar-Mei), 30% makin padat
+    mendekati tanggal akhir, 15% merata.
+    """
+    start = pd.Timestamp(start)
+    end = pd.Timestamp(end)
+    span = max((end - start).days, 1)
+    harvest_start = max(start, pd.Timestamp(year=end.year, month=3, day=1))
+    harvest_span = max(min((pd.Timestamp(year=end.year, month=5, day=31) - harvest_start).days, span), 1)
+
+    bucket = rng.choice(3, size=size, p=[0.55, 0.30, 0.15])
+    offsets = np.empty(size, dtype=np.int64)
+    harvest = bucket == 0
+    offsets[harvest] = (harvest_start - start).days + rng.normal(harvest_span / 2, harvest_span / 4, harvest.sum()).astype(np.int64)
+    recent = bucket == 1
+    offsets[recent] = span - rng.exponential(span / 10, recent.sum()).astype(np.int64)
+    uniform = bucket == 2
+    offsets[uniform] = rng.integers(0, span + 1, uniform.sum())
+    offsets = np.clip(offsets, 0, span)
+    return start + pd.to_timedelta(offsets, unit='D')
+
+
+def generate_realisasi(rows, seed=42, start_date='2025-01-01', end_date='2025-10-01', excel_strings=False):
+    """
+    DataFrame realisasi dengan kolom sheet Export.
+
+    excel_strings=True: kolom numerik presisi ('Kuantum PO (Kg)', 'In / Out', 'Harga Include ppn',
+    'Nominal Realisasi Incl ppn') dibuat str seperti hasil read_excel dengan REALISASI_EXCEL_DTYPES.
+    """
+    rng = np.random.default_rng(seed)
+    kancabs = kancab_map(seed)
+
+    weights = np.array([KANWIL_WEIGHTS.get(k, DEFAULT_KANWIL_WEIGHT) for k in KANWIL_LIST], dtype=float)
+    kanwil_idx = rng.choice(len(KANWIL_LIST), size=rows, p=weights / weights.sum())
+    kanwil = np.asarray(KANWIL_LIST, dtype=object)[kanwil_idx]
+
+    # Kancab dipilih per kanwil
+    entitas = np.empty(rows, dtype=object)
+    for idx, name in enumerate(KANWIL_LIST):
+        mask = kanwil_idx == idx
+        entitas[mask] = np.asarray(kancabs[name], dtype=object)[rng.integers(0, len(kancabs[name]), mask.sum())]
+
+    komoditi_names = list(KOMODITI)
+    komoditi_idx = rng.choice(len(komoditi_names), size=rows, p=[KOMODITI[k][0] for k in komoditi_names])
+    komoditi = np.asarray(komoditi_names, dtype=object)[komoditi_idx]
+    spesifikasi = np.empty(rows, dtype=object)
+    harga = np.empty(rows, dtype=float)
+    for idx, name in enumerate(komoditi_names):
+        mask = komoditi_idx == idx
+        _, specs, spec_probs, price = KOMODITI[name]
+        spesifikasi[mask] = _choice(rng, specs, spec_probs, mask.sum())
+        harga[mask] = np.round(price * rng.normal(1.0, 0.03, mask.sum()), 2)
+
+    qty = np.round(rng.lognormal(mean=9.0, sigma=1.1, size=rows), 2)  # median ~8 ton
+    kuantum_po = np.round(qty * rng.uniform(1.0, 1.6, rows), 0)
+    nominal = np.round(qty * harga, 2)
+
+    tanggal_penerimaan = _skewed_dates(rng, rows, start_date, end_date)
+    tanggal_po = tanggal_penerimaan - pd.to_timedelta(rng.integers(1, 30, rows), unit='D')
+    tanggal_kirim = tanggal_penerimaan + pd.to_timedelta(rng.integers(0, 14, rows), unit='D')
+
+    seq = pd.Series(np.arange(1, rows + 1)).astype(str).str.zfill(8)
+    kode = pd.Series(kanwil).str[:5]
+    pemasok_id = rng.integers(100_000, 100_000 + max(rows // 20, 50), rows)
+
+    df = pd.DataFrame({
+        'kanwil': kanwil,
+        'Entitas': entitas,
+        'Lokasi Persediaan': 'GUDANG ' + pd.Series(entitas).str.split(' - ').str[0] + '-' + pd.Series(rng.integers(1, 6, rows)).astype(str),
+        'No. ID Pemasok': pemasok_id,
+        'Nama Pemasok': 'MITRA ' + pd.Series(pemasok_id).astype(str),
+        'Tanggal PO': tanggal_po,
+        'Nomor PO': 'PO/' + kode + '/2025/' + seq,
+        'Produk': komoditi,
+        'No Jurnal': 'JRN/' + kode + '/' + seq,
+        'Nomor IN / OUT': 'IN/' + kode + '/' + seq,
+        'Tanggal Penerimaan': tanggal_penerimaan,
+        'Komoditi': komoditi,
+        'spesifikasi': spesifikasi,
+        'Tahun Stok': 2025,
+        'Tanggal Kirim Keuangan': tanggal_kirim,
+        'Jenis Transaksi': 'Penerimaan',
+        'Akun Analitik': _choice(rng, *AKUN_ANALITIK, rows),
+        'Jenis Pengadaan': _choice(rng, *JENIS_PENGADAAN, rows),
+        'Satuan': 'Kg',
+        'uom_po': 'Kg',
+        'Kuantum PO (Kg)': kuantum_po,
+        'In / Out': qty,
+        'Harga Include ppn': harga,
+        'Nominal Realisasi Incl ppn': nominal,
+        'Status': 'done',
+    })
+    if excel_strings:
+        for column in ('Kuantum PO (Kg)', 'In / Out', 'Harga Include ppn', 'Nominal Realisasi Incl ppn'):
+            df[column] = df[column].astype(str)
+    return df
+
+
+def generate_target_kanwil(seed=42):
+    """DataFrame sheet Target Kanwil (kanwil, Target Setara Beras dalam Ton)"""
+    rng = np.random.default_rng(seed)
+    weights = np.array([KANWIL_WEIGHTS.get(k, DEFAULT_KANWIL_WEIGHT) for k in KANWIL_LIST], dtype=float)
+    target = np.round(weights * 25_000 * rng.uniform(0.8, 1.2, len(KANWIL_LIST)), 0)
+    return pd.DataFrame({'kanwil': KANWIL_LIST, 'Target Setara Beras': target})
+
+
+def generate_rpc_trend(rows, seed=42):
+    """
+    DataFrame seperti hasil RPC get_realisasi_harian_setara_beras
+    (tanggal, nama_kanwil, beras, gkg, gkp, setara_beras), tanggal sebagai string ISO.
+    """
+    rng = np.random.default_rng(seed)
+    days = pd.date_range('2020-01-01', periods=max(rows // len(KANWIL_LIST), 1) + 1, freq='D').strftime('%Y-%m-%d')
+    beras = np.round(rng.gamma(2.0, 40.0, rows), 3)
+    gkg = np.round(rng.gamma(1.5, 20.0, rows), 3)
+    gkp = np.round(rng.gamma(1.5, 30.0, rows), 3)
+    return pd.DataFrame({
+        'tanggal': np.repeat(days, len(KANWIL_LIST))[:rows],
+        'nama_kanwil': np.tile(KANWIL_LIST, len(days))[:rows],
+        'beras': beras,
+        'gkg': gkg,
+        'gkp': gkp,
+        'setara_beras': np.round(beras + 0.635 * gkg + 0.53375 * gkp, 3),
+    })
+
+
+def generate_target_kancab(seed=42):
+    """DataFrame sheet Target Kancab (kancab, Target Setara Beras dalam Ton)"""
+    rng = np.random.default_rng(seed)
+    target_kanwil = generate_target_kanwil(seed).set_index('kanwil')['Target Setara Beras']
+    rows = []
+    for kanwil, kancabs in kancab_map(seed).items():
+        share = rng.dirichlet(np.ones(len(kancabs)))
+        for name, part in zip(kancabs, share):
+            rows.append({'kancab': name, 'Target Setara Beras': round(float(target_kanwil[kanwil] * part), 0)})
+    return pd.DataFrame(rows)
+
+
+def mappings(seed=42):
+    """
+    Mapping id sintetis seperti load_mappings():
+    {'kanwil': nama->id, 'kancab': nama->id, 'kancab_full': (kanwil, kancab)->id}
+    """
+    kanwil = {name: idx for idx, name in enumerate(KANWIL_LIST, 1)}
+    kancab = {}
+    kancab_full = {}
+    for kanwil_name, names in kancab_map(seed).items():
+        for name in names:
+            kancab[name] = len(kancab) + 1
+            kancab_full[(kanwil_name, name)] = kancab[name]
+    return {'kanwil': kanwil, 'kancab': kancab, 'kancab_full': kancab_full}
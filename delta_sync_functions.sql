@@ -0,0 +1,179 @@
+-- Delta sync realisasi: terapkan hanya perubahan export baru terhadap isi tabel
+--
+-- Append hanya menambah baris dengan row_hash baru, sehingga koreksi kuantum di
+-- Odoo muncul sebagai baris baru di samping baris lama; satu-satunya cara membetulkan
+-- adalah Replace penuh. Delta sync membandingkan export (di-stage ke realisasi_compare,
+-- sama seperti Append) dengan realisasi memakai business key
+-- (nomor_po, no_in_out, produk, tanggal_penerimaan) + row_hash:
+--
+--   key + row_hash sama           -> unchanged (tidak disentuh)
+--   key sama, row_hash berbeda    -> updated   (UPDATE baris lama dengan nilai baru)
+--   key hanya ada di export       -> inserted
+--   key hanya ada di realisasi    -> deleted
+--
+-- Key yang muncul lebih dari sekali dipasangkan per urutan id: baris identik lebih
+-- dulu, sisanya berpasangan sebagai update, kelebihan di salah satu sisi menjadi
+-- insert / delete. Jumlah baris per key di realisasi selalu sama dengan di export.
+--
+-- Scope: hanya baris realisasi dengan kanwil_id di p_kanwil_ids dan tanggal_penerimaan
+-- di [p_date_from, p_date_to] yang dibandingkan (dan bisa dihapus); p_date_from NULL =
+-- baris dengan tanggal_penerimaan NULL. Pemanggil (ingestion.delta) mengisi scope dari
+-- export dan memanggil fungsi ini per bulan supaya setiap panggilan REST tetap di bawah
+-- statement_timeout; jalur PostgreSQL langsung memanggil semua bulan dalam satu transaksi.
+-- Hanya bulan yang punya baris di export yang dipanggil; window lebih dari satu bulan ditolak.
+-- p_apply = false hanya menghitung (preview).
+
+CREATE INDEX IF NOT EXISTS realisasi_delta_scope_idx ON realisasi (tanggal_penerimaan, kanwil_id);
+CREATE INDEX IF NOT EXISTS realisasi_compare_delta_scope_idx ON realisasi_compare (tanggal_penerimaan, kanwil_id);
+
+CREATE OR REPLACE FUNCTION delta_sync_realisasi(
+    p_date_from date,
+    p_date_to date,
+    p_kanwil_ids bigint[],
+    p_apply boolean DEFAULT true
+)
+RETURNS TABLE (
+    inserted bigint,
+    updated bigint,
+    deleted bigint,
+    unchanged bigint
+)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_old bigint;
+    v_inserted bigint;
+    v_updated bigint;
+    v_deleted bigint;
+BEGIN
+    -- Satu panggilan = satu bulan kalender (ingestion.delta); rentang lebih lebar
+    -- berarti scope salah dan bisa menghapus bulan yang tidak ada di export
+    IF p_date_from IS NOT NULL AND (p_date_to IS NULL
+        OR date_trunc('month', p_date_from) <> date_trunc('month', p_date_to)) THEN
+        RAISE EXCEPTION 'Window delta sync harus di dalam satu bulan (% s/d %)', p_date_from, p_date_to;
+    END IF;
+
+    -- Temp table per transaksi; dipakai ulang jika fungsi dipanggil beberapa kali
+    CREATE TEMP TABLE IF NOT EXISTS _delta_old (id bigint, key text, row_hash text) ON COMMIT DROP;
+    CREATE TEMP TABLE IF NOT EXISTS _delta_new (id bigint, key text, row_hash text) ON COMMIT DROP;
+    CREATE TEMP TABLE IF NOT EXISTS _delta_actions (action text, old_id bigint, new_id bigint) ON COMMIT DROP;
+    TRUNCATE _delta_old, _delta_new, _delta_actions;
+
+    -- jsonb_build_array membedakan NULL dan '' di key
+    INSERT INTO _delta_old
+    SELECT r.id, jsonb_build_array(r.nomor_po, r.no_in_out, r.produk, r.tanggal_penerimaan)::text, r.row_hash
+    FROM realisasi r
+    WHERE r.kanwil_id = ANY(p_kanwil_ids)
+      AND CASE WHEN p_date_from IS NULL THEN r.tanggal_penerimaan IS NULL
+               ELSE r.tanggal_penerimaan BETWEEN p_date_from AND p_date_to END;
+    GET DIAGNOSTICS v_old = ROW_COUNT;
+
+    INSERT INTO _delta_new
+    SELECT c.id, jsonb_build_array(c.nomor_po, c.no_in_out, c.produk, c.tanggal_penerimaan)::text, c.row_hash
+    FROM realisasi_compare c
+    WHERE c.kanwil_id = ANY(p_kanwil_ids)
+      AND CASE WHEN p_date_from IS NULL THEN c.tanggal_penerimaan IS NULL
+               ELSE c.tanggal_penerimaan BETWEEN p_date_from AND p_date_to END;
+
+    ANALYZE _delta_old;
+    ANALYZE _delta_new;
+
+    INSERT INTO _delta_actions
+    WITH old_exact AS (
+        SELECT o.*, row_number() OVER (PARTITION BY o.key, o.row_hash ORDER BY o.id) AS seq FROM _delta_old o
+    ),
+    new_exact AS (
+        SELECT n.*, row_number() OVER (PARTITION BY n.key, n.row_hash ORDER BY n.id) AS seq FROM _delta_new n
+    ),
+    old_changed AS (
+        SELECT o.id, o.key, row_number() OVER (PARTITION BY o.key ORDER BY o.id) AS k
+        FROM old_exact o
+        WHERE NOT EXISTS (
+            SELECT 1 FROM new_exact n WHERE n.key = o.key AND n.row_hash = o.row_hash AND n.seq = o.seq
+        )
+    ),
+    new_changed AS (
+        SELECT n.id, n.key, row_number() OVER (PARTITION BY n.key ORDER BY n.id) AS k
+        FROM new_exact n
+        WHERE NOT EXISTS (
+            SELECT 1 FROM old_exact o WHERE o.key = n.key AND o.row_hash = n.row_hash AND o.seq = n.seq
+        )
+    )
+    SELECT CASE WHEN o.id IS NULL THEN 'insert' WHEN n.id IS NULL THEN 'delete' ELSE 'update' END,
+           o.id, n.id
+    FROM old_changed o
+    FULL JOIN new_changed n ON n.key = o.key AND n.k = o.k;
+
+    SELECT count(*) FILTER (WHERE action = 'insert'),
+           count(*) FILTER (WHERE action = 'update'),
+           count(*) FILTER (WHERE action = 'delete')
+    INTO v_inserted, v_updated, v_deleted
+    FROM _delta_actions;
+
+    IF p_apply THEN
+        DELETE FROM realisasi r
+        USING _delta_actions d
+        WHERE d.action = 'delete' AND r.id = d.old_id;
+
+        UPDATE realisasi r
+        SET kanwil_id = c.kanwil_id,
+            kancab_id = c.kancab_id,
+            lokasi_persediaan = c.lokasi_persediaan,
+            id_pemasok = c.id_pemasok,
+            nama_pemasok = c.nama_pemasok,
+            tanggal_po = c.tanggal_po,
+            nomor_po = c.nomor_po,
+            produk = c.produk,
+            no_jurnal = c.no_jurnal,
+            no_in_out = c.no_in_out,
+            tanggal_penerimaan = c.tanggal_penerimaan,
+            komoditi = c.komoditi,
+            spesifikasi = c.spesifikasi,
+            tahun_stok = c.tahun_stok,
+            tanggal_kirim_keuangan = c.tanggal_kirim_keuangan,
+            jenis_transaksi = c.jenis_transaksi,
+            akun_analitik = c.akun_analitik,
+            jenis_pengadaan = c.jenis_pengadaan,
+            satuan = c.satuan,
+            uom_po = c.uom_po,
+            kuantum_po_kg = c.kuantum_po_kg,
+            qty_in_out = c.qty_in_out,
+            harga_include_ppn = c.harga_include_ppn,
+            nominal_realisasi_incl_ppn = c.nominal_realisasi_incl_ppn,
+            status = c.status,
+            row_hash = c.row_hash
+        FROM _delta_actions d
+        JOIN realisasi_compare c ON c.id = d.new_id
+        WHERE d.action = 'update' AND r.id = d.old_id;
+
+        INSERT INTO realisasi (
+            kanwil_id, kancab_id, lokasi_persediaan, id_pemasok, nama_pemasok,
+            tanggal_po, nomor_po, produk, no_jurnal, no_in_out,
+            tanggal_penerimaan, komoditi, spesifikasi, tahun_stok,
+            tanggal_kirim_keuangan, jenis_transaksi, akun_analitik,
+            jenis_pengadaan, satuan, uom_po, kuantum_po_kg, qty_in_out,
+            harga_include_ppn, nominal_realisasi_incl_ppn, status, row_hash
+        )
+        SELECT
+            c.kanwil_id, c.kancab_id, c.lokasi_persediaan, c.id_pemasok, c.nama_pemasok,
+            c.tanggal_po, c.nomor_po, c.produk, c.no_jurnal, c.no_in_out,
+            c.tanggal_penerimaan, c.komoditi, c.spesifikasi, c.tahun_stok,
+            c.tanggal_kirim_keuangan, c.jenis_transaksi, c.akun_analitik,
+            c.jenis_pengadaan, c.satuan, c.uom_po, c.kuantum_po_kg, c.qty_in_out,
+            c.harga_include_ppn, c.nominal_realisasi_incl_ppn, c.status, c.row_hash
+        FROM _delta_actions d
+        JOIN realisasi_compare c ON c.id = d.new_id
+        WHERE d.action = 'insert'
+        ORDER BY c.id;
+    END IF;
+
+    RETURN QUERY SELECT v_inserted, v_updated, v_deleted, v_old - v_updated - v_deleted;
+END;
+$$;
+
+-- Hanya service role (client bulk ingestion, [supabase] service_key); default privileges
+-- Supabase memberi EXECUTE ke anon / authenticated, jadi dicabut eksplisit
+REVOKE ALL ON FUNCTION delta_sync_realisasi(date, date, bigint[], boolean) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION delta_sync_realisasi(date, date, bigint[], boolean) TO service_role;
@@ -0,0 +1,23 @@
+-- Versi dimensi kanwil / kancab untuk cache ingestion.dimensions
+--
+-- Aplikasi memuat kanwil dan kancab sekali per proses dan hanya memuat ulang jika
+-- dimension_version() berubah. Nilainya md5 dari seluruh baris kedua tabel (termasuk
+-- rename dan perubahan kanwil induk kancab); tabel dimensi hanya ratusan baris, jadi
+-- pemanggilan ini jauh lebih murah daripada memuat ulang keduanya lewat REST.
+-- Tanpa fungsi ini aplikasi memakai jumlah baris sebagai versi (rename baru terlihat
+-- setelah cache kadaluarsa).
+
+CREATE OR REPLACE FUNCTION dimension_version()
+RETURNS text
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+    SELECT md5(
+        coalesce((SELECT string_agg(md5(kw::text), '' ORDER BY kw.kanwil_id) FROM kanwil kw), '')
+        || '|' ||
+        coalesce((SELECT string_agg(md5(kc::text), '' ORDER BY kc.kancab_id) FROM kancab kc), '')
+    );
+$$;
+
+GRANT EXECUTE ON FUNCTION dimension_version() TO authenticated, anon;
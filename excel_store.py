@@ -0,0 +1,330 @@
+"""
+Segment store untuk data mode Excel (app-excel.py).
+
+Sebelumnya setiap append/replace menulis ulang seluruh assets/hasil_gabungan.xlsx
+(3 sheet, ratusan ribu baris) hanya untuk menambah beberapa ribu baris. Di sini
+setiap sheet disimpan sebagai kumpulan segment Parquet yang immutable:
+
+    assets/store/
+        manifest.json            <- daftar segment aktif per sheet (source of truth)
+        export/000001.parquet
+        export/000002.parquet    <- hasil append berikutnya
+        target_kanwil/000001.parquet
+        ...
+
+- append  : tulis 1 segment baru + update manifest (segment lama tidak disentuh)
+- replace : tulis 1 segment baru, manifest sheet tsb hanya menunjuk segment itu
+- read    : union semua segment sheet (hanya segment yang terdaftar di manifest)
+- compact : gabungkan semua segment sheet menjadi 1 (otomatis saat jumlah segment
+            melewati COMPACT_THRESHOLD)
+
+Manifest ditulis atomik (tmp + os.replace), jadi segment yatim akibat proses yang
+mati di tengah jalan tidak pernah terbaca dan dibersihkan oleh compact().
+Saat store belum ada, isi awal diambil dari hasil_gabungan.xlsx (bootstrap).
+Workbook tetap bisa dibuat lewat export_workbook().
+
+Setiap segment menyimpan kolom HASH_COLUMN (uint64, pd.util.hash_pandas_object
+atas kolom yang dinormalisasi). Cek duplikasi saat append cukup membaca kolom
+hash segment lama; hanya baris baru yang di-hash.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_WORKBOOK = os.path.join(REPO_ROOT, 'assets', 'hasil_gabungan.xlsx')
+DEFAULT_STORE_DIR = os.environ.get('BULOG_EXCEL_STORE_DIR', os.path.join(REPO_ROOT, 'assets', 'store'))
+
+MANIFEST_VERSION = 1
+COMPACT_THRESHOLD = 20
+
+# Kolom hash per baris di dalam segment (tidak ikut dikembalikan read())
+HASH_COLUMN = '__row_hash'
+
+# Nama sheet workbook -> folder segment
+SHEETS = {
+    'Export': 'export',
+    'Target Kanwil': 'target_kanwil',
+    'Target Kancab': 'target_kancab',
+}
+
+
+def prepare_segment(df):
+    """
+    Samakan tipe kolom sebelum ditulis ke Parquet (sama seperti pembersihan
+    sebelum to_excel di app-excel.py): inf -> NaN, kolom object -> str dengan
+    nilai kosong menjadi None. Kolom numerik dan datetime dipertahankan.
+    """
+    df = df.replace([np.inf, -np.inf], np.nan).reset_index(drop=True)
+    for col in df.columns:
+        if df[col].dtype == 'object':
+            values = df[col]
+            df[col] = values.astype(str).where(values.notna(), None).replace({'nan': None, 'None': None, 'NaT': None})
+    df.columns = [str(col) for col in df.columns]
+    return df
+
+
+def normalize_for_hash(df, columns):
+    """
+    Representasi string per kolom agar nilai yang sama menghasilkan hash yang sama,
+    baik dari read_excel upload maupun dari segment: numerik -> float (5 dan 5.0 sama),
+    datetime -> 'YYYY-mm-dd HH:MM:SS', kosong -> ''. Kolom yang tidak ada dianggap kosong.
+    """
+    normalized = {}
+    for col in columns:
+        if col not in df.columns:
+            normalized[col] = pd.Series('', index=df.index)
+            continue
+        values = df[col]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            text = values.dt.strftime('%Y-%m-%d %H:%M:%S')
+        elif pd.api.types.is_numeric_dtype(values):
+            text = values.astype('float64').astype(str)
+        else:
+            text = values.astype(str).str.strip()
+        normalized[col] = text.where(values.notna(), '').replace({'nan': '', 'None': '', 'NaT': ''})
+    return pd.DataFrame(normalized, index=df.index)
+
+
+def compute_row_hashes(df, columns):
+    """Hash uint64 per baris atas `columns` (urutan kolom diabaikan), vectorized"""
+    columns = sorted(str(col) for col in columns)
+    if len(df) == 0:
+        return np.array([], dtype='uint64')
+    normalized = normalize_for_hash(df, columns)
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy(dtype='uint64')
+
+
+class ExcelSegmentStore:
+    """Append-only Parquet segment store + manifest untuk sheet Export/Target Kanwil/Target Kancab"""
+
+    def __init__(self, root=DEFAULT_STORE_DIR, workbook=DEFAULT_WORKBOOK, compact_threshold=COMPACT_THRESHOLD):
+        self.root = root
+        self.workbook = workbook
+        self.compact_threshold = compact_threshold
+        self.manifest_path = os.path.join(root, 'manifest.json')
+        self._lock = threading.RLock()
+
+    # ---- manifest ----
+
+    def exists(self):
+        return os.path.exists(self.manifest_path)
+
+    def manifest(self):
+        with open(self.manifest_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest):
+        manifest['updated_at'] = datetime.now().isoformat(timespec='seconds')
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _empty_manifest(self):
+        return {
+            'version': MANIFEST_VERSION,
+            'next_segment': 1,
+            'sheets': {sheet: {'segments': []} for sheet in SHEETS},
+        }
+
+    def ensure(self):
+        """Pastikan store ada; bootstrap dari workbook jika belum."""
+        with self._lock:
+            if self.exists():
+                return False
+            self.bootstrap_from_workbook()
+            return True
+
+    def bootstrap_from_workbook(self, path=None):
+        """Buat store baru dari hasil_gabungan.xlsx (1 segment per sheet)"""
+        path = path or self.workbook
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            manifest = self._empty_manifest()
+            available = pd.ExcelFile(path, engine='openpyxl').sheet_names if os.path.exists(path) else []
+            for sheet in SHEETS:
+                if sheet not in available:
+                    continue
+                df = pd.read_excel(path, sheet_name=sheet, engine='openpyxl')
+                entry = self._write_segment(manifest, sheet, df, source=os.path.basename(path))
+                manifest['sheets'][sheet]['segments'].append(entry)
+                print(f"📦 Bootstrap {sheet}: {len(df):,} rows -> {entry['file']}")
+            self._write_manifest(manifest)
+
+    # ---- segment ----
+
+    def _write_segment(self, manifest, sheet, df, source=None):
+        folder = os.path.join(self.root, SHEETS[sheet])
+        os.makedirs(folder, exist_ok=True)
+        seq = manifest['next_segment']
+        manifest['next_segment'] = seq + 1
+        relative = f"{SHEETS[sheet]}/{seq:06d}.parquet"
+        path = os.path.join(self.root, relative)
+        tmp_path = path + '.tmp'
+        prepared = prepare_segment(df.drop(columns=[HASH_COLUMN], errors='ignore'))
+        hash_columns = sorted(prepared.columns)
+        prepared[HASH_COLUMN] = compute_row_hashes(prepared, hash_columns)
+        prepared.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        return {
+            'file': relative,
+            'rows': int(len(df)),
+            'hash_columns': hash_columns,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'source': source,
+        }
+
+    def segments(self, sheet):
+        self.ensure()
+        return list(self.manifest()['sheets'][sheet]['segments'])
+
+    def row_count(self, sheet):
+        return sum(entry['rows'] for entry in self.segments(sheet))
+
+    def read(self, sheet, columns=None):
+        """Union semua segment sheet (urut sesuai urutan append)"""
+        frames = [
+            pd.read_parquet(os.path.join(self.root, entry['file']), columns=columns)
+            .drop(columns=[HASH_COLUMN], errors='ignore')
+            for entry in self.segments(sheet)
+        ]
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        if len(frames) == 1:
+            return frames[0]
+        return pd.concat(frames, ignore_index=True)
+
+    def row_hashes(self, sheet, columns):
+        """
+        Hash semua baris sheet atas `columns`. Segment yang hash-nya dibuat dengan
+        kolom yang sama cukup dibaca kolom HASH_COLUMN-nya saja; segment lain
+        (mis. kolom upload berbeda) di-hash ulang secara vectorized.
+        """
+        columns = sorted(str(col) for col in columns)
+        parts = []
+        for entry in self.segments(sheet):
+            path = os.path.join(self.root, entry['file'])
+            if entry.get('hash_columns') == columns:
+                parts.append(pd.read_parquet(path, columns=[HASH_COLUMN])[HASH_COLUMN].to_numpy(dtype='uint64'))
+            else:
+                segment = pd.read_parquet(path).drop(columns=[HASH_COLUMN], errors='ignore')
+                parts.append(compute_row_hashes(segment, columns))
+        if not parts:
+            return np.array([], dtype='uint64')
+        return np.concatenate(parts)
+
+    def append(self, sheet, df, source=None):
+        """Tambah df sebagai segment baru. Returns entry manifest segment tsb."""
+        with self._lock:
+            self.ensure()
+            manifest = self.manifest()
+            entry = self._write_segment(manifest, sheet, df, source=source)
+            manifest['sheets'][sheet]['segments'].append(entry)
+            self._write_manifest(manifest)
+            print(f"📦 Append {sheet}: {entry['rows']:,} rows -> {entry['file']}")
+            if len(manifest['sheets'][sheet]['segments']) > self.compact_threshold:
+                self.compact(sheet)
+            return entry
+
+    def replace(self, sheet, df, source=None):
+        """Ganti seluruh isi sheet dengan df (1 segment). Segment lama dihapus setelah manifest ditulis."""
+        with self._lock:
+            self.ensure()
+            manifest = self.manifest()
+            old_entries = manifest['sheets'][sheet]['segments']
+            entry = self._write_segment(manifest, sheet, df, source=source)
+            manifest['sheets'][sheet]['segments'] = [entry]
+            self._write_manifest(manifest)
+            self._remove_files(old_entries)
+            print(f"🔁 Replace {sheet}: {entry['rows']:,} rows -> {entry['file']}")
+            return entry
+
+    def compact(self, sheet=None):
+        """
+        Gabungkan semua segment per sheet menjadi 1 segment dan hapus file yang
+        tidak lagi terdaftar di manifest. Returns dict sheet -> jumlah segment sebelum compact.
+        """
+        with self._lock:
+            self.ensure()
+            manifest = self.manifest()
+            sheets = [sheet] if sheet else list(SHEETS)
+            compacted = {}
+            old_entries = []
+            for name in sheets:
+                entries = manifest['sheets'][name]['segments']
+                compacted[name] = len(entries)
+                if len(entries) <= 1:
+                    continue
+                df = self.read(name)
+                entry = self._write_segment(manifest, name, df, source='compact')
+                manifest['sheets'][name]['segments'] = [entry]
+                old_entries.extend(entries)
+                print(f"🗜️ Compact {name}: {len(entries)} segment -> {entry['file']} ({entry['rows']:,} rows)")
+            if old_entries:
+                self._write_manifest(manifest)
+                self._remove_files(old_entries)
+            self._remove_orphans(manifest)
+            return compacted
+
+    def _remove_files(self, entries):
+        for entry in entries:
+            try:
+                os.remove(os.path.join(self.root, entry['file']))
+            except OSError:
+                pass
+
+    def _remove_orphans(self, manifest):
+        """Hapus segment yang tidak terdaftar (sisa proses yang gagal sebelum manifest ditulis)"""
+        active = {entry['file'] for info in manifest['sheets'].values() for entry in info['segments']}
+        for folder in SHEETS.values():
+            directory = os.path.join(self.root, folder)
+            if not os.path.isdir(directory):
+                continue
+            for filename in os.listdir(directory):
+                if f"{folder}/{filename}" not in active:
+                    try:
+                        os.remove(os.path.join(directory, filename))
+                    except OSError:
+                        pass
+
+    # ---- export ----
+
+    def export_workbook(self, path=None):
+        """
+        Tulis ketiga sheet sebagai workbook xlsx (format sama dengan hasil_gabungan.xlsx).
+        path=None -> returns bytes (untuk st.download_button), selain itu tulis ke path.
+        """
+        output = BytesIO() if path is None else path
+        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+            for sheet in SHEETS:
+                self.read(sheet).to_excel(writer, sheet_name=sheet, index=False)
+        if path is None:
+            return output.getvalue()
+        return path
+
+    def info(self):
+        """Ringkasan per sheet: jumlah segment, rows, ukuran file (MB)"""
+        rows = []
+        for sheet in SHEETS:
+            entries = self.segments(sheet)
+            size = sum(
+                os.path.getsize(os.path.join(self.root, entry['file']))
+                for entry in entries if os.path.exists(os.path.join(self.root, entry['file']))
+            )
+            rows.append({
+                'sheet': sheet,
+                'segments': len(entries),
+                'rows': sum(entry['rows'] for entry in entries),
+                'size_mb': round(size / 1024 / 1024, 2),
+            })
+        return pd.DataFrame(rows)
+
+
+# Store default untuk app-excel.py
+STORE = ExcelSegmentStore()
@@ -0,0 +1,143 @@
+"""
+Loader Google Sheets untuk app-backup.py (deployment cadangan berbasis Sheets).
+
+Sebelumnya setiap sheet dibaca dengan worksheet.get_all_records() (1 dict per baris)
+lalu tanggal dikonversi per sel dengan .apply. Di sini:
+
+- header semua sheet diambil dalam 1 request values_batch_get (baris 1)
+- isi diambil per kolom ('Export'!A2:A, ...) dengan majorDimension=COLUMNS dalam
+  1 request values_batch_get untuk semua sheet, langsung menjadi kolom DataFrame
+- tanggal serial Sheets dikonversi vectorized (origin 1899-12-30)
+- hasil di-cache per spreadsheet berdasarkan revisi file (modifiedTime Drive);
+  selama revisi sama, sheet tidak di-fetch ulang
+
+Yang dibutuhkan dari objek spreadsheet hanya id, values_batch_get() dan
+get_lastUpdateTime() (gspread.Spreadsheet), jadi mudah diganti fake
+(tests/test_gsheets_loader.py).
+"""
+import threading
+
+import pandas as pd
+
+SERIAL_DATE_ORIGIN = '1899-12-30'
+MAX_RANGES_PER_REQUEST = 100
+
+# spreadsheet_id -> {'revision': ..., 'frames': {sheet_name: DataFrame}}
+_CACHE = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def column_letter(index):
+    """0 -> 'A', 25 -> 'Z', 26 -> 'AA'"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def quote_sheet(name):
+    return "'" + name.replace("'", "''") + "'"
+
+
+def convert_serial_dates(series):
+    """
+    Konversi kolom tanggal Sheets ke datetime secara vectorized.
+    Angka = serial date (hari sejak 1899-12-30, sama seperti Excel),
+    string = di-parse sebagai tanggal, kosong/tidak valid = NaT.
+    """
+    numeric = pd.to_numeric(series, errors='coerce')
+    result = pd.to_datetime(numeric, unit='D', origin=SERIAL_DATE_ORIGIN, errors='coerce')
+    text = series.astype(str).str.strip()
+    text_mask = numeric.isna() & series.notna() & (text != '')
+    if text_mask.any():
+        result[text_mask] = pd.to_datetime(text[text_mask], errors='coerce', format='mixed')
+    return result
+
+
+def sheet_revision(spreadsheet):
+    """Revisi spreadsheet (modifiedTime dari Drive API). None jika tidak bisa dibaca."""
+    try:
+        return spreadsheet.get_lastUpdateTime()
+    except Exception as e:
+        print(f"⚠️ Revisi spreadsheet tidak bisa dibaca, cache revisi dinonaktifkan: {str(e)}")
+        return None
+
+
+def _batch_get(spreadsheet, ranges, major_dimension):
+    value_ranges = []
+    for start in range(0, len(ranges), MAX_RANGES_PER_REQUEST):
+        chunk = ranges[start:start + MAX_RANGES_PER_REQUEST]
+        response = spreadsheet.values_batch_get(chunk, params={
+            'valueRenderOption': 'UNFORMATTED_VALUE',
+            'majorDimension': major_dimension,
+        })
+        value_ranges.extend(response.get('valueRanges', []))
+    return [value_range.get('values', []) for value_range in value_ranges]
+
+
+def fetch_sheets(spreadsheet, sheet_names):
+    """
+    Ambil beberapa sheet sebagai DataFrame (2 request total: header lalu kolom).
+    Sel kosong menjadi '' seperti get_all_records(); kolom tanpa header dilewati.
+    Header yang sama dua kali -> ValueError (get_all_records juga menolak header tidak unik).
+    """
+    header_values = _batch_get(spreadsheet, [f"{quote_sheet(name)}!1:1" for name in sheet_names], 'ROWS')
+    headers = {name: (values[0] if values else []) for name, values in zip(sheet_names, header_values)}
+    for name in sheet_names:
+        names = [str(header) for header in headers[name] if str(header).strip() != '']
+        duplicates = sorted({header for header in names if names.count(header) > 1})
+        if duplicates:
+            raise ValueError(f"Header sheet '{name}' tidak unik: {', '.join(duplicates)}")
+
+    ranges, targets = [], []
+    for name in sheet_names:
+        for index, header in enumerate(headers[name]):
+            if str(header).strip() == '':
+                continue
+            letter = column_letter(index)
+            ranges.append(f"{quote_sheet(name)}!{letter}2:{letter}")
+            targets.append((name, str(header)))
+
+    columns = {name: {} for name in sheet_names}
+    for (name, header), values in zip(targets, _batch_get(spreadsheet, ranges, 'COLUMNS')):
+        columns[name][header] = values[0] if values else []
+
+    frames = {}
+    for name in sheet_names:
+        sheet_columns = columns[name]
+        row_count = max((len(values) for values in sheet_columns.values()), default=0)
+        # Sheets memotong sel kosong di ujung kolom -> samakan panjang semua kolom
+        frames[name] = pd.DataFrame({
+            header: values + [''] * (row_count - len(values))
+            for header, values in sheet_columns.items()
+        })
+    return frames
+
+
+def load_sheets(spreadsheet, sheet_names, use_cache=True):
+    """
+    Returns dict sheet_name -> DataFrame (salinan, aman dimodifikasi pemanggil).
+    Jika revisi spreadsheet sama dengan yang ter-cache, tidak ada fetch isi sheet.
+    """
+    revision = sheet_revision(spreadsheet) if use_cache else None
+    with _CACHE_LOCK:
+        cached = _CACHE.get(spreadsheet.id)
+    if (revision is not None and cached and cached['revision'] == revision
+            and all(name in cached['frames'] for name in sheet_names)):
+        print(f"♻️ Sheets tidak berubah (revisi {revision}), pakai cache")
+        return {name: cached['frames'][name].copy() for name in sheet_names}
+
+    frames = fetch_sheets(spreadsheet, sheet_names)
+    for name, df in frames.items():
+        print(f"📥 Loaded {len(df):,} rows from '{name}' sheet")
+    if revision is not None:
+        with _CACHE_LOCK:
+            _CACHE[spreadsheet.id] = {'revision': revision, 'frames': frames}
+    return {name: df.copy() for name, df in frames.items()}
+
+
+def clear_cache():
+    with _CACHE_LOCK:
+        _CACHE.clear()
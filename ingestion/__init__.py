@@ -0,0 +1,45 @@
+"""
+Ingestion package untuk data BULOG (realisasi, target_kanwil, target_kancab).
+
+Dipakai bersama oleh Streamlit UI (app.py) dan CLI headless (python -m ingestion).
+"""
+from .config import create_supabase_client, load_service_key, load_supabase_credentials
+from .delta import DeltaSyncIncomplete, DeltaSyncUnavailable, ScopeTooWide
+from .dimensions import DIMENSIONS, Dimensions, get_dimensions
+from .hashing import (
+    generate_row_hash,
+    generate_target_kancab_hash,
+    generate_target_kanwil_hash,
+)
+from .jobs import JobStore, UploadLedger, run_append_job, start_job_thread
+from .partitions import ensure_partitions
+from .pipeline import (
+    TABLES,
+    compare_and_migrate,
+    compare_not_exists,
+    copy_compare_rows,
+    filter_not_migrated,
+    iter_compare_pages,
+    load_mappings,
+    prepare_partitions,
+    read_excel_for_table,
+    reset_table,
+    rollback_replace,
+    run_append,
+    run_delta_sync,
+    run_replace,
+    run_scoped_replace,
+)
+from .records import (
+    REALISASI_EXCEL_DTYPES,
+    RecordBatch,
+    build_realisasi_records,
+    build_target_kancab_records,
+    build_target_kanwil_records,
+    collapse_duplicates,
+)
+from .scoped import ScopedReplaceUnavailable
+from .shadow import ShadowSwapUnavailable, drop_shadow, prepare_shadow, rollback_swap, swap_shadow
+from .sniff import SniffUnavailable, sheet_content_hash, sniff_workbook
+from .stats import ThroughputStats
+from .writer import InsertResult, insert_batches
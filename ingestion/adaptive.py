@@ -0,0 +1,286 @@
+"""
+Ukuran batch dan concurrency adaptif untuk insert / pagination compare.
+
+Sebelumnya semua loop memakai batch 1000 dan time.sleep(0.2) tetap, berapa pun
+kecepatan server. AdaptiveController mengatur:
+
+- size        : jumlah baris per request. Naik bertahap (maks 1.5x per batch) selama
+                waktu server per batch di bawah target (sebagian kecil statement_timeout;
+                overhead jaringan dipisahkan lewat regresi latency vs jumlah baris) dan
+                payload di bawah batas 413; turun seketika saat melewati target,
+                timeout (57014 / 504) atau 413 (batch yang gagal dipecah dua).
+- concurrency : jumlah request paralel, hill climbing pada throughput (rows/detik)
+                per jendela beberapa request: arah naik/turun dipertahankan selama
+                throughput membaik, dibalik saat memburuk; -1 seketika saat latency
+                melewati 1.5x target atau error.
+- interval    : jeda antar request (pengganti sleep tetap). 0 selama server sehat,
+                naik eksponensial saat 429/503/timeout (Retry-After dihormati),
+                turun lagi setiap request sukses.
+
+FixedController punya interface yang sama dengan nilai tetap (untuk resume job
+yang checkpoint-nya per nomor batch, dan pembanding benchmark).
+"""
+import threading
+import time
+from collections import deque
+
+DEFAULT_STATEMENT_TIMEOUT = 8.0       # detik, statement_timeout role anon/authenticated Supabase
+TARGET_FRACTION = 0.25                # target latency per batch = 25% statement_timeout
+DEFAULT_MAX_PAYLOAD_BYTES = 4 * 1024 * 1024
+PAYLOAD_HEADROOM = 0.8
+MIN_SIZE = 100
+MAX_SIZE = 5000
+GROWTH = 1.5
+MAX_INTERVAL = 30.0
+EWMA_ALPHA = 0.3
+THROUGHPUT_TOLERANCE = 0.05
+LATENCY_SAMPLES = 20
+
+
+def error_codes(error):
+    """
+    (HTTP status, kode PostgREST / SQLSTATE) dari exception sebagai string, None jika
+    tidak ada. Hanya dari atribut response / status / code, bukan dari teks pesan.
+    """
+    status = getattr(getattr(error, 'response', None), 'status_code', None) or getattr(error, 'status', None)
+    code = getattr(error, 'code', None)
+    return (str(status) if status is not None else None,
+            str(code) if code not in (None, '') else None)
+
+
+def classify_error(error):
+    """
+    Jenis error untuk controller: payload / timeout / throttle / error.
+    Dari HTTP status, kode PostgREST (SQLSTATE) dan tipe exception (timeout client);
+    angka di dalam teks pesan (bisa berasal dari nilai baris) tidak dibaca.
+    """
+    codes = set(error_codes(error)) - {None}
+    if '413' in codes:
+        return 'payload'
+    if codes & {'408', '504', '57014'} or 'timeout' in type(error).__name__.lower():
+        return 'timeout'
+    if codes & {'429', '503'}:
+        return 'throttle'
+    return 'error'
+
+
+def is_split_error(error):
+    """
+    Batch ditolak karena ukurannya: 413 atau statement_timeout (SQLSTATE 57014).
+    Keduanya pasti tidak commit, jadi batch aman dipecah dan dikirim ulang; timeout
+    lain (504, timeout client) tidak, karena insert bisa sudah tersimpan.
+    """
+    status, code = error_codes(error)
+    return '413' in (status, code) or code == '57014'
+
+
+def retry_after_seconds(error):
+    """Nilai Retry-After (detik) dari error jika ada"""
+    value = getattr(error, 'retry_after', None)
+    if value is None:
+        headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+        value = headers.get('Retry-After') if hasattr(headers, 'get') else None
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveController:
+    """
+    Controller thread-safe: worker memanggil record() / record_error() setelah setiap
+    request, scheduler membaca size / concurrency dan memanggil wait() sebelum kirim.
+    """
+
+    def __init__(self, initial_size=1000, min_size=MIN_SIZE, max_size=MAX_SIZE,
+                 initial_concurrency=4, min_concurrency=1, max_concurrency=8,
+                 statement_timeout=DEFAULT_STATEMENT_TIMEOUT, max_payload_bytes=DEFAULT_MAX_PAYLOAD_BYTES):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max(max_concurrency, initial_concurrency)
+        self.target_seconds = statement_timeout * TARGET_FRACTION
+        self.max_payload_bytes = max_payload_bytes
+        self.lock = threading.Lock()
+        self._size = float(min(max(initial_size, min_size), max_size))
+        self._concurrency = max(min_concurrency, initial_concurrency)
+        self.interval = 0.0
+        self.next_request_at = 0.0
+        self.samples = deque(maxlen=LATENCY_SAMPLES)
+        self.overhead = 0.0
+        self.seconds_per_row = None
+        self.bytes_per_row = None
+        self.latency = None
+        self.direction = 1
+        self.window_start = None
+        self.window_rows = 0
+        self.window_requests = 0
+        self.last_throughput = None
+        self.requests = 0
+        self.errors = {'payload': 0, 'timeout': 0, 'throttle': 0, 'error': 0}
+        self.peak_size = int(self._size)
+        self.peak_concurrency = self._concurrency
+
+    @property
+    def size(self):
+        return int(self._size)
+
+    @property
+    def concurrency(self):
+        return self._concurrency
+
+    def _ewma(self, current, value):
+        return value if current is None else current + EWMA_ALPHA * (value - current)
+
+    def _fit_latency(self):
+        """
+        Model latency = overhead + rows * seconds_per_row dari sampel terakhir (least squares).
+        Overhead (jaringan, PostgREST) tidak ikut dihitung ke budget statement_timeout.
+        Returns (overhead, seconds_per_row).
+        """
+        count = len(self.samples)
+        mean_rows = sum(rows for rows, _ in self.samples) / count
+        mean_seconds = sum(seconds for _, seconds in self.samples) / count
+        variance = sum((rows - mean_rows) ** 2 for rows, _ in self.samples)
+        if count >= 3 and variance > 0:
+            slope = sum((rows - mean_rows) * (seconds - mean_seconds) for rows, seconds in self.samples) / variance
+            overhead = mean_seconds - slope * mean_rows
+            if slope > 0 and overhead >= 0:
+                return overhead, slope
+        # Ukuran batch belum bervariasi: anggap seluruh latency biaya per baris (konservatif)
+        return 0.0, mean_seconds / max(mean_rows, 1)
+
+    def record(self, seconds, rows, payload_bytes=None):
+        """Feedback request sukses: latency, jumlah baris, ukuran payload (bytes, opsional)"""
+        if rows <= 0:
+            return
+        with self.lock:
+            self.requests += 1
+            self.latency = self._ewma(self.latency, seconds)
+            self.samples.append((rows, seconds))
+            self.overhead, self.seconds_per_row = self._fit_latency()
+            if payload_bytes:
+                self.bytes_per_row = self._ewma(self.bytes_per_row, payload_bytes / rows)
+
+            desired = min(self.max_size, self.target_seconds / max(self.seconds_per_row, 1e-9))
+            if self.bytes_per_row:
+                desired = min(desired, self.max_payload_bytes * PAYLOAD_HEADROOM / self.bytes_per_row)
+            if desired > self._size:
+                self._size = min(desired, self._size * GROWTH)
+            else:
+                self._size = desired
+            self._size = max(self.min_size, self._size)
+
+            if seconds - self.overhead > self.target_seconds * 1.5:
+                self._concurrency = max(self.min_concurrency, self._concurrency - 1)
+                self.direction = -1
+                self._reset_window()
+            else:
+                self._climb(rows)
+
+            self.interval = self.interval * 0.5 if self.interval >= 0.02 else 0.0
+            self.peak_size = max(self.peak_size, int(self._size))
+            self.peak_concurrency = max(self.peak_concurrency, self._concurrency)
+
+    def _reset_window(self):
+        self.window_start = time.monotonic()
+        self.window_rows = 0
+        self.window_requests = 0
+
+    def _climb(self, rows):
+        """Hill climbing concurrency berdasarkan throughput per jendela request"""
+        if self.window_start is None:
+            self._reset_window()
+            return
+        self.window_rows += rows
+        self.window_requests += 1
+        if self.window_requests < max(4, self._concurrency * 2):
+            return
+        throughput = self.window_rows / max(time.monotonic() - self.window_start, 1e-9)
+        if self.last_throughput is not None and throughput < self.last_throughput * (1 - THROUGHPUT_TOLERANCE):
+            self.direction = -self.direction
+        elif self.last_throughput is not None and throughput < self.last_throughput * (1 + THROUGHPUT_TOLERANCE):
+            # Tidak ada perbedaan berarti: tahan di concurrency sekarang
+            self.last_throughput = throughput
+            self._reset_window()
+            return
+        self.last_throughput = throughput
+        self._concurrency = min(self.max_concurrency, max(self.min_concurrency, self._concurrency + self.direction))
+        self._reset_window()
+
+    def record_error(self, error, payload_bytes=None):
+        """Feedback request gagal (dipanggil juga untuk setiap percobaan yang di-retry)"""
+        kind = classify_error(error)
+        retry_after = retry_after_seconds(error)
+        with self.lock:
+            self.errors[kind] += 1
+            self.direction = -1
+            self._reset_window()
+            if kind == 'payload':
+                if payload_bytes:
+                    self.max_payload_bytes = min(self.max_payload_bytes, payload_bytes * PAYLOAD_HEADROOM)
+                self._size = max(self.min_size, self._size * 0.5)
+            elif kind == 'timeout':
+                self._size = max(self.min_size, self._size * 0.5)
+                self._concurrency = max(self.min_concurrency, self._concurrency - 1)
+                self.interval = min(MAX_INTERVAL, max(self.interval * 2, 0.5))
+            elif kind == 'throttle':
+                self._concurrency = max(self.min_concurrency, self._concurrency - 1)
+                self.interval = min(MAX_INTERVAL, max(self.interval * 2, 1.0))
+            else:
+                self._concurrency = max(self.min_concurrency, self._concurrency - 1)
+                self.interval = min(MAX_INTERVAL, max(self.interval * 2, 0.25))
+            if retry_after is not None:
+                self.interval = min(MAX_INTERVAL, max(self.interval, retry_after))
+            self.next_request_at = max(self.next_request_at, time.monotonic() + self.interval)
+
+    def wait(self):
+        """Rate limiting: tunggu sampai boleh kirim request berikutnya"""
+        with self.lock:
+            now = time.monotonic()
+            delay = max(0.0, self.next_request_at - now)
+            self.next_request_at = max(now, self.next_request_at) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'size': int(self._size),
+                'concurrency': self._concurrency,
+                'interval': round(self.interval, 3),
+                'latency_ms': round(self.latency * 1000, 1) if self.latency is not None else None,
+                'overhead_ms': round(self.overhead * 1000, 1),
+                'target_ms': round(self.target_seconds * 1000, 1),
+                'peak_size': self.peak_size,
+                'peak_concurrency': self.peak_concurrency,
+                'requests': self.requests,
+                'errors': dict(self.errors),
+            }
+
+
+class FixedController:
+    """Ukuran batch, concurrency dan jeda tetap (perilaku lama)"""
+
+    def __init__(self, size=1000, concurrency=4, interval=0.0):
+        self.size = size
+        self.concurrency = concurrency
+        self.max_concurrency = concurrency
+        self.interval = interval
+        self.requests = 0
+
+    def record(self, seconds, rows, payload_bytes=None):
+        self.requests += 1
+
+    def record_error(self, error, payload_bytes=None):
+        pass
+
+    def wait(self):
+        if self.interval:
+            time.sleep(self.interval)
+        return self.interval
+
+    def snapshot(self):
+        return {'size': self.size, 'concurrency': self.concurrency, 'interval': self.interval,
+                'requests': self.requests}
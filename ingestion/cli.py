@@ -0,0 +1,184 @@
+"""
+CLI ingestion headless untuk bulk load dari cron.
+
+Contoh:
+    python -m ingestion append --table realisasi assets/export.xlsx
+    python -m ingestion replace --table target_kanwil --sheet "Target Kanwil" target.xlsx
+    python -m ingestion replace --table realisasi --database-url postgresql://... assets/export.xlsx
+    python -m ingestion append --resumable --table realisasi assets/export.xlsx
+    python -m ingestion delta --table realisasi --dry-run assets/export.xlsx
+    python -m ingestion scoped --table realisasi --all-kanwil koreksi_maret.xlsx
+    python -m ingestion rollback --table realisasi
+    python -m ingestion jobs
+    python -m ingestion resume 20250101-120000-abc123
+    python -m ingestion telemetry 20250101-120000-abc123 --telemetry-out job.csv
+"""
+import argparse
+import json
+import sys
+import time
+
+from .config import create_supabase_client, load_database_url
+from .delta import MAX_SCOPE_MONTHS
+from .dimensions import get_dimensions
+from .http_pool import pool_snapshot
+from .jobs import JobStore, UploadLedger, run_append_job
+from .pipeline import (
+    TABLES,
+    read_excel_for_table,
+    rollback_replace,
+    run_append,
+    run_delta_sync,
+    run_replace,
+    run_scoped_replace,
+)
+from .stats import ThroughputStats, summary_to_csv
+from .writer import DEFAULT_BATCH_SIZE, DEFAULT_MAX_WORKERS
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="ingest",
+        description="Load file Excel BULOG ke Supabase (mode append, replace, delta atau scoped) tanpa Streamlit",
+    )
+    parser.add_argument("mode", choices=["append", "replace", "delta", "scoped", "rollback", "resume", "jobs", "telemetry"],
+                        help="append: hanya data unik | replace: ganti semua data | "
+                             "delta: insert/update/delete per business key dalam scope file | "
+                             "scoped: ganti hanya bulan dan kanwil yang ada di file | "
+                             "rollback: kembalikan data sebelum replace terakhir | resume: lanjutkan job | "
+                             "jobs: daftar job | telemetry: export telemetry job")
+    parser.add_argument("file", nargs="?", help="Path file Excel (.xlsx), atau job_id untuk mode resume/telemetry")
+    parser.add_argument("--table", choices=sorted(TABLES), help="Tabel tujuan (wajib untuk append/replace/delta/scoped)")
+    parser.add_argument("--resumable", action="store_true", help="Append sebagai job dengan checkpoint (bisa di-resume)")
+    parser.add_argument("--dry-run", action="store_true", help="Delta: hanya hitung inserted/updated/deleted tanpa mengubah data")
+    parser.add_argument("--all-kanwil", action="store_true",
+                        help="Scoped: ganti bulan di file untuk semua kanwil (file nasional), bukan hanya kanwil di file")
+    parser.add_argument("--max-months", type=int, default=MAX_SCOPE_MONTHS,
+                        help=f"Delta/scoped: tolak file yang mencakup lebih dari N bulan tanggal penerimaan "
+                             f"(default {MAX_SCOPE_MONTHS}, 0 = tanpa batas)")
+    parser.add_argument("--jobs-dir", default=None, help="Folder state job (default .ingestion_jobs atau env BULOG_JOBS_DIR)")
+    parser.add_argument("--sheet", default=None, help="Nama sheet (default sesuai tabel: Export / Target Kanwil / Target Kancab)")
+    parser.add_argument("--secrets", default=None, help="Path secrets.toml (default .streamlit/secrets.toml atau env SUPABASE_URL/SUPABASE_KEY)")
+    parser.add_argument("--database-url", default=None,
+                        help="PostgreSQL langsung untuk COPY di mode replace/delta/scoped (default env BULOG_DATABASE_URL / [database] url)")
+    parser.add_argument("--rest-only", action="store_true", help="Jangan pakai COPY walaupun database_url tersedia")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Jumlah baris per request insert")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS, help="Jumlah request insert paralel")
+    parser.add_argument("--json", action="store_true", help="Cetak ringkasan dan statistik dalam format JSON")
+    parser.add_argument("--telemetry-out", default=None,
+                        help="Simpan telemetry per fase ke file .json (lengkap) atau .csv (satu baris per fase)")
+    return parser
+
+
+def print_jobs(store):
+    jobs = store.list_jobs()
+    if not jobs:
+        print("Tidak ada job")
+        return 0
+    print(f"{'Job ID':<24} {'Table':<14} {'Status':<12} {'Phase':<9} {'Staged':>10} {'Migrated':>10}  Source")
+    for job in jobs:
+        print(f"{job['job_id']:<24} {job['table_name']:<14} {job['status']:<12} {job['phase']:<9} "
+              f"{job['staged_rows']:>10,} {job['migrated_count']:>10,}  {job['source_name'] or '-'}")
+    return 0
+
+
+def write_telemetry(summary, path):
+    """Tulis telemetry ke JSON atau CSV sesuai ekstensi file ('-' = stdout JSON)"""
+    content = summary_to_csv(summary) if path.lower().endswith(".csv") else json.dumps(summary, indent=2)
+    if path == "-":
+        print(content)
+        return
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(content)
+    print(f"📈 Telemetry disimpan ke {path}")
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    stats = ThroughputStats()
+
+    if args.mode == "jobs":
+        return print_jobs(JobStore(args.jobs_dir))
+    if args.mode == "rollback":
+        if not args.table:
+            parser.error("--table wajib diisi untuk rollback")
+        rollback_replace(create_supabase_client(args.secrets), args.table,
+                         ledger=UploadLedger(JobStore(args.jobs_dir), args.table))
+        return 0
+    if not args.file:
+        parser.error("file (atau job_id untuk resume/telemetry) wajib diisi")
+    if args.mode == "telemetry":
+        telemetry = JobStore(args.jobs_dir).get_job(args.file)['telemetry']
+        write_telemetry(telemetry or {}, args.telemetry_out or "-")
+        return 0
+    if args.mode != "resume" and not args.table:
+        parser.error("--table wajib diisi untuk append/replace/delta/scoped")
+
+    print("=" * 60)
+    print(f"🚀 {args.mode.upper()} MODE - {'Job: ' + args.file if args.mode == 'resume' else 'Table: ' + args.table}")
+    print("=" * 60)
+
+    client = create_supabase_client(args.secrets)
+    start = time.time()
+
+    if args.mode == "resume":
+        store = JobStore(args.jobs_dir)
+        stats = ThroughputStats.from_summary(store.get_job(args.file)['telemetry'])
+        summary = run_append_job(client, store, args.file, max_workers=args.workers, stats=stats)
+    else:
+        with stats.phase('read_excel'):
+            df = read_excel_for_table(args.file, args.table, sheet_name=args.sheet)
+            stats.add_rows(len(df))
+        print(f"📖 Loaded {len(df):,} rows from {args.file}")
+
+        if args.mode == "append" and args.resumable:
+            store = JobStore(args.jobs_dir)
+            job_id = store.create_job(args.table, df, batch_size=args.batch_size, source_name=args.file, stats=stats)
+            print(f"🧾 Job {job_id} dibuat (lanjutkan dengan: python -m ingestion resume {job_id})")
+            summary = run_append_job(client, store, job_id, max_workers=args.workers, stats=stats)
+        elif args.mode == "append":
+            summary = run_append(client, args.table, df, batch_size=args.batch_size, max_workers=args.workers, stats=stats)
+        else:
+            database_url = None if args.rest_only else (args.database_url or load_database_url(args.secrets))
+            # Ledger upload sama dengan UI: riwayat dihapus / file dicatat setelah isi tabel berubah
+            ledger = UploadLedger.from_frame(JobStore(args.jobs_dir), args.table, df, source_name=args.file,
+                                             sheet_name=args.sheet,
+                                             dimension_version=get_dimensions(client).version)
+            if args.mode == "delta":
+                summary = run_delta_sync(client, args.table, df, batch_size=args.batch_size, max_workers=args.workers,
+                                         stats=stats, database_url=database_url, apply=not args.dry_run,
+                                         ledger=ledger, max_months=args.max_months or None)
+            elif args.mode == "scoped":
+                summary = run_scoped_replace(client, args.table, df, batch_size=args.batch_size,
+                                             max_workers=args.workers, stats=stats, database_url=database_url,
+                                             all_kanwil=args.all_kanwil, ledger=ledger,
+                                             max_months=args.max_months or None)
+            else:
+                summary = run_replace(client, args.table, df, batch_size=args.batch_size, max_workers=args.workers,
+                                      stats=stats, database_url=database_url, ledger=ledger)
+    elapsed = time.time() - start
+
+    if args.json:
+        print(json.dumps({'summary': summary, 'stats': stats.summary(), 'http_pools': pool_snapshot()}, indent=2))
+    else:
+        print("-" * 60)
+        for key, value in summary.items():
+            print(f"{key:<16}: {value:,}" if isinstance(value, int) else f"{key:<16}: {value}")
+        print("-" * 60)
+        print(stats.format())
+        for pool in pool_snapshot():
+            print(f"🔌 Pool {pool['profile']}: {pool['requests']:,} requests, peak {pool['peak_in_flight']}/"
+                  f"{pool['max_connections']} koneksi, {pool['queued']:,} antri, {pool['pool_timeouts']:,} pool timeout")
+        written = summary.get('migrated', summary.get('inserted', 0))
+        print(f"⚡ Average: {written / elapsed if elapsed > 0 else 0:,.0f} records/second")
+        print("=" * 60)
+
+    if args.telemetry_out:
+        write_telemetry(stats.summary(include_raw=True), args.telemetry_out)
+
+    return 1 if summary.get('failed') else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Konfigurasi koneksi Supabase untuk ingestion headless (CLI / cron).
+
+Urutan pencarian credentials:
+1. Environment variable SUPABASE_URL dan SUPABASE_KEY
+2. File secrets yang diberikan lewat parameter / env BULOG_SECRETS_PATH
+3. .streamlit/secrets.toml di root repository (sama dengan Streamlit UI)
+
+Client profil "bulk" memakai service role key jika ada (env SUPABASE_SERVICE_KEY lalu
+[supabase] service_key): fungsi RPC destruktif (shadow swap, delta sync, scoped replace,
+partisi) hanya di-grant ke service_role. Tanpa service key dipakai api_key biasa.
+
+Koneksi PostgreSQL langsung (opsional, untuk COPY di Replace mode) dicari dari
+env BULOG_DATABASE_URL / DATABASE_URL lalu [database] url di secrets.toml.
+Ukuran pool / timeout HTTP per profil dari [http.read] / [http.bulk] (ingestion.http_pool).
+"""
+import os
+import tomllib
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_SECRETS_PATH = REPO_ROOT / ".streamlit" / "secrets.toml"
+
+
+def resolve_secrets_path(secrets_path=None):
+    """Tentukan path secrets.toml yang dipakai"""
+    if secrets_path:
+        return Path(secrets_path).expanduser()
+    env_path = os.environ.get("BULOG_SECRETS_PATH")
+    if env_path:
+        return Path(env_path).expanduser()
+    return DEFAULT_SECRETS_PATH
+
+
+def load_secrets(secrets_path=None):
+    """Baca seluruh isi secrets.toml (dict kosong jika file tidak ada)"""
+    path = resolve_secrets_path(secrets_path)
+    if not path.exists():
+        return {}
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+def load_supabase_credentials(secrets_path=None):
+    """
+    Return (project_url, api_key) untuk Supabase.
+    Raise RuntimeError jika credentials tidak ditemukan.
+    """
+    url = os.environ.get("SUPABASE_URL")
+    key = os.environ.get("SUPABASE_KEY")
+    if url and key:
+        return url, key
+
+    secrets = load_secrets(secrets_path)
+    supabase_secrets = secrets.get("supabase", {})
+    url = url or supabase_secrets.get("project_url")
+    key = key or supabase_secrets.get("api_key")
+    if not url or not key:
+        raise RuntimeError(
+            f"Credentials Supabase tidak ditemukan. Set SUPABASE_URL/SUPABASE_KEY "
+            f"atau isi [supabase] project_url/api_key di {resolve_secrets_path(secrets_path)}"
+        )
+    return url, key
+
+
+def load_service_key(secrets_path=None):
+    """Return service role key Supabase untuk client bulk, atau None jika tidak dikonfigurasi"""
+    key = os.environ.get("SUPABASE_SERVICE_KEY")
+    if key:
+        return key
+    return load_secrets(secrets_path).get("supabase", {}).get("service_key") or None
+
+
+def load_database_url(secrets_path=None):
+    """Return connection string PostgreSQL langsung, atau None jika tidak dikonfigurasi"""
+    url = os.environ.get("BULOG_DATABASE_URL") or os.environ.get("DATABASE_URL")
+    if url:
+        return url
+    return load_secrets(secrets_path).get("database", {}).get("url") or None
+
+
+def create_supabase_client(secrets_path=None, profile="bulk"):
+    """
+    Buat Supabase client dari credentials yang ditemukan, dengan pool HTTP sesuai
+    profil (ingestion.http_pool; default "bulk" untuk CLI / migrasi). Profil "bulk"
+    memakai service role key jika dikonfigurasi.
+    """
+    from .http_pool import create_pooled_client
+
+    url, key = load_supabase_credentials(secrets_path)
+    if profile == "bulk":
+        key = load_service_key(secrets_path) or key
+    return create_pooled_client(url, key, profile=profile, overrides=load_secrets(secrets_path).get("http"))
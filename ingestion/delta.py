@@ -0,0 +1,135 @@
+"""
+Delta sync: terapkan hanya baris yang berubah dari export terhadap tabel utama
+(lihat delta_sync_functions.sql).
+
+Append hanya menambah row_hash baru, jadi koreksi kuantum muncul sebagai baris
+kedua di samping baris lama. Delta sync men-stage export ke <table>_compare (sama
+seperti Append), lalu RPC delta_sync_<table> membandingkan per business key
+(key_columns di TABLES) + row_hash dan menerapkan insert / update / delete
+sekaligus di database.
+
+Scope dibatasi dari isi export: kanwil yang ada di export dan bulan
+tanggal_penerimaan yang punya baris di export, satu DeltaWindow per bulan supaya
+setiap RPC lewat REST tetap di bawah statement_timeout. Baris di luar scope (kanwil
+lain, bulan yang tidak ada di export walaupun berada di antara bulan lain) tidak
+pernah dihapus. Export yang mencakup lebih dari MAX_SCOPE_MONTHS bulan (biasanya
+tanggal salah ketik) ditolak kecuali batasnya dinaikkan pemanggil.
+"""
+import pandas as pd
+
+from .adaptive import classify_error
+from .writer import DEFAULT_MAX_RETRIES, DEFAULT_RETRY_DELAY, execute_with_retry, print_log
+
+DATE_COLUMN = 'tanggal_penerimaan'
+SCOPE_COLUMN = 'kanwil_id'
+DELTA_ACTIONS = ('inserted', 'updated', 'deleted', 'unchanged')
+# Jumlah bulan maksimum satu scope file (delta sync / scoped replace) tanpa konfirmasi
+MAX_SCOPE_MONTHS = 24
+
+
+class DeltaSyncUnavailable(Exception):
+    """Tabel tidak mendukung delta sync atau fungsi delta_sync_<table> belum dipasang"""
+
+
+class DeltaSyncIncomplete(Exception):
+    """
+    Window delta sync gagal setelah window sebelumnya diterapkan (satu transaksi per
+    window). applied: label window yang sudah diterapkan, failed: label window yang gagal,
+    summary: ringkasan hitungan sampai window terakhir yang berhasil.
+    """
+
+    def __init__(self, message, applied, failed, summary):
+        super().__init__(message)
+        self.applied = applied
+        self.failed = failed
+        self.summary = summary
+
+
+class ScopeTooWide(Exception):
+    """Export mencakup lebih banyak bulan tanggal_penerimaan dari batas yang diizinkan"""
+
+
+class DeltaWindow:
+    """Satu panggilan delta_sync_<table>: rentang tanggal (None = tanggal NULL) + kanwil_id"""
+
+    def __init__(self, date_from, date_to, scope_ids):
+        self.date_from = date_from
+        self.date_to = date_to
+        self.scope_ids = scope_ids
+
+    @property
+    def label(self):
+        return f"{self.date_from:%Y-%m}" if self.date_from is not None else "tanggal kosong"
+
+    def params(self, apply=True):
+        return {
+            'p_date_from': self.date_from.isoformat() if self.date_from is not None else None,
+            'p_date_to': self.date_to.isoformat() if self.date_to is not None else None,
+            'p_kanwil_ids': self.scope_ids,
+            'p_apply': apply,
+        }
+
+
+def scope_months(dates):
+    """Bulan kalender (pd.Period) yang punya baris di dates (Series datetime), terurut"""
+    return sorted(dates.dropna().dt.to_period('M').unique())
+
+
+def delta_windows(records, max_months=MAX_SCOPE_MONTHS):
+    """
+    Scope delta sync dari records (sudah di-build): satu DeltaWindow per bulan
+    kalender yang punya baris di export (bulan kosong di antaranya tidak disentuh),
+    plus satu window tanggal NULL jika ada. Lebih dari max_months bulan -> ScopeTooWide
+    (max_months None: tanpa batas).
+    """
+    frame = pd.DataFrame({
+        'date': pd.to_datetime(pd.Series([record.get(DATE_COLUMN) for record in records], dtype=object),
+                               format='%Y-%m-%d'),
+        'scope': pd.Series([record.get(SCOPE_COLUMN) for record in records], dtype=object),
+    })
+    scope_ids = sorted(int(value) for value in frame['scope'].dropna().unique())
+    if not scope_ids:
+        return []
+    months = scope_months(frame['date'])
+    if max_months is not None and len(months) > max_months:
+        raise ScopeTooWide(f"Export mencakup {len(months)} bulan tanggal_penerimaan "
+                           f"({months[0]} s/d {months[-1]}), batas {max_months} bulan")
+    windows = [DeltaWindow(month.start_time.date(), month.end_time.date(), scope_ids) for month in months]
+    if frame['date'].isna().any():
+        windows.append(DeltaWindow(None, None, scope_ids))
+    return windows
+
+
+def _missing_function(error):
+    text = str(error)
+    return 'PGRST202' in text or 'Could not find the function' in text
+
+
+def sync_window(client, rpc_name, window, apply=True, max_retries=DEFAULT_MAX_RETRIES,
+                retry_delay=DEFAULT_RETRY_DELAY, log=None):
+    """
+    Jalankan delta sync satu window lewat RPC (satu transaksi per window).
+    Returns dict inserted / updated / deleted / unchanged.
+    """
+    try:
+        # Window yang timeout akan timeout lagi: langsung gagal (pakai jalur database_url)
+        data = execute_with_retry(
+            lambda: client.rpc(rpc_name, window.params(apply)).execute().data,
+            max_retries=max_retries,
+            retry_delay=retry_delay,
+            log=log or print_log,
+            label=f"{rpc_name} {window.label}",
+            should_retry=lambda e: not _missing_function(e) and classify_error(e) != 'timeout',
+        )
+    except Exception as e:
+        if _missing_function(e):
+            raise DeltaSyncUnavailable(f"{rpc_name} belum dipasang (delta_sync_functions.sql): {e}") from e
+        raise
+    row = (data[0] if isinstance(data, list) else data) or {}
+    return {action: int(row.get(action) or 0) for action in DELTA_ACTIONS}
+
+
+def add_counts(total, counts):
+    for action in DELTA_ACTIONS:
+        total[action] = total.get(action, 0) + counts[action]
+    return total
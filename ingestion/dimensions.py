@@ -0,0 +1,143 @@
+"""
+Registry dimensi kanwil / kancab yang dimuat sekali per proses.
+
+Sebelumnya satu append memuat kanwil 1x dan kancab 2x (tanpa dan dengan join
+kanwil!inner), lalu load_all_realisasi_from_db_with_progress memuat semuanya lagi.
+DIMENSIONS menyimpan satu snapshot (Dimensions) untuk semua pemakai dan hanya
+memuat ulang jika versi tabel berubah:
+
+- versi dari RPC dimension_version() (md5 isi kanwil + kancab, lihat
+  dimension_functions.sql); jika RPC belum dipasang, jumlah baris kedua tabel
+- versi dicek paling sering sekali per VERSION_CHECK_INTERVAL detik
+- snapshot dimuat ulang penuh paling lambat setiap MAX_AGE detik (fallback jumlah
+  baris tidak mendeteksi rename)
+"""
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .writer import print_log
+
+VERSION_CHECK_INTERVAL = 30.0
+MAX_AGE = 3600.0
+
+
+class Dimensions:
+    """
+    Snapshot kanwil & kancab. Lookup tersedia sebagai dict:
+    - kanwil: nama_kanwil -> kanwil_id
+    - kanwil_names: kanwil_id -> nama_kanwil
+    - kancab: nama_kancab -> kancab_id
+    - kancab_names: kancab_id -> nama_kancab
+    - kancab_full: (nama_kanwil, nama_kancab) -> kancab_id
+    dan sebagai pd.Series lewat series(nama) untuk Series.map / reindex.
+    """
+
+    LOOKUPS = ('kanwil', 'kanwil_names', 'kancab', 'kancab_names', 'kancab_full')
+
+    def __init__(self, kanwil_rows, kancab_rows, version=None):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.kanwil = {kw['nama_kanwil']: kw['kanwil_id'] for kw in kanwil_rows}
+        self.kanwil_names = {kw['kanwil_id']: kw['nama_kanwil'] for kw in kanwil_rows}
+        self.kancab = {}
+        self.kancab_names = {}
+        self.kancab_full = {}
+        for kc in kancab_rows:
+            self.kancab[kc['nama_kancab']] = kc['kancab_id']
+            self.kancab_names[kc['kancab_id']] = kc['nama_kancab']
+            # Sama dengan join kanwil!inner lama: kancab tanpa kanwil tidak masuk kancab_full
+            if kc.get('kanwil'):
+                self.kancab_full[(kc['kanwil']['nama_kanwil'], kc['nama_kancab'])] = kc['kancab_id']
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def series(self, name):
+        """Lookup sebagai pd.Series (dibuat sekali); kancab_full memakai MultiIndex"""
+        if name not in self.LOOKUPS:
+            raise ValueError(f"Lookup tidak dikenal: {name} (pilihan: {', '.join(self.LOOKUPS)})")
+        with self._lock:
+            if name not in self._series:
+                mapping = getattr(self, name)
+                index = pd.MultiIndex.from_tuples(list(mapping), names=['nama_kanwil', 'nama_kancab']) \
+                    if name == 'kancab_full' and mapping else list(mapping)
+                self._series[name] = pd.Series(list(mapping.values()), index=index, dtype=object)
+            return self._series[name]
+
+    def kancab_ids(self, kanwil_names, kancab_names):
+        """kancab_id untuk pasangan (nama_kanwil, nama_kancab) per baris; tidak ditemukan -> NaN"""
+        lookup = self.series('kancab_full')
+        keys = pd.MultiIndex.from_arrays([pd.Index(kanwil_names), pd.Index(kancab_names)])
+        if lookup.empty:
+            return np.full(len(keys), np.nan, dtype=object)
+        return lookup.reindex(keys).to_numpy()
+
+    def mappings(self):
+        """Format load_mappings(): kanwil, kancab, kancab_full"""
+        return {'kanwil': self.kanwil, 'kancab': self.kancab, 'kancab_full': self.kancab_full}
+
+
+def _table_count(client, table_name):
+    return client.table(table_name).select('*', count='exact').limit(1).execute().count
+
+
+def fetch_version(client):
+    """Versi isi kanwil + kancab: hasil RPC dimension_version, fallback (jumlah kanwil, jumlah kancab)"""
+    try:
+        return client.rpc("dimension_version", {}).execute().data
+    except Exception:
+        return (_table_count(client, 'kanwil'), _table_count(client, 'kancab'))
+
+
+def fetch_dimensions(client, version=None):
+    """Muat kanwil dan kancab (dengan nama kanwil) dari database, masing-masing satu request"""
+    kanwil_rows = client.table('kanwil').select('*').execute().data
+    # Embed tanpa !inner: kancab tanpa kanwil tetap ada di lookup kancab / kancab_names
+    kancab_rows = client.table('kancab').select('*, kanwil(nama_kanwil)').execute().data
+    return Dimensions(kanwil_rows, kancab_rows, version=version)
+
+
+class DimensionRegistry:
+    """Cache Dimensions per proses, thread-safe (dipakai UI, job thread dan CLI)"""
+
+    def __init__(self, check_interval=VERSION_CHECK_INTERVAL, max_age=MAX_AGE):
+        self.check_interval = check_interval
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.current = None
+        self.checked_at = 0.0
+        self.loads = 0
+
+    def get(self, client, force=False, log=None):
+        """Snapshot terbaru; dimuat ulang hanya jika force, kadaluarsa, atau versi berubah"""
+        with self.lock:
+            now = time.monotonic()
+            current = self.current
+            if not force and current is not None:
+                if now - current.loaded_at >= self.max_age:
+                    force = True
+                elif now - self.checked_at < self.check_interval:
+                    return current
+            version = fetch_version(client)
+            self.checked_at = now
+            if not force and current is not None and version == current.version:
+                return current
+            self.current = fetch_dimensions(client, version=version)
+            self.loads += 1
+            (log or print_log)(f"🗂️ Dimensi dimuat: {len(self.current.kanwil)} kanwil, "
+                               f"{len(self.current.kancab)} kancab", "info")
+            return self.current
+
+    def invalidate(self):
+        """Paksa muat ulang pada get() berikutnya (mis. setelah kanwil/kancab diubah dari aplikasi)"""
+        with self.lock:
+            self.current = None
+
+
+DIMENSIONS = DimensionRegistry()
+
+
+def get_dimensions(client, force=False, log=None):
+    return DIMENSIONS.get(client, force=force, log=log)
@@ -0,0 +1,77 @@
+"""
+Row hash untuk deteksi duplikasi (lihat HASH_DOCUMENTATION.md).
+
+Format hash harus tetap sama dengan data yang sudah ada di database:
+SHA256 dari JSON (sort_keys=True, default=str) berisi field-field di bawah.
+"""
+import hashlib
+import json
+
+REALISASI_HASH_FIELDS = (
+    'kanwil_id',
+    'kancab_id',
+    'lokasi_persediaan',
+    'id_pemasok',
+    'nama_pemasok',
+    'tanggal_po',
+    'nomor_po',
+    'produk',
+    'no_jurnal',
+    'no_in_out',
+    'tanggal_penerimaan',
+    'komoditi',
+    'spesifikasi',
+    'tahun_stok',
+    'tanggal_kirim_keuangan',
+    'jenis_transaksi',
+    'akun_analitik',
+    'jenis_pengadaan',
+    'satuan',
+    'uom_po',
+    'kuantum_po_kg',
+    'qty_in_out',
+    'harga_include_ppn',
+    'nominal_realisasi_incl_ppn',
+    'status',
+)
+
+# Date is NOT part of target comparison (only id and target_setara_beras)
+TARGET_KANWIL_HASH_FIELDS = ('kanwil_id', 'target_setara_beras')
+TARGET_KANCAB_HASH_FIELDS = ('kancab_id', 'target_setara_beras')
+
+
+def _hash_fields(record, fields):
+    hash_data = {field: record.get(field) for field in fields}
+    json_string = json.dumps(hash_data, sort_keys=True, default=str)
+    return hashlib.sha256(json_string.encode()).hexdigest()
+
+
+def generate_row_hash(record):
+    """
+    Generate SHA256 hash from record data for duplicate detection.
+    Excludes auto-generated fields like id and created_at.
+    """
+    return _hash_fields(record, REALISASI_HASH_FIELDS)
+
+
+def generate_target_kanwil_hash(record):
+    """Generate SHA256 hash from target_kanwil record data for duplicate detection."""
+    return _hash_fields(record, TARGET_KANWIL_HASH_FIELDS)
+
+
+def generate_target_kancab_hash(record):
+    """Generate SHA256 hash from target_kancab record data for duplicate detection."""
+    return _hash_fields(record, TARGET_KANCAB_HASH_FIELDS)
+
+
+def add_row_hashes(records, fields):
+    """
+    Tambahkan kolom row_hash ke setiap record (in-place).
+    Encoder JSON dibuat sekali supaya tidak di-setup ulang per baris.
+    """
+    encoder = json.JSONEncoder(sort_keys=True, default=str)
+    sha256 = hashlib.sha256
+    for record in records:
+        hash_data = {field: record.get(field) for field in fields}
+        record['row_hash'] = sha256(encoder.encode(hash_data).encode()).hexdigest()
+    return records
@@ -0,0 +1,246 @@
+"""
+Transport HTTP ber-pool untuk client Supabase (PostgREST).
+
+create_client() bawaan supabase-py membuat httpx.Client dengan limit default dan
+satu timeout untuk semua operasi. Di sini setiap client mendapat profil pool:
+
+- "read" : query dashboard, banyak koneksi pendek, timeout ketat agar halaman
+           tidak menggantung
+- "bulk" : upload / migrasi, sedikit koneksi panjang dengan timeout longgar
+
+Dashboard dan upload memakai client (dan pool) yang berbeda, jadi upload besar
+tidak menghabiskan koneksi yang dibutuhkan dashboard. Setiap pool mencatat
+in-flight, antrian saat pool penuh, pool timeout dan latency (pool_snapshot()).
+
+Override per profil lewat [http.read] / [http.bulk] di secrets.toml atau env
+BULOG_HTTP_<PROFIL>_<SETTING> (mis. BULOG_HTTP_BULK_MAX_CONNECTIONS=16).
+HTTP/2 dipakai jika paket h2 terinstall.
+"""
+import importlib.util
+import os
+import threading
+import time
+from collections import deque
+
+import httpx
+
+POOL_PROFILES = {
+    'read': {
+        'max_connections': 16,
+        'max_keepalive': 8,
+        'keepalive_expiry': 30.0,
+        'connect_timeout': 5.0,
+        'timeout': 30.0,
+        'pool_timeout': 10.0,
+    },
+    'bulk': {
+        'max_connections': 8,
+        'max_keepalive': 8,
+        'keepalive_expiry': 60.0,
+        'connect_timeout': 10.0,
+        'timeout': 120.0,
+        'pool_timeout': 60.0,
+    },
+}
+HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+LATENCY_WINDOW = 1000
+
+# profil -> PoolMetrics (dibaca halaman profiler / output CLI)
+POOL_METRICS = {}
+_METRICS_LOCK = threading.Lock()
+
+
+def pool_settings(profile, overrides=None):
+    """Gabungkan default profil, override secrets ({profil: {setting: nilai}}) dan env"""
+    if profile not in POOL_PROFILES:
+        raise ValueError(f"Profil pool tidak dikenal: {profile} (pilihan: {', '.join(POOL_PROFILES)})")
+    settings = dict(POOL_PROFILES[profile])
+    for name, value in ((overrides or {}).get(profile) or {}).items():
+        if name in settings:
+            settings[name] = type(settings[name])(value)
+    for name in settings:
+        value = os.environ.get(f"BULOG_HTTP_{profile.upper()}_{name.upper()}")
+        if value:
+            settings[name] = type(settings[name])(value)
+    return settings
+
+
+class PoolMetrics:
+    """Counter thread-safe untuk satu pool HTTP"""
+
+    def __init__(self, profile, settings):
+        self.profile = profile
+        self.settings = settings
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.queued = 0
+        self.pool_timeouts = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.transport = None
+
+    def begin(self):
+        with self.lock:
+            if self.in_flight >= self.settings['max_connections']:
+                # Semua koneksi terpakai: request ini menunggu koneksi bebas
+                self.queued += 1
+            self.in_flight += 1
+            self.requests += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def end(self, seconds, error=None):
+        with self.lock:
+            self.in_flight -= 1
+            self.latencies.append(seconds)
+            if isinstance(error, httpx.PoolTimeout):
+                self.pool_timeouts += 1
+            elif isinstance(error, httpx.TimeoutException):
+                self.timeouts += 1
+            elif error is not None:
+                self.errors += 1
+
+    def connections(self):
+        """(jumlah koneksi terbuka, jumlah idle) dari pool httpcore, None jika tidak terbaca"""
+        pool = getattr(self.transport, '_pool', None)
+        try:
+            connections = list(pool.connections)
+        except Exception:
+            return None, None
+        return len(connections), sum(1 for connection in connections if connection.is_idle())
+
+    def snapshot(self):
+        open_connections, idle_connections = self.connections()
+        with self.lock:
+            latencies = sorted(self.latencies)
+            snapshot = {
+                'profile': self.profile,
+                'max_connections': self.settings['max_connections'],
+                'in_flight': self.in_flight,
+                'peak_in_flight': self.peak_in_flight,
+                'saturation': self.in_flight / self.settings['max_connections'],
+                'requests': self.requests,
+                'queued': self.queued,
+                'pool_timeouts': self.pool_timeouts,
+                'timeouts': self.timeouts,
+                'errors': self.errors,
+            }
+        snapshot['open_connections'] = open_connections
+        snapshot['idle_connections'] = idle_connections
+        snapshot['p50_ms'] = latencies[len(latencies) // 2] * 1000 if latencies else None
+        snapshot['p95_ms'] = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else None
+        return snapshot
+
+    def reset(self):
+        with self.lock:
+            self.peak_in_flight = self.in_flight
+            self.requests = self.queued = self.pool_timeouts = self.timeouts = self.errors = 0
+            self.latencies.clear()
+
+
+class _ReleaseOnClose(httpx.SyncByteStream):
+    """Koneksi baru kembali ke pool saat body response selesai dibaca / ditutup"""
+
+    def __init__(self, stream, release):
+        self.stream = stream
+        self.release = release
+
+    def __iter__(self):
+        yield from self.stream
+
+    def close(self):
+        try:
+            self.stream.close()
+        finally:
+            if self.release is not None:
+                self.release()
+                self.release = None
+
+
+class MeteredTransport(httpx.HTTPTransport):
+    """httpx.HTTPTransport yang melapor ke PoolMetrics"""
+
+    def __init__(self, metrics, **kwargs):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+        metrics.transport = self
+
+    def handle_request(self, request):
+        self.metrics.begin()
+        start = time.perf_counter()
+        try:
+            response = super().handle_request(request)
+        except Exception as e:
+            self.metrics.end(time.perf_counter() - start, error=e)
+            raise
+        response.stream = _ReleaseOnClose(
+            response.stream, lambda: self.metrics.end(time.perf_counter() - start)
+        )
+        return response
+
+
+def get_metrics(profile):
+    with _METRICS_LOCK:
+        if profile not in POOL_METRICS:
+            POOL_METRICS[profile] = PoolMetrics(profile, pool_settings(profile))
+        return POOL_METRICS[profile]
+
+
+def create_http_session(profile, base_url='', headers=None, overrides=None):
+    """httpx.Client ber-pool sesuai profil, terdaftar di POOL_METRICS"""
+    settings = pool_settings(profile, overrides)
+    metrics = get_metrics(profile)
+    metrics.settings = settings
+    transport = MeteredTransport(
+        metrics,
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=settings['max_connections'],
+            max_keepalive_connections=settings['max_keepalive'],
+            keepalive_expiry=settings['keepalive_expiry'],
+        ),
+    )
+    return httpx.Client(
+        base_url=base_url,
+        headers=headers,
+        timeout=httpx.Timeout(settings['timeout'], connect=settings['connect_timeout'],
+                              pool=settings['pool_timeout']),
+        transport=transport,
+        follow_redirects=True,
+    )
+
+
+def install_pooled_session(client, profile, overrides=None):
+    """
+    Ganti session httpx milik client.postgrest dengan session ber-pool.
+    Base URL dan header (apikey / Authorization) diambil dari session lama.
+    """
+    postgrest = client.postgrest
+    old_session = postgrest.session
+    postgrest.session = create_http_session(profile, base_url=old_session.base_url,
+                                            headers=old_session.headers, overrides=overrides)
+    old_session.close()
+    return client
+
+
+def create_pooled_client(url, key, profile='read', overrides=None):
+    """create_client supabase-py dengan transport PostgREST ber-pool sesuai profil"""
+    from supabase import create_client
+
+    return install_pooled_session(create_client(url, key), profile, overrides=overrides)
+
+
+def pool_snapshot():
+    """List of dict metrik semua pool (satu per profil)"""
+    with _METRICS_LOCK:
+        metrics = list(POOL_METRICS.values())
+    return [pool.snapshot() for pool in metrics]
+
+
+def reset_pool_metrics():
+    with _METRICS_LOCK:
+        metrics = list(POOL_METRICS.values())
+    for pool in metrics:
+        pool.reset()
@@ -0,0 +1,568 @@
+"""
+Job append yang bisa di-resume (checkpoint di SQLite).
+
+Setiap job append melewati fase:
+    stage -> compare -> migrate -> cleanup -> done
+
+Fase compare sekaligus memigrasi id baru setiap halaman (compare_and_migrate);
+fase migrate mengulang id yang masih gagal.
+
+Checkpoint yang disimpan:
+- stage: nomor batch yang sudah ter-insert ke <table>_compare (batch yang dipecah
+  dan hanya sebagian tersimpan: potongan baris yang tersimpan)
+- compare: last_id cursor RPC terakhir + compare ID yang ditemukan
+- migrate: compare ID yang sudah dipindahkan ke <table>
+
+Jika proses terputus (browser ditutup, koneksi putus, server restart),
+job dilanjutkan dari checkpoint terakhir, bukan dari awal. Id yang belum
+tercatat termigrasi dicek ulang lewat RPC compare sebelum dikirim lagi.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from contextlib import closing
+
+import pandas as pd
+
+from .config import REPO_ROOT
+from .ledger import match_upload, prefix_digest, row_hashes, set_digest, version_key
+from .pipeline import (
+    build_records,
+    compare_and_migrate,
+    copy_compare_rows,
+    filter_not_migrated,
+    get_table_config,
+    load_mappings,
+    prepare_partitions,
+    reset_table,
+)
+from .stats import ThroughputStats
+from .writer import DEFAULT_BATCH_SIZE, DEFAULT_MAX_WORKERS, insert_batches, print_log
+
+DEFAULT_JOBS_DIR = os.path.join(REPO_ROOT, ".ingestion_jobs")
+
+PHASES = ['stage', 'compare', 'migrate', 'cleanup', 'done']
+ACTIVE_STATUSES = ('pending', 'running', 'interrupted')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    table_name TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    status TEXT NOT NULL,
+    phase TEXT NOT NULL,
+    data_path TEXT NOT NULL,
+    source_name TEXT,
+    total_rows INTEGER DEFAULT 0,
+    total_batches INTEGER DEFAULT 0,
+    batch_size INTEGER NOT NULL,
+    staged_rows INTEGER DEFAULT 0,
+    last_compared_id INTEGER,
+    found_count INTEGER DEFAULT 0,
+    migrated_count INTEGER DEFAULT 0,
+    error TEXT,
+    summary TEXT,
+    telemetry TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_batches (
+    job_id TEXT NOT NULL,
+    batch_num INTEGER NOT NULL,
+    row_count INTEGER NOT NULL,
+    PRIMARY KEY (job_id, batch_num)
+);
+CREATE TABLE IF NOT EXISTS job_batch_parts (
+    job_id TEXT NOT NULL,
+    batch_num INTEGER NOT NULL,
+    start_row INTEGER NOT NULL,
+    row_count INTEGER NOT NULL,
+    PRIMARY KEY (job_id, batch_num, start_row)
+);
+CREATE TABLE IF NOT EXISTS job_compare_ids (
+    job_id TEXT NOT NULL,
+    compare_id INTEGER NOT NULL,
+    migrated INTEGER DEFAULT 0,
+    PRIMARY KEY (job_id, compare_id)
+);
+CREATE TABLE IF NOT EXISTS job_logs (
+    job_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    level TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS upload_ledger (
+    upload_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_name TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    status TEXT NOT NULL,
+    source_name TEXT,
+    sheet_name TEXT,
+    content_hash TEXT,
+    row_count INTEGER NOT NULL,
+    row_offset INTEGER DEFAULT 0,
+    prefix_hash TEXT NOT NULL,
+    set_hash TEXT NOT NULL,
+    dimension_version TEXT,
+    job_id TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS upload_ledger_table ON upload_ledger (table_name, status);
+"""
+
+
+class JobStore:
+    """State job ingestion di file SQLite (satu koneksi per operasi, aman lintas thread)"""
+
+    def __init__(self, jobs_dir=None):
+        self.jobs_dir = jobs_dir or os.environ.get("BULOG_JOBS_DIR") or DEFAULT_JOBS_DIR
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self.db_path = os.path.join(self.jobs_dir, "jobs.sqlite3")
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            # DB lama (sebelum ada telemetry)
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if 'telemetry' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN telemetry TEXT")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _execute(self, sql, params=(), many=False):
+        with closing(self._connect()) as conn, conn:
+            if many:
+                conn.executemany(sql, params)
+            else:
+                conn.execute(sql, params)
+
+    def _query(self, sql, params=()):
+        with closing(self._connect()) as conn:
+            return [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+    # ---- jobs ----
+    def create_job(self, table_name, df, batch_size=DEFAULT_BATCH_SIZE, source_name=None, stats=None):
+        """
+        Simpan DataFrame sumber ke disk dan daftarkan job baru. Returns job_id.
+        stats: ThroughputStats awal (mis. berisi fase read_excel) untuk telemetry job.
+        """
+        get_table_config(table_name)
+        job_id = time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        data_path = os.path.join(self.jobs_dir, f"{job_id}.pkl")
+        df.to_pickle(data_path)
+        now = time.time()
+        self._execute(
+            "INSERT INTO jobs (job_id, table_name, mode, status, phase, data_path, source_name, "
+            "total_rows, batch_size, telemetry, created_at, updated_at) "
+            "VALUES (?, ?, 'append', 'pending', 'stage', ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, table_name, data_path, source_name, len(df), batch_size,
+             json.dumps(stats.summary(include_raw=True)) if stats is not None else None, now, now),
+        )
+        return job_id
+
+    def get_job(self, job_id):
+        rows = self._query("SELECT * FROM jobs WHERE job_id = ?", (job_id,))
+        if not rows:
+            raise KeyError(f"Job tidak ditemukan: {job_id}")
+        return self._decode(rows[0])
+
+    @staticmethod
+    def _decode(job):
+        for key in ('summary', 'telemetry'):
+            job[key] = json.loads(job[key]) if job[key] else None
+        return job
+
+    def list_jobs(self, statuses=None, limit=50):
+        sql = "SELECT * FROM jobs"
+        params = []
+        if statuses:
+            sql += f" WHERE status IN ({', '.join('?' for _ in statuses)})"
+            params.extend(statuses)
+        sql += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        return [self._decode(job) for job in self._query(sql, params)]
+
+    def incomplete_jobs(self, table_name=None):
+        """Job yang belum selesai (bisa dilanjutkan)"""
+        jobs = self.list_jobs(statuses=ACTIVE_STATUSES + ('failed',))
+        return [job for job in jobs if table_name is None or job['table_name'] == table_name]
+
+    def update_job(self, job_id, **fields):
+        for key in ('summary', 'telemetry'):
+            if fields.get(key) is not None:
+                fields[key] = json.dumps(fields[key], default=str)
+        fields['updated_at'] = time.time()
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        self._execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+
+    def mark_interrupted(self):
+        """Job berstatus running tanpa thread hidup (mis. setelah restart) ditandai interrupted"""
+        running = self.list_jobs(statuses=('running',), limit=1000)
+        for job in running:
+            if not is_job_active(job['job_id']):
+                self.update_job(job['job_id'], status='interrupted')
+
+    def delete_job(self, job_id):
+        job = self.get_job(job_id)
+        for table in ('job_batches', 'job_batch_parts', 'job_compare_ids', 'job_logs', 'upload_ledger', 'jobs'):
+            self._execute(f"DELETE FROM {table} WHERE job_id = ?", (job_id,))
+        if os.path.exists(job['data_path']):
+            os.remove(job['data_path'])
+
+    def load_data(self, job_id):
+        return pd.read_pickle(self.get_job(job_id)['data_path'])
+
+    # ---- checkpoints ----
+    def completed_batches(self, job_id):
+        rows = self._query("SELECT batch_num FROM job_batches WHERE job_id = ?", (job_id,))
+        return {row['batch_num'] for row in rows}
+
+    def add_batch(self, job_id, batch_num, row_count):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR IGNORE INTO job_batches VALUES (?, ?, ?)", (job_id, batch_num, row_count))
+            self._update_staged_rows(conn, job_id)
+
+    def completed_parts(self, job_id):
+        """Potongan batch yang tersimpan dari batch yang belum lengkap: {batch_num: [(start, count)]}"""
+        rows = self._query(
+            "SELECT batch_num, start_row, row_count FROM job_batch_parts WHERE job_id = ? "
+            "AND batch_num NOT IN (SELECT batch_num FROM job_batches WHERE job_id = ?) ORDER BY batch_num, start_row",
+            (job_id, job_id),
+        )
+        parts = {}
+        for row in rows:
+            parts.setdefault(row['batch_num'], []).append((row['start_row'], row['row_count']))
+        return parts
+
+    def add_batch_part(self, job_id, batch_num, start_row, row_count):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR IGNORE INTO job_batch_parts VALUES (?, ?, ?, ?)",
+                         (job_id, batch_num, start_row, row_count))
+            self._update_staged_rows(conn, job_id)
+
+    def _update_staged_rows(self, conn, job_id):
+        conn.execute(
+            "UPDATE jobs SET staged_rows = "
+            "(SELECT COALESCE(SUM(row_count), 0) FROM job_batches WHERE job_id = ?) + "
+            "(SELECT COALESCE(SUM(row_count), 0) FROM job_batch_parts WHERE job_id = ? "
+            " AND batch_num NOT IN (SELECT batch_num FROM job_batches WHERE job_id = ?)), "
+            "updated_at = ? WHERE job_id = ?",
+            (job_id, job_id, job_id, time.time(), job_id),
+        )
+
+    def add_compare_page(self, job_id, last_id, compare_ids):
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR IGNORE INTO job_compare_ids (job_id, compare_id) VALUES (?, ?)",
+                             [(job_id, compare_id) for compare_id in compare_ids])
+            conn.execute(
+                "UPDATE jobs SET last_compared_id = ?, "
+                "found_count = (SELECT COUNT(*) FROM job_compare_ids WHERE job_id = ?), "
+                "updated_at = ? WHERE job_id = ?",
+                (last_id, job_id, time.time(), job_id),
+            )
+
+    def compare_ids(self, job_id, migrated=None):
+        sql = "SELECT compare_id FROM job_compare_ids WHERE job_id = ?"
+        params = [job_id]
+        if migrated is not None:
+            sql += " AND migrated = ?"
+            params.append(int(migrated))
+        sql += " ORDER BY compare_id"
+        return [row['compare_id'] for row in self._query(sql, params)]
+
+    def mark_migrated(self, job_id, compare_ids, count):
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("UPDATE job_compare_ids SET migrated = 1 WHERE job_id = ? AND compare_id = ?",
+                             [(job_id, compare_id) for compare_id in compare_ids])
+            conn.execute("UPDATE jobs SET migrated_count = migrated_count + ?, updated_at = ? WHERE job_id = ?",
+                         (count, time.time(), job_id))
+
+    # ---- upload ledger (lihat ingestion.ledger) ----
+    def record_upload(self, table_name, mode, columns, hashes, content_hash=None, source_name=None,
+                      sheet_name=None, row_offset=0, job_id=None, dimension_version=None, status='done'):
+        """
+        Catat sidik jari upload (seluruh baris file, termasuk bagian yang dilewati
+        karena sudah di-upload sebelumnya). Upload lewat job dicatat 'pending' dan
+        menjadi 'done' saat job selesai. Returns upload_id.
+        """
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute(
+                "INSERT INTO upload_ledger (table_name, mode, status, source_name, sheet_name, content_hash, "
+                "row_count, row_offset, prefix_hash, set_hash, dimension_version, job_id, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (table_name, mode, status, source_name, sheet_name, content_hash, len(hashes), row_offset,
+                 prefix_digest(columns, hashes), set_digest(columns, hashes), version_key(dimension_version),
+                 job_id, time.time()),
+            )
+            return cursor.lastrowid
+
+    def completed_uploads(self, table_name, dimension_version=None):
+        """Upload selesai untuk tabel (terbaru dulu), hanya dengan versi dimensi yang sama"""
+        return self._query(
+            "SELECT * FROM upload_ledger WHERE table_name = ? AND status = 'done' "
+            "AND dimension_version IS ? ORDER BY created_at DESC",
+            (table_name, version_key(dimension_version)),
+        )
+
+    def find_upload_by_content(self, table_name, content_hash, dimension_version=None):
+        """Upload selesai dengan isi sheet identik (tanpa parse), atau None"""
+        if not content_hash:
+            return None
+        for entry in self.completed_uploads(table_name, dimension_version):
+            if entry['content_hash'] == content_hash:
+                return entry
+        return None
+
+    def find_upload(self, table_name, columns, hashes, dimension_version=None):
+        """(IDENTICAL | TAIL | None, entry, offset) dari ingestion.ledger.match_upload"""
+        return match_upload(self.completed_uploads(table_name, dimension_version), columns, hashes)
+
+    def complete_uploads(self, job_id):
+        self._execute("UPDATE upload_ledger SET status = 'done' WHERE job_id = ?", (job_id,))
+
+    def clear_uploads(self, table_name):
+        """Lupakan semua upload tabel (setelah replace / rollback isi tabel tidak lagi sama)"""
+        self._execute("DELETE FROM upload_ledger WHERE table_name = ?", (table_name,))
+
+    # ---- logs ----
+    def add_log(self, job_id, message, level="info"):
+        self._execute("INSERT INTO job_logs VALUES (?, ?, ?, ?)", (job_id, time.time(), level, message))
+
+    def get_logs(self, job_id, limit=200):
+        rows = self._query("SELECT * FROM job_logs WHERE job_id = ? ORDER BY ts DESC LIMIT ?", (job_id, limit))
+        return list(reversed(rows))
+
+
+class UploadLedger:
+    """
+    Ledger upload satu file untuk satu tabel, diteruskan ke run_replace / run_delta_sync /
+    run_scoped_replace / rollback_replace (ingestion.pipeline) yang memperbaruinya setelah
+    isi tabel berubah, sehingga UI dan CLI mencatat riwayat upload dengan cara yang sama.
+    Tanpa hashes (mis. rollback) hanya bisa menghapus riwayat.
+    """
+
+    def __init__(self, store, table_name, columns=None, hashes=None, content_hash=None,
+                 source_name=None, sheet_name=None, dimension_version=None):
+        self.store = store
+        self.table_name = table_name
+        self.columns = list(columns) if columns is not None else None
+        self.hashes = hashes
+        self.content_hash = content_hash
+        self.source_name = source_name
+        self.sheet_name = sheet_name
+        self.dimension_version = dimension_version
+
+    @classmethod
+    def from_frame(cls, store, table_name, df, **kwargs):
+        return cls(store, table_name, list(df.columns), row_hashes(df), **kwargs)
+
+    def table_changed(self):
+        """Isi tabel tidak lagi sama dengan gabungan upload sebelumnya"""
+        self.store.clear_uploads(self.table_name)
+
+    def table_matches(self, mode):
+        """Isi tabel (atau scope file) sekarang = file ini: riwayat lama diganti upload ini"""
+        self.store.clear_uploads(self.table_name)
+        if self.hashes is not None:
+            self.store.record_upload(self.table_name, mode, self.columns, self.hashes,
+                                     content_hash=self.content_hash, source_name=self.source_name,
+                                     sheet_name=self.sheet_name, dimension_version=self.dimension_version)
+
+
+def run_append_job(client, store, job_id, max_workers=DEFAULT_MAX_WORKERS, log=None, stats=None):
+    """
+    Jalankan (atau lanjutkan) job append dari checkpoint terakhir.
+    Telemetry (ThroughputStats) disimpan berkala ke kolom telemetry job;
+    saat resume, telemetry run sebelumnya dilanjutkan.
+    Returns dict ringkasan seperti run_append.
+    """
+    echo = log or print_log
+
+    def job_log(message, level="info"):
+        store.add_log(job_id, message, level)
+        echo(message, level)
+
+    job = store.get_job(job_id)
+    stats = stats or ThroughputStats.from_summary(job['telemetry'])
+    last_saved = [0.0]
+
+    def save_telemetry(force=False):
+        # Dibatasi ~1x per detik agar SQLite tidak ditulis setiap batch
+        now = time.time()
+        if force or now - last_saved[0] >= 1:
+            store.update_job(job_id, telemetry=stats.summary(include_raw=True))
+            last_saved[0] = now
+
+    def on_stage_batch(batch_num, count):
+        store.add_batch(job_id, batch_num, count)
+        save_telemetry()
+
+    def on_stage_part(batch_num, start, count):
+        store.add_batch_part(job_id, batch_num, start, count)
+        save_telemetry()
+
+    def on_compare_page(last_id, ids):
+        # Dipanggil dari thread compare (compare_and_migrate): hanya checkpoint,
+        # telemetry disimpan dari thread job
+        store.add_compare_page(job_id, last_id, ids)
+
+    def on_migrate_batch(ids, count):
+        store.mark_migrated(job_id, ids, count)
+        save_telemetry()
+
+    def pending_migrate_ids():
+        # Run sebelumnya bisa terputus antara insert ke tabel utama dan mark_migrated:
+        # id yang sudah ada di tabel utama dicatat termigrasi, bukan dikirim ulang
+        pending = store.compare_ids(job_id, migrated=False)
+        if not pending:
+            return pending
+        remaining = filter_not_migrated(client, table_name, pending, limit=batch_size, log=job_log)
+        landed = sorted(set(pending) - set(remaining))
+        if landed:
+            store.mark_migrated(job_id, landed, len(landed))
+            job_log(f"⏩ {len(landed):,} id sudah ada di {table_name} dari run sebelumnya, tidak dimigrasi ulang", "info")
+        return remaining
+
+    table_name = job['table_name']
+    batch_size = job['batch_size']
+    compare_table = get_table_config(table_name)['compare_table']
+    phase = job['phase']
+
+    store.update_job(job_id, status='running', error=None)
+    job_log(f"▶️ Job {job_id} ({table_name}) mulai dari fase '{phase}'", "info")
+
+    try:
+        with stats.phase('load_mappings'):
+            mappings = load_mappings(client)
+        df = store.load_data(job_id)
+        with stats.phase('build_records'):
+            batch = build_records(table_name, df, mappings, stats=stats, collapse=True)
+            stats.add_rows(len(batch))
+        if batch.collapsed and phase == 'stage' and not store.completed_batches(job_id):
+            job_log(f"🧹 {batch.collapsed:,} baris duplikat dalam file digabung sebelum staging", "info")
+        save_telemetry(force=True)
+        total_batches = (len(batch.records) + batch_size - 1) // batch_size
+        store.update_job(job_id, total_batches=total_batches)
+
+        if phase == 'stage':
+            prepare_partitions(client, table_name, batch.records, (compare_table, table_name),
+                               log=job_log, stats=stats)
+            done_batches = store.completed_batches(job_id)
+            done_parts = store.completed_parts(job_id)
+            if not done_batches and not done_parts:
+                job_log(f"🗑️ Clearing {compare_table} table...", "warning")
+                if not reset_table(client, compare_table, log=job_log):
+                    raise RuntimeError(f"Failed to reset {compare_table} table. Aborting.")
+            else:
+                job_log(f"⏩ Melewati {len(done_batches)}/{total_batches} batch yang sudah di-stage", "info")
+            with stats.phase('insert_compare'):
+                staged = insert_batches(client, compare_table, batch.records, batch_size=batch_size,
+                                        max_workers=max_workers, log=job_log, stats=stats,
+                                        skip_batches=done_batches, skip_parts=done_parts,
+                                        batch_callback=on_stage_batch, part_callback=on_stage_part)
+            if staged.failed:
+                raise RuntimeError(f"{staged.failed:,} records gagal di-stage ke {compare_table}")
+            phase = 'compare'
+            store.update_job(job_id, phase=phase)
+
+        if phase == 'compare':
+            # Compare dan migrate berjalan bersamaan; id yang gagal dimigrasi
+            # diulang di fase migrate
+            start_after = store.get_job(job_id)['last_compared_id']
+            pending_ids = pending_migrate_ids()
+            if start_after is not None:
+                job_log(f"⏩ Melanjutkan compare dari last_id={start_after} "
+                        f"({len(pending_ids):,} id menunggu migrate)", "info")
+            with stats.phase('compare_migrate'):
+                compare_and_migrate(client, table_name, limit=batch_size, batch_size=batch_size,
+                                    max_workers=max_workers, log=job_log, stats=stats,
+                                    start_after=start_after, pending_ids=pending_ids,
+                                    page_callback=on_compare_page,
+                                    batch_callback=on_migrate_batch)
+            phase = 'migrate'
+            store.update_job(job_id, phase=phase)
+            job_log(f"📊 Found {len(store.compare_ids(job_id)):,} unique records to migrate", "info")
+
+        if phase == 'migrate':
+            pending_ids = pending_migrate_ids()
+            if pending_ids:
+                with stats.phase('migrate'):
+                    copy_compare_rows(client, table_name, pending_ids, batch_size=batch_size,
+                                      max_workers=max_workers, log=job_log, stats=stats,
+                                      batch_callback=on_migrate_batch)
+            remaining = len(store.compare_ids(job_id, migrated=False))
+            if remaining:
+                raise RuntimeError(f"{remaining:,} records belum termigrasi ke {table_name}")
+            phase = 'cleanup'
+            store.update_job(job_id, phase=phase)
+
+        if phase == 'cleanup':
+            reset_table(client, compare_table, log=job_log)
+            phase = 'done'
+
+        job = store.get_job(job_id)
+        summary = {
+            'job_id': job_id,
+            'table': table_name,
+            'mode': 'append',
+            'total_rows': job['total_rows'],
+            'staged': job['staged_rows'],
+            'unique': job['found_count'],
+            'migrated': job['migrated_count'],
+            'duplicates': job['staged_rows'] - job['found_count'],
+            'collapsed': batch.collapsed,
+            'skipped_kanwil': batch.skipped_kanwil,
+            'skipped_kancab': batch.skipped_kancab,
+            'invalid_rows': len(batch.invalid_rows),
+            'failed': 0,
+        }
+        store.update_job(job_id, status='done', phase='done', summary=summary,
+                         telemetry=stats.summary(include_raw=True))
+        store.complete_uploads(job_id)
+        job_log(f"✅ Job {job_id} selesai: {summary['migrated']:,} records ditambahkan", "success")
+        return summary
+    except Exception as e:
+        store.update_job(job_id, status='failed', phase=phase, error=str(e),
+                         telemetry=stats.summary(include_raw=True))
+        job_log(f"❌ Job {job_id} gagal pada fase '{phase}': {e}", "error")
+        job_log(traceback.format_exc(), "error")
+        raise
+
+
+# Registry thread job yang sedang berjalan di proses ini
+_active_threads = {}
+_active_lock = threading.Lock()
+
+
+def is_job_active(job_id):
+    with _active_lock:
+        thread = _active_threads.get(job_id)
+        return thread is not None and thread.is_alive()
+
+
+def start_job_thread(client, store, job_id, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Jalankan job di background thread (daemon) agar tidak terikat sesi Streamlit.
+    Returns thread, atau thread yang sudah berjalan untuk job yang sama.
+    """
+    with _active_lock:
+        thread = _active_threads.get(job_id)
+        if thread is not None and thread.is_alive():
+            return thread
+
+        def target():
+            try:
+                run_append_job(client, store, job_id, max_workers=max_workers, log=lambda *args: None)
+            except Exception:
+                pass  # Status & error sudah tersimpan di JobStore
+
+        thread = threading.Thread(target=target, name=f"ingestion-job-{job_id}", daemon=True)
+        _active_threads[job_id] = thread
+        thread.start()
+        return thread
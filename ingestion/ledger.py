@@ -0,0 +1,82 @@
+"""
+Sidik jari upload untuk ledger di JobStore (tabel upload_ledger).
+
+Admin sering meng-upload ulang export harian yang sama, atau yang hanya bertambah
+di akhir. Setiap upload yang selesai dicatat dengan:
+
+- content_hash : sha256 XML sheet + sharedStrings (ingestion.sniff.sheet_content_hash),
+                 dihitung sebelum read_excel -> file identik dikenali tanpa parse
+- prefix_hash  : sha256 header + urutan hash baris (pd.util.hash_pandas_object),
+                 untuk mengenali file yang merupakan perpanjangan upload sebelumnya
+- set_hash     : sha256 header + hash baris unik terurut (isi sama, urutan berbeda)
+
+Entry ledger hanya dipakai jika upload-nya selesai (job append done / replace
+sukses) dan versi dimensi kanwil/kancab sama: baris yang dulu dilewati karena
+mapping belum ada harus diproses ulang setelah mapping berubah. Replace dan
+rollback menghapus ledger tabelnya (isi tabel tidak lagi sama dengan gabungan
+upload sebelumnya).
+"""
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+IDENTICAL = 'identical'
+TAIL = 'tail'
+
+
+def row_hashes(df):
+    """Hash uint64 per baris DataFrame hasil read_excel (nilai saja, tanpa index)"""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+
+
+def _digest(columns, values):
+    digest = hashlib.sha256("\x1f".join(str(column) for column in columns).encode())
+    digest.update(np.ascontiguousarray(values, dtype=np.uint64).tobytes())
+    return digest.hexdigest()
+
+
+def prefix_digest(columns, hashes, count=None):
+    """Digest header + hash baris [0, count) berurutan"""
+    return _digest(columns, hashes[:count])
+
+
+def set_digest(columns, hashes):
+    """Digest header + himpunan hash baris (urutan dan duplikat diabaikan)"""
+    return _digest(columns, np.unique(hashes))
+
+
+def version_key(version):
+    """Versi dimensi (str dari RPC atau tuple fallback) sebagai teks untuk SQLite"""
+    return json.dumps(version, default=str) if version is not None else None
+
+
+def match_upload(entries, columns, hashes):
+    """
+    Cari upload selesai yang isinya sudah tercakup data baru.
+    entries: baris upload_ledger (row_count, prefix_hash, set_hash).
+    Returns (IDENTICAL, entry, len(hashes)) jika isi sama, (TAIL, entry, row_count)
+    jika data baru = upload lama + baris tambahan di akhir, atau (None, None, 0).
+    """
+    total = len(hashes)
+    digests = {}
+    best = None
+    for entry in entries:
+        count = entry['row_count']
+        if count > total:
+            continue
+        if count not in digests:
+            digests[count] = prefix_digest(columns, hashes, count)
+        if digests[count] == entry['prefix_hash'] and (best is None or count > best['row_count']):
+            best = entry
+    if best is not None and best['row_count'] == total:
+        return IDENTICAL, best, total
+    if entries:
+        current_set = set_digest(columns, hashes)
+        for entry in entries:
+            if entry['set_hash'] == current_set:
+                return IDENTICAL, entry, total
+    if best is not None and best['row_count'] > 0:
+        return TAIL, best, best['row_count']
+    return None, None, 0
@@ -0,0 +1,87 @@
+"""
+Partisi bulanan untuk tabel yang dipartisi per tanggal (lihat partition_functions.sql).
+
+realisasi / realisasi_compare dipartisi RANGE per bulan pada tanggal_penerimaan.
+Sebelum data dimuat, ensure_partitions memanggil RPC ensure_month_partitions untuk
+bulan-bulan yang ada di records supaya setiap bulan masuk ke partisinya sendiri (dan
+Replace lewat shadow table mengkloning batas partisi yang lengkap).
+
+Hanya bulan yang benar-benar ada di data yang dibuat partisinya: bulan berurutan
+digabung per panggilan (maks MAX_PARTITION_SPAN_MONTHS, batas yang sama ditolak oleh
+fungsi SQL-nya), celah antar bulan tidak diisi. Bulan di luar jendela wajar
+(PARTITION_MONTHS_BACK ke belakang, PARTITION_MONTHS_AHEAD ke depan) dianggap salah
+ketik dan tidak dibuatkan partisi; barisnya masuk partisi default.
+
+Gagal di sini tidak pernah menggagalkan upload: baris bulan yang belum punya
+partisi tetap masuk ke partisi default, dan tabel yang belum dimigrasi
+(partition_table_by_month) dilewati oleh fungsi SQL-nya.
+"""
+import pandas as pd
+
+from .writer import print_log
+
+PARTITION_RPC = 'ensure_month_partitions'
+MAX_PARTITION_SPAN_MONTHS = 24        # sama dengan partition_max_span_months() di SQL
+PARTITION_MONTHS_BACK = 120
+PARTITION_MONTHS_AHEAD = 12
+
+
+def record_months(records, column):
+    """Bulan (pd.Period) kolom column yang ada di records, terurut dan unik"""
+    dates = pd.to_datetime(pd.Series([record.get(column) for record in records], dtype=object),
+                           format='%Y-%m-%d').dropna()
+    return sorted(set(dates.dt.to_period('M')))
+
+
+def partition_ranges(months, today=None, max_span=MAX_PARTITION_SPAN_MONTHS,
+                     months_back=PARTITION_MONTHS_BACK, months_ahead=PARTITION_MONTHS_AHEAD):
+    """
+    Kelompokkan months menjadi rentang bulan berurutan (maks max_span bulan per rentang).
+    Bulan di luar [today - months_back, today + months_ahead] tidak dibuatkan partisi.
+    Returns ([(date_from, date_to)], [bulan yang dilewati]).
+    """
+    current = pd.Period(today or pd.Timestamp.today(), freq='M')
+    ranges, skipped, run = [], [], []
+    for month in months:
+        if not current - months_back <= month <= current + months_ahead:
+            skipped.append(month)
+            continue
+        if run and (month != run[-1] + 1 or len(run) >= max_span):
+            ranges.append((run[0].start_time.date(), run[-1].end_time.date()))
+            run = []
+        run.append(month)
+    if run:
+        ranges.append((run[0].start_time.date(), run[-1].end_time.date()))
+    return ranges, skipped
+
+
+def ensure_partitions(client, table_names, records, column, log=None):
+    """
+    Buat partisi bulanan yang belum ada di setiap tabel table_names untuk bulan-bulan
+    di records. Returns jumlah partisi baru (0 jika tabel tidak dipartisi).
+    """
+    log = log or print_log
+    ranges, skipped = partition_ranges(record_months(records, column))
+    if skipped:
+        labels = ', '.join(str(month) for month in skipped[:5]) + (' ...' if len(skipped) > 5 else '')
+        log(f"⚠️ {len(skipped)} bulan di luar jendela partisi ({labels}), baris masuk partisi default", "warning")
+    created = 0
+    for table_name in table_names:
+        for date_from, date_to in ranges:
+            try:
+                count = client.rpc(PARTITION_RPC, {
+                    'p_table_name': table_name,
+                    'p_date_from': date_from.isoformat(),
+                    'p_date_to': date_to.isoformat(),
+                }).execute().data
+            except Exception as e:
+                text = str(e)
+                if 'PGRST202' in text or 'Could not find the function' in text:
+                    break
+                log(f"⚠️ Partisi {table_name} {date_from:%Y-%m} s/d {date_to:%Y-%m} gagal dibuat ({e}), "
+                    f"baris masuk partisi default", "warning")
+                continue
+            if count:
+                log(f"🗂️ {count} partisi bulanan baru di {table_name} ({date_from:%Y-%m} s/d {date_to:%Y-%m})", "info")
+                created += count
+    return created
@@ -0,0 +1,291 @@
+"""
+Jalur PostgreSQL langsung untuk Replace mode (COPY FROM STDIN).
+
+Jalur REST mengirim 1000 baris JSON per request lewat PostgREST; untuk 500k baris
+itu ratusan request plus TRUNCATE di awal (dashboard kosong selama upload).
+Jika database_url dikonfigurasi (env BULOG_DATABASE_URL / DATABASE_URL atau
+[database] url di secrets.toml) dan psycopg2 tersedia, semuanya dalam satu transaksi:
+
+    SELECT prepare_shadow_table('<table>');                -- <table>_next kosong
+    COPY <table>_next (<kolom>) FROM STDIN (FORMAT csv);    -- streaming per chunk
+    SELECT swap_shadow_table('<table>');                   -- rename, lama -> <table>_prev
+
+COPY ke tabel baru tidak mengunci tabel aktif, jadi dashboard tetap membaca data
+lama tanpa menunggu; lock hanya sesaat saat rename. Jika fungsi shadow swap belum
+dipasang (shadow_swap_functions.sql) dipakai staging:
+
+    CREATE TEMP TABLE _stage_<table> AS SELECT <kolom> FROM <table> WITH NO DATA;
+    COPY _stage_<table> ...; TRUNCATE <table> RESTART IDENTITY; INSERT ... SELECT ...;
+
+Jika COPY gagal (data tidak valid) seluruh transaksi di-rollback sehingga tabel
+tidak pernah kosong/setengah terisi. Jika koneksi langsung tidak bisa dibuat,
+pemanggil kembali ke jalur REST.
+
+Delta sync (copy_delta_sync) dan scoped replace (copy_scoped_replace) memakai koneksi
+yang sama: COPY ke <table>_compare lalu fungsi SQL-nya dalam satu transaksi tanpa
+statement_timeout.
+"""
+import time
+from contextlib import nullcontext
+
+import pandas as pd
+
+from .delta import DELTA_ACTIONS, DeltaSyncUnavailable
+from .scoped import SCOPED_ACTIONS, ScopedReplaceUnavailable
+
+try:
+    import psycopg2
+    import psycopg2.errors
+    from psycopg2 import sql
+except ImportError:  # psycopg2 opsional, hanya jalur REST yang tersedia
+    psycopg2 = None
+
+COPY_CHUNK_ROWS = 50_000
+COPY_READ_SIZE = 1024 * 1024
+
+
+class DirectCopyUnavailable(Exception):
+    """Koneksi PostgreSQL langsung tidak tersedia (pakai jalur REST)"""
+
+
+def direct_copy_available(database_url):
+    return bool(database_url) and psycopg2 is not None
+
+
+def records_to_csv(records, columns):
+    """List of dict -> CSV tanpa header (None -> sel kosong = NULL untuk COPY csv)"""
+    frame = pd.DataFrame(records, columns=columns, dtype=object)
+    return frame.to_csv(index=False, header=False)
+
+
+class RecordCsvStream:
+    """
+    File-like (read) untuk cursor.copy_expert: records di-serialize ke CSV per
+    chunk_rows baris saat dibaca, jadi CSV 500k baris tidak pernah utuh di memori.
+    """
+
+    def __init__(self, records, columns, chunk_rows=COPY_CHUNK_ROWS):
+        self.records = records
+        self.columns = columns
+        self.chunk_rows = chunk_rows
+        self.position = 0
+        self.buffer = b''
+        self.offset = 0
+        self.bytes_sent = 0
+
+    def read(self, size=-1):
+        # Boleh mengembalikan kurang dari size; copy_expert membaca sampai b''
+        if self.offset >= len(self.buffer):
+            if self.position >= len(self.records):
+                return b''
+            chunk = self.records[self.position:self.position + self.chunk_rows]
+            self.position += len(chunk)
+            self.buffer = records_to_csv(chunk, self.columns).encode('utf-8')
+            self.offset = 0
+        end = len(self.buffer) if size is None or size < 0 else self.offset + size
+        data = self.buffer[self.offset:end]
+        self.offset += len(data)
+        self.bytes_sent += len(data)
+        return data
+
+
+def connect(database_url):
+    if psycopg2 is None:
+        raise DirectCopyUnavailable("psycopg2 tidak terinstall")
+    try:
+        return psycopg2.connect(database_url)
+    except psycopg2.OperationalError as e:
+        raise DirectCopyUnavailable(str(e)) from e
+
+
+def _copy_records(cursor, conn, target, column_list, records, columns, chunk_rows, stats, phase):
+    """COPY records ke target, returns (detik, bytes terkirim)"""
+    stream = RecordCsvStream(records, columns, chunk_rows=chunk_rows)
+    with phase('copy'):
+        copy_start = time.perf_counter()
+        cursor.copy_expert(
+            sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(target, column_list).as_string(conn),
+            stream,
+            size=COPY_READ_SIZE,
+        )
+        copy_seconds = time.perf_counter() - copy_start
+        if stats is not None:
+            stats.record_batch(copy_seconds, len(records), stream.bytes_sent, 0)
+    return copy_seconds, stream.bytes_sent
+
+
+def _prepare_shadow(cursor, table_name, log):
+    """
+    prepare_shadow_table di dalam savepoint. Returns nama shadow table, atau None
+    jika fungsi belum dipasang / tabel ditolak (transaksi tetap bisa dipakai).
+    """
+    cursor.execute("SAVEPOINT shadow_prepare")
+    try:
+        cursor.execute("SELECT prepare_shadow_table(%s)", [table_name])
+        shadow = cursor.fetchone()[0]
+    except psycopg2.Error as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT shadow_prepare")
+        reason = str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__
+        log(f"⚠️ Shadow swap tidak tersedia untuk {table_name} ({reason}), pakai staging + TRUNCATE", "warning")
+        return None
+    cursor.execute("RELEASE SAVEPOINT shadow_prepare")
+    return shadow
+
+
+def copy_replace(database_url, table_name, records, log=None, stats=None, chunk_rows=COPY_CHUNK_ROWS,
+                 use_shadow=True):
+    """
+    Ganti seluruh isi table_name dengan records dalam satu transaksi
+    (COPY ke <table>_next lalu swap; atau staging COPY -> TRUNCATE -> INSERT SELECT).
+    Returns jumlah baris yang masuk. Raise DirectCopyUnavailable jika tidak bisa konek.
+    """
+    log = log or (lambda message, level='info': print(message))
+    phase = stats.phase if stats is not None else (lambda name: nullcontext())
+    conn = connect(database_url)
+    table = sql.Identifier(table_name)
+    try:
+        with conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SET LOCAL statement_timeout = 0")
+                shadow = _prepare_shadow(cursor, table_name, log) if use_shadow else None
+                columns = list(records[0].keys()) if records else []
+                column_list = sql.SQL(', ').join(sql.Identifier(column) for column in columns)
+
+                if shadow is not None:
+                    if records:
+                        log(f"📤 COPY {len(records):,} rows ke {shadow}...", "info")
+                        copy_seconds, bytes_sent = _copy_records(cursor, conn, sql.Identifier(shadow), column_list,
+                                                                 records, columns, chunk_rows, stats, phase)
+                        log(f"✅ COPY selesai dalam {copy_seconds:.1f}s ({bytes_sent / 1024 / 1024:.1f} MB)", "success")
+                    with phase('swap'):
+                        cursor.execute("SELECT swap_shadow_table(%s)", [table_name])
+                        inserted = cursor.fetchone()[0]
+                    log(f"🔁 {table_name} di-swap dengan {shadow} ({inserted:,} rows), "
+                        f"data lama disimpan di {table_name}_prev", "success")
+                    return inserted
+
+                if not records:
+                    cursor.execute(sql.SQL("TRUNCATE {} RESTART IDENTITY").format(table))
+                    log(f"🗑️ {table_name} dikosongkan (tidak ada data baru)", "warning")
+                    return 0
+
+                stage = sql.Identifier(f"_stage_{table_name}")
+                cursor.execute(sql.SQL(
+                    "CREATE TEMP TABLE {} ON COMMIT DROP AS SELECT {} FROM {} WITH NO DATA"
+                ).format(stage, column_list, table))
+
+                log(f"📤 COPY {len(records):,} rows ke staging {table_name}...", "info")
+                copy_seconds, bytes_sent = _copy_records(cursor, conn, stage, column_list,
+                                                         records, columns, chunk_rows, stats, phase)
+                log(f"✅ COPY selesai dalam {copy_seconds:.1f}s ({bytes_sent / 1024 / 1024:.1f} MB)", "success")
+
+                with phase('swap'):
+                    cursor.execute(sql.SQL("TRUNCATE {} RESTART IDENTITY").format(table))
+                    cursor.execute(sql.SQL("INSERT INTO {} ({}) SELECT {} FROM {}").format(
+                        table, column_list, column_list, stage
+                    ))
+                    inserted = cursor.rowcount
+        log(f"🔁 {table_name} diganti dengan {inserted:,} rows dalam satu transaksi", "success")
+        return inserted
+    finally:
+        conn.close()
+
+
+def _stage_compare(cursor, conn, compare_table, records, chunk_rows, stats, phase, log):
+    """Kosongkan compare_table lalu COPY records ke dalamnya (di transaksi pemanggil)"""
+    compare = sql.Identifier(compare_table)
+    cursor.execute(sql.SQL("TRUNCATE {} RESTART IDENTITY").format(compare))
+    columns = list(records[0].keys())
+    column_list = sql.SQL(', ').join(sql.Identifier(column) for column in columns)
+    log(f"📤 COPY {len(records):,} rows ke {compare_table}...", "info")
+    copy_seconds, bytes_sent = _copy_records(cursor, conn, compare, column_list,
+                                             records, columns, chunk_rows, stats, phase)
+    log(f"✅ COPY selesai dalam {copy_seconds:.1f}s ({bytes_sent / 1024 / 1024:.1f} MB)", "success")
+
+
+def copy_delta_sync(database_url, compare_table, rpc_name, records, windows, apply=True, log=None, stats=None,
+                    chunk_rows=COPY_CHUNK_ROWS):
+    """
+    Delta sync dalam satu transaksi: COPY records ke compare_table (dikosongkan
+    dulu), panggil rpc_name untuk setiap DeltaWindow, lalu kosongkan compare_table.
+    apply=False: hanya menghitung, transaksi di-rollback.
+    Returns dict inserted / updated / deleted / unchanged.
+    """
+    log = log or (lambda message, level='info': print(message))
+    phase = stats.phase if stats is not None else (lambda name: nullcontext())
+    conn = connect(database_url)
+    compare = sql.Identifier(compare_table)
+    totals = {action: 0 for action in DELTA_ACTIONS}
+    try:
+        with conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SET LOCAL statement_timeout = 0")
+                _stage_compare(cursor, conn, compare_table, records, chunk_rows, stats, phase, log)
+
+                with phase('delta_sync'):
+                    for window in windows:
+                        params = window.params(apply)
+                        try:
+                            cursor.execute(
+                                sql.SQL("SELECT * FROM {}(%s::date, %s::date, %s::bigint[], %s)").format(sql.Identifier(rpc_name)),
+                                [params['p_date_from'], params['p_date_to'], params['p_kanwil_ids'], apply],
+                            )
+                        except psycopg2.errors.UndefinedFunction as e:
+                            raise DeltaSyncUnavailable(f"{rpc_name} belum dipasang (delta_sync_functions.sql)") from e
+                        row = dict(zip([column.name for column in cursor.description], cursor.fetchone()))
+                        for action in DELTA_ACTIONS:
+                            totals[action] += int(row[action] or 0)
+
+                if not apply:
+                    conn.rollback()
+                    return totals
+                cursor.execute(sql.SQL("TRUNCATE {} RESTART IDENTITY").format(compare))
+        return totals
+    finally:
+        conn.close()
+
+
+def copy_scoped_replace(database_url, compare_table, rpc_name, records, scope, log=None, stats=None,
+                        chunk_rows=COPY_CHUNK_ROWS):
+    """
+    Scoped replace dalam satu transaksi: COPY records ke compare_table, panggil
+    rpc_name untuk ReplaceScope scope, lalu kosongkan compare_table.
+    Returns dict deleted / inserted / swapped_partitions.
+    """
+    log = log or (lambda message, level='info': print(message))
+    phase = stats.phase if stats is not None else (lambda name: nullcontext())
+    conn = connect(database_url)
+    try:
+        with conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SET LOCAL statement_timeout = 0")
+                _stage_compare(cursor, conn, compare_table, records, chunk_rows, stats, phase, log)
+
+                params = scope.params()
+                with phase('scoped_replace'):
+                    try:
+                        cursor.execute(
+                            sql.SQL("SELECT * FROM {}(%s::date[], %s, %s::bigint[])").format(sql.Identifier(rpc_name)),
+                            [params['p_months'], params['p_include_null'], params['p_kanwil_ids']],
+                        )
+                    except psycopg2.errors.UndefinedFunction as e:
+                        raise ScopedReplaceUnavailable(f"{rpc_name} belum dipasang (scoped_replace_functions.sql)") from e
+                    row = dict(zip([column.name for column in cursor.description], cursor.fetchone()))
+
+                cursor.execute(sql.SQL("TRUNCATE {} RESTART IDENTITY").format(sql.Identifier(compare_table)))
+        return {action: int(row[action] or 0) for action in SCOPED_ACTIONS}
+    finally:
+        conn.close()
+
+
+def truncate_tables(database_url, table_names):
+    """TRUNCATE beberapa tabel sekaligus (urutan FK tidak masalah) + reset identity"""
+    conn = connect(database_url)
+    try:
+        with conn:
+            with conn.cursor() as cursor:
+                cursor.execute(sql.SQL("TRUNCATE {} RESTART IDENTITY").format(
+                    sql.SQL(', ').join(sql.Identifier(name) for name in table_names)
+                ))
+    finally:
+        conn.close()
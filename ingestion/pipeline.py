@@ -0,0 +1,916 @@
+"""
+Alur Append / Replace tanpa Streamlit.
+
+Append: Excel -> <table>_compare -> RPC compare -> <table> -> cleanup
+        (compare dan migrate di-pipeline: halaman id baru langsung dimigrasi)
+Replace: insert semua data Excel ke <table>_next -> swap ke <table> (ingestion.shadow)
+         (atau COPY + swap dalam satu transaksi jika database_url tersedia;
+         reset <table> -> insert jika fungsi shadow swap belum dipasang)
+Delta:   Excel -> <table>_compare -> RPC delta_sync_<table> per bulan (insert / update /
+         delete per business key, ingestion.delta) -> cleanup
+Scoped:  Excel -> <table>_compare -> RPC scoped_replace_<table> (hapus + muat ulang
+         hanya bulan x kanwil di file, satu transaksi, ingestion.scoped) -> cleanup
+"""
+import json
+import queue
+import threading
+import time
+from contextlib import nullcontext
+
+import pandas as pd
+
+from .adaptive import AdaptiveController
+from .delta import MAX_SCOPE_MONTHS, DeltaSyncIncomplete, DeltaSyncUnavailable, add_counts, delta_windows, sync_window
+from .dimensions import get_dimensions
+from .hashing import (
+    REALISASI_HASH_FIELDS,
+    TARGET_KANCAB_HASH_FIELDS,
+    TARGET_KANWIL_HASH_FIELDS,
+    add_row_hashes,
+)
+from .partitions import ensure_partitions
+from .pgcopy import (
+    DirectCopyUnavailable,
+    copy_delta_sync,
+    copy_replace,
+    copy_scoped_replace,
+    direct_copy_available,
+)
+from .records import (
+    REALISASI_EXCEL_COLUMNS,
+    REALISASI_EXCEL_DTYPES,
+    REALISASI_REQUIRED_COLUMNS,
+    TARGET_KANCAB_EXCEL_COLUMNS,
+    TARGET_KANWIL_EXCEL_COLUMNS,
+    build_realisasi_records,
+    build_target_kancab_records,
+    build_target_kanwil_records,
+    collapse_duplicates,
+)
+from .scoped import ScopedReplaceUnavailable, replace_scope, replace_slice
+from .shadow import ShadowSwapUnavailable, drop_shadow, prepare_shadow, rollback_swap, swap_shadow
+from .stats import ThroughputStats
+from .writer import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_RETRY_DELAY,
+    BatchFeed,
+    FeedCancelled,
+    dispatch_batches,
+    execute_with_retry,
+    insert_batches,
+    make_controller,
+    may_have_committed,
+    print_log,
+)
+
+# Halaman id hasil compare yang boleh menunggu migrate (backpressure compare_and_migrate)
+MAX_FEED_PAGES = 8
+
+def table_spec(table_name, label, sheet, builder, mappings, hash_fields, key_columns,
+               builder_kwargs=None, excel_dtypes=None, excel_columns=(), required_columns=None,
+               store_hash=False, delta_sync=False, scoped_replace=False, partition_column=None,
+               **overrides):
+    """
+    Konfigurasi satu tabel ingestion. Nama tabel compare, RPC compare dan kolom id
+    hasil RPC mengikuti konvensi <table>_compare / get_<table>_compare_not_exists_page /
+    <table>_compare_id (lihat *_comparison_functions.sql); override lewat keyword.
+
+    - builder(df, *mapping, with_hash=False, **builder_kwargs) -> RecordBatch
+    - mappings: nama mapping dari load_mappings() yang diteruskan ke builder, berurutan;
+      baris yang tidak ditemukan di mapping dihitung di RecordBatch.skipped_<kanwil|kancab>
+    - hash_fields: kolom yang membentuk row_hash
+    - key_columns: business key satu baris (identitas baris di luar row_hash)
+    - excel_columns / required_columns: header sheet yang dibaca builder / wajib ada
+      (default: semua excel_columns), untuk deteksi sheet di ingestion.sniff
+    - store_hash: row_hash ikut disimpan saat Replace (bukan hanya di tabel compare)
+    - delta_sync: tabel punya RPC delta_sync_<table> (delta_sync_functions.sql)
+    - scoped_replace: tabel punya RPC scoped_replace_<table> (scoped_replace_functions.sql)
+    - partition_column: kolom tanggal partisi bulanan tabel utama dan compare
+      (partition_functions.sql); partisi dibuat sebelum load lewat ingestion.partitions
+    """
+    spec = {
+        'label': label,
+        'sheet': sheet,
+        'compare_table': f"{table_name}_compare",
+        'compare_rpc': f"get_{table_name}_compare_not_exists_page",
+        'compare_id_key': f"{table_name}_compare_id",
+        'excel_dtypes': excel_dtypes or {},
+        'excel_columns': tuple(excel_columns),
+        'required_columns': tuple(excel_columns if required_columns is None else required_columns),
+        'hash_fields': hash_fields,
+        'key_columns': key_columns,
+        'builder': builder,
+        'builder_kwargs': builder_kwargs or {},
+        'mappings': mappings,
+        'skipped': tuple(dict.fromkeys(name.split('_')[0] for name in mappings)),
+        'store_hash': store_hash,
+        'delta_rpc': f"delta_sync_{table_name}" if delta_sync else None,
+        'scoped_rpc': f"scoped_replace_{table_name}" if scoped_replace else None,
+        'partition_column': partition_column,
+    }
+    spec.update(overrides)
+    return spec
+
+
+# Satu entry per tabel tujuan upload; seluruh alur (append job, compare + migrate,
+# replace, CLI, Streamlit) dibaca dari sini. Tabel baru = satu table_spec baru
+# + fungsi SQL compare-nya.
+TABLES = {
+    'realisasi': table_spec(
+        'realisasi', "📈 Realisasi", 'Export',
+        builder=build_realisasi_records,
+        mappings=('kanwil', 'kancab_full'),
+        builder_kwargs={'kancab_column': 'Entitas'},
+        hash_fields=REALISASI_HASH_FIELDS,
+        key_columns=('nomor_po', 'no_in_out', 'produk', 'tanggal_penerimaan'),
+        excel_dtypes=REALISASI_EXCEL_DTYPES,
+        excel_columns=REALISASI_EXCEL_COLUMNS,
+        required_columns=REALISASI_REQUIRED_COLUMNS,
+        store_hash=True,
+        delta_sync=True,
+        scoped_replace=True,
+        partition_column='tanggal_penerimaan',
+    ),
+    'target_kanwil': table_spec(
+        'target_kanwil', "🎯 Target Kanwil", 'Target Kanwil',
+        builder=build_target_kanwil_records,
+        mappings=('kanwil',),
+        hash_fields=TARGET_KANWIL_HASH_FIELDS,
+        key_columns=('kanwil_id', 'date'),
+        excel_columns=TARGET_KANWIL_EXCEL_COLUMNS,
+    ),
+    'target_kancab': table_spec(
+        'target_kancab', "🏢 Target Kancab", 'Target Kancab',
+        builder=build_target_kancab_records,
+        mappings=('kancab',),
+        hash_fields=TARGET_KANCAB_HASH_FIELDS,
+        key_columns=('kancab_id', 'date'),
+        excel_columns=TARGET_KANCAB_EXCEL_COLUMNS,
+    ),
+}
+
+
+def get_table_config(table_name):
+    if table_name not in TABLES:
+        raise ValueError(f"Tabel tidak dikenal: {table_name} (pilihan: {', '.join(TABLES)})")
+    return TABLES[table_name]
+
+
+def read_excel_for_table(path, table_name, sheet_name=None):
+    """
+    Baca sheet Excel dengan dtype yang menjaga presisi numeric.
+    Header dicek dulu (ingestion.sniff): tanpa sheet_name dipakai sheet yang terdeteksi
+    untuk tabel ini (fallback sheet default), dan kolom wajib yang hilang -> ValueError
+    sebelum sheet dibaca penuh.
+    """
+    from .sniff import SniffUnavailable, sniff_workbook  # sniff memakai TABLES dari modul ini
+
+    config = get_table_config(table_name)
+    sheet_name = sheet_name or config['sheet']
+    try:
+        workbook = sniff_workbook(path)
+    except SniffUnavailable:
+        workbook = None
+    if workbook is not None:
+        sheets = {sheet['name']: sheet for sheet in workbook['sheets']}
+        if sheet_name not in sheets and table_name in workbook['detected']:
+            sheet_name = workbook['detected'][table_name]
+        if sheet_name in sheets and sheets[sheet_name]['missing'][table_name]:
+            raise ValueError(
+                f"Sheet '{sheet_name}' tidak cocok untuk {table_name}, kolom tidak ada: "
+                f"{', '.join(sheets[sheet_name]['missing'][table_name])}"
+            )
+    return pd.read_excel(
+        path,
+        sheet_name=sheet_name,
+        engine='openpyxl',
+        dtype=config['excel_dtypes'],
+    )
+
+
+def load_mappings(client):
+    """
+    Mapping Kanwil & Kancab dari cache dimensi (ingestion.dimensions, dimuat ulang
+    hanya jika tabel kanwil / kancab berubah).
+    Returns dict:
+    - kanwil: nama_kanwil -> kanwil_id
+    - kancab: nama_kancab -> kancab_id
+    - kancab_full: (nama_kanwil, nama_kancab) -> kancab_id
+    """
+    return get_dimensions(client).mappings()
+
+
+def build_records(table_name, df, mappings, with_hash=True, stats=None, collapse=False):
+    """
+    Build RecordBatch sesuai tabel tujuan (builder dari TABLES).
+    Jika stats diberikan, waktu hashing dicatat sebagai fase 'hashing' tersendiri.
+    collapse=True (append): record dengan row_hash sama dalam upload ini digabung
+    sebelum staging (jumlahnya di batch.collapsed).
+    """
+    config = get_table_config(table_name)
+    batch = config['builder'](df, *[mappings[name] for name in config['mappings']],
+                              with_hash=False, **config['builder_kwargs'])
+    if with_hash:
+        with stats.phase('hashing') if stats is not None else nullcontext():
+            add_row_hashes(batch.records, config['hash_fields'])
+            if stats is not None:
+                stats.add_rows(len(batch))
+        if collapse:
+            with stats.phase('collapse') if stats is not None else nullcontext():
+                collapse_duplicates(batch)
+    return batch
+
+
+def prepare_partitions(client, table_name, records, targets, log=None, stats=None):
+    """
+    Pastikan partisi bulanan untuk rentang tanggal records ada di targets (tabel
+    utama dan/atau compare) sebelum load; tanpa partition_column di TABLES tidak apa-apa.
+    Returns jumlah partisi baru.
+    """
+    column = get_table_config(table_name)['partition_column']
+    if not column or not records:
+        return 0
+    with stats.phase('partitions') if stats is not None else nullcontext():
+        return ensure_partitions(client, targets, records, column, log=log)
+
+
+def reset_table(client, table_name, log=None):
+    """
+    TRUNCATE table dan reset sequence ID menggunakan reset_table_sequence RPC.
+    Fallback ke delete semua baris jika RPC gagal.
+    """
+    log = log or print_log
+    try:
+        client.rpc("reset_table_sequence", {"p_table_name": table_name}).execute()
+        log(f"✅ Tabel {table_name} telah di-truncate dan sequence di-reset", "success")
+        return True
+    except Exception as e:
+        log(f"❌ Error saat reset {table_name}: {e} - mencoba manual delete", "warning")
+    try:
+        client.table(table_name).delete().neq('id', 0).execute()
+        log(f"✅ Tabel {table_name} dikosongkan dengan delete (sequence mungkin perlu reset manual)", "warning")
+        return True
+    except Exception as e:
+        log(f"❌ Error pada alternatif method untuk {table_name}: {e}", "error")
+        return False
+
+
+def iter_compare_pages(client, table_name, limit=1000, max_retries=DEFAULT_MAX_RETRIES,
+                       retry_delay=DEFAULT_RETRY_DELAY, log=None, start_after=None, controller=None):
+    """
+    Generator RPC *_compare_not_exists_page dengan cursor pagination.
+    Yields (last_id, page_ids, latency, retries, progress) per halaman; progress adalah
+    (posisi cursor, total baris compare). page_ids kosong jika rentang id tidak berisi
+    baris baru.
+
+    - start_after: lanjutkan dari cursor last_id tertentu (resume)
+    - controller: p_limit per halaman dan jeda antar halaman (default adaptif mulai
+      dari limit; latency RPC sebanding dengan rentang id yang di-scan)
+    """
+    log = log or print_log
+    config = get_table_config(table_name)
+    compare_table = config['compare_table']
+    id_key = config['compare_id_key']
+
+    total_rows = client.table(compare_table).select("id", count="exact").limit(1).execute().count
+    if not total_rows:
+        log(f"📊 No data in {compare_table} to process", "info")
+        return
+    res = client.table(compare_table).select("id").order("id", desc=False).limit(1).execute()
+    min_id = res.data[0]["id"] if res.data else 0
+
+    # RPC memakai id > p_last_id, jadi mulai dari min_id - 1 agar baris pertama ikut dibandingkan
+    last_id = min_id - 1 if start_after is None else start_after
+    controller = controller or AdaptiveController(initial_size=limit, initial_concurrency=1, max_concurrency=1)
+    while True:
+        retries = []
+        page_limit = controller.size
+        controller.wait()
+        start = time.perf_counter()
+        data = execute_with_retry(
+            lambda: client.rpc(config['compare_rpc'], {"p_last_id": last_id, "p_limit": page_limit}).execute().data,
+            max_retries=max_retries,
+            retry_delay=retry_delay,
+            log=log,
+            label=f"last_id={last_id}",
+            on_retry=lambda: retries.append(1),
+            on_error=controller.record_error,
+        )
+        latency = time.perf_counter() - start
+        controller.record(latency, page_limit)
+        if data:
+            page_ids = [row[id_key] for row in data]
+            last_id = max(page_ids)
+            yield last_id, page_ids, latency, len(retries), (min(last_id - min_id, total_rows), total_rows)
+        else:
+            if last_id >= (min_id + total_rows):
+                break
+            last_id += page_limit
+            yield last_id, [], latency, len(retries), (min(last_id - min_id, total_rows), total_rows)
+            # Safety check to avoid infinite loop
+            if last_id > (min_id + total_rows + page_limit * 10):
+                log("⚠️ Exceeded maximum range, stopping iteration", "warning")
+                break
+
+
+def compare_not_exists(client, table_name, limit=1000, max_retries=DEFAULT_MAX_RETRIES,
+                       retry_delay=DEFAULT_RETRY_DELAY, log=None, stats=None, progress_callback=None,
+                       start_after=None, page_callback=None, controller=None):
+    """
+    Jalankan seluruh compare (iter_compare_pages) sebelum migrate.
+    Returns list of compare IDs yang belum ada di tabel utama.
+
+    - page_callback: dipanggil (last_id, ids_page) setiap halaman, untuk checkpoint
+    """
+    ids = []
+    for last_id, page_ids, latency, retries, progress in iter_compare_pages(
+            client, table_name, limit=limit, max_retries=max_retries, retry_delay=retry_delay,
+            log=log, start_after=start_after, controller=controller):
+        if stats is not None:
+            stats.record_batch(latency, rows=len(page_ids), retries=retries)
+        ids.extend(page_ids)
+        if page_callback is not None:
+            page_callback(last_id, page_ids)
+        if page_ids and progress_callback is not None:
+            progress_callback(*progress)
+    return ids
+
+
+def filter_not_migrated(client, table_name, ids, limit=1000, max_retries=DEFAULT_MAX_RETRIES,
+                        retry_delay=DEFAULT_RETRY_DELAY, log=None):
+    """
+    Subset ids <table>_compare yang belum ada di <table> menurut RPC compare, urutan
+    ids dipertahankan. Dipakai sebelum mengirim ulang id yang status migrate-nya tidak
+    pasti (retry setelah error, resume job), agar baris yang sudah ter-insert tidak
+    dimigrasi dua kali.
+    """
+    config = get_table_config(table_name)
+    wanted = set(ids)
+    if not wanted:
+        return []
+    remaining = set()
+    last_id, upper = min(wanted) - 1, max(wanted)
+    while last_id < upper:
+        data = execute_with_retry(
+            lambda: client.rpc(config['compare_rpc'], {"p_last_id": last_id, "p_limit": limit}).execute().data,
+            max_retries=max_retries,
+            retry_delay=retry_delay,
+            log=log,
+            label=f"recheck last_id={last_id}",
+        )
+        if data:
+            page_ids = [row[config['compare_id_key']] for row in data]
+            remaining.update(compare_id for compare_id in page_ids if compare_id in wanted)
+            last_id = max(page_ids)
+        else:
+            # Sama dengan iter_compare_pages: rentang id tanpa baris baru dilewati
+            last_id += limit
+    return [compare_id for compare_id in ids if compare_id in remaining]
+
+
+def copy_compare_rows(client, table_name, ids, batch_size=DEFAULT_BATCH_SIZE, max_workers=DEFAULT_MAX_WORKERS,
+                      max_retries=DEFAULT_MAX_RETRIES, retry_delay=DEFAULT_RETRY_DELAY,
+                      log=None, stats=None, progress_callback=None, batch_callback=None, controller=None,
+                      stats_phase=None):
+    """
+    Pindahkan baris <table>_compare dengan id tertentu ke <table> (paralel per batch).
+    Batch yang di-retry dicek ulang dulu lewat filter_not_migrated, dan row_hash yang
+    sama hanya dimigrasi sekali per run (lihat claim di bawah).
+    Returns jumlah baris yang berhasil dimigrasi.
+
+    - ids: list, atau BatchFeed yang masih diisi compare (lihat compare_and_migrate)
+    - batch_callback: dipanggil (batch_ids, count) setelah batch sukses, untuk checkpoint
+    - controller: ukuran batch / concurrency (default adaptif mulai dari batch_size / max_workers)
+    - stats_phase: nama fase telemetry untuk batch migrate (default fase yang sedang berjalan)
+    """
+    log = log or print_log
+    compare_table = get_table_config(table_name)['compare_table']
+    controller = controller or make_controller(batch_size, max_workers)
+    items = ids if isinstance(ids, BatchFeed) else list(ids)
+
+    # row_hash yang sudah (atau sedang) dimigrasi run ini. Append meng-collapse baris
+    # identik sebelum staging, jadi row_hash berulang di tabel compare berarti batch
+    # staging yang terkirim dua kali; salinan keduanya tidak ikut dimigrasi.
+    claimed_hashes = set()
+    claimed_lock = threading.Lock()
+
+    def claim(rows, owned):
+        """Baris dengan row_hash yang belum diklaim batch lain; owned: klaim batch ini"""
+        with claimed_lock:
+            fresh = []
+            for row in rows:
+                row_hash = row.get('row_hash')
+                if row_hash is not None and row_hash not in owned:
+                    if row_hash in claimed_hashes:
+                        continue
+                    claimed_hashes.add(row_hash)
+                    owned.add(row_hash)
+                fresh.append(row)
+            return fresh
+
+    def release(owned):
+        with claimed_lock:
+            claimed_hashes.difference_update(owned)
+        owned.clear()
+
+    def move(batch_num, batch_ids):
+        payload_bytes = []
+        attempts = []
+        owned = set()
+        uncertain = []
+
+        def operation():
+            pending = batch_ids
+            if attempts:
+                # Percobaan sebelumnya mungkin sudah commit walau client menerima error
+                # (timeout): kirim ulang hanya id yang menurut RPC compare belum ada
+                pending = filter_not_migrated(client, table_name, batch_ids, max_retries=max_retries,
+                                              retry_delay=retry_delay, log=print_log)
+            attempts.append(1)
+            if not pending:
+                return len(batch_ids)
+            rows = client.table(compare_table).select("*").in_("id", pending).execute().data
+            for row in rows:
+                row.pop('id', None)
+            rows = claim(rows, owned)
+            if rows:
+                try:
+                    client.table(table_name).insert(rows).execute()
+                except Exception as e:
+                    # Klaim dilepas hanya jika belum ada percobaan yang mungkin sudah commit
+                    if may_have_committed(e):
+                        uncertain.append(1)
+                    elif not uncertain:
+                        release(owned)
+                    raise
+                payload_bytes.append(len(json.dumps(rows, default=str)))
+            return len(batch_ids) - len(pending) + len(rows)
+
+        retries = []
+        start = time.perf_counter()
+        count = execute_with_retry(operation, max_retries=max_retries, retry_delay=retry_delay,
+                                   log=print_log, label=f"{table_name} migrate batch {batch_num}",
+                                   on_retry=lambda: retries.append(1), on_error=controller.record_error)
+        latency = time.perf_counter() - start
+        controller.record(latency, len(batch_ids), sum(payload_bytes))
+        return count, latency, sum(payload_bytes), len(retries)
+
+    migrated = 0
+    for batch_num, batch_ids, outcome, error in dispatch_batches(items, move, controller,
+                                                                 thread_name_prefix=f"migrate-{table_name}"):
+        if error is not None:
+            log(f"❌ Error on migrate batch {batch_num} ({len(batch_ids):,} ids): {error}", "error")
+            continue
+        count, latency, payload_bytes, retries = outcome
+        migrated += count
+        if batch_callback is not None:
+            batch_callback(batch_ids, count)
+        if stats is not None:
+            stats.record_batch(latency, rows=count, bytes_sent=payload_bytes, retries=retries, phase=stats_phase)
+        if progress_callback is not None:
+            progress_callback(migrated, items.received if isinstance(items, BatchFeed) else len(items))
+    return migrated
+
+
+def compare_and_migrate(client, table_name, limit=1000, batch_size=DEFAULT_BATCH_SIZE,
+                        max_workers=DEFAULT_MAX_WORKERS, max_retries=DEFAULT_MAX_RETRIES,
+                        retry_delay=DEFAULT_RETRY_DELAY, log=None, stats=None, start_after=None,
+                        pending_ids=None, page_callback=None, batch_callback=None,
+                        compare_progress_callback=None, progress_callback=None, max_pages=MAX_FEED_PAGES):
+    """
+    Compare dan migrate sebagai producer/consumer: compare berjalan di background
+    thread, setiap halaman id baru langsung masuk BatchFeed dan dimigrasi sementara
+    halaman berikutnya di-scan. Durasi total ~max(compare, migrate), bukan jumlahnya,
+    dan hanya max_pages halaman id yang tertahan di memori.
+
+    - pending_ids: id hasil compare sebelumnya yang belum dimigrasi (resume), dikirim lebih dulu
+    - page_callback: (last_id, ids_page) dari thread compare, SEBELUM id halaman itu
+      dimigrasi (checkpoint compare selalu mendahului checkpoint migrate)
+    - batch_callback / progress_callback: seperti copy_compare_rows (thread pemanggil)
+    - compare_progress_callback: (posisi cursor, total) dari thread pemanggil
+
+    Log, telemetry (fase compare_rpc / migrate) dan callback progress dijalankan
+    di thread pemanggil. Returns (found, migrated).
+    """
+    log = log or print_log
+    # Event dari thread compare: ('log', message, level) / ('page', latency, rows, retries, progress)
+    events = queue.SimpleQueue()
+    outcome = {'found': 0, 'error': None}
+
+    def produce():
+        try:
+            if pending_ids:
+                feed.put(pending_ids)
+            for last_id, page_ids, latency, retries, progress in iter_compare_pages(
+                    client, table_name, limit=limit, max_retries=max_retries, retry_delay=retry_delay,
+                    log=lambda message, level="info": events.put(('log', message, level)),
+                    start_after=start_after):
+                if page_callback is not None:
+                    page_callback(last_id, page_ids)
+                events.put(('page', latency, len(page_ids), retries, progress))
+                if page_ids:
+                    outcome['found'] += len(page_ids)
+                    feed.put(page_ids)
+        except FeedCancelled:
+            pass
+        except Exception as e:
+            outcome['error'] = e
+        finally:
+            feed.close()
+
+    def drain_events():
+        while not events.empty():
+            event = events.get()
+            if event[0] == 'log':
+                log(event[1], event[2])
+                continue
+            _, latency, rows, retries, progress = event
+            if stats is not None:
+                stats.record_batch(latency, rows=rows, retries=retries, phase='compare_rpc')
+            if rows and compare_progress_callback is not None:
+                compare_progress_callback(*progress)
+
+    feed = BatchFeed(max_pages=max_pages, on_poll=drain_events)
+    producer = threading.Thread(target=produce, name=f"compare-{table_name}", daemon=True)
+    producer.start()
+    try:
+        migrated = copy_compare_rows(client, table_name, feed, batch_size=batch_size, max_workers=max_workers,
+                                     max_retries=max_retries, retry_delay=retry_delay, log=log, stats=stats,
+                                     progress_callback=progress_callback, batch_callback=batch_callback,
+                                     stats_phase='migrate')
+    finally:
+        feed.cancel()
+        producer.join()
+        drain_events()
+    if outcome['error'] is not None:
+        raise outcome['error']
+    return outcome['found'], migrated
+
+
+def run_append(client, table_name, df, batch_size=DEFAULT_BATCH_SIZE, max_workers=DEFAULT_MAX_WORKERS,
+               log=None, stats=None):
+    """
+    APPEND MODE: hanya data yang belum ada yang ditambahkan ke tabel utama.
+    Returns dict ringkasan.
+    """
+    log = log or print_log
+    stats = stats or ThroughputStats()
+    config = get_table_config(table_name)
+    compare_table = config['compare_table']
+
+    with stats.phase('load_mappings'):
+        mappings = load_mappings(client)
+
+    with stats.phase('build_records'):
+        batch = build_records(table_name, df, mappings, stats=stats, collapse=True)
+        stats.add_rows(len(batch))
+    for idx, error in list(batch.invalid_rows.items())[:20]:
+        log(f"⚠️ Error at row {idx}: {error}", "warning")
+    if batch.collapsed:
+        log(f"🧹 {batch.collapsed:,} baris duplikat dalam file digabung sebelum staging", "info")
+    prepare_partitions(client, table_name, batch.records, (compare_table, table_name), log=log, stats=stats)
+
+    log(f"🗑️ Clearing {compare_table} table...", "warning")
+    reset_table(client, compare_table, log=log)
+
+    with stats.phase('insert_compare'):
+        staged = insert_batches(client, compare_table, batch.records, batch_size=batch_size,
+                                max_workers=max_workers, log=log, stats=stats)
+    log(f"✅ Staged {staged.inserted:,} records to {compare_table}", "success")
+
+    # Compare dan migrate berjalan bersamaan (compare_and_migrate)
+    with stats.phase('compare_migrate'):
+        found, migrated = compare_and_migrate(client, table_name, limit=batch_size, batch_size=batch_size,
+                                              max_workers=max_workers, log=log, stats=stats)
+    log(f"📊 Found {found:,} unique records, migrated {migrated:,}", "info")
+    if found:
+        reset_table(client, compare_table, log=log)
+
+    return {
+        'table': table_name,
+        'mode': 'append',
+        'total_rows': len(df),
+        'staged': staged.inserted,
+        'unique': found,
+        'migrated': migrated,
+        'duplicates': staged.inserted - found,
+        'collapsed': batch.collapsed,
+        'skipped_kanwil': batch.skipped_kanwil,
+        'skipped_kancab': batch.skipped_kancab,
+        'invalid_rows': len(batch.invalid_rows),
+        'failed': staged.failed,
+    }
+
+
+def discard_shadow(client, table_name, log=None):
+    """Hapus <table>_next setelah swap dibatalkan; gagal hapus hanya dicatat (prepare berikutnya menimpanya)"""
+    log = log or print_log
+    try:
+        drop_shadow(client, table_name, log=log)
+    except Exception as e:
+        log(f"⚠️ Shadow table {table_name} gagal dihapus: {e}", "warning")
+
+
+def update_ledger(ledger, mode=None):
+    """
+    Ledger upload (ingestion.jobs.UploadLedger) setelah isi tabel berubah: riwayat lama
+    dihapus; mode diisi -> upload ini dicatat (isi tabel sekarang = file ini)
+    """
+    if ledger is None:
+        return
+    if mode is None:
+        ledger.table_changed()
+    else:
+        ledger.table_matches(mode)
+
+
+def rollback_replace(client, table_name, log=None, ledger=None):
+    """Kembalikan <table>_prev (ingestion.shadow.rollback_swap) dan lupakan riwayat upload tabel"""
+    rows = rollback_swap(client, table_name, log=log)
+    update_ledger(ledger)
+    return rows
+
+
+def run_replace(client, table_name, df, batch_size=DEFAULT_BATCH_SIZE, max_workers=DEFAULT_MAX_WORKERS,
+                log=None, stats=None, database_url=None, mappings=None, progress_callback=None, ledger=None):
+    """
+    REPLACE MODE: insert semua data Excel ke <table>_next lalu swap ke tabel utama
+    (data lama disimpan di <table>_prev untuk rollback). Jika database_url diberikan,
+    COPY + swap dalam satu transaksi (ingestion.pgcopy); fallback ke REST jika
+    koneksi langsung gagal, dan ke reset + insert jika shadow swap tidak tersedia.
+
+    - mappings: hasil load_mappings jika sudah dimuat pemanggil
+    - progress_callback: dipanggil (inserted, total) setiap batch REST selesai
+    - ledger: UploadLedger (ingestion.jobs); riwayat upload dihapus jika tabel berubah,
+      file ini dicatat jika replace lengkap
+
+    Returns dict ringkasan; 'replaced' False jika tabel aktif tidak berubah (swap dibatalkan).
+    """
+    log = log or print_log
+    stats = stats or ThroughputStats()
+    config = get_table_config(table_name)
+
+    if mappings is None:
+        with stats.phase('load_mappings'):
+            mappings = load_mappings(client)
+
+    # realisasi menyimpan row_hash, target table tidak (store_hash di TABLES)
+    with stats.phase('build_records'):
+        batch = build_records(table_name, df, mappings, with_hash=config['store_hash'], stats=stats)
+        stats.add_rows(len(batch))
+    for idx, error in list(batch.invalid_rows.items())[:20]:
+        log(f"⚠️ Error at row {idx}: {error}", "warning")
+
+    summary = {
+        'table': table_name,
+        'mode': 'replace',
+        'total_rows': len(df),
+        'skipped_kanwil': batch.skipped_kanwil,
+        'skipped_kancab': batch.skipped_kancab,
+        'invalid_rows': len(batch.invalid_rows),
+    }
+    # Shadow table mengkloning partisi tabel aktif, jadi partisi dibuat di tabel aktif dulu
+    prepare_partitions(client, table_name, batch.records, (table_name,), log=log, stats=stats)
+
+    if direct_copy_available(database_url):
+        try:
+            inserted = copy_replace(database_url, table_name, batch.records, log=log, stats=stats)
+            if progress_callback is not None:
+                progress_callback(inserted, len(batch.records))
+            update_ledger(ledger, 'replace')
+            return {**summary, 'inserted': inserted, 'failed': 0, 'transport': 'copy',
+                    'swapped': True, 'replaced': True}
+        except DirectCopyUnavailable as e:
+            log(f"⚠️ Koneksi PostgreSQL langsung gagal ({e}), kembali ke REST", "warning")
+
+    try:
+        target = prepare_shadow(client, table_name, log=log)
+    except ShadowSwapUnavailable as e:
+        log(f"⚠️ Shadow swap tidak tersedia ({e}), pakai TRUNCATE + insert", "warning")
+        target = None
+
+    if target is None:
+        log(f"🗑️ Resetting {table_name} table and sequence...", "warning")
+        if not reset_table(client, table_name, log=log):
+            raise RuntimeError(f"Failed to reset {table_name} table. Aborting.")
+
+    with stats.phase('insert'):
+        inserted = insert_batches(client, target or table_name, batch.records, batch_size=batch_size,
+                                  max_workers=max_workers, log=log, stats=stats,
+                                  progress_callback=progress_callback)
+
+    summary = {**summary, 'inserted': inserted.inserted, 'failed': inserted.failed, 'transport': 'rest'}
+    if target is None:
+        # Tabel aktif sudah dikosongkan: isinya berubah walaupun sebagian batch gagal
+        update_ledger(ledger, None if inserted.failed else 'replace')
+        return {**summary, 'swapped': False, 'replaced': True}
+    if inserted.failed:
+        # Jangan swap data setengah jadi; tabel aktif tetap berisi data lama
+        log(f"❌ {inserted.failed:,} records gagal masuk {target}, swap dibatalkan ({table_name} tidak berubah)", "error")
+        discard_shadow(client, table_name, log=log)
+        return {**summary, 'swapped': False, 'replaced': False}
+    with stats.phase('swap'):
+        swap_shadow(client, table_name, log=log)
+    update_ledger(ledger, 'replace')
+    return {**summary, 'swapped': True, 'replaced': True}
+
+
+def run_delta_sync(client, table_name, df, batch_size=DEFAULT_BATCH_SIZE, max_workers=DEFAULT_MAX_WORKERS,
+                   log=None, stats=None, database_url=None, apply=True, ledger=None,
+                   max_months=MAX_SCOPE_MONTHS):
+    """
+    DELTA MODE: samakan isi tabel utama dengan export di dalam scope export (kanwil
+    dan bulan tanggal_penerimaan yang ada di file), hanya baris yang berubah yang ditulis.
+    apply=False: hanya hitung inserted / updated / deleted (preview).
+    Returns dict ringkasan. Window yang gagal di jalur REST -> DeltaSyncIncomplete
+    (bulan yang sudah diterapkan di .applied), tabel compare dikosongkan.
+    ledger: UploadLedger (ingestion.jobs); setelah diterapkan file ini dicatat, jika
+    hanya sebagian bulan yang diterapkan riwayat upload dihapus.
+    max_months: batas jumlah bulan di export (ingestion.delta.ScopeTooWide), None = tanpa batas.
+    """
+    log = log or print_log
+    stats = stats or ThroughputStats()
+    config = get_table_config(table_name)
+    if not config['delta_rpc']:
+        raise DeltaSyncUnavailable(f"Delta sync tidak tersedia untuk tabel {table_name}")
+    compare_table = config['compare_table']
+
+    with stats.phase('load_mappings'):
+        mappings = load_mappings(client)
+
+    # Tanpa collapse: baris identik dalam export tetap dihitung per baris, sama dengan Replace
+    with stats.phase('build_records'):
+        batch = build_records(table_name, df, mappings, stats=stats)
+        stats.add_rows(len(batch))
+    for idx, error in list(batch.invalid_rows.items())[:20]:
+        log(f"⚠️ Error at row {idx}: {error}", "warning")
+
+    windows = delta_windows(batch.records, max_months=max_months)
+    summary = {
+        'table': table_name,
+        'mode': 'delta' if apply else 'delta-preview',
+        'total_rows': len(df),
+        'windows': len(windows),
+        'inserted': 0,
+        'updated': 0,
+        'deleted': 0,
+        'unchanged': 0,
+        'skipped_kanwil': batch.skipped_kanwil,
+        'skipped_kancab': batch.skipped_kancab,
+        'invalid_rows': len(batch.invalid_rows),
+        'failed': 0,
+    }
+    if not windows:
+        log("⚠️ Tidak ada baris dengan kanwil valid, delta sync dilewati", "warning")
+        return summary
+    log(f"🔀 Scope delta sync: {len(windows[0].scope_ids)} kanwil, {len(windows)} window "
+        f"({', '.join(window.label for window in windows)})", "info")
+    if apply:
+        prepare_partitions(client, table_name, batch.records, (compare_table, table_name), log=log, stats=stats)
+
+    if direct_copy_available(database_url):
+        try:
+            counts = copy_delta_sync(database_url, compare_table, config['delta_rpc'], batch.records, windows,
+                                     apply=apply, log=log, stats=stats)
+            add_counts(summary, counts)
+            log(f"📊 Delta {table_name}: {summary['inserted']:,} inserted, {summary['updated']:,} updated, "
+                f"{summary['deleted']:,} deleted, {summary['unchanged']:,} unchanged", "success")
+            if apply:
+                update_ledger(ledger, 'delta')
+            return {**summary, 'transport': 'copy'}
+        except DirectCopyUnavailable as e:
+            log(f"⚠️ Koneksi PostgreSQL langsung gagal ({e}), kembali ke REST", "warning")
+
+    log(f"🗑️ Clearing {compare_table} table...", "warning")
+    if not reset_table(client, compare_table, log=log):
+        raise RuntimeError(f"Failed to reset {compare_table} table. Aborting.")
+    with stats.phase('insert_compare'):
+        staged = insert_batches(client, compare_table, batch.records, batch_size=batch_size,
+                                max_workers=max_workers, log=log, stats=stats)
+    if staged.failed:
+        # Export yang tidak lengkap di tabel compare akan terbaca sebagai baris yang dihapus
+        reset_table(client, compare_table, log=log)
+        raise RuntimeError(f"{staged.failed:,} records gagal di-stage ke {compare_table}, delta sync dibatalkan")
+    log(f"✅ Staged {staged.inserted:,} records to {compare_table}", "success")
+
+    # Satu transaksi per window (bulan); setiap window idempotent terhadap isi compare,
+    # jadi window yang gagal bisa diulang dengan menjalankan delta sync lagi
+    applied = []
+    with stats.phase('delta_sync'):
+        for window in windows:
+            start = time.perf_counter()
+            try:
+                counts = sync_window(client, config['delta_rpc'], window, apply=apply, log=log)
+            except Exception as e:
+                # Tabel compare tidak ditinggalkan penuh; window sebelumnya sudah commit
+                reset_table(client, compare_table, log=log)
+                if isinstance(e, DeltaSyncUnavailable):
+                    raise
+                if apply and applied:
+                    # Bulan yang sudah diterapkan tetap berubah
+                    update_ledger(ledger)
+                done = ', '.join(applied) if applied else 'tidak ada'
+                log(f"❌ Delta sync {window.label} gagal: {e} (sudah diterapkan: {done})", "error")
+                raise DeltaSyncIncomplete(
+                    f"Delta sync {window.label} gagal: {e}. Bulan yang sudah "
+                    f"{'diterapkan' if apply else 'dihitung'}: {done}",
+                    applied=applied if apply else [], failed=window.label, summary={**summary, 'transport': 'rest'},
+                ) from e
+            stats.record_batch(time.perf_counter() - start, rows=sum(counts.values()))
+            add_counts(summary, counts)
+            applied.append(window.label)
+            if counts['inserted'] or counts['updated'] or counts['deleted']:
+                log(f"🔀 {window.label}: +{counts['inserted']:,} ~{counts['updated']:,} "
+                    f"-{counts['deleted']:,} (={counts['unchanged']:,})", "info")
+
+    reset_table(client, compare_table, log=log)
+    log(f"📊 Delta {table_name}: {summary['inserted']:,} inserted, {summary['updated']:,} updated, "
+        f"{summary['deleted']:,} deleted, {summary['unchanged']:,} unchanged", "success")
+    if apply:
+        update_ledger(ledger, 'delta')
+    return {**summary, 'transport': 'rest'}
+
+
+def run_scoped_replace(client, table_name, df, batch_size=DEFAULT_BATCH_SIZE, max_workers=DEFAULT_MAX_WORKERS,
+                       log=None, stats=None, database_url=None, all_kanwil=False, ledger=None,
+                       max_months=MAX_SCOPE_MONTHS):
+    """
+    SCOPED REPLACE MODE: hapus dan muat ulang hanya bulan tanggal_penerimaan dan
+    kanwil yang dicakup file (all_kanwil=True: semua kanwil di bulan tersebut),
+    dalam satu transaksi. Data di luar scope tidak disentuh.
+    ledger: UploadLedger (ingestion.jobs); riwayat upload dihapus setelah scope diganti.
+    max_months: batas jumlah bulan di file (ingestion.delta.ScopeTooWide), None = tanpa batas.
+    Returns dict ringkasan.
+    """
+    log = log or print_log
+    stats = stats or ThroughputStats()
+    config = get_table_config(table_name)
+    if not config['scoped_rpc']:
+        raise ScopedReplaceUnavailable(f"Scoped replace tidak tersedia untuk tabel {table_name}")
+    compare_table = config['compare_table']
+
+    with stats.phase('load_mappings'):
+        mappings = load_mappings(client)
+
+    # Sama dengan Replace: semua baris file dimuat apa adanya (tanpa collapse)
+    with stats.phase('build_records'):
+        batch = build_records(table_name, df, mappings, with_hash=config['store_hash'], stats=stats)
+        stats.add_rows(len(batch))
+    for idx, error in list(batch.invalid_rows.items())[:20]:
+        log(f"⚠️ Error at row {idx}: {error}", "warning")
+
+    scope = replace_scope(batch.records, all_kanwil=all_kanwil, max_months=max_months)
+    summary = {
+        'table': table_name,
+        'mode': 'scoped-replace',
+        'total_rows': len(df),
+        'scope': scope.label if scope else None,
+        'deleted': 0,
+        'inserted': 0,
+        'swapped_partitions': 0,
+        'skipped_kanwil': batch.skipped_kanwil,
+        'skipped_kancab': batch.skipped_kancab,
+        'invalid_rows': len(batch.invalid_rows),
+        'failed': 0,
+    }
+    if scope is None:
+        log("⚠️ Tidak ada baris dengan kanwil valid, scoped replace dilewati", "warning")
+        return summary
+    log(f"✂️ Scope replace {table_name}: {scope.label}", "info")
+    prepare_partitions(client, table_name, batch.records, (compare_table, table_name), log=log, stats=stats)
+
+    if direct_copy_available(database_url):
+        try:
+            counts = copy_scoped_replace(database_url, compare_table, config['scoped_rpc'], batch.records, scope,
+                                         log=log, stats=stats)
+            log(f"📊 Scoped replace {table_name}: {counts['deleted']:,} dihapus, {counts['inserted']:,} dimuat "
+                f"({counts['swapped_partitions']} partisi ditukar)", "success")
+            update_ledger(ledger)
+            return {**summary, **counts, 'transport': 'copy'}
+        except DirectCopyUnavailable as e:
+            log(f"⚠️ Koneksi PostgreSQL langsung gagal ({e}), kembali ke REST", "warning")
+
+    log(f"🗑️ Clearing {compare_table} table...", "warning")
+    if not reset_table(client, compare_table, log=log):
+        raise RuntimeError(f"Failed to reset {compare_table} table. Aborting.")
+    with stats.phase('insert_compare'):
+        staged = insert_batches(client, compare_table, batch.records, batch_size=batch_size,
+                                max_workers=max_workers, log=log, stats=stats)
+    if staged.failed:
+        # Scope yang dimuat dari compare tidak lengkap berarti data hilang di tabel utama
+        reset_table(client, compare_table, log=log)
+        raise RuntimeError(f"{staged.failed:,} records gagal di-stage ke {compare_table}, scoped replace dibatalkan")
+    log(f"✅ Staged {staged.inserted:,} records to {compare_table}", "success")
+
+    try:
+        with stats.phase('scoped_replace'):
+            counts = replace_slice(client, config['scoped_rpc'], scope, log=log)
+    finally:
+        # Satu transaksi: gagal berarti tabel utama tidak berubah, compare tetap dikosongkan
+        reset_table(client, compare_table, log=log)
+    log(f"📊 Scoped replace {table_name}: {counts['deleted']:,} dihapus, {counts['inserted']:,} dimuat "
+        f"({counts['swapped_partitions']} partisi ditukar)", "success")
+    update_ledger(ledger)
+    return {**summary, **counts, 'transport': 'rest'}
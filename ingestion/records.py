@@ -0,0 +1,422 @@
+"""
+Vectorized record building: DataFrame Excel -> list of dict siap insert.
+
+Menggantikan loop df.iterrows() di fungsi migrate_*. Setiap kolom dikonversi
+sekali untuk seluruh DataFrame, hasilnya identik dengan konversi per-baris
+lama (str(), int(), float(), pd.to_datetime().date().isoformat()) sehingga
+row_hash tetap cocok dengan data yang sudah ada di database.
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .hashing import (
+    REALISASI_HASH_FIELDS,
+    TARGET_KANCAB_HASH_FIELDS,
+    TARGET_KANWIL_HASH_FIELDS,
+    add_row_hashes,
+)
+
+# Kolom Excel (sheet Export) -> kolom database realisasi
+REALISASI_TEXT_COLUMNS = {
+    'lokasi_persediaan': 'Lokasi Persediaan',
+    'nama_pemasok': 'Nama Pemasok',
+    'nomor_po': 'Nomor PO',
+    'produk': 'Produk',
+    'no_jurnal': 'No Jurnal',
+    'no_in_out': 'Nomor IN / OUT',
+    'komoditi': 'Komoditi',
+    'spesifikasi': 'spesifikasi',
+    'jenis_transaksi': 'Jenis Transaksi',
+    'akun_analitik': 'Akun Analitik',
+    'jenis_pengadaan': 'Jenis Pengadaan',
+    'satuan': 'Satuan',
+    'uom_po': 'uom_po',
+    'status': 'Status',
+}
+REALISASI_INT_COLUMNS = {
+    'id_pemasok': 'No. ID Pemasok',
+    'tahun_stok': 'Tahun Stok',
+}
+REALISASI_DATE_COLUMNS = {
+    'tanggal_po': 'Tanggal PO',
+    'tanggal_penerimaan': 'Tanggal Penerimaan',
+    'tanggal_kirim_keuangan': 'Tanggal Kirim Keuangan',
+}
+REALISASI_DECIMAL_COLUMNS = {
+    'kuantum_po_kg': 'Kuantum PO (Kg)',
+    'qty_in_out': 'In / Out',
+    'harga_include_ppn': 'Harga Include ppn',
+    'nominal_realisasi_incl_ppn': 'Nominal Realisasi Incl ppn',
+}
+
+# Kolom numerik dibaca sebagai str supaya presisi tidak hilang saat read_excel
+REALISASI_EXCEL_DTYPES = {excel_col: str for excel_col in REALISASI_DECIMAL_COLUMNS.values()}
+
+# Kolom Excel yang dibaca builder, dan yang wajib ada (identitas baris). Dipakai
+# ingestion.sniff untuk mengenali / memvalidasi sheet dari baris header saja.
+REALISASI_EXCEL_COLUMNS = (
+    'kanwil', 'Entitas',
+    *REALISASI_TEXT_COLUMNS.values(), *REALISASI_INT_COLUMNS.values(),
+    *REALISASI_DATE_COLUMNS.values(), *REALISASI_DECIMAL_COLUMNS.values(),
+)
+REALISASI_REQUIRED_COLUMNS = ('kanwil', 'Entitas', 'Nomor PO', 'Nomor IN / OUT', 'Produk', 'Tanggal Penerimaan')
+TARGET_KANWIL_EXCEL_COLUMNS = ('kanwil', 'Target Setara Beras')
+TARGET_KANCAB_EXCEL_COLUMNS = ('kancab', 'Target Setara Beras')
+
+# Nilai string yang dianggap kosong (clean_value di app.py), dibandingkan setelah strip + lower
+NULL_STRINGS = ('', 'nan', 'none', 'null')
+# parse_fixed_point: lebar maksimum string dan jumlah digit agar mantissa / 10**scale eksak
+FIXED_POINT_WIDTH = 24
+MAX_FIXED_POINT_DIGITS = 15
+
+# Urutan kolom record sama dengan dict record lama
+REALISASI_COLUMNS = (
+    'kanwil_id', 'kancab_id', 'lokasi_persediaan', 'id_pemasok', 'nama_pemasok',
+    'tanggal_po', 'nomor_po', 'produk', 'no_jurnal', 'no_in_out',
+    'tanggal_penerimaan', 'komoditi', 'spesifikasi', 'tahun_stok',
+    'tanggal_kirim_keuangan', 'jenis_transaksi', 'akun_analitik',
+    'jenis_pengadaan', 'satuan', 'uom_po', 'kuantum_po_kg', 'qty_in_out',
+    'harga_include_ppn', 'nominal_realisasi_incl_ppn', 'status',
+)
+
+
+class RecordBatch:
+    """Hasil build records: list of dict + statistik baris yang dilewati"""
+
+    def __init__(self, records, skipped_kanwil=0, skipped_kancab=0, invalid_rows=None):
+        self.records = records
+        self.skipped_kanwil = skipped_kanwil
+        self.skipped_kancab = skipped_kancab
+        # {index baris DataFrame: pesan error} untuk baris yang gagal dikonversi
+        self.invalid_rows = invalid_rows or {}
+        # Jumlah record yang dibuang collapse_duplicates (row_hash sama dalam satu upload)
+        self.collapsed = 0
+
+    def __len__(self):
+        return len(self.records)
+
+
+def collapse_duplicates(batch, key='row_hash'):
+    """
+    Buang record dengan row_hash yang sudah muncul sebelumnya di batch yang sama
+    (in-place, record pertama dipertahankan sehingga urutan / nomor batch stabil).
+    Sheet Export Odoo sering berisi baris identik; tanpa ini semuanya ikut di-stage
+    ke tabel compare dan di-compare satu per satu. Returns jumlah record yang dibuang.
+    """
+    if not batch.records:
+        return 0
+    hashes = pd.Series([record[key] for record in batch.records], dtype=object)
+    duplicated = hashes.duplicated().to_numpy()
+    collapsed = int(duplicated.sum())
+    if collapsed:
+        batch.records = [record for record, dup in zip(batch.records, duplicated) if not dup]
+        batch.collapsed += collapsed
+    return collapsed
+
+
+def _column(df, name):
+    """Ambil kolom sebagai Series object; kolom yang tidak ada dianggap kosong"""
+    if name in df.columns:
+        return df[name]
+    return pd.Series([None] * len(df), index=df.index, dtype=object)
+
+
+def _finalize(values, mask):
+    """Gabungkan nilai hasil konversi dengan mask notna -> list dengan None"""
+    out = np.full(len(mask), None, dtype=object)
+    out[mask] = values
+    return out
+
+
+def _convert_elementwise(series, mask, func, invalid, label):
+    """Fallback per-elemen untuk kolom yang tidak bisa dikonversi sekaligus"""
+    out = np.full(len(series), None, dtype=object)
+    for pos in np.flatnonzero(mask):
+        try:
+            out[pos] = func(series.iat[pos])
+        except Exception as e:
+            invalid.setdefault(series.index[pos], f"{label}: {e}")
+    return out
+
+
+def text_values(series):
+    """Setara dengan: str(v) if pd.notna(v) else None"""
+    mask = series.notna().to_numpy()
+    if not mask.any():
+        return np.full(len(series), None, dtype=object)
+    return _finalize(series[mask].astype(str).to_numpy(dtype=object), mask)
+
+
+def int_values(series, invalid, label=''):
+    """Setara dengan: int(v) if pd.notna(v) else None"""
+    mask = series.notna().to_numpy()
+    if not mask.any():
+        return np.full(len(series), None, dtype=object)
+    try:
+        values = series[mask].astype(float)
+    except (TypeError, ValueError):
+        return _convert_elementwise(series, mask, int, invalid, label)
+    # int() pada string desimal ('12.5') gagal di implementasi lama
+    if series.dtype == object and not (values == np.trunc(values)).all():
+        return _convert_elementwise(series, mask, int, invalid, label)
+    return _finalize(np.trunc(values.to_numpy()).astype(np.int64).tolist(), mask)
+
+
+def float_values(series, invalid, label=''):
+    """
+    Setara dengan: float(v) if pd.notna(v) else None.
+    Memakai astype(float) (bukan pd.to_numeric) karena hasil parsing string-nya
+    identik dengan float() bawaan Python.
+    """
+    mask = series.notna().to_numpy()
+    if not mask.any():
+        return np.full(len(series), None, dtype=object)
+    try:
+        values = series[mask].astype(float).to_numpy()
+    except (TypeError, ValueError):
+        return _convert_elementwise(series, mask, float, invalid, label)
+    return _finalize(values.tolist(), mask)
+
+
+def parse_fixed_point(strings):
+    """
+    Parse array string desimal biasa ([+-]digit[.digit]) sekaligus, per posisi karakter
+    (bukan per sel): hasilnya fixed-point eksak mantissa (int64) dan scale (jumlah digit
+    di belakang titik), nilai = mantissa / 10**scale.
+
+    Returns (mantissa, scale, ok). ok False untuk sel di luar format tersebut (spasi,
+    eksponen, '_', teks, string kosong) atau dengan lebih dari MAX_FIXED_POINT_DIGITS digit;
+    sel seperti itu diproses per elemen oleh pemanggil.
+    """
+    strings = np.asarray(strings, dtype=str)
+    if strings.dtype.itemsize // 4 > FIXED_POINT_WIDTH:
+        # String panjang tidak mungkin <= MAX_FIXED_POINT_DIGITS digit; kosongkan agar matriks kecil
+        strings = np.where(np.char.str_len(strings) > FIXED_POINT_WIDTH, '', strings).astype(f'U{FIXED_POINT_WIDTH}')
+    width = strings.dtype.itemsize // 4
+    # Satu baris per posisi karakter: setiap langkah loop memproses satu posisi untuk semua sel
+    codes = np.ascontiguousarray(strings.view(np.uint32).reshape(len(strings), width).T)
+
+    ok = np.ones(len(strings), dtype=bool)
+    digit_count = np.zeros(len(strings), dtype=np.int8)
+    dot_count = np.zeros(len(strings), dtype=np.int8)
+    scale = np.zeros(len(strings), dtype=np.int8)
+    mantissa = np.zeros(len(strings), dtype=np.int64)
+    for position in range(width):
+        code = codes[position]
+        digit_value = code - 48
+        digit = digit_value < 10
+        dot = code == 46
+        allowed = digit | dot | (code == 0)
+        if position == 0:
+            allowed |= (code == 43) | (code == 45)
+        ok &= allowed
+        digit_count += digit
+        dot_count += dot
+        scale += digit & (dot_count > 0)
+        np.multiply(mantissa, 10, out=mantissa, where=digit)
+        np.add(mantissa, digit_value, out=mantissa, where=digit, casting='unsafe')
+    ok &= (dot_count <= 1) & (digit_count > 0) & (digit_count <= MAX_FIXED_POINT_DIGITS)
+    np.negative(mantissa, out=mantissa, where=codes[0] == 45)
+    return mantissa, scale, ok
+
+
+def decimal_values(series, invalid, label=''):
+    """
+    Kolom desimal presisi (dibaca sebagai str) -> float dalam satu pass vectorized.
+
+    Nilai sama dengan float(clean_value(v)) yang dikirim hari ini: '', 'nan', 'None',
+    'null' (setelah strip, huruf besar/kecil) -> None. Mantissa <= 15 digit dan
+    10**scale keduanya eksak di float64, sehingga mantissa / 10**scale (dibulatkan
+    sekali oleh IEEE) identik dengan float(string). Sel yang tidak bisa di-parse
+    dicatat ke invalid sekaligus.
+    """
+    mask = series.notna().to_numpy()
+    if not mask.any():
+        return np.full(len(series), None, dtype=object)
+    if series.dtype != object:
+        return float_values(series, invalid, label)
+
+    positions = np.flatnonzero(mask)
+    values = series.to_numpy(dtype=object)[mask]
+    mantissa, scale, ok = parse_fixed_point(values)
+    result = mantissa / np.power(10.0, scale)
+    zero = ok & (mantissa == 0)
+    if zero.any():
+        # float('-0.0') == -0.0, tanda minus ikut terkirim di JSON
+        negative = np.char.startswith(np.asarray(values[zero], dtype=str), '-')
+        result[np.flatnonzero(zero)[negative]] = -0.0
+
+    present = np.ones(len(values), dtype=bool)
+    for pos in np.flatnonzero(~ok):
+        value = values[pos]
+        if isinstance(value, str):
+            value = value.strip()
+            if value.lower() in NULL_STRINGS:
+                present[pos] = False
+                continue
+        try:
+            result[pos] = float(value)
+        except (TypeError, ValueError) as e:
+            present[pos] = False
+            invalid.setdefault(series.index[positions[pos]], f"{label}: {e}")
+
+    out_mask = mask.copy()
+    out_mask[mask] = present
+    return _finalize(result[present].tolist(), out_mask)
+
+
+def map_unique(series, func, invalid=None, label=''):
+    """
+    Setara dengan: func(v) if pd.notna(v) else None, tetapi func hanya dipanggil sekali
+    per nilai unik (pd.factorize) lalu hasilnya disebar kembali lewat kode per baris.
+    Kolom tanggal upload hanya punya ratusan nilai berbeda per ratusan ribu baris.
+
+    Nilai yang sama (==) dianggap satu nilai, jadi func harus memberi hasil yang sama
+    untuk keduanya (mis. Timestamp dan datetime dengan waktu yang sama).
+    Exception dari func dicatat ke invalid untuk setiap baris dengan nilai tersebut;
+    tanpa invalid exception diteruskan.
+    """
+    try:
+        codes, uniques = pd.factorize(series)
+    except TypeError:
+        # Nilai tidak hashable (list / dict): tidak bisa di-factorize
+        mask = series.notna().to_numpy()
+        if invalid is None:
+            return _finalize([func(value) for value in series[mask]], mask)
+        return _convert_elementwise(series, mask, func, invalid, label)
+
+    # Slot terakhir untuk kode -1 (NaN / None / NaT)
+    results = np.full(len(uniques) + 1, None, dtype=object)
+    failed = []
+    for code, value in enumerate(uniques):
+        try:
+            results[code] = func(value)
+        except Exception as e:
+            if invalid is None:
+                raise
+            failed.append((code, e))
+    for code, e in failed:
+        for pos in np.flatnonzero(codes == code):
+            invalid.setdefault(series.index[pos], f"{label}: {e}")
+    return results[codes]
+
+
+def _parse_date(value):
+    return pd.to_datetime(value).date().isoformat()
+
+
+def date_values(series, invalid, label=''):
+    """Setara dengan: pd.to_datetime(v).date().isoformat() if pd.notna(v) else None"""
+    mask = series.notna().to_numpy()
+    if not mask.any():
+        return np.full(len(series), None, dtype=object)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return _finalize(series[mask].dt.strftime('%Y-%m-%d').to_numpy(dtype=object), mask)
+    return map_unique(series, _parse_date, invalid, label)
+
+
+def _records_from_columns(columns, keep=None):
+    """Susun dict record dari kolom-kolom (dict nama -> array)"""
+    names = list(columns)
+    arrays = [columns[name] for name in names]
+    if keep is not None:
+        arrays = [array[keep] for array in arrays]
+    return [dict(zip(names, row)) for row in zip(*arrays)]
+
+
+def build_realisasi_records(df, kanwil_mapping, kancab_mapping, kancab_column='Entitas', with_hash=True):
+    """
+    Build records untuk tabel realisasi / realisasi_compare.
+
+    Parameters:
+    - kanwil_mapping: nama_kanwil -> kanwil_id
+    - kancab_mapping: (nama_kanwil, nama_kancab) -> kancab_id
+    - kancab_column: Nama kolom kancab di Excel
+
+    Returns: RecordBatch
+    """
+    invalid = {}
+
+    kanwil_names = text_values(_column(df, 'kanwil'))
+    kancab_names = text_values(_column(df, kancab_column))
+
+    kanwil_ids = np.array([kanwil_mapping.get(name) for name in kanwil_names], dtype=object)
+    kancab_ids = np.array(
+        [kancab_mapping.get(key) for key in zip(kanwil_names, kancab_names)],
+        dtype=object,
+    )
+
+    columns = {'kanwil_id': kanwil_ids, 'kancab_id': kancab_ids}
+    for db_col, excel_col in REALISASI_TEXT_COLUMNS.items():
+        columns[db_col] = text_values(_column(df, excel_col))
+    for db_col, excel_col in REALISASI_INT_COLUMNS.items():
+        columns[db_col] = int_values(_column(df, excel_col), invalid, excel_col)
+    for db_col, excel_col in REALISASI_DATE_COLUMNS.items():
+        columns[db_col] = date_values(_column(df, excel_col), invalid, excel_col)
+    for db_col, excel_col in REALISASI_DECIMAL_COLUMNS.items():
+        columns[db_col] = decimal_values(_column(df, excel_col), invalid, excel_col)
+    columns = {name: columns[name] for name in REALISASI_COLUMNS}
+
+    keep = None
+    if invalid:
+        keep = ~df.index.isin(list(invalid.keys()))
+
+    missing_kanwil = np.array([not kanwil_id for kanwil_id in kanwil_ids])
+    missing_kancab = np.array(
+        [not kancab_id and bool(name) for kancab_id, name in zip(kancab_ids, kancab_names)]
+    )
+    if keep is not None:
+        missing_kanwil = missing_kanwil[keep]
+        missing_kancab = missing_kancab[keep]
+
+    records = _records_from_columns(columns, keep)
+    if with_hash:
+        add_row_hashes(records, REALISASI_HASH_FIELDS)
+
+    return RecordBatch(
+        records,
+        skipped_kanwil=int(missing_kanwil.sum()),
+        skipped_kancab=int(missing_kancab.sum()),
+        invalid_rows=invalid,
+    )
+
+
+def _build_target_records(df, name_column, id_column, mapping, hash_fields, with_hash, target_date):
+    names = text_values(_column(df, name_column))
+    ids = np.array([mapping.get(name) for name in names], dtype=object)
+    keep = np.array([bool(i) for i in ids], dtype=bool)
+
+    target_date = (target_date or datetime.now().date()).isoformat()
+    columns = {
+        id_column: ids,
+        'target_setara_beras': text_values(_column(df, 'Target Setara Beras')),
+        'date': np.full(len(df), target_date, dtype=object),
+    }
+    records = _records_from_columns(columns, keep)
+    if with_hash:
+        add_row_hashes(records, hash_fields)
+    return records, int((~keep).sum())
+
+
+def build_target_kanwil_records(df, kanwil_mapping, with_hash=True, target_date=None):
+    """
+    Build records untuk tabel target_kanwil / target_kanwil_compare.
+    Baris dengan kanwil yang tidak ditemukan dilewati.
+    """
+    records, skipped = _build_target_records(
+        df, 'kanwil', 'kanwil_id', kanwil_mapping, TARGET_KANWIL_HASH_FIELDS, with_hash, target_date
+    )
+    return RecordBatch(records, skipped_kanwil=skipped)
+
+
+def build_target_kancab_records(df, kancab_mapping, with_hash=True, target_date=None):
+    """
+    Build records untuk tabel target_kancab / target_kancab_compare.
+    Baris dengan kancab yang tidak ditemukan dilewati.
+    """
+    records, skipped = _build_target_records(
+        df, 'kancab', 'kancab_id', kancab_mapping, TARGET_KANCAB_HASH_FIELDS, with_hash, target_date
+    )
+    return RecordBatch(records, skipped_kancab=skipped)
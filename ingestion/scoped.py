@@ -0,0 +1,94 @@
+"""
+Scoped replace: ganti hanya irisan bulan x kanwil yang dicakup file
+(lihat scoped_replace_functions.sql).
+
+Replace penuh mengganti seluruh tabel walaupun file koreksi hanya berisi satu
+bulan / satu kanwil. Di sini export di-stage ke <table>_compare lalu RPC
+scoped_replace_<table> menghapus dan memuat ulang hanya scope file dalam satu
+transaksi:
+
+- tanggal_penerimaan: bulan kalender penuh yang punya baris di file (sama dengan
+  window delta sync; bulan di antaranya yang tidak ada di file tidak disentuh),
+  plus baris tanggal NULL jika file memuatnya. File yang mencakup lebih dari
+  max_months bulan ditolak (ingestion.delta.ScopeTooWide)
+- kanwil_id: kanwil yang ada di file, atau semua kanwil (all_kanwil) untuk file
+  nasional; dengan semua kanwil dan tabel berpartisi bulanan, setiap bulan
+  diganti dengan menukar partisi
+"""
+from .adaptive import classify_error
+from .delta import MAX_SCOPE_MONTHS, _missing_function, delta_windows
+from .writer import DEFAULT_MAX_RETRIES, DEFAULT_RETRY_DELAY, execute_with_retry, print_log
+
+SCOPED_ACTIONS = ('deleted', 'inserted', 'swapped_partitions')
+
+
+class ScopedReplaceUnavailable(Exception):
+    """Tabel tidak mendukung scoped replace atau fungsi scoped_replace_<table> belum dipasang"""
+
+
+class ReplaceScope:
+    """Irisan yang diganti: bulan (tanggal 1), tanggal NULL, kanwil_id (None = semua kanwil)"""
+
+    def __init__(self, months, include_null, scope_ids):
+        self.months = months
+        self.include_null = include_null
+        self.scope_ids = scope_ids
+
+    @property
+    def label(self):
+        parts = []
+        if len(self.months) > 6:
+            parts.append(f"{len(self.months)} bulan ({self.months[0]:%Y-%m} s/d {self.months[-1]:%Y-%m})")
+        elif self.months:
+            parts.append(', '.join(f"{month:%Y-%m}" for month in self.months))
+        if self.include_null:
+            parts.append("tanggal kosong")
+        kanwil = "semua kanwil" if self.scope_ids is None else f"{len(self.scope_ids)} kanwil"
+        return f"{' + '.join(parts)}, {kanwil}"
+
+    def params(self):
+        return {
+            'p_months': [month.isoformat() for month in self.months],
+            'p_include_null': self.include_null,
+            'p_kanwil_ids': self.scope_ids,
+        }
+
+
+def replace_scope(records, all_kanwil=False, max_months=MAX_SCOPE_MONTHS):
+    """
+    Scope dari records (sudah di-build), atau None jika tidak ada baris dengan kanwil valid.
+    Raises ScopeTooWide jika records mencakup lebih dari max_months bulan (None = tanpa batas).
+    """
+    windows = delta_windows(records, max_months=max_months)
+    if not windows:
+        return None
+    dated = [window for window in windows if window.date_from is not None]
+    return ReplaceScope(
+        [window.date_from for window in dated],
+        len(dated) < len(windows),
+        None if all_kanwil else windows[0].scope_ids,
+    )
+
+
+def replace_slice(client, rpc_name, scope, max_retries=DEFAULT_MAX_RETRIES, retry_delay=DEFAULT_RETRY_DELAY,
+                  log=None):
+    """
+    Jalankan scoped replace lewat RPC (satu transaksi untuk seluruh scope).
+    Returns dict deleted / inserted / swapped_partitions.
+    """
+    try:
+        # Idempotent terhadap isi compare, tapi scope yang timeout akan timeout lagi
+        data = execute_with_retry(
+            lambda: client.rpc(rpc_name, scope.params()).execute().data,
+            max_retries=max_retries,
+            retry_delay=retry_delay,
+            log=log or print_log,
+            label=f"{rpc_name} {scope.label}",
+            should_retry=lambda e: not _missing_function(e) and classify_error(e) != 'timeout',
+        )
+    except Exception as e:
+        if _missing_function(e):
+            raise ScopedReplaceUnavailable(f"{rpc_name} belum dipasang (scoped_replace_functions.sql): {e}") from e
+        raise
+    row = (data[0] if isinstance(data, list) else data) or {}
+    return {action: int(row.get(action) or 0) for action in SCOPED_ACTIONS}
@@ -0,0 +1,91 @@
+"""
+Replace mode lewat shadow table (lihat shadow_swap_functions.sql).
+
+Data baru dimuat ke <table>_next (struktur, index, grant dan RLS sama), lalu
+swap_shadow_table me-rename <table> -> <table>_prev dan <table>_next -> <table>
+dalam satu transaksi. Selama upload dashboard tetap membaca tabel lama secara
+utuh, dan <table>_prev disimpan untuk rollback cepat.
+
+Jalur REST: prepare_shadow / insert_batches ke shadow_table_name() / swap_shadow.
+Jalur PostgreSQL langsung: ingestion.pgcopy.copy_replace memanggil fungsi SQL
+yang sama dalam satu transaksi.
+"""
+import time
+
+from .writer import print_log
+
+SHADOW_SUFFIX = '_next'
+PREVIOUS_SUFFIX = '_prev'
+SCHEMA_RELOAD_ATTEMPTS = 10
+SCHEMA_RELOAD_DELAY = 0.5
+
+
+class ShadowSwapUnavailable(Exception):
+    """Fungsi shadow swap belum dipasang / tabel tidak mendukung (pakai TRUNCATE + insert)"""
+
+
+def shadow_table_name(table_name):
+    return f"{table_name}{SHADOW_SUFFIX}"
+
+
+def previous_table_name(table_name):
+    return f"{table_name}{PREVIOUS_SUFFIX}"
+
+
+def _wait_until_visible(client, table_name):
+    """PostgREST me-reload schema cache secara async setelah NOTIFY; tunggu tabel baru terlihat"""
+    for attempt in range(SCHEMA_RELOAD_ATTEMPTS):
+        try:
+            client.table(table_name).select('*').limit(1).execute()
+            return True
+        except Exception:
+            time.sleep(SCHEMA_RELOAD_DELAY * (attempt + 1))
+    return False
+
+
+def prepare_shadow(client, table_name, log=None):
+    """
+    Buat <table>_next kosong lewat RPC prepare_shadow_table.
+    Returns nama shadow table. Raise ShadowSwapUnavailable jika RPC gagal.
+    """
+    log = log or print_log
+    try:
+        shadow = client.rpc("prepare_shadow_table", {"p_table_name": table_name}).execute().data
+    except Exception as e:
+        raise ShadowSwapUnavailable(str(e)) from e
+    shadow = shadow or shadow_table_name(table_name)
+    if not _wait_until_visible(client, shadow):
+        raise ShadowSwapUnavailable(f"{shadow} belum terlihat di schema cache PostgREST")
+    log(f"🌓 Shadow table {shadow} siap, data lama {table_name} tetap terbaca selama upload", "info")
+    return shadow
+
+
+def swap_shadow(client, table_name, log=None):
+    """Swap <table>_next menjadi <table> (satu transaksi). Returns jumlah baris tabel aktif."""
+    log = log or print_log
+    rows = client.rpc("swap_shadow_table", {"p_table_name": table_name}).execute().data
+    log(f"🔁 {table_name} di-swap dengan {shadow_table_name(table_name)} ({rows or 0:,} rows), "
+        f"data lama disimpan di {previous_table_name(table_name)}", "success")
+    return rows or 0
+
+
+def drop_shadow(client, table_name, log=None):
+    """Hapus <table>_next dari load yang dibatalkan (<table>_prev untuk rollback tetap ada)"""
+    log = log or print_log
+    client.rpc("drop_shadow_table", {"p_table_name": table_name}).execute()
+    log(f"🧹 {shadow_table_name(table_name)} sisa load yang dibatalkan dihapus", "info")
+
+
+def rollback_swap(client, table_name, log=None):
+    """Kembalikan <table> ke isi sebelum swap terakhir. Returns jumlah baris tabel aktif."""
+    log = log or print_log
+    rows = client.rpc("rollback_shadow_swap", {"p_table_name": table_name}).execute().data
+    log(f"↩️ {table_name} dikembalikan ke data sebelum Replace terakhir ({rows or 0:,} rows)", "success")
+    return rows or 0
+
+
+def drop_previous(client, table_name, log=None):
+    """Hapus <table>_prev dan sisa <table>_next (rollback tidak bisa lagi)"""
+    log = log or print_log
+    client.rpc("drop_shadow_previous", {"p_table_name": table_name}).execute()
+    log(f"🧹 {previous_table_name(table_name)} dihapus", "info")
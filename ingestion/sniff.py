@@ -0,0 +1,244 @@
+"""
+Sniffing workbook .xlsx dari header saja, sebelum sheet dibaca penuh.
+
+pd.read_excel mem-parse seluruh sheet (dan sharedStrings yang bisa puluhan MB)
+sebelum ketahuan sheet yang dipilih salah atau kolomnya tidak cocok. Di sini file
+.xlsx dibaca sebagai zip:
+
+- xl/workbook.xml + rels        : daftar sheet dan path XML-nya
+- baris pertama tiap worksheet  : header (streaming, berhenti setelah baris 1)
+- xl/sharedStrings.xml          : hanya sampai indeks string header terbesar
+- <dimension ref="A1:AB300001"> : jumlah baris; jika tidak ada, diperkirakan dari
+                                  ukuran XML tak terkompresi / byte per baris sampel
+
+Dari header, setiap sheet dicocokkan ke TABLES (excel_columns / required_columns)
+untuk deteksi otomatis sheet Realisasi / Target Kanwil / Target Kancab.
+File .xls lama (bukan zip) -> SniffUnavailable, pemanggil kembali ke pd.ExcelFile.
+"""
+import hashlib
+import posixpath
+import re
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+from .pipeline import TABLES, get_table_config
+
+NS_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+NS_DOC_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+NS_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+WORKSHEET_REL_TYPE = '/worksheet'
+DIMENSION_SCAN_BYTES = 4096
+SAMPLE_BYTES = 256 * 1024
+HASH_CHUNK_BYTES = 1024 * 1024
+
+_DIMENSION = re.compile(rb'<(?:\w+:)?dimension[^>]*\bref="([A-Z]*)(\d*)(?::([A-Z]*)(\d+))?"')
+_ROW_TAG = re.compile(rb'<(?:\w+:)?row[\s>]')
+_CELL_REF = re.compile(r'([A-Z]+)')
+
+
+class SniffUnavailable(Exception):
+    """File bukan .xlsx (mis. .xls lama) atau struktur workbook tidak terbaca"""
+
+
+def _column_index(ref):
+    match = _CELL_REF.match(ref or '')
+    if not match:
+        return None
+    index = 0
+    for char in match.group(1):
+        index = index * 26 + ord(char) - 64
+    return index - 1
+
+
+def _worksheet_paths(archive):
+    """[(nama sheet, path XML)] sesuai urutan di workbook; chartsheet dilewati"""
+    targets = {}
+    with archive.open('xl/_rels/workbook.xml.rels') as rels:
+        for _, element in iterparse(rels):
+            if element.tag == f'{NS_PKG_REL}Relationship' and element.get('Type', '').endswith(WORKSHEET_REL_TYPE):
+                target = element.get('Target')
+                targets[element.get('Id')] = target.lstrip('/') if target.startswith('/') \
+                    else posixpath.normpath(posixpath.join('xl', target))
+    sheets = []
+    with archive.open('xl/workbook.xml') as workbook:
+        for _, element in iterparse(workbook):
+            if element.tag == f'{NS_MAIN}sheet':
+                path = targets.get(element.get(f'{NS_DOC_REL}id'))
+                if path:
+                    sheets.append((element.get('name'), path))
+    return sheets
+
+
+def _header_cells(archive, path):
+    """Sel baris pertama: [(indeks kolom, jenis, nilai)] dengan jenis 's' = indeks sharedStrings"""
+    cells = []
+    with archive.open(path) as sheet:
+        for event, element in iterparse(sheet, events=('end',)):
+            if element.tag == f'{NS_MAIN}c':
+                kind = element.get('t')
+                if kind == 'inlineStr':
+                    value = ''.join(text.text or '' for text in element.iter(f'{NS_MAIN}t'))
+                else:
+                    node = element.find(f'{NS_MAIN}v')
+                    value = node.text if node is not None else None
+                if value is not None:
+                    cells.append((_column_index(element.get('r')), kind, value))
+            elif element.tag == f'{NS_MAIN}row':
+                break
+    return cells
+
+
+def _shared_strings(archive, indices):
+    """Isi sharedStrings untuk indeks yang diminta; parse berhenti setelah indeks terbesar"""
+    if not indices or 'xl/sharedStrings.xml' not in archive.namelist():
+        return {}
+    last = max(indices)
+    strings = {}
+    position = 0
+    with archive.open('xl/sharedStrings.xml') as shared:
+        for _, element in iterparse(shared):
+            if element.tag != f'{NS_MAIN}si':
+                continue
+            if position in indices:
+                # Teks fonetik (rPh) bukan bagian nilai sel
+                phonetic = {id(text) for run in element.iter(f'{NS_MAIN}rPh') for text in run.iter(f'{NS_MAIN}t')}
+                strings[position] = ''.join(text.text or '' for text in element.iter(f'{NS_MAIN}t')
+                                            if id(text) not in phonetic)
+            element.clear()
+            position += 1
+            if position > last:
+                break
+    return strings
+
+
+def _estimate_rows(archive, path):
+    """(jumlah baris data, exact) dari <dimension>, atau perkiraan dari byte per baris sampel"""
+    with archive.open(path) as sheet:
+        head = sheet.read(DIMENSION_SCAN_BYTES)
+        match = _DIMENSION.search(head)
+        if match and match.group(4):
+            return max(int(match.group(4)) - int(match.group(2) or 1), 0), True
+        sample = head + sheet.read(SAMPLE_BYTES - len(head))
+    rows = len(_ROW_TAG.findall(sample))
+    size = archive.getinfo(path).file_size
+    if rows == 0:
+        return 0, True
+    if len(sample) >= size:
+        return rows - 1, True
+    return max(int(size / (len(sample) / rows)) - 1, 0), False
+
+
+def missing_columns(table_name, columns):
+    """Kolom wajib tabel yang tidak ada di header"""
+    present = set(columns)
+    return [column for column in get_table_config(table_name)['required_columns'] if column not in present]
+
+
+def match_tables(sheet_name, columns):
+    """
+    Skor kecocokan header ke setiap tabel, urut terbaik dulu: list of dict
+    table, missing (kolom wajib yang tidak ada), matched (kolom builder yang ada),
+    specific (kolom wajib yang hanya dimiliki tabel ini, mis. 'kancab' untuk
+    target_kancab yang juga punya kolom 'kanwil').
+    Nama sheet sama dengan sheet default tabel dipakai sebagai penentu jika skor sama.
+    """
+    present = set(columns)
+    matches = []
+    for table_name, config in TABLES.items():
+        others = {column for name, other in TABLES.items() if name != table_name
+                  for column in other['required_columns']}
+        matches.append({
+            'table': table_name,
+            'missing': missing_columns(table_name, columns),
+            'matched': sum(1 for column in config['excel_columns'] if column in present),
+            'specific': sum(1 for column in config['required_columns'] if column in present and column not in others),
+        })
+    return sorted(
+        matches,
+        key=lambda match: (not match['missing'], match['matched'], match['specific'],
+                           TABLES[match['table']]['sheet'] == sheet_name),
+        reverse=True,
+    )
+
+
+def sniff_workbook(source):
+    """
+    Baca daftar sheet dan header tiap sheet tanpa parse data.
+    source: path atau file-like (posisi dikembalikan ke awal untuk read_excel berikutnya).
+
+    Returns dict:
+    - sheets: list of dict name, columns, rows (perkiraan jumlah baris data),
+      rows_exact, table (tabel terdeteksi atau None), missing (per tabel)
+    - detected: table_name -> nama sheet terbaik
+    """
+    try:
+        archive = zipfile.ZipFile(source)
+    except (zipfile.BadZipFile, OSError) as e:
+        raise SniffUnavailable(f"Bukan file .xlsx: {e}") from e
+
+    try:
+        with archive:
+            sheet_paths = _worksheet_paths(archive)
+            headers = {name: _header_cells(archive, path) for name, path in sheet_paths}
+            string_indices = {int(value) for cells in headers.values() for _, kind, value in cells if kind == 's'}
+            strings = _shared_strings(archive, string_indices)
+
+            sheets = []
+            for name, path in sheet_paths:
+                columns = [strings.get(int(value), '') if kind == 's' else value
+                           for _, kind, value in sorted(headers[name], key=lambda cell: cell[0] or 0)]
+                columns = [str(column).strip() for column in columns if str(column).strip()]
+                rows, exact = _estimate_rows(archive, path)
+                matches = match_tables(name, columns)
+                sheets.append({
+                    'name': name,
+                    'columns': columns,
+                    'rows': rows,
+                    'rows_exact': exact,
+                    'table': matches[0]['table'] if not matches[0]['missing'] else None,
+                    'missing': {match['table']: match['missing'] for match in matches},
+                })
+    except (KeyError, zipfile.BadZipFile, SyntaxError) as e:
+        # KeyError: member zip tidak ada; SyntaxError: ParseError XML
+        raise SniffUnavailable(f"Struktur workbook tidak terbaca: {e}") from e
+    finally:
+        if hasattr(source, 'seek'):
+            source.seek(0)
+
+    detected = {}
+    for table_name in TABLES:
+        candidates = [sheet for sheet in sheets if sheet['table'] == table_name]
+        if candidates:
+            detected[table_name] = max(candidates, key=lambda sheet: sheet['name'] == TABLES[table_name]['sheet'])['name']
+    return {'sheets': sheets, 'detected': detected}
+
+
+def sheet_content_hash(source, sheet_name):
+    """
+    sha256 XML satu worksheet + sharedStrings (nilai sel string disimpan terpisah di
+    sharedStrings), dihitung dari zip tanpa parse. Dipakai ledger upload untuk
+    mengenali sheet identik sebelum read_excel. File .xls -> SniffUnavailable.
+    """
+    try:
+        archive = zipfile.ZipFile(source)
+    except (zipfile.BadZipFile, OSError) as e:
+        raise SniffUnavailable(f"Bukan file .xlsx: {e}") from e
+    try:
+        with archive:
+            paths = dict(_worksheet_paths(archive))
+            if sheet_name not in paths:
+                raise SniffUnavailable(f"Sheet tidak ditemukan: {sheet_name}")
+            digest = hashlib.sha256()
+            for member in (paths[sheet_name], 'xl/sharedStrings.xml'):
+                if member not in archive.namelist():
+                    continue
+                digest.update(member.encode())
+                with archive.open(member) as content:
+                    for chunk in iter(lambda: content.read(HASH_CHUNK_BYTES), b''):
+                        digest.update(chunk)
+            return digest.hexdigest()
+    except (KeyError, zipfile.BadZipFile, SyntaxError) as e:
+        raise SniffUnavailable(f"Struktur workbook tidak terbaca: {e}") from e
+    finally:
+        if hasattr(source, 'seek'):
+            source.seek(0)
@@ -0,0 +1,218 @@
+"""
+Telemetry ingestion per fase: rows, durasi, rows/detik, bytes terkirim,
+latency per batch (histogram + percentile) dan jumlah retry.
+
+Fase yang dipakai pipeline:
+- read_excel      : parsing file Excel
+- build_records   : konversi DataFrame -> records
+- hashing         : generate row_hash
+- insert / insert_compare / migrate : network (insert ke Supabase)
+- compare_rpc     : compare di server (RPC *_compare_not_exists_page)
+- compare_migrate : compare + migrate yang berjalan bersamaan (durasi wall-clock);
+                    batch compare_rpc / migrate di dalamnya dicatat ke fase masing-masing
+
+Fase boleh bersarang (mis. hashing di dalam build_records); durasi fase induk
+hanya menghitung waktu di luar fase anak, sehingga total per fase tidak dobel.
+"""
+import csv
+import io
+import json
+import math
+import time
+from contextlib import contextmanager
+
+# Batas atas bucket histogram latency batch (milidetik)
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+# Jumlah maksimum event batch yang disimpan untuk timeline / chart
+MAX_EVENTS = 5000
+
+CSV_FIELDS = [
+    'phase', 'rows', 'seconds', 'rows_per_second', 'bytes_sent', 'batches', 'retries',
+    'latency_p50_ms', 'latency_p95_ms', 'latency_p99_ms', 'latency_max_ms',
+]
+
+
+def _new_entry():
+    return {'seconds': 0.0, 'rows': 0, 'bytes_sent': 0, 'batches': 0, 'retries': 0, 'latencies_ms': []}
+
+
+def percentile(values, pct):
+    """Percentile sederhana (nearest-rank) tanpa numpy"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def latency_histogram(latencies_ms):
+    """Return dict label bucket -> jumlah batch"""
+    labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+    counts = dict.fromkeys(labels, 0)
+    for value in latencies_ms:
+        for bound, label in zip(LATENCY_BUCKETS_MS, labels):
+            if value <= bound:
+                counts[label] += 1
+                break
+        else:
+            counts[labels[-1]] += 1
+    return counts
+
+
+class ThroughputStats:
+    """
+    Catat durasi, rows, bytes, latency batch dan retry per fase.
+    Semua method record dipanggil dari thread pemanggil (bukan worker thread).
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.phases = {}
+        self.events = []
+        self._current = None
+        self._stack = []
+        self._offset = 0.0
+
+    @contextmanager
+    def phase(self, name):
+        """Context manager untuk mengukur satu fase, mis. stats.phase('insert')"""
+        now = time.perf_counter()
+        if self._stack:
+            # Pause fase induk selama fase anak berjalan
+            parent_name, parent_start = self._stack[-1]
+            self.phases[parent_name]['seconds'] += now - parent_start
+        entry = self.phases.setdefault(name, _new_entry())
+        previous = self._current
+        self._current = name
+        self._stack.append((name, now))
+        try:
+            yield entry
+        finally:
+            end = time.perf_counter()
+            _, start = self._stack.pop()
+            entry['seconds'] += end - start
+            self._current = previous
+            if self._stack:
+                parent_name, _ = self._stack[-1]
+                self._stack[-1] = (parent_name, end)
+
+    def _entry(self, phase):
+        name = phase or self._current
+        if name is None:
+            return None, None
+        return name, self.phases.setdefault(name, _new_entry())
+
+    def add_rows(self, count, phase=None):
+        """Tambah jumlah baris ke fase yang sedang berjalan (atau fase tertentu)"""
+        _, entry = self._entry(phase)
+        if entry is not None:
+            entry['rows'] += count
+
+    def add_time(self, name, seconds, rows=0):
+        """Tambah durasi yang diukur di luar stats (mis. parsing Excel sebelum job dibuat)"""
+        entry = self.phases.setdefault(name, _new_entry())
+        entry['seconds'] += seconds
+        entry['rows'] += rows
+
+    def record_batch(self, seconds, rows=0, bytes_sent=0, retries=0, phase=None):
+        """Catat satu request batch: latency, rows, bytes terkirim, retry"""
+        name, entry = self._entry(phase)
+        if entry is None:
+            return
+        latency_ms = round(seconds * 1000, 1)
+        entry['batches'] += 1
+        entry['rows'] += rows
+        entry['bytes_sent'] += bytes_sent
+        entry['retries'] += retries
+        entry['latencies_ms'].append(latency_ms)
+        if len(self.events) < MAX_EVENTS:
+            self.events.append({
+                't': round(self._offset + time.time() - self.started_at, 3),
+                'phase': name,
+                'latency_ms': latency_ms,
+                'rows': rows,
+            })
+
+    @property
+    def total_seconds(self):
+        return self._offset + time.time() - self.started_at
+
+    def summary(self, include_raw=False):
+        """
+        Return dict ringkasan per fase + total.
+        include_raw=True menyertakan latency mentah & event timeline (untuk disimpan / chart).
+        """
+        phases = {}
+        for name, entry in self.phases.items():
+            seconds = entry['seconds']
+            latencies = entry['latencies_ms']
+            phases[name] = {
+                'rows': entry['rows'],
+                'seconds': round(seconds, 3),
+                'rows_per_second': round(entry['rows'] / seconds, 1) if seconds > 0 else None,
+                'bytes_sent': entry['bytes_sent'],
+                'batches': entry['batches'],
+                'retries': entry['retries'],
+                'latency_p50_ms': percentile(latencies, 50),
+                'latency_p95_ms': percentile(latencies, 95),
+                'latency_p99_ms': percentile(latencies, 99),
+                'latency_max_ms': max(latencies) if latencies else None,
+                'latency_histogram': latency_histogram(latencies) if latencies else {},
+            }
+            if include_raw:
+                phases[name]['latencies_ms'] = list(latencies)
+        summary = {'total_seconds': round(self.total_seconds, 3), 'phases': phases}
+        if include_raw:
+            summary['events'] = list(self.events)
+        return summary
+
+    @classmethod
+    def from_summary(cls, summary):
+        """Buat ulang stats dari summary(include_raw=True), mis. saat job di-resume"""
+        stats = cls()
+        if not summary:
+            return stats
+        stats._offset = summary.get('total_seconds', 0.0)
+        for name, data in summary.get('phases', {}).items():
+            entry = stats.phases.setdefault(name, _new_entry())
+            entry['seconds'] = data.get('seconds', 0.0)
+            entry['rows'] = data.get('rows', 0)
+            entry['bytes_sent'] = data.get('bytes_sent', 0)
+            entry['batches'] = data.get('batches', 0)
+            entry['retries'] = data.get('retries', 0)
+            entry['latencies_ms'] = list(data.get('latencies_ms', []))
+        stats.events = list(summary.get('events', []))
+        return stats
+
+    def to_json(self, include_raw=False):
+        return json.dumps(self.summary(include_raw=include_raw), indent=2)
+
+    def to_csv(self):
+        """Satu baris per fase (tanpa histogram / data mentah)"""
+        return summary_to_csv(self.summary())
+
+    def format(self):
+        """Ringkasan dalam bentuk teks untuk CLI / log"""
+        summary = self.summary()
+        lines = [f"{'Phase':<16} {'Rows':>10} {'Seconds':>9} {'Rows/s':>10} {'MB sent':>9} "
+                 f"{'Batches':>8} {'Retries':>8} {'p50 ms':>8} {'p95 ms':>8}"]
+        for name, entry in summary['phases'].items():
+            rate = f"{entry['rows_per_second']:,.0f}" if entry['rows_per_second'] else "-"
+            p50 = f"{entry['latency_p50_ms']:,.0f}" if entry['latency_p50_ms'] is not None else "-"
+            p95 = f"{entry['latency_p95_ms']:,.0f}" if entry['latency_p95_ms'] is not None else "-"
+            lines.append(f"{name:<16} {entry['rows']:>10,} {entry['seconds']:>9.2f} {rate:>10} "
+                         f"{entry['bytes_sent'] / 1_000_000:>9.2f} {entry['batches']:>8,} {entry['retries']:>8,} "
+                         f"{p50:>8} {p95:>8}")
+        lines.append(f"{'TOTAL':<16} {'':>10} {summary['total_seconds']:>9.2f}")
+        return "\n".join(lines)
+
+
+def summary_to_csv(summary):
+    """Konversi summary() menjadi CSV (satu baris per fase)"""
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=CSV_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    for name, entry in (summary or {}).get('phases', {}).items():
+        writer.writerow({'phase': name, **entry})
+    return output.getvalue()
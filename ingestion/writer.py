@@ -0,0 +1,406 @@
+"""
+Parallel batch insert ke Supabase (PostgREST).
+
+Batch dikirim bersamaan oleh beberapa worker thread. Setiap batch di-retry
+dengan exponential backoff + jitter, kecuali jika insert mungkin sudah commit
+(timeout / koneksi putus tanpa jawaban server): batch itu dicatat gagal, bukan
+dikirim ulang, agar baris tidak tersimpan dua kali. Batch yang dipecah (413 /
+statement timeout) dicatat per potongan: potongan yang tersimpan dihitung inserted
+dan di-checkpoint, hanya potongan yang gagal dilaporkan.
+Ukuran batch, jumlah worker dan jeda antar request diatur AdaptiveController
+(ingestion.adaptive) berdasarkan latency, ukuran payload dan error dari server.
+"""
+import json
+import queue
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .adaptive import AdaptiveController, FixedController, classify_error, error_codes, is_split_error
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_DELAY = 2
+RETRY_JITTER = 0.5
+# Status gateway yang bisa muncul setelah statement sudah commit di server
+AMBIGUOUS_STATUSES = ('502', '504')
+# Exception transport sebelum request terkirim (insert pasti belum commit)
+UNSENT_ERRORS = ('ConnectError', 'ConnectTimeout', 'PoolTimeout')
+# Interval cek BatchFeed saat producer belum mengirim item baru
+FEED_POLL_SECONDS = 0.1
+
+
+def print_log(message, level="info"):
+    print(f"[{level.upper()}] {message}")
+
+
+def chunked(items, size):
+    """Potong list menjadi batch berukuran size"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def execute_with_retry(operation, max_retries=DEFAULT_MAX_RETRIES, retry_delay=DEFAULT_RETRY_DELAY,
+                       log=None, label="request", on_retry=None, on_error=None, should_retry=None):
+    """
+    Jalankan operation() dengan retry + exponential backoff.
+    Exception terakhir di-raise ulang jika semua retry gagal.
+    on_retry() dipanggil setiap kali retry dilakukan (untuk telemetry).
+    on_error(e) dipanggil untuk setiap percobaan yang gagal (feedback controller);
+    should_retry(e) False -> langsung raise tanpa retry (mis. 413, payload sama pasti gagal lagi).
+    """
+    log = log or print_log
+    retries = 0
+    while True:
+        try:
+            return operation()
+        except Exception as e:
+            if on_error is not None:
+                on_error(e)
+            if should_retry is not None and not should_retry(e):
+                raise
+            if retries >= max_retries:
+                log(f"❌ Gagal setelah {max_retries} retry pada {label}: {e}", "error")
+                raise
+            # Exponential backoff + jitter, agar worker yang gagal bersamaan tidak retry serempak
+            delay = retry_delay * (2 ** retries) * random.uniform(1 - RETRY_JITTER, 1 + RETRY_JITTER)
+            log(f"⚠️ Error pada {label}, retry ke-{retries + 1}/{max_retries} - waiting {delay:.1f}s", "warning")
+            if on_retry is not None:
+                on_retry()
+            time.sleep(delay)
+            retries += 1
+
+
+def may_have_committed(error):
+    """
+    True jika insert yang gagal mungkin sudah commit di server: tidak ada jawaban
+    PostgREST (read timeout, koneksi putus) atau 502 / 504 dari gateway. Error dengan
+    status / kode PostgREST lain berarti statement ditolak atau di-rollback, aman diulang.
+    """
+    if type(error).__name__ in UNSENT_ERRORS:
+        return False
+    status, code = error_codes(error)
+    if code is not None and code not in AMBIGUOUS_STATUSES:
+        return False
+    if status is not None and status not in AMBIGUOUS_STATUSES:
+        return False
+    return True
+
+
+class InsertResult:
+    """Ringkasan hasil insert_batches"""
+
+    def __init__(self):
+        self.inserted = 0
+        self.failed = 0
+        self.batches = 0
+        self.errors = []
+        self.controller = None
+
+    def as_dict(self):
+        return {
+            'inserted': self.inserted,
+            'failed': self.failed,
+            'batches': self.batches,
+            'errors': list(self.errors),
+            'controller': self.controller,
+        }
+
+
+def make_controller(batch_size=DEFAULT_BATCH_SIZE, max_workers=DEFAULT_MAX_WORKERS, adaptive=True):
+    """Controller default: adaptif mulai dari batch_size / max_workers, atau tetap"""
+    if adaptive:
+        return AdaptiveController(initial_size=batch_size, initial_concurrency=max_workers)
+    return FixedController(size=batch_size, concurrency=max_workers)
+
+
+class FeedCancelled(Exception):
+    """Consumer BatchFeed berhenti, producer tidak perlu melanjutkan"""
+
+
+class BatchFeed:
+    """
+    Antrian item dari producer thread (mis. halaman hasil compare) untuk
+    dispatch_batches. Antrian dibatasi max_pages halaman: producer tertahan jika
+    consumer tertinggal, jadi memori tetap datar berapa pun jumlah item.
+
+    on_poll() dipanggil di thread consumer setiap kali antrian dicek (untuk
+    meneruskan log / progress producer selagi menunggu).
+    """
+
+    def __init__(self, max_pages=8, on_poll=None):
+        self.pages = queue.Queue(maxsize=max_pages)
+        self.on_poll = on_poll
+        self.buffer = []
+        self.received = 0
+        self.closed = False
+        self.cancelled = False
+
+    def put(self, items):
+        """Dipanggil producer; menunggu jika antrian penuh"""
+        items = list(items)
+        while not self.cancelled:
+            try:
+                self.pages.put(items, timeout=FEED_POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+        raise FeedCancelled()
+
+    def close(self):
+        """Producer selesai (termasuk saat error)"""
+        while not self.cancelled:
+            try:
+                self.pages.put(None, timeout=FEED_POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+
+    def cancel(self):
+        """Consumer berhenti; producer yang sedang menunggu di put() dilepas"""
+        self.cancelled = True
+
+    @property
+    def exhausted(self):
+        return self.closed and not self.buffer
+
+    def _pull(self, block):
+        if self.on_poll is not None:
+            self.on_poll()
+        try:
+            page = self.pages.get(timeout=FEED_POLL_SECONDS) if block else self.pages.get_nowait()
+        except queue.Empty:
+            return False
+        if page is None:
+            self.closed = True
+        else:
+            self.buffer.extend(page)
+            self.received += len(page)
+        return True
+
+    def take(self, size, block=True):
+        """
+        Ambil satu batch (maks size item). Batch kurang dari size hanya dikirim
+        setelah producer selesai. block=False: None jika item belum cukup.
+        """
+        while len(self.buffer) < size and not self.closed:
+            if not self._pull(block) and not block:
+                return None
+        if not self.buffer:
+            return None
+        batch, self.buffer = self.buffer[:size], self.buffer[size:]
+        return batch
+
+
+def dispatch_batches(items, operation, controller, fixed_size=None, skip_batches=None, thread_name_prefix="batch"):
+    """
+    Jalankan operation(batch_num, batch) per batch di worker thread. Ukuran batch dan
+    jumlah request paralel dibaca dari controller setiap kali batch baru dikirim, dan
+    controller.wait() dipanggil sebelumnya (rate limiting dari feedback server).
+
+    items: list, atau BatchFeed yang diisi producer thread (batch dikirim selagi
+    producer masih berjalan);
+    fixed_size: ukuran tetap agar nomor batch stabil (checkpoint resume per nomor batch);
+    skip_batches: nomor batch yang dilewati (hanya bersama fixed_size).
+    Yields (batch_num, batch, result, error) sesuai urutan selesai, di thread pemanggil.
+    """
+    feed = items if isinstance(items, BatchFeed) else None
+    skip_batches = set(skip_batches or ()) if fixed_size else set()
+    position, batch_num, pending = 0, 0, {}
+    executor = ThreadPoolExecutor(max_workers=max(1, controller.max_concurrency), thread_name_prefix=thread_name_prefix)
+    try:
+        while True:
+            while len(pending) < max(1, controller.concurrency):
+                size = fixed_size or controller.size
+                if feed is not None:
+                    # Tanpa request berjalan, tunggu producer; selain itu cek saja
+                    batch = feed.take(size, block=not pending)
+                    if not batch:
+                        break
+                elif position < len(items):
+                    batch = items[position:position + size]
+                    position += len(batch)
+                else:
+                    break
+                batch_num += 1
+                if batch_num in skip_batches:
+                    continue
+                controller.wait()
+                pending[executor.submit(operation, batch_num, batch)] = (batch_num, batch)
+            if not pending:
+                if feed is None or feed.exhausted:
+                    break
+                continue
+            done, _ = wait(pending, timeout=FEED_POLL_SECONDS if feed is not None else None,
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                batch_num_done, batch = pending.pop(future)
+                try:
+                    yield batch_num_done, batch, future.result(), None
+                except Exception as e:
+                    yield batch_num_done, batch, None, e
+    finally:
+        if feed is not None:
+            feed.cancel()
+        executor.shutdown(wait=True)
+
+
+def missing_ranges(total, parts):
+    """Rentang [start, stop) dari 0..total yang tidak tercakup parts [(start, count)]"""
+    ranges, position = [], 0
+    for start, count in sorted(parts):
+        if start > position:
+            ranges.append((position, start))
+        position = max(position, start + count)
+    if position < total:
+        ranges.append((position, total))
+    return ranges
+
+
+def insert_batches(client, table_name, records, batch_size=DEFAULT_BATCH_SIZE,
+                   max_workers=DEFAULT_MAX_WORKERS, max_retries=DEFAULT_MAX_RETRIES,
+                   retry_delay=DEFAULT_RETRY_DELAY, progress_callback=None, log=None, stats=None,
+                   skip_batches=None, batch_callback=None, controller=None, adaptive=True,
+                   skip_parts=None, part_callback=None):
+    """
+    Insert records ke table_name per batch secara paralel.
+
+    Parameters:
+    - progress_callback: dipanggil (inserted, total) setiap batch selesai
+      dari thread pemanggil (aman untuk elemen Streamlit)
+    - stats: ThroughputStats opsional untuk mencatat rows/detik, bytes, latency batch dan retry
+    - skip_batches: nomor batch (mulai 1) yang sudah ter-insert sebelumnya (resume)
+    - batch_callback: dipanggil (batch_num, count) setelah batch sukses, untuk checkpoint
+    - skip_parts: {batch_num: [(start, count)]} potongan batch yang sudah ter-insert
+      sebelumnya (resume batch yang hanya sebagian tersimpan); hanya sisanya yang dikirim
+    - part_callback: dipanggil (batch_num, start, count) untuk setiap potongan yang
+      tersimpan dari batch yang tidak lengkap (batch dipecah dan sebagian gagal)
+    - controller: AdaptiveController / FixedController; default adaptif mulai dari
+      batch_size dan max_workers (adaptive=False untuk perilaku lama)
+
+    Dengan skip_batches / batch_callback ukuran batch tetap batch_size (checkpoint
+    per nomor batch), hanya concurrency dan jeda yang adaptif.
+
+    Returns: InsertResult
+    """
+    log = log or print_log
+    result = InsertResult()
+    total = len(records)
+    if total == 0:
+        return result
+
+    controller = controller or make_controller(batch_size, max_workers, adaptive=adaptive)
+    skip_parts = skip_parts or {}
+    fixed_size = batch_size if (skip_batches or skip_parts or batch_callback is not None) else None
+    measure_payload = stats is not None or isinstance(controller, AdaptiveController)
+
+    # Log dari worker thread ditampung dulu, lalu diteruskan dari thread pemanggil
+    # (add_log di Streamlit butuh ScriptRunContext yang tidak ada di worker)
+    worker_logs = queue.SimpleQueue()
+
+    def merge(outcomes):
+        """Gabungkan hasil potongan: (committed, latency, payload_bytes, retries, failed)"""
+        committed, latency, payload_bytes, retries, failed = [], 0.0, 0, 0, []
+        for part in outcomes:
+            committed += part[0]
+            latency += part[1]
+            payload_bytes += part[2]
+            retries += part[3]
+            failed += part[4]
+        return committed, latency, payload_bytes, retries, failed
+
+    def send_part(batch_num, batch, offset):
+        """send() untuk satu potongan; error dicatat sebagai potongan gagal, bukan di-raise"""
+        try:
+            return send(batch_num, batch, offset)
+        except Exception as e:
+            return [], 0.0, 0, 0, [(offset, len(batch), e)]
+
+    def send(batch_num, batch, offset=0):
+        """
+        Kirim batch (baris offset.. dari batch nomor batch_num). Returns (committed,
+        latency, payload_bytes, retries, failed): committed [(start, count)] potongan yang
+        tersimpan, failed [(start, count, error)] potongan yang gagal setelah dipecah.
+        Error batch utuh (belum dipecah) di-raise.
+        """
+        retries = []
+        # Ukuran payload untuk controller (batas 413) dan telemetry
+        payload_bytes = len(json.dumps(batch, default=str)) if measure_payload else 0
+        start = time.perf_counter()
+        try:
+            execute_with_retry(
+                lambda: client.table(table_name).insert(batch).execute(),
+                max_retries=max_retries,
+                retry_delay=retry_delay,
+                log=lambda message, level="info": worker_logs.put((message, level)),
+                label=f"{table_name} batch {batch_num}",
+                on_retry=lambda: retries.append(1),
+                on_error=lambda e: controller.record_error(e, payload_bytes),
+                # Insert tidak idempotent: batch yang mungkin sudah commit tidak dikirim ulang
+                should_retry=lambda e: not is_split_error(e) and not may_have_committed(e),
+            )
+        except Exception as e:
+            if may_have_committed(e):
+                raise RuntimeError(f"status batch tidak pasti (mungkin sudah tersimpan), tidak dikirim ulang: {e}") from e
+            if not is_split_error(e) or len(batch) < 2:
+                raise
+            # 413 / statement timeout (57014): batch sama pasti gagal lagi dan tidak commit, pecah dua.
+            # Hasil tiap potongan dicatat sendiri: potongan yang tersimpan tidak ikut dihitung gagal
+            worker_logs.put((f"⚠️ {table_name} batch {batch_num} terlalu besar ({len(batch):,} rows, "
+                             f"{classify_error(e)}), dipecah dua", "warning"))
+            half = len(batch) // 2
+            return merge([send_part(batch_num, batch[:half], offset),
+                          send_part(batch_num, batch[half:], offset + half)])
+        latency = time.perf_counter() - start
+        controller.record(latency, len(batch), payload_bytes)
+        return [(offset, len(batch))], latency, payload_bytes, len(retries), []
+
+    def send_batch(batch_num, batch):
+        done = skip_parts.get(batch_num)
+        if not done:
+            return send(batch_num, batch)
+        # Resume batch yang sebagian sudah tersimpan: hanya potongan yang belum
+        return merge([([tuple(part) for part in done], 0.0, 0, 0, [])] +
+                     [send_part(batch_num, batch[start:stop], start)
+                      for start, stop in missing_ranges(len(batch), done)])
+
+    for batch_num, batch, outcome, error in dispatch_batches(records, send_batch, controller, fixed_size=fixed_size,
+                                                             skip_batches=skip_batches,
+                                                             thread_name_prefix=f"insert-{table_name}"):
+        while not worker_logs.empty():
+            log(*worker_logs.get())
+        result.batches += 1
+        if error is not None:
+            result.failed += len(batch)
+            result.errors.append(f"batch {batch_num}: {error}")
+            log(f"❌ Error on batch {batch_num} ({len(batch):,} rows): {error}", "error")
+            continue
+        committed, latency, payload_bytes, retries, failed = outcome
+        previous = sum(count for _, count in skip_parts.get(batch_num, ()))
+        count = sum(count for _, count in committed) - previous
+        result.inserted += count
+        for start, part_count, part_error in failed:
+            result.failed += part_count
+            result.errors.append(f"batch {batch_num} baris {start + 1}-{start + part_count}: {part_error}")
+            log(f"❌ Error on batch {batch_num} baris {start + 1}-{start + part_count} "
+                f"({part_count:,} rows): {part_error}", "error")
+        if not failed:
+            if batch_callback is not None:
+                batch_callback(batch_num, len(batch))
+        elif part_callback is not None:
+            # Checkpoint per potongan: resume hanya mengirim ulang potongan yang gagal
+            for start, part_count in committed:
+                part_callback(batch_num, start, part_count)
+        if stats is not None:
+            stats.record_batch(latency, rows=count, bytes_sent=payload_bytes, retries=retries)
+        if progress_callback is not None:
+            progress_callback(result.inserted, total)
+
+    while not worker_logs.empty():
+        log(*worker_logs.get())
+    result.controller = controller.snapshot()
+    if isinstance(controller, AdaptiveController):
+        log(f"🎛️ {table_name}: batch akhir {result.controller['size']:,} rows x {result.controller['concurrency']} "
+            f"paralel (puncak {result.controller['peak_size']:,} x {result.controller['peak_concurrency']})", "info")
+    return result
@@ -0,0 +1,125 @@
+"""
+Registry 26 kanwil berdasarkan kode (08001, 13001, ...).
+
+Sebelumnya daftar kanwil ditulis ulang di beberapa tempat (filter dashboard,
+kanwil_sentra / kanwil_lainnya tabel summary) dan baris RPC dicari dengan
+str.contains(" <kode> ") sekali per kanwil. Format nama berbeda per sumber:
+
+- aplikasi / filter : "15001 - KANTOR WILAYAH KALTIM KALTARA"
+- database          : "16 - 15001 - KANTOR WILAYAH KALTIM KALTARA"
+
+Kode 5 digit sama di keduanya, jadi semua pencocokan memakai kode: hasil RPC
+diindeks per kode sekali (kolom kode_kanwil jika RPC mengembalikannya, selain
+itu diekstrak dari nama) lalu tabel dibangun dengan satu reindex.
+"""
+import pandas as pd
+
+SENTRA = 'sentra'
+LAINNYA = 'lainnya'
+
+# kode -> (nama tampilan tanpa kode, kelompok). Urutan = urutan baris summary
+# sebelum diurutkan per capaian (baris dengan capaian sama tetap di urutan ini).
+KANWIL = {
+    '08001': ('KANTOR WILAYAH LAMPUNG', SENTRA),
+    '21001': ('KANTOR WILAYAH SULSEL SULBAR', SENTRA),
+    '20001': ('KANTOR WILAYAH SULTRA', SENTRA),
+    '12001': ('KANTOR WILAYAH DI YOGYAKARTA', SENTRA),
+    '09001': ('KANTOR WILAYAH DKI JAKARTA BANTEN', SENTRA),
+    '23001': ('KANTOR WILAYAH N.T.B', SENTRA),
+    '13001': ('KANTOR WILAYAH JATIM', SENTRA),
+    '10001': ('KANTOR WILAYAH JABAR', SENTRA),
+    '01001': ('KANTOR WILAYAH ACEH', SENTRA),
+    '06001': ('KANTOR WILAYAH SUMSEL', SENTRA),
+    '11001': ('KANTOR WILAYAH JATENG', SENTRA),
+    '15001': ('KANTOR WILAYAH KALTIM KALTARA', LAINNYA),
+    '25001': ('KANTOR WILAYAH MALUKU MALUT', LAINNYA),
+    '26001': ('KANTOR WILAYAH PAPUA PABAR', LAINNYA),
+    '02001': ('KANTOR WILAYAH SUMUT', LAINNYA),
+    '04001': ('KANTOR WILAYAH SUMBAR', LAINNYA),
+    '17001': ('KANTOR WILAYAH KALTENG', LAINNYA),
+    '16001': ('KANTOR WILAYAH KALSEL', LAINNYA),
+    '14001': ('KANTOR WILAYAH KALBAR', LAINNYA),
+    '18001': ('KANTOR WILAYAH SULUT GORONTALO', LAINNYA),
+    '05001': ('KANTOR WILAYAH JAMBI', LAINNYA),
+    '19001': ('KANTOR WILAYAH SULTENG', LAINNYA),
+    '24001': ('KANTOR WILAYAH N.T.T', LAINNYA),
+    '03001': ('KANTOR WILAYAH RIAU DAN KEPRI', LAINNYA),
+    '22001': ('KANTOR WILAYAH BALI', LAINNYA),
+    '07001': ('KANTOR WILAYAH BENGKULU', LAINNYA),
+}
+
+# Kode kanwil di nama aplikasi maupun database (prefix nomor urut DB hanya 2 digit)
+CODE_PATTERN = r'\b(\d{5}) - '
+
+
+def display_name(code):
+    """Nama kanwil di aplikasi, mis. '13001 - KANTOR WILAYAH JATIM'"""
+    return f"{code} - {KANWIL[code][0]}"
+
+
+def kanwil_codes(group=None):
+    """Kode kanwil (urutan registry), opsional hanya satu kelompok (SENTRA / LAINNYA)"""
+    return [code for code, (_, kanwil_group) in KANWIL.items() if group is None or kanwil_group == group]
+
+
+def kanwil_options(kanwil_names=None):
+    """
+    Nama tampilan kanwil urut kode (pilihan filter dashboard). Dengan kanwil_names
+    (nama kanwil di database) hanya kanwil yang ada di database; semua kanwil
+    registry jika tidak ada nama database yang cocok.
+    """
+    frame = registry_frame(kanwil_names).sort_index()
+    if kanwil_names is not None and frame['db_name'].notna().any():
+        frame = frame[frame['db_name'].notna()]
+    return frame['display_name'].tolist()
+
+
+def extract_codes(names):
+    """Kode kanwil dari Series nama (format aplikasi atau database); tidak ada kode -> NaN"""
+    return pd.Series(names).astype('string').str.extract(CODE_PATTERN, expand=False)
+
+
+def normalize_codes(values):
+    """
+    Kode kanwil 5 digit sebagai string. Decoder CSV RPC (rpc_columnar) menebak tipe,
+    jadi kode '08001' bisa datang sebagai angka 8001 (atau 8001.0 jika ada NULL).
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values):
+        values = values.astype('Int64')
+    return values.astype('string').str.strip().str.zfill(5)
+
+
+def db_names(kanwil_names):
+    """kode -> nama_kanwil di database, dari iterable nama DB (mis. Dimensions.kanwil)"""
+    names = pd.Series(list(kanwil_names), dtype=object)
+    codes = extract_codes(names)
+    return dict(zip(codes[codes.notna()], names[codes.notna()]))
+
+
+def registry_frame(kanwil_names=None):
+    """
+    DataFrame registry berindeks kode: display_name, group, dan db_name jika
+    kanwil_names (nama kanwil di database) diberikan.
+    """
+    frame = pd.DataFrame(
+        {
+            'display_name': [display_name(code) for code in KANWIL],
+            'group': [group for _, group in KANWIL.values()],
+        },
+        index=pd.Index(list(KANWIL), name='kode_kanwil'),
+    )
+    if kanwil_names is not None:
+        frame['db_name'] = pd.Series(db_names(kanwil_names), dtype=object)
+    return frame
+
+
+def index_by_code(df, name_column='kanwil', code_column='kode_kanwil'):
+    """
+    DataFrame hasil RPC berindeks kode kanwil. Memakai kolom code_column jika ada,
+    selain itu kode diekstrak sekali dari name_column. Kode ganda: baris pertama dipakai
+    (sama dengan iloc[0] hasil str.contains lama).
+    """
+    codes = normalize_codes(df[code_column]) if code_column in df.columns else extract_codes(df[name_column])
+    indexed = df.set_axis(pd.Index(codes.to_numpy(), name='kode_kanwil'), axis=0)
+    return indexed[indexed.index.notna() & ~indexed.index.duplicated()]
@@ -1,65 +1,43 @@
+import sys
 import pandas as pd
-from supabase import create_client, Client
-import toml
 from datetime import datetime
-import os
-import hashlib
-import json
+from ingestion.config import create_supabase_client, load_database_url
+from ingestion.hashing import generate_row_hash
+from ingestion.records import REALISASI_EXCEL_DTYPES, build_realisasi_records
+from ingestion.pgcopy import DirectCopyUnavailable, copy_replace, direct_copy_available, truncate_tables
+from ingestion.writer import insert_batches
 
 class SupabaseDataImporter:
-    def __init__(self, secrets_path="/home/dimas/bulog/dashboard-realisasi/.streamlit/secrets.toml"):
-        # Load secrets
-        secrets = toml.load(secrets_path)
-        self.url = secrets['supabase']['project_url']
-        self.key = secrets['supabase']['api_key']
-        self.supabase: Client = create_client(self.url, self.key)
+    def __init__(self, secrets_path=None):
+        # Credentials: env SUPABASE_URL/SUPABASE_KEY, BULOG_SECRETS_PATH, atau .streamlit/secrets.toml
+        self.supabase = create_supabase_client(secrets_path)
+        # PostgreSQL langsung (opsional): TRUNCATE + COPY realisasi tanpa REST
+        self.database_url = load_database_url(secrets_path)
+        self.use_copy = direct_copy_available(self.database_url)
 
     def generate_row_hash(self, record):
         """
         Generate SHA256 hash from record data for duplicate detection.
         Excludes auto-generated fields like id and created_at.
         """
-        # Create a sorted dictionary to ensure consistent hashing
-        hash_data = {
-            'kanwil_id': record.get('kanwil_id'),
-            'kancab_id': record.get('kancab_id'),
-            'lokasi_persediaan': record.get('lokasi_persediaan'),
-            'id_pemasok': record.get('id_pemasok'),
-            'nama_pemasok': record.get('nama_pemasok'),
-            'tanggal_po': record.get('tanggal_po'),
-            'nomor_po': record.get('nomor_po'),
-            'produk': record.get('produk'),
-            'no_jurnal': record.get('no_jurnal'),
-            'no_in_out': record.get('no_in_out'),
-            'tanggal_penerimaan': record.get('tanggal_penerimaan'),
-            'komoditi': record.get('komoditi'),
-            'spesifikasi': record.get('spesifikasi'),
-            'tahun_stok': record.get('tahun_stok'),
-            'tanggal_kirim_keuangan': record.get('tanggal_kirim_keuangan'),
-            'jenis_transaksi': record.get('jenis_transaksi'),
-            'akun_analitik': record.get('akun_analitik'),
-            'jenis_pengadaan': record.get('jenis_pengadaan'),
-            'satuan': record.get('satuan'),
-            'uom_po': record.get('uom_po'),
-            'kuantum_po_kg': record.get('kuantum_po_kg'),
-            'qty_in_out': record.get('qty_in_out'),
-            'harga_include_ppn': record.get('harga_include_ppn'),
-            'nominal_realisasi_incl_ppn': record.get('nominal_realisasi_incl_ppn'),
-            'status': record.get('status'),
-        }
-
-        # Convert to JSON string with sorted keys for consistent hashing
-        json_string = json.dumps(hash_data, sort_keys=True, default=str)
-
-        # Generate SHA256 hash
-        return hashlib.sha256(json_string.encode()).hexdigest()
+        return generate_row_hash(record)
         
     def truncate_all_tables(self):
         """Truncate semua tabel dengan urutan yang benar"""
         print("🗑️  Truncating tables...")
         
         tables = ['realisasi', 'target_kancab', 'target_kanwil', 'kancab', 'kanwil']
-        
+
+        if self.use_copy:
+            try:
+                truncate_tables(self.database_url, tables)
+                print(f"   ✅ Truncated: {', '.join(tables)} (PostgreSQL langsung)")
+                print("✅ All tables truncated\n")
+                return
+            except DirectCopyUnavailable as e:
+                print(f"   ⚠️  Koneksi PostgreSQL langsung gagal ({e}), pakai REST")
+                self.use_copy = False
+
         for table in tables:
             try:
                 # Delete semua data
@@ -222,69 +200,24 @@ class SupabaseDataImporter:
             key = (k['kanwil']['nama_kanwil'], k['nama_kancab'])
             kancab_mapping[key] = k['kancab_id']
 
-        realisasi_data = []
-        batch_size = 1000
+        # Kolom pertama: kanwil, kolom kedua: Entitas (kancab)
+        kancab_column = df.columns[1]
+        df = df.rename(columns={df.columns[0]: 'kanwil'})
+        batch = build_realisasi_records(df, kanwil_mapping, kancab_mapping, kancab_column=kancab_column)
+        for idx, error in batch.invalid_rows.items():
+            print(f"   ⚠️  Error at row {idx}: {error}")
 
-        for idx, row in df.iterrows():
+        if self.use_copy:
             try:
-                kanwil_name = str(row.iloc[0]) if pd.notna(row.iloc[0]) else None
-                kancab_name = str(row.iloc[1]) if pd.notna(row.iloc[1]) else None
-
-                kanwil_id = kanwil_mapping.get(kanwil_name)
-                kancab_id = kancab_mapping.get((kanwil_name, kancab_name))
-
-                # Parse tanggal
-                tanggal_po = pd.to_datetime(row['Tanggal PO']).date() if pd.notna(row['Tanggal PO']) else None
-                tanggal_penerimaan = pd.to_datetime(row['Tanggal Penerimaan']).date() if pd.notna(row['Tanggal Penerimaan']) else None
-                tanggal_kirim = pd.to_datetime(row['Tanggal Kirim Keuangan']).date() if pd.notna(row['Tanggal Kirim Keuangan']) else None
-
-                record = {
-                    'kanwil_id': kanwil_id,
-                    'kancab_id': kancab_id,
-                    'lokasi_persediaan': str(row['Lokasi Persediaan']) if pd.notna(row['Lokasi Persediaan']) else None,
-                    'id_pemasok': int(row['No. ID Pemasok']) if pd.notna(row['No. ID Pemasok']) else None,
-                    'nama_pemasok': str(row['Nama Pemasok']) if pd.notna(row['Nama Pemasok']) else None,
-                    'tanggal_po': tanggal_po.isoformat() if tanggal_po else None,
-                    'nomor_po': str(row['Nomor PO']) if pd.notna(row['Nomor PO']) else None,
-                    'produk': str(row['Produk']) if pd.notna(row['Produk']) else None,
-                    'no_jurnal': str(row['No Jurnal']) if pd.notna(row['No Jurnal']) else None,
-                    'no_in_out': str(row['Nomor IN / OUT']) if pd.notna(row['Nomor IN / OUT']) else None,
-                    'tanggal_penerimaan': tanggal_penerimaan.isoformat() if tanggal_penerimaan else None,
-                    'komoditi': str(row['Komoditi']) if pd.notna(row['Komoditi']) else None,
-                    'spesifikasi': str(row['spesifikasi']) if pd.notna(row['spesifikasi']) else None,
-                    'tahun_stok': int(row['Tahun Stok']) if pd.notna(row['Tahun Stok']) else None,
-                    'tanggal_kirim_keuangan': tanggal_kirim.isoformat() if tanggal_kirim else None,
-                    'jenis_transaksi': str(row['Jenis Transaksi']) if pd.notna(row['Jenis Transaksi']) else None,
-                    'akun_analitik': str(row['Akun Analitik']) if pd.notna(row['Akun Analitik']) else None,
-                    'jenis_pengadaan': str(row['Jenis Pengadaan']) if pd.notna(row['Jenis Pengadaan']) else None,
-                    'satuan': str(row['Satuan']) if pd.notna(row['Satuan']) else None,
-                    'uom_po': str(row['uom_po']) if pd.notna(row['uom_po']) else None,
-                    'kuantum_po_kg': float(row['Kuantum PO (Kg)']) if pd.notna(row['Kuantum PO (Kg)']) else None,
-                    'qty_in_out': float(row['In / Out']) if pd.notna(row['In / Out']) else None,
-                    'harga_include_ppn': float(row['Harga Include ppn']) if pd.notna(row['Harga Include ppn']) else None,
-                    'nominal_realisasi_incl_ppn': float(row['Nominal Realisasi Incl ppn']) if pd.notna(row['Nominal Realisasi Incl ppn']) else None,
-                    'status': str(row['Status']) if pd.notna(row['Status']) else None,
-                }
-
-                # Generate and add row hash
-                record['row_hash'] = self.generate_row_hash(record)
-
-                realisasi_data.append(record)
-
-                # Insert per batch
-                if len(realisasi_data) >= batch_size:
-                    self.supabase.table('realisasi').insert(realisasi_data).execute()
-                    print(f"   ✅ Inserted batch: {len(realisasi_data)} records")
-                    realisasi_data = []
-
-            except Exception as e:
-                print(f"   ⚠️  Error at row {idx}: {e}")
-                continue
+                inserted = copy_replace(self.database_url, 'realisasi', batch.records)
+                print(f"   ✅ Inserted {inserted} records (COPY)")
+                print(f"✅ Realisasi import completed\n")
+                return
+            except DirectCopyUnavailable as e:
+                print(f"   ⚠️  Koneksi PostgreSQL langsung gagal ({e}), pakai REST")
 
-        # Insert remaining data
-        if realisasi_data:
-            self.supabase.table('realisasi').insert(realisasi_data).execute()
-            print(f"   ✅ Inserted final batch: {len(realisasi_data)} records")
+        result = insert_batches(self.supabase, 'realisasi', batch.records)
+        print(f"   ✅ Inserted {result.inserted} records ({result.batches} batches, {result.failed} failed)")
 
         print(f"✅ Realisasi import completed\n")
     
@@ -298,7 +231,7 @@ class SupabaseDataImporter:
         print(f"📖 Reading Excel: {excel_path}")
 
         # Read sheet realisasi (sheet pertama atau default)
-        df_realisasi = pd.read_excel(excel_path)
+        df_realisasi = pd.read_excel(excel_path, dtype=REALISASI_EXCEL_DTYPES)
         print(f"   ✅ Loaded {len(df_realisasi)} rows from Realisasi sheet\n")
 
         # Read sheet Target Kanwil
@@ -340,13 +273,17 @@ class SupabaseDataImporter:
         print("=" * 60)
 
 
-# Usage
+# Usage: python migrate_excel_to_supabase.py <file.xlsx> [secrets.toml]
 if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python migrate_excel_to_supabase.py <file.xlsx> [secrets.toml]")
+        sys.exit(1)
+
     # Path ke file Excel
-    excel_file = "/home/dimas/bulog/dashboard-realisasi/assets/hasil_gabungan_ori.xlsx"
-    
+    excel_file = sys.argv[1]
+
     # Initialize importer
-    importer = SupabaseDataImporter()
-    
+    importer = SupabaseDataImporter(sys.argv[2] if len(sys.argv) > 2 else None)
+
     # Run import
-    importer.run_full_import(excel_file)
\ No newline at end of file
+    importer.run_full_import(excel_file)
@@ -0,0 +1,260 @@
+-- Partisi bulanan realisasi / realisasi_compare pada tanggal_penerimaan
+--
+-- Semua RPC dashboard memfilter rentang tanggal_penerimaan; dengan partisi RANGE per
+-- bulan planner hanya membaca partisi bulan yang tercakup (partition pruning), dan
+-- VACUUM / REINDEX / ANALYZE bisa dijalankan per bulan:
+--
+--   VACUUM (ANALYZE) realisasi_p2025_03;
+--   REINDEX TABLE CONCURRENTLY realisasi_p2025_03;
+--
+-- Layout setelah migrasi:
+--   realisasi                  partitioned table (kolom, default, FK, grant, RLS sama)
+--   realisasi_p2025_01, ...    satu partisi per bulan: [tanggal 1, tanggal 1 bulan berikutnya)
+--   realisasi_pdefault         tanggal_penerimaan NULL / bulan yang belum punya partisi
+--   realisasi_unpartitioned    tabel lama, disimpan untuk rollback (hapus manual)
+--
+-- Index dibuat di tabel induk sehingga setiap partisi (termasuk yang dibuat nanti)
+-- otomatis punya index yang sama. Primary key lama (id) diganti UNIQUE (id, tanggal_penerimaan)
+-- karena constraint unik di tabel partisi wajib memuat kolom partisi.
+--
+-- Urutan pemasangan (sekali, di luar jam upload):
+--   1. shadow_swap_functions.sql     (prepare/swap sadar partisi, rename_table_tree, copy_table_access)
+--   2. file ini
+--   3. SELECT partition_table_by_month('realisasi');
+--      SELECT partition_table_by_month('realisasi_compare');
+--
+-- Ingestion memanggil ensure_month_partitions sebelum load (ingestion.partitions), jadi
+-- bulan baru mendapat partisi sendiri; baris yang terlanjur masuk pdefault dipindah
+-- saat partisinya dibuat. Satu panggilan maksimal partition_max_span_months() bulan
+-- (tanggal salah ketik tidak membuat ratusan partisi); bulan di luar itu tetap di pdefault.
+
+-- ===== HELPERS =====
+
+CREATE OR REPLACE FUNCTION month_partition_name(p_table_name text, p_month date)
+RETURNS text
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT p_table_name || '_p' || to_char(p_month, 'YYYY_MM');
+$$;
+
+CREATE OR REPLACE FUNCTION partition_check_table(p_table_name text)
+RETURNS void
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+BEGIN
+    IF p_table_name NOT IN ('realisasi', 'realisasi_compare', 'realisasi_next') THEN
+        RAISE EXCEPTION 'Partisi bulanan tidak diizinkan untuk tabel %', p_table_name;
+    END IF;
+END;
+$$;
+
+-- Kolom partisi tabel (NULL jika tabel tidak dipartisi)
+CREATE OR REPLACE FUNCTION partition_column(p_table_name text)
+RETURNS text
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+    SELECT a.attname::text
+    FROM pg_partitioned_table pt
+    JOIN pg_attribute a ON a.attrelid = pt.partrelid AND a.attnum = pt.partattrs[0]
+    WHERE pt.partrelid = to_regclass(format('public.%I', p_table_name));
+$$;
+
+-- Batas jumlah bulan satu panggilan ensure_month_partitions (sama dengan
+-- ingestion.partitions.MAX_PARTITION_SPAN_MONTHS)
+CREATE OR REPLACE FUNCTION partition_max_span_months()
+RETURNS integer
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT 24;
+$$;
+
+-- ===== ENSURE =====
+
+-- Buat partisi bulanan yang belum ada untuk rentang [p_date_from, p_date_to] tanpa batas
+-- rentang (internal: dipakai ensure_month_partitions dan partition_table_by_month).
+-- Baris bulan tersebut yang sudah ada di partisi default dipindah ke partisi baru.
+-- Tabel yang tidak dipartisi: tidak melakukan apa-apa. Returns jumlah partisi baru.
+CREATE OR REPLACE FUNCTION create_month_partitions(p_table_name text, p_date_from date, p_date_to date)
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_column text := partition_column(p_table_name);
+    v_default text := p_table_name || '_pdefault';
+    v_month date;
+    v_name text;
+    v_created integer := 0;
+BEGIN
+    PERFORM partition_check_table(p_table_name);
+    IF v_column IS NULL OR p_date_from IS NULL OR p_date_to IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    SET LOCAL lock_timeout = '10s';
+    FOR v_month IN
+        SELECT generate_series(date_trunc('month', p_date_from), date_trunc('month', p_date_to), interval '1 month')::date
+    LOOP
+        v_name := month_partition_name(p_table_name, v_month);
+        CONTINUE WHEN to_regclass(format('public.%I', v_name)) IS NOT NULL;
+
+        IF to_regclass(format('public.%I', v_default)) IS NOT NULL THEN
+            -- Partisi baru tidak bisa dibuat selama default berisi baris di rentangnya:
+            -- buat sebagai tabel biasa, pindahkan barisnya, lalu attach
+            EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', v_name, p_table_name);
+            EXECUTE format('WITH moved AS (DELETE FROM %I WHERE %I >= $1 AND %I < $2 RETURNING *) '
+                           'INSERT INTO %I SELECT * FROM moved',
+                           v_default, v_column, v_column, v_name)
+                USING v_month, (v_month + interval '1 month')::date;
+            EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                           p_table_name, v_name, v_month, (v_month + interval '1 month')::date);
+        ELSE
+            EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                           v_name, p_table_name, v_month, (v_month + interval '1 month')::date);
+        END IF;
+        v_created := v_created + 1;
+    END LOOP;
+    RETURN v_created;
+END;
+$$;
+
+-- Dipanggil ingestion sebelum load: rentang lebih dari partition_max_span_months() bulan ditolak
+CREATE OR REPLACE FUNCTION ensure_month_partitions(p_table_name text, p_date_from date, p_date_to date)
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    PERFORM partition_check_table(p_table_name);
+    IF p_date_from IS NULL OR p_date_to IS NULL THEN
+        RETURN 0;
+    END IF;
+    IF p_date_to < p_date_from
+        OR date_trunc('month', p_date_to) >= date_trunc('month', p_date_from)
+                                             + make_interval(months => partition_max_span_months()) THEN
+        RAISE EXCEPTION 'Rentang partisi % s/d % melebihi % bulan', p_date_from, p_date_to, partition_max_span_months();
+    END IF;
+    RETURN create_month_partitions(p_table_name, p_date_from, p_date_to);
+END;
+$$;
+
+-- ===== MIGRATE =====
+
+-- Ubah tabel biasa menjadi tabel berpartisi bulanan (satu transaksi). Partisi dibuat
+-- dari bulan data terlama (paling jauh p_months_back bulan ke belakang; data lebih lama
+-- masuk partisi default) sampai p_months_ahead bulan ke depan. Returns jumlah baris.
+CREATE OR REPLACE FUNCTION partition_table_by_month(p_table_name text, p_column text DEFAULT 'tanggal_penerimaan',
+                                                    p_months_ahead integer DEFAULT 12, p_months_back integer DEFAULT 120)
+RETURNS bigint
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_old text := p_table_name || '_unpartitioned';
+    v_index record;
+    v_column record;
+    v_first date;
+    v_rows bigint;
+BEGIN
+    PERFORM partition_check_table(p_table_name);
+    IF partition_column(p_table_name) IS NOT NULL THEN
+        RAISE NOTICE '% sudah dipartisi', p_table_name;
+        EXECUTE format('SELECT count(*) FROM %I', p_table_name) INTO v_rows;
+        RETURN v_rows;
+    END IF;
+    IF to_regclass(format('public.%I', v_old)) IS NOT NULL THEN
+        RAISE EXCEPTION '% masih ada dari migrasi sebelumnya, hapus dulu', v_old;
+    END IF;
+
+    SET LOCAL lock_timeout = '10s';
+    EXECUTE format('LOCK TABLE %I IN ACCESS EXCLUSIVE MODE', p_table_name);
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', p_table_name, v_old);
+
+    -- Kolom, default (termasuk nextval sequence serial yang sama), identity, CHECK;
+    -- index dan primary key dibuat ulang di bawah
+    EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING ALL EXCLUDING INDEXES) PARTITION BY RANGE (%I)',
+                   p_table_name, v_old, p_column);
+
+    EXECUTE format('SELECT date_trunc(''month'', min(%I))::date FROM %I', p_column, v_old) INTO v_first;
+    v_first := GREATEST(v_first, (date_trunc('month', current_date) - make_interval(months => p_months_back))::date);
+    PERFORM create_month_partitions(p_table_name, COALESCE(v_first, current_date),
+                                    (date_trunc('month', current_date) + make_interval(months => p_months_ahead))::date);
+    EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', p_table_name || '_pdefault', p_table_name);
+
+    -- Index lama dibuat ulang di tabel induk dengan nama yang sama (index lama di-rename);
+    -- index di induk otomatis ada di setiap partisi, termasuk partisi yang dibuat nanti
+    FOR v_index IN
+        SELECT c.relname, i.indisunique, pg_get_indexdef(i.indexrelid) AS definition,
+               (SELECT array_agg(a.attname::text ORDER BY k.ord)
+                FROM unnest(i.indkey) WITH ORDINALITY AS k(attnum, ord)
+                JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum) AS columns
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = format('public.%I', v_old)::regclass
+    LOOP
+        EXECUTE format('ALTER INDEX %I RENAME TO %I', v_index.relname, left(v_index.relname, 48) || '_unpartitioned');
+        IF v_index.indisunique AND NOT p_column = ANY(v_index.columns) THEN
+            -- Primary key / unique (id) -> UNIQUE (id, tanggal_penerimaan); tanggal NULL
+            -- di partisi default membuat primary key tidak mungkin
+            EXECUTE format('CREATE UNIQUE INDEX %I ON %I (%s, %I)',
+                           left(format('%s_%s_%s_key', p_table_name, array_to_string(v_index.columns, '_'), p_column), 63),
+                           p_table_name,
+                           (SELECT string_agg(quote_ident(c), ', ') FROM unnest(v_index.columns) AS c), p_column);
+        ELSE
+            EXECUTE regexp_replace(v_index.definition, ' ON \S+ ', format(' ON %I ', p_table_name));
+        END IF;
+    END LOOP;
+
+    -- Index dashboard (rentang tanggal per kanwil) jika belum ada dari delta_sync_functions.sql
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_index i
+        WHERE i.indrelid = format('public.%I', p_table_name)::regclass
+          AND i.indkey[0] = (SELECT attnum FROM pg_attribute
+                             WHERE attrelid = i.indrelid AND attname = p_column)
+    ) THEN
+        EXECUTE format('CREATE INDEX %I ON %I (%I, kanwil_id)', p_table_name || '_scope_idx', p_table_name, p_column);
+    END IF;
+
+    PERFORM copy_table_access(v_old, p_table_name);
+
+    EXECUTE format('INSERT INTO %I SELECT * FROM %I', p_table_name, v_old);
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+
+    -- Sequence serial dipindah ke tabel baru; identity (sequence baru) dilanjutkan dari max(id)
+    FOR v_column IN
+        SELECT a.attname, a.attidentity,
+               pg_get_serial_sequence(format('public.%I', v_old), a.attname) AS old_seq,
+               pg_get_serial_sequence(format('public.%I', p_table_name), a.attname) AS new_seq
+        FROM pg_attribute a
+        WHERE a.attrelid = format('public.%I', p_table_name)::regclass
+          AND a.attnum > 0 AND NOT a.attisdropped
+    LOOP
+        IF v_column.attidentity = '' AND v_column.old_seq IS NOT NULL THEN
+            EXECUTE format('ALTER SEQUENCE %s OWNED BY %I.%I', v_column.old_seq, p_table_name, v_column.attname);
+        ELSIF v_column.attidentity <> '' AND v_column.new_seq IS NOT NULL THEN
+            EXECUTE format('SELECT setval(%L, COALESCE((SELECT max(%I) FROM %I), 0) + 1, false)',
+                           v_column.new_seq, v_column.attname, p_table_name);
+        END IF;
+    END LOOP;
+
+    EXECUTE format('ANALYZE %I', p_table_name);
+    NOTIFY pgrst, 'reload schema';
+    RETURN v_rows;
+END;
+$$;
+
+-- Hanya service role (client bulk ingestion, [supabase] service_key); default privileges
+-- Supabase memberi EXECUTE ke anon / authenticated, jadi dicabut eksplisit. Migrasi dan
+-- create_month_partitions (tanpa batas rentang) tidak bisa dipanggil lewat RPC sama sekali.
+REVOKE ALL ON FUNCTION create_month_partitions(text, date, date) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION partition_table_by_month(text, text, integer, integer) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION ensure_month_partitions(text, date, date) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION ensure_month_partitions(text, date, date) TO service_role;
@@ -0,0 +1,204 @@
+"""
+Decoding response RPC/tabel langsung menjadi kolom DataFrame.
+
+Jalur lama: PostgREST mengirim JSON array of objects -> httpx mem-parse menjadi
+list of dict -> pd.DataFrame(list). Untuk tren harian setahun atau load seluruh
+tabel realisasi, alokasi dict per baris ini mendominasi waktu dan memori.
+
+Di sini response diminta sebagai CSV lalu di-parse dengan pd.read_csv (parser C,
+langsung ke kolom bertipe), dengan tiga transport berurutan:
+
+1. "copy" : COPY (SELECT * FROM rpc(...)) TO STDOUT lewat psycopg2, jika
+            database_url dikonfigurasi (tanpa lewat PostgREST sama sekali)
+2. "csv"  : POST /rpc/<nama> dengan Accept: text/csv lewat session httpx milik
+            client postgrest supabase-py
+3. "json" : fallback client.rpc(...).execute() + pd.DataFrame(response.data)
+
+Semua panggilan tetap tercatat di rpc_profiler (latency + ukuran payload).
+Catatan CSV PostgREST: NULL menjadi sel kosong; string kosong juga terbaca NaN.
+"""
+import json
+import threading
+import time
+from io import BytesIO
+
+import pandas as pd
+
+from rpc_profiler import PROFILER
+
+try:
+    import psycopg2
+    from psycopg2 import pool as psycopg2_pool
+    from psycopg2 import sql as psycopg2_sql
+except ImportError:  # psycopg2 opsional, transport copy dinonaktifkan
+    psycopg2 = None
+
+TRANSPORTS = ('copy', 'csv', 'json')
+TABLE_PAGE_SIZE = 1000
+
+
+class ColumnarRpcError(Exception):
+    """Error dari PostgREST/PostgreSQL (pesan memuat kode error, mis. 57014 untuk timeout)"""
+
+
+def decode_csv(content):
+    """CSV bytes -> DataFrame; hanya sel kosong yang dianggap NULL"""
+    if not content or not content.strip():
+        return pd.DataFrame()
+    return pd.read_csv(BytesIO(content), keep_default_na=False, na_values=[''])
+
+
+def decode_json(content):
+    """Jalur lama (untuk pembanding benchmark): JSON array of objects -> DataFrame"""
+    return pd.DataFrame(json.loads(content))
+
+
+class ColumnarClient:
+    """
+    Pembungkus client supabase untuk mengambil hasil RPC/tabel sebagai DataFrame.
+    database_url opsional (postgresql://...) untuk transport copy.
+    """
+
+    def __init__(self, client, database_url=None, profiler=PROFILER, max_connections=4):
+        self.client = client
+        self.database_url = database_url
+        self.profiler = profiler
+        self.max_connections = max_connections
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._copy_disabled = database_url is None or psycopg2 is None
+        self._csv_disabled = self._session() is None
+
+    # ---- transport ----
+
+    def _session(self):
+        postgrest = getattr(self.client, 'postgrest', None)
+        return getattr(postgrest, 'session', None)
+
+    def transport(self):
+        """Transport yang akan dipakai saat ini: copy / csv / json"""
+        if not self._copy_disabled:
+            return 'copy'
+        if not self._csv_disabled:
+            return 'csv'
+        return 'json'
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = psycopg2_pool.ThreadedConnectionPool(1, self.max_connections, self.database_url)
+            return self._pool
+
+    def _copy_csv(self, query):
+        """Jalankan COPY (query) TO STDOUT CSV HEADER, returns bytes"""
+        try:
+            conn_pool = self._get_pool()
+            conn = conn_pool.getconn()
+        except psycopg2.OperationalError as e:
+            # Database tidak bisa dihubungi langsung -> pakai PostgREST untuk sisa proses
+            print(f"⚠️ Koneksi PostgreSQL langsung gagal, beralih ke CSV PostgREST: {str(e)}")
+            self._copy_disabled = True
+            return None
+        buffer = BytesIO()
+        try:
+            with conn.cursor() as cursor:
+                copy_sql = psycopg2_sql.SQL("COPY ({}) TO STDOUT WITH (FORMAT csv, HEADER true)").format(query)
+                cursor.copy_expert(copy_sql.as_string(conn), buffer)
+            conn.rollback()
+        except psycopg2.Error as e:
+            conn.rollback()
+            raise ColumnarRpcError(f"{getattr(e, 'pgcode', '')} {str(e)}".strip())
+        finally:
+            conn_pool.putconn(conn)
+        return buffer.getvalue()
+
+    def _postgrest_csv(self, method, path, **kwargs):
+        headers = {'Accept': 'text/csv'}
+        headers.update(kwargs.pop('headers', {}))
+        response = self._session().request(method, path, headers=headers, **kwargs)
+        if response.status_code >= 400:
+            raise ColumnarRpcError(f"{response.status_code} {response.text}")
+        return response.content
+
+    # ---- RPC ----
+
+    def _rpc_query(self, rpc_name, params):
+        arguments = psycopg2_sql.SQL(', ').join(
+            psycopg2_sql.SQL('{} := {}').format(psycopg2_sql.Identifier(name), psycopg2_sql.Literal(value))
+            for name, value in (params or {}).items()
+        )
+        return psycopg2_sql.SQL('SELECT * FROM {}({})').format(psycopg2_sql.Identifier(rpc_name), arguments)
+
+    def _fetch_rpc(self, rpc_name, params):
+        """Returns (DataFrame, payload_bytes, transport)"""
+        if not self._copy_disabled:
+            content = self._copy_csv(self._rpc_query(rpc_name, params))
+            if content is not None:
+                return decode_csv(content), len(content), 'copy'
+        if not self._csv_disabled:
+            content = self._postgrest_csv('POST', f"/rpc/{rpc_name}", json=params or {})
+            return decode_csv(content), len(content), 'csv'
+        response = self.client.rpc(rpc_name, params).execute()
+        data = response.data or []
+        return pd.DataFrame(data if isinstance(data, list) else [data]), None, 'json'
+
+    def rpc_frame(self, rpc_name, params, caller=None):
+        """
+        Panggil RPC dan kembalikan DataFrame (pengganti pd.DataFrame(response.data)).
+        Exception di-raise ulang agar handle_rpc_error tetap bekerja.
+        """
+        start = time.perf_counter()
+        try:
+            df, payload_bytes, transport = self._fetch_rpc(rpc_name, params)
+        except Exception as e:
+            self.profiler.record(rpc_name, params, time.perf_counter() - start, caller=caller, error=e)
+            raise
+        if payload_bytes is None:
+            payload_bytes = int(df.memory_usage(deep=True).sum())
+        self.profiler.record(rpc_name, params, time.perf_counter() - start, row_count=len(df),
+                             payload_bytes=payload_bytes, caller=f"{caller or rpc_name} [{transport}]")
+        return df
+
+    # ---- tabel ----
+
+    def table_frame(self, table_name, key_column='id', page_size=TABLE_PAGE_SIZE, progress_callback=None):
+        """
+        Ambil seluruh isi tabel sebagai DataFrame.
+        copy: 1x COPY tabel; csv: halaman keyset (key_column > last) per page_size baris.
+        progress_callback(rows_loaded) dipanggil setiap halaman.
+        """
+        if not self._copy_disabled:
+            query = psycopg2_sql.SQL('SELECT * FROM {} ORDER BY {}').format(
+                psycopg2_sql.Identifier(table_name), psycopg2_sql.Identifier(key_column)
+            )
+            content = self._copy_csv(query)
+            if content is not None:
+                df = decode_csv(content)
+                if progress_callback:
+                    progress_callback(len(df))
+                return df
+
+        frames, loaded, last_key = [], 0, None
+        while True:
+            if not self._csv_disabled:
+                params = {'select': '*', 'order': f'{key_column}.asc', 'limit': page_size}
+                if last_key is not None:
+                    params[key_column] = f'gt.{last_key}'
+                page = decode_csv(self._postgrest_csv('GET', f"/{table_name}", params=params))
+            else:
+                query = self.client.table(table_name).select('*').order(key_column).limit(page_size)
+                if last_key is not None:
+                    query = query.gt(key_column, last_key)
+                page = pd.DataFrame(query.execute().data)
+            if page.empty:
+                break
+            frames.append(page)
+            loaded += len(page)
+            last_key = page[key_column].iloc[-1]
+            if progress_callback:
+                progress_callback(loaded)
+            if len(page) < page_size:
+                break
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,152 @@
+"""
+Profiler latency untuk RPC dashboard (get_realisasi_setara_beras, get_overview_*, dll).
+
+Setiap panggilan lewat profiled_rpc() dicatat ke store rolling in-process:
+wall time, ukuran payload response, jumlah baris, parameter, dan error (mis.
+statement timeout 57014). Store hidup selama proses Streamlit berjalan
+(module di-cache di sys.modules, tidak ikut reset saat rerun).
+
+Dipakai halaman "⏱️ Profiler RPC" di app.py untuk melihat p50/p95/p99 per RPC
+dan per kombinasi filter, serta daftar panggilan paling lambat.
+"""
+import json
+import threading
+import time
+from collections import deque
+from datetime import date, datetime
+
+import pandas as pd
+
+DEFAULT_MAX_CALLS = 5000
+
+
+def _is_timeout(error_str):
+    return 'statement timeout' in error_str.lower() or '57014' in error_str
+
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def filter_key(params):
+    """
+    Ringkas parameter RPC menjadi kombinasi filter, mis.
+    "kanwil=Kanwil Jatim | akun=ALL | range=31d".
+    Tanggal diganti panjang rentang agar panggilan dengan periode sama panjang terkelompok.
+    """
+    params = params or {}
+    parts = []
+    start = _parse_date(params['p_start_date']) if params.get('p_start_date') else None
+    end = _parse_date(params['p_end_date']) if params.get('p_end_date') else None
+    for name, value in params.items():
+        if name in ('p_start_date', 'p_end_date', 'p_today'):
+            continue
+        label = name[2:] if name.startswith('p_') else name
+        label = label.replace('nama_', '').replace('_analitik', '')
+        if value is None or value == [] or value == '':
+            text = 'ALL'
+        elif isinstance(value, (list, tuple)):
+            text = str(value[0]) if len(value) == 1 else f"{len(value)} dipilih"
+        else:
+            text = str(value)
+        parts.append(f"{label}={text}")
+    if start and end:
+        parts.append(f"range={(end - start).days + 1}d")
+    return " | ".join(parts) or "-"
+
+
+class RpcProfiler:
+    """Store rolling (deque) berisi catatan panggilan RPC, aman dipakai lintas thread"""
+
+    def __init__(self, max_calls=DEFAULT_MAX_CALLS):
+        self.calls = deque(maxlen=max_calls)
+        self._lock = threading.Lock()
+
+    def record(self, rpc_name, params, seconds, row_count=0, payload_bytes=0, caller=None, error=None):
+        entry = {
+            'timestamp': datetime.now(),
+            'rpc': rpc_name,
+            'caller': caller or rpc_name,
+            'filter': filter_key(params),
+            'params': json.dumps(params, default=str, sort_keys=True),
+            'ms': round(seconds * 1000, 1),
+            'rows': row_count,
+            'payload_kb': round(payload_bytes / 1024, 1),
+            'status': 'ok' if error is None else ('timeout' if _is_timeout(str(error)) else 'error'),
+            'error': None if error is None else str(error)[:300],
+        }
+        with self._lock:
+            self.calls.append(entry)
+        return entry
+
+    def call(self, client, rpc_name, params, caller=None):
+        """
+        Jalankan client.rpc(rpc_name, params).execute() sambil mencatat latency.
+        Exception tetap di-raise ulang (handle_rpc_error di app.py tetap bekerja).
+        """
+        start = time.perf_counter()
+        try:
+            response = client.rpc(rpc_name, params).execute()
+        except Exception as e:
+            self.record(rpc_name, params, time.perf_counter() - start, caller=caller, error=e)
+            raise
+        elapsed = time.perf_counter() - start
+        data = response.data or []
+        row_count = len(data) if isinstance(data, list) else 1
+        self.record(rpc_name, params, elapsed, row_count=row_count,
+                    payload_bytes=len(json.dumps(data, default=str)), caller=caller)
+        return response
+
+    def clear(self):
+        with self._lock:
+            self.calls.clear()
+
+    def to_dataframe(self):
+        with self._lock:
+            calls = list(self.calls)
+        columns = ['timestamp', 'rpc', 'caller', 'filter', 'params', 'ms', 'rows', 'payload_kb', 'status', 'error']
+        return pd.DataFrame(calls, columns=columns)
+
+    def summary(self, by=('rpc',)):
+        """
+        Ringkasan latency per grup (default per RPC; by=('rpc', 'filter') untuk per kombinasi filter).
+        Kolom: calls, errors, timeouts, p50/p95/p99/max ms, rata-rata rows dan payload.
+        """
+        df = self.to_dataframe()
+        if df.empty:
+            return pd.DataFrame()
+        grouped = df.groupby(list(by), sort=False)
+        summary = pd.DataFrame({
+            'calls': grouped.size(),
+            'errors': grouped['status'].apply(lambda s: int((s != 'ok').sum())),
+            'timeouts': grouped['status'].apply(lambda s: int((s == 'timeout').sum())),
+            'p50_ms': grouped['ms'].quantile(0.50),
+            'p95_ms': grouped['ms'].quantile(0.95),
+            'p99_ms': grouped['ms'].quantile(0.99),
+            'max_ms': grouped['ms'].max(),
+            'avg_rows': grouped['rows'].mean(),
+            'avg_payload_kb': grouped['payload_kb'].mean(),
+        }).round(1)
+        return summary.sort_values('p95_ms', ascending=False).reset_index()
+
+    def slowest(self, n=20):
+        df = self.to_dataframe()
+        if df.empty:
+            return df
+        return df.sort_values('ms', ascending=False).head(n).reset_index(drop=True)
+
+
+# Store global untuk proses Streamlit
+PROFILER = RpcProfiler()
+
+
+def profiled_rpc(client, rpc_name, params, caller=None):
+    """Shortcut: PROFILER.call(...)"""
+    return PROFILER.call(client, rpc_name, params, caller=caller)
@@ -0,0 +1,167 @@
+-- Scoped replace realisasi: ganti hanya irisan bulan x kanwil yang dicakup file
+--
+-- Replace biasa mengganti seluruh tabel walaupun file koreksi hanya berisi satu bulan
+-- atau satu kanwil. Scoped replace men-stage file ke realisasi_compare (sama seperti
+-- Append / Delta Sync), lalu dalam SATU transaksi:
+--
+--   DELETE FROM realisasi  WHERE <scope>;
+--   INSERT INTO realisasi  SELECT ... FROM realisasi_compare WHERE <scope>;
+--
+-- Scope (diisi ingestion.scoped dari isi file):
+--   p_months        bulan kalender (tanggal 1) yang punya baris di file; bulan di antaranya
+--                   yang tidak ada di file tidak disentuh
+--   p_include_null  baris dengan tanggal_penerimaan NULL ikut diganti
+--   p_kanwil_ids    kanwil yang ada di file; NULL = semua kanwil
+--
+-- Jika p_kanwil_ids NULL dan realisasi dipartisi per bulan (partition_functions.sql),
+-- setiap bulan penuh di scope diganti dengan menukar partisi: data baru dimuat ke tabel
+-- terpisah, partisi lama di-DETACH + DROP dan tabel baru di-ATTACH dengan nama yang
+-- sama. Tidak ada DELETE per baris / dead tuple, dan index partisi dibangun sebelum
+-- lock diambil. Bulan lain dan kanwil lain tidak pernah disentuh.
+
+-- Versi lama (rentang p_date_from .. p_date_to, termasuk bulan yang tidak ada di file)
+DROP FUNCTION IF EXISTS scoped_replace_realisasi(date, date, boolean, bigint[]);
+
+CREATE OR REPLACE FUNCTION scoped_replace_realisasi(
+    p_months date[],
+    p_include_null boolean DEFAULT false,
+    p_kanwil_ids bigint[] DEFAULT NULL
+)
+RETURNS TABLE (
+    deleted bigint,
+    inserted bigint,
+    swapped_partitions integer
+)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_partitioned boolean := EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'realisasi'::regclass);
+    v_months date[];
+    v_from date;
+    v_to date;
+    v_month date;
+    v_next date;
+    v_part text;
+    v_stage text;
+    v_index record;
+    v_swapped date[] := '{}';
+    v_count bigint;
+    v_deleted bigint := 0;
+    v_inserted bigint := 0;
+BEGIN
+    SET LOCAL lock_timeout = '10s';
+
+    -- Normalisasi ke tanggal 1; v_from .. v_to hanya untuk partition pruning / index
+    SELECT array_agg(DISTINCT date_trunc('month', m)::date) INTO v_months
+    FROM unnest(COALESCE(p_months, '{}')) AS m WHERE m IS NOT NULL;
+    v_months := COALESCE(v_months, '{}');
+    SELECT min(m), (max(m) + interval '1 month')::date INTO v_from, v_to FROM unnest(v_months) AS m;
+
+    -- Bulan penuh tanpa filter kanwil: tukar partisi
+    IF p_kanwil_ids IS NULL AND v_partitioned THEN
+        FOREACH v_month IN ARRAY v_months
+        LOOP
+            v_next := (v_month + interval '1 month')::date;
+            v_part := 'realisasi_p' || to_char(v_month, 'YYYY_MM');
+            CONTINUE WHEN NOT EXISTS (
+                SELECT 1 FROM pg_inherits
+                WHERE inhparent = 'realisasi'::regclass AND inhrelid = to_regclass(format('public.%I', v_part))
+            );
+
+            v_stage := v_part || '_load';
+            EXECUTE format('DROP TABLE IF EXISTS %I', v_stage);
+            EXECUTE format('CREATE TABLE %I (LIKE realisasi INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', v_stage);
+            -- CHECK sesuai batas partisi: ATTACH tidak perlu scan ulang tabel
+            EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I CHECK (tanggal_penerimaan IS NOT NULL '
+                           'AND tanggal_penerimaan >= %L AND tanggal_penerimaan < %L)',
+                           v_stage, v_stage || '_bound', v_month, v_next);
+            EXECUTE format($sql$
+                INSERT INTO %I (
+                    kanwil_id, kancab_id, lokasi_persediaan, id_pemasok, nama_pemasok,
+                    tanggal_po, nomor_po, produk, no_jurnal, no_in_out,
+                    tanggal_penerimaan, komoditi, spesifikasi, tahun_stok,
+                    tanggal_kirim_keuangan, jenis_transaksi, akun_analitik,
+                    jenis_pengadaan, satuan, uom_po, kuantum_po_kg, qty_in_out,
+                    harga_include_ppn, nominal_realisasi_incl_ppn, status, row_hash
+                )
+                SELECT
+                    c.kanwil_id, c.kancab_id, c.lokasi_persediaan, c.id_pemasok, c.nama_pemasok,
+                    c.tanggal_po, c.nomor_po, c.produk, c.no_jurnal, c.no_in_out,
+                    c.tanggal_penerimaan, c.komoditi, c.spesifikasi, c.tahun_stok,
+                    c.tanggal_kirim_keuangan, c.jenis_transaksi, c.akun_analitik,
+                    c.jenis_pengadaan, c.satuan, c.uom_po, c.kuantum_po_kg, c.qty_in_out,
+                    c.harga_include_ppn, c.nominal_realisasi_incl_ppn, c.status, c.row_hash
+                FROM realisasi_compare c
+                WHERE c.tanggal_penerimaan >= $1 AND c.tanggal_penerimaan < $2
+                ORDER BY c.id
+            $sql$, v_stage) USING v_month, v_next;
+            GET DIAGNOSTICS v_count = ROW_COUNT;
+            v_inserted := v_inserted + v_count;
+
+            -- Index induk dibangun di tabel baru sebelum lock; ATTACH memakai index yang cocok
+            FOR v_index IN
+                SELECT pg_get_indexdef(indexrelid) AS definition FROM pg_index WHERE indrelid = 'realisasi'::regclass
+            LOOP
+                EXECUTE regexp_replace(v_index.definition, '^(CREATE (UNIQUE )?INDEX) \S+ ON ONLY \S+',
+                                       '\1 ON ' || quote_ident(v_stage));
+            END LOOP;
+            EXECUTE format('ANALYZE %I', v_stage);
+
+            EXECUTE format('SELECT count(*) FROM %I', v_part) INTO v_count;
+            v_deleted := v_deleted + v_count;
+
+            EXECUTE format('ALTER TABLE realisasi DETACH PARTITION %I', v_part);
+            EXECUTE format('DROP TABLE %I', v_part);
+            EXECUTE format('ALTER TABLE %I RENAME TO %I', v_stage, v_part);
+            EXECUTE format('ALTER TABLE realisasi ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                           v_part, v_month, v_next);
+            EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', v_part, v_stage || '_bound');
+            v_swapped := v_swapped || v_month;
+        END LOOP;
+    END IF;
+
+    -- Sisa scope (kanwil tertentu, tabel tidak dipartisi, tanggal NULL): DELETE + INSERT
+    DELETE FROM realisasi r
+    WHERE (p_kanwil_ids IS NULL OR r.kanwil_id = ANY(p_kanwil_ids))
+      AND ((r.tanggal_penerimaan >= v_from AND r.tanggal_penerimaan < v_to
+            AND date_trunc('month', r.tanggal_penerimaan)::date = ANY(v_months)
+            AND NOT date_trunc('month', r.tanggal_penerimaan)::date = ANY(v_swapped))
+           OR (p_include_null AND r.tanggal_penerimaan IS NULL));
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    v_deleted := v_deleted + v_count;
+
+    INSERT INTO realisasi (
+        kanwil_id, kancab_id, lokasi_persediaan, id_pemasok, nama_pemasok,
+        tanggal_po, nomor_po, produk, no_jurnal, no_in_out,
+        tanggal_penerimaan, komoditi, spesifikasi, tahun_stok,
+        tanggal_kirim_keuangan, jenis_transaksi, akun_analitik,
+        jenis_pengadaan, satuan, uom_po, kuantum_po_kg, qty_in_out,
+        harga_include_ppn, nominal_realisasi_incl_ppn, status, row_hash
+    )
+    SELECT
+        c.kanwil_id, c.kancab_id, c.lokasi_persediaan, c.id_pemasok, c.nama_pemasok,
+        c.tanggal_po, c.nomor_po, c.produk, c.no_jurnal, c.no_in_out,
+        c.tanggal_penerimaan, c.komoditi, c.spesifikasi, c.tahun_stok,
+        c.tanggal_kirim_keuangan, c.jenis_transaksi, c.akun_analitik,
+        c.jenis_pengadaan, c.satuan, c.uom_po, c.kuantum_po_kg, c.qty_in_out,
+        c.harga_include_ppn, c.nominal_realisasi_incl_ppn, c.status, c.row_hash
+    FROM realisasi_compare c
+    WHERE (p_kanwil_ids IS NULL OR c.kanwil_id = ANY(p_kanwil_ids))
+      AND ((c.tanggal_penerimaan >= v_from AND c.tanggal_penerimaan < v_to
+            AND date_trunc('month', c.tanggal_penerimaan)::date = ANY(v_months)
+            AND NOT date_trunc('month', c.tanggal_penerimaan)::date = ANY(v_swapped))
+           OR (p_include_null AND c.tanggal_penerimaan IS NULL))
+    ORDER BY c.id;
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    v_inserted := v_inserted + v_count;
+
+    RETURN QUERY SELECT v_deleted, v_inserted, COALESCE(array_length(v_swapped, 1), 0);
+END;
+$$;
+
+-- Hanya service role (client bulk ingestion, [supabase] service_key); default privileges
+-- Supabase memberi EXECUTE ke anon / authenticated, jadi dicabut eksplisit
+REVOKE ALL ON FUNCTION scoped_replace_realisasi(date[], boolean, bigint[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION scoped_replace_realisasi(date[], boolean, bigint[]) TO service_role;
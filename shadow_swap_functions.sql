@@ -0,0 +1,346 @@
+-- Shadow table swap untuk Replace mode (realisasi, target_kanwil, target_kancab)
+--
+-- Alur:
+--   1. prepare_shadow_table('realisasi')  -> buat realisasi_next (kolom, default, index,
+--      constraint, FK, grant, RLS policy sama dengan realisasi), kosong
+--   2. data baru di-insert/COPY ke realisasi_next (dashboard tetap membaca realisasi lama)
+--   3. swap_shadow_table('realisasi')     -> satu transaksi rename:
+--        realisasi      -> realisasi_prev  (disimpan untuk rollback)
+--        realisasi_next -> realisasi
+--   4. rollback_shadow_swap('realisasi')  -> tukar kembali realisasi <-> realisasi_prev
+--   5. drop_shadow_previous('realisasi')  -> hapus realisasi_prev jika sudah yakin
+--   (drop_shadow_table('realisasi') -> hapus realisasi_next saja, jika load gagal dan swap dibatalkan)
+--
+-- Catatan:
+-- - Kolom identity (GENERATED AS IDENTITY) mendapat sequence baru (ID mulai dari awal, sama
+--   seperti TRUNCATE RESTART IDENTITY). Kolom serial memakai sequence yang sama (ID lanjut),
+--   kepemilikan sequence dipindah ke tabel aktif saat swap.
+-- - Tabel yang dipakai view, direferensikan FK tabel lain, atau punya trigger ditolak,
+--   karena objek tersebut tetap menempel ke tabel lama setelah rename. Pemanggil akan
+--   kembali ke jalur TRUNCATE + insert.
+-- - Rename hanya butuh lock sesaat; lock_timeout mencegah swap mengantri di belakang
+--   query dashboard yang panjang (dan membuat query baru ikut mengantri).
+-- - Tabel yang dipartisi per bulan (partition_functions.sql): <table>_next dibuat dengan
+--   batas partisi yang sama, dan partisi <table>_p<bulan> ikut di-rename saat swap / rollback.
+
+-- ===== GUARD =====
+
+CREATE OR REPLACE FUNCTION shadow_swap_check_table(p_table_name text)
+RETURNS void
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+DECLARE
+    v_dependents text;
+BEGIN
+    IF p_table_name NOT IN ('realisasi', 'target_kanwil', 'target_kancab') THEN
+        RAISE EXCEPTION 'Shadow swap tidak diizinkan untuk tabel %', p_table_name;
+    END IF;
+
+    SELECT string_agg(DISTINCT v.relname, ', ') INTO v_dependents
+    FROM pg_depend d
+    JOIN pg_rewrite r ON r.oid = d.objid
+    JOIN pg_class v ON v.oid = r.ev_class
+    WHERE d.refobjid = format('public.%I', p_table_name)::regclass
+      AND d.classid = 'pg_rewrite'::regclass
+      AND v.oid <> d.refobjid;
+    IF v_dependents IS NOT NULL THEN
+        RAISE EXCEPTION 'Tabel % dipakai view (%), shadow swap tidak didukung', p_table_name, v_dependents;
+    END IF;
+
+    SELECT string_agg(conrelid::regclass::text, ', ') INTO v_dependents
+    FROM pg_constraint
+    WHERE contype = 'f' AND confrelid = format('public.%I', p_table_name)::regclass;
+    IF v_dependents IS NOT NULL THEN
+        RAISE EXCEPTION 'Tabel % direferensikan FK dari (%), shadow swap tidak didukung', p_table_name, v_dependents;
+    END IF;
+
+    IF EXISTS (
+        SELECT 1 FROM pg_trigger
+        WHERE tgrelid = format('public.%I', p_table_name)::regclass AND NOT tgisinternal
+    ) THEN
+        RAISE EXCEPTION 'Tabel % punya trigger, shadow swap tidak didukung', p_table_name;
+    END IF;
+END;
+$$;
+
+-- Nama tabel yang boleh disentuh helper SECURITY DEFINER di bawah: tabel ingestion
+-- beserta turunannya (<table>_next / _prev / _swap, <table>_unpartitioned dari
+-- partition_functions.sql)
+CREATE OR REPLACE FUNCTION shadow_swap_check_name(p_name text)
+RETURNS void
+LANGUAGE plpgsql
+IMMUTABLE
+AS $$
+BEGIN
+    IF p_name IS NULL OR NOT EXISTS (
+        SELECT 1
+        FROM unnest(ARRAY['realisasi', 'target_kanwil', 'target_kancab']) AS t(base)
+        CROSS JOIN unnest(ARRAY['', '_next', '_prev', '_swap', '_unpartitioned']) AS s(suffix)
+        WHERE t.base || s.suffix = p_name
+    ) THEN
+        RAISE EXCEPTION 'Tabel % bukan tabel ingestion', p_name;
+    END IF;
+END;
+$$;
+
+-- ===== HELPERS =====
+
+-- Salin FK, grant dan RLS policy p_source ke p_target (tidak ikut lewat CREATE TABLE ... LIKE)
+CREATE OR REPLACE FUNCTION copy_table_access(p_source text, p_target text)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_grant record;
+    v_fk record;
+    v_policy record;
+BEGIN
+    PERFORM shadow_swap_check_name(p_source);
+    PERFORM shadow_swap_check_name(p_target);
+
+    FOR v_fk IN
+        SELECT conname, pg_get_constraintdef(oid) AS definition
+        FROM pg_constraint
+        WHERE contype = 'f' AND conrelid = format('public.%I', p_source)::regclass
+    LOOP
+        EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I %s', p_target, v_fk.conname, v_fk.definition);
+    END LOOP;
+
+    FOR v_grant IN
+        SELECT grantee, privilege_type
+        FROM information_schema.role_table_grants
+        WHERE table_schema = 'public' AND table_name = p_source
+    LOOP
+        EXECUTE format('GRANT %s ON %I TO %s', v_grant.privilege_type, p_target,
+                       CASE WHEN v_grant.grantee = 'PUBLIC' THEN 'PUBLIC' ELSE quote_ident(v_grant.grantee) END);
+    END LOOP;
+
+    IF (SELECT relrowsecurity FROM pg_class WHERE oid = format('public.%I', p_source)::regclass) THEN
+        EXECUTE format('ALTER TABLE %I ENABLE ROW LEVEL SECURITY', p_target);
+    END IF;
+    FOR v_policy IN
+        SELECT policyname, permissive, cmd, roles, qual, with_check
+        FROM pg_policies
+        WHERE schemaname = 'public' AND tablename = p_source
+    LOOP
+        EXECUTE format('CREATE POLICY %I ON %I AS %s FOR %s TO %s%s%s',
+                       v_policy.policyname, p_target, v_policy.permissive, v_policy.cmd,
+                       (SELECT string_agg(CASE WHEN role = 'public' THEN 'PUBLIC' ELSE quote_ident(role) END, ', ')
+                        FROM unnest(v_policy.roles) AS role),
+                       COALESCE(' USING (' || v_policy.qual || ')', ''),
+                       COALESCE(' WITH CHECK (' || v_policy.with_check || ')', ''));
+    END LOOP;
+END;
+$$;
+
+-- Rename tabel beserta partisinya: partisi bernama <tabel>_p... (partition_functions.sql)
+-- ikut berganti prefix, supaya <table>_next dan <table> tidak pernah berbagi nama partisi
+CREATE OR REPLACE FUNCTION rename_table_tree(p_from text, p_to text)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_child record;
+BEGIN
+    PERFORM shadow_swap_check_name(p_from);
+    PERFORM shadow_swap_check_name(p_to);
+
+    FOR v_child IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = format('public.%I', p_from)::regclass
+          AND left(c.relname, length(p_from) + 2) = p_from || '_p'
+    LOOP
+        EXECUTE format('ALTER TABLE %I RENAME TO %I', v_child.relname,
+                       p_to || substr(v_child.relname, length(p_from) + 1));
+    END LOOP;
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', p_from, p_to);
+END;
+$$;
+
+-- ===== PREPARE =====
+
+-- Buat <table>_next kosong dengan struktur yang sama. Tabel yang dipartisi
+-- (partition_functions.sql) mendapat partisi dengan batas yang sama. Returns nama shadow table.
+CREATE OR REPLACE FUNCTION prepare_shadow_table(p_table_name text)
+RETURNS text
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_next text := p_table_name || '_next';
+    v_partition record;
+BEGIN
+    PERFORM shadow_swap_check_table(p_table_name);
+
+    EXECUTE format('DROP TABLE IF EXISTS %I', v_next);
+    IF (SELECT relkind FROM pg_class WHERE oid = format('public.%I', p_table_name)::regclass) = 'p' THEN
+        EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING ALL) PARTITION BY %s', v_next, p_table_name,
+                       pg_get_partkeydef(format('public.%I', p_table_name)::regclass));
+        FOR v_partition IN
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) AS bound
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = format('public.%I', p_table_name)::regclass
+        LOOP
+            EXECUTE format('CREATE TABLE %I PARTITION OF %I %s',
+                           v_next || substr(v_partition.relname, length(p_table_name) + 1), v_next, v_partition.bound);
+        END LOOP;
+    ELSE
+        EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING ALL)', v_next, p_table_name);
+    END IF;
+
+    PERFORM copy_table_access(p_table_name, v_next);
+
+    -- PostgREST perlu tahu tabel baru sebelum bisa di-insert lewat REST
+    NOTIFY pgrst, 'reload schema';
+    RETURN v_next;
+END;
+$$;
+
+-- ===== SWAP =====
+
+-- Tukar <table>_next menjadi <table> dalam satu transaksi. Returns jumlah baris tabel aktif baru.
+CREATE OR REPLACE FUNCTION swap_shadow_table(p_table_name text)
+RETURNS bigint
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_next text := p_table_name || '_next';
+    v_prev text := p_table_name || '_prev';
+    v_column record;
+    v_rows bigint;
+BEGIN
+    PERFORM shadow_swap_check_table(p_table_name);
+    IF to_regclass(format('public.%I', v_next)) IS NULL THEN
+        RAISE EXCEPTION 'Shadow table % belum dibuat (panggil prepare_shadow_table)', v_next;
+    END IF;
+
+    -- Statistik planner siap sebelum tabel dipakai dashboard
+    EXECUTE format('ANALYZE %I', v_next);
+    EXECUTE format('SELECT count(*) FROM %I', v_next) INTO v_rows;
+
+    SET LOCAL lock_timeout = '10s';
+    EXECUTE format('LOCK TABLE %I, %I IN ACCESS EXCLUSIVE MODE', p_table_name, v_next);
+
+    -- Sequence serial dimiliki tabel lama; pindahkan agar DROP <table>_prev tidak ikut menghapusnya
+    FOR v_column IN
+        SELECT a.attname, pg_get_serial_sequence(format('public.%I', p_table_name), a.attname) AS seq
+        FROM pg_attribute a
+        WHERE a.attrelid = format('public.%I', p_table_name)::regclass
+          AND a.attnum > 0 AND NOT a.attisdropped AND a.attidentity = ''
+    LOOP
+        IF v_column.seq IS NOT NULL THEN
+            EXECUTE format('ALTER SEQUENCE %s OWNED BY %I.%I', v_column.seq, v_next, v_column.attname);
+        END IF;
+    END LOOP;
+
+    EXECUTE format('DROP TABLE IF EXISTS %I', v_prev);
+    PERFORM rename_table_tree(p_table_name, v_prev);
+    PERFORM rename_table_tree(v_next, p_table_name);
+
+    NOTIFY pgrst, 'reload schema';
+    RETURN v_rows;
+END;
+$$;
+
+-- ===== ROLLBACK =====
+
+-- Kembalikan isi tabel sebelum swap terakhir (<table> <-> <table>_prev)
+CREATE OR REPLACE FUNCTION rollback_shadow_swap(p_table_name text)
+RETURNS bigint
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_prev text := p_table_name || '_prev';
+    v_swap text := p_table_name || '_swap';
+    v_column record;
+    v_rows bigint;
+BEGIN
+    PERFORM shadow_swap_check_table(p_table_name);
+    IF to_regclass(format('public.%I', v_prev)) IS NULL THEN
+        RAISE EXCEPTION 'Tidak ada % untuk rollback', v_prev;
+    END IF;
+
+    SET LOCAL lock_timeout = '10s';
+    EXECUTE format('LOCK TABLE %I, %I IN ACCESS EXCLUSIVE MODE', p_table_name, v_prev);
+
+    FOR v_column IN
+        SELECT a.attname, pg_get_serial_sequence(format('public.%I', p_table_name), a.attname) AS seq
+        FROM pg_attribute a
+        WHERE a.attrelid = format('public.%I', p_table_name)::regclass
+          AND a.attnum > 0 AND NOT a.attisdropped AND a.attidentity = ''
+    LOOP
+        IF v_column.seq IS NOT NULL THEN
+            EXECUTE format('ALTER SEQUENCE %s OWNED BY %I.%I', v_column.seq, v_prev, v_column.attname);
+        END IF;
+    END LOOP;
+
+    PERFORM rename_table_tree(p_table_name, v_swap);
+    PERFORM rename_table_tree(v_prev, p_table_name);
+    PERFORM rename_table_tree(v_swap, v_prev);
+    EXECUTE format('SELECT count(*) FROM %I', p_table_name) INTO v_rows;
+
+    NOTIFY pgrst, 'reload schema';
+    RETURN v_rows;
+END;
+$$;
+
+-- ===== CLEANUP =====
+
+-- Hapus <table>_prev (tidak bisa rollback lagi) dan <table>_next sisa load yang gagal
+CREATE OR REPLACE FUNCTION drop_shadow_previous(p_table_name text)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    PERFORM shadow_swap_check_table(p_table_name);
+    EXECUTE format('DROP TABLE IF EXISTS %I', p_table_name || '_prev');
+    EXECUTE format('DROP TABLE IF EXISTS %I', p_table_name || '_next');
+    NOTIFY pgrst, 'reload schema';
+END;
+$$;
+
+-- Hapus <table>_next sisa load yang tidak lengkap (swap dibatalkan); <table>_prev tetap ada
+CREATE OR REPLACE FUNCTION drop_shadow_table(p_table_name text)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    PERFORM shadow_swap_check_table(p_table_name);
+    EXECUTE format('DROP TABLE IF EXISTS %I', p_table_name || '_next');
+    NOTIFY pgrst, 'reload schema';
+END;
+$$;
+
+-- Hanya service role (client bulk ingestion, [supabase] service_key) yang boleh
+-- menjalankan fungsi ini; helper tidak boleh dipanggil langsung lewat RPC sama sekali.
+-- Default privileges Supabase memberi EXECUTE ke anon / authenticated, jadi dicabut eksplisit.
+REVOKE ALL ON FUNCTION copy_table_access(text, text) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION rename_table_tree(text, text) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION prepare_shadow_table(text) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION swap_shadow_table(text) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION rollback_shadow_swap(text) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION drop_shadow_previous(text) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION drop_shadow_table(text) FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION prepare_shadow_table(text) TO service_role;
+GRANT EXECUTE ON FUNCTION swap_shadow_table(text) TO service_role;
+GRANT EXECUTE ON FUNCTION rollback_shadow_swap(text) TO service_role;
+GRANT EXECUTE ON FUNCTION drop_shadow_previous(text) TO service_role;
+GRANT EXECUTE ON FUNCTION drop_shadow_table(text) TO service_role;
@@ -0,0 +1,84 @@
+from ingestion.adaptive import AdaptiveController, classify_error, is_split_error
+
+
+class FakeError(Exception):
+    def __init__(self, status=None, code=None, retry_after=None):
+        super().__init__(f"{status} {code}")
+        self.status = status
+        self.code = code
+        self.retry_after = retry_after
+
+
+def controller(**kwargs):
+    return AdaptiveController(initial_size=1000, initial_concurrency=4, **kwargs)
+
+
+def test_payload_too_large_halves_size_and_caps_payload():
+    adaptive = controller()
+
+    adaptive.record_error(FakeError(status=413), payload_bytes=2_000_000)
+
+    assert adaptive.size == 500
+    assert adaptive.concurrency == 4
+    assert adaptive.max_payload_bytes == 1_600_000
+    assert adaptive.errors['payload'] == 1
+
+
+def test_statement_timeout_shrinks_size_and_concurrency():
+    adaptive = controller()
+
+    adaptive.record_error(FakeError(code='57014'))
+
+    assert adaptive.size == 500
+    assert adaptive.concurrency == 3
+    assert adaptive.interval >= 0.5
+    assert adaptive.errors['timeout'] == 1
+
+
+def test_throttle_backs_off_with_retry_after():
+    adaptive = controller()
+
+    adaptive.record_error(FakeError(status=429, retry_after=5))
+
+    assert adaptive.size == 1000
+    assert adaptive.concurrency == 3
+    assert adaptive.interval == 5.0
+    assert adaptive.errors['throttle'] == 1
+
+
+def test_size_never_below_minimum():
+    adaptive = controller(min_size=100)
+
+    for _ in range(10):
+        adaptive.record_error(FakeError(status=413))
+
+    assert adaptive.size == 100
+
+
+def test_fast_batches_grow_size_at_most_1_5x():
+    adaptive = controller(statement_timeout=8.0)
+
+    adaptive.record(0.05, 1000)
+    assert adaptive.size == 1500
+    adaptive.record(0.05, 1500)
+    assert adaptive.size == 2250
+    assert adaptive.interval == 0.0
+
+
+def test_slow_batches_shrink_size_to_target():
+    # Target 25% statement_timeout = 2 detik; 1000 baris butuh 4 detik -> 500 baris
+    adaptive = controller(statement_timeout=8.0)
+
+    adaptive.record(4.0, 1000)
+
+    assert adaptive.size == 500
+    assert adaptive.concurrency == 3
+
+
+def test_classify_error_reads_codes_not_message():
+    assert classify_error(FakeError(status=413)) == 'payload'
+    assert classify_error(FakeError(code='57014')) == 'timeout'
+    assert classify_error(FakeError(status=503)) == 'throttle'
+    assert classify_error(Exception('HTTP 413 dari nilai 57014 di baris')) == 'error'
+    assert is_split_error(FakeError(code='57014'))
+    assert not is_split_error(FakeError(status=504))
@@ -0,0 +1,41 @@
+from datetime import date
+
+import pytest
+
+from ingestion.delta import ScopeTooWide, delta_windows
+from ingestion.scoped import replace_scope
+
+
+def records(*rows):
+    return [{'tanggal_penerimaan': day, 'kanwil_id': kanwil} for day, kanwil in rows]
+
+
+def test_delta_windows_only_months_in_file():
+    windows = delta_windows(records(('2024-01-05', 2), ('2024-04-30', 1), ('2024-01-20', 2), (None, 1)))
+
+    assert [window.label for window in windows] == ['2024-01', '2024-04', 'tanggal kosong']
+    assert (windows[1].date_from, windows[1].date_to) == (date(2024, 4, 1), date(2024, 4, 30))
+    assert all(window.scope_ids == [1, 2] for window in windows)
+
+
+def test_delta_windows_without_kanwil():
+    assert delta_windows(records(('2024-01-05', None))) == []
+
+
+def test_delta_windows_rejects_too_many_months():
+    rows = records(('2024-01-05', 1), ('1924-01-05', 1), ('2024-02-05', 1))
+
+    with pytest.raises(ScopeTooWide):
+        delta_windows(rows, max_months=2)
+    assert len(delta_windows(rows, max_months=None)) == 3
+
+
+def test_replace_scope_only_months_in_file():
+    scope = replace_scope(records(('2024-01-05', 2), ('2024-04-30', 1), (None, 1)))
+
+    assert scope.params() == {'p_months': ['2024-01-01', '2024-04-01'], 'p_include_null': True,
+                              'p_kanwil_ids': [1, 2]}
+    assert scope.label == '2024-01, 2024-04 + tanggal kosong, 2 kanwil'
+    assert replace_scope(records(('2024-01-05', 2)), all_kanwil=True).scope_ids is None
+    with pytest.raises(ScopeTooWide):
+        replace_scope(records(('2024-01-05', 1), ('1924-01-05', 1)), max_months=1)
@@ -0,0 +1,148 @@
+import re
+
+import pandas as pd
+import pytest
+
+import gsheets_loader
+from gsheets_loader import column_letter, convert_serial_dates, load_sheets
+
+RANGE_PATTERN = re.compile(r"^'(?P<sheet>(?:[^']|'')+)'!(?:1:1|(?P<column>[A-Z]+)2:[A-Z]+)$")
+
+
+def column_index(letters):
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - 64
+    return index - 1
+
+
+class FakeSpreadsheet:
+    """Fake gspread.Spreadsheet: sheet = list baris (baris pertama header), tanpa jaringan"""
+
+    def __init__(self, sheets, revision="rev-1", spreadsheet_id="fake-sheet"):
+        self.id = spreadsheet_id
+        self.sheets = sheets
+        self.revision = revision
+        self.requests = []
+
+    def get_lastUpdateTime(self):
+        return self.revision
+
+    def values_batch_get(self, ranges, params=None):
+        self.requests.append((list(ranges), dict(params or {})))
+        value_ranges = []
+        for value_range in ranges:
+            match = RANGE_PATTERN.match(value_range)
+            rows = self.sheets[match.group('sheet').replace("''", "'")]
+            if match.group('column') is None:
+                values = [rows[0]] if rows else []
+            else:
+                index = column_index(match.group('column'))
+                column = [row[index] if index < len(row) else '' for row in rows[1:]]
+                # Sheets API memotong sel kosong di ujung range
+                while column and column[-1] == '':
+                    column.pop()
+                values = [column] if column else []
+            entry = {'range': value_range}
+            if values:
+                entry['values'] = values
+            value_ranges.append(entry)
+        return {'valueRanges': value_ranges}
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    gsheets_loader.clear_cache()
+    yield
+    gsheets_loader.clear_cache()
+
+
+def test_column_letter():
+    assert [column_letter(i) for i in (0, 25, 26, 51, 701, 702)] == ['A', 'Z', 'AA', 'AZ', 'ZZ', 'AAA']
+
+
+def test_ragged_columns_are_padded_to_the_longest_column():
+    spreadsheet = FakeSpreadsheet({
+        'Export': [
+            ['Nomor PO', 'Kuantum PO (Kg)', '', 'Status'],
+            ['PO-1', 100, 'x', 'done'],
+            ['PO-2', '', 'y', ''],
+            ['PO-3', 300],
+        ],
+    })
+
+    df = load_sheets(spreadsheet, ['Export'], use_cache=False)['Export']
+
+    # Kolom tanpa header dilewati, sel kosong di ujung kolom menjadi ''
+    assert list(df.columns) == ['Nomor PO', 'Kuantum PO (Kg)', 'Status']
+    assert df['Nomor PO'].tolist() == ['PO-1', 'PO-2', 'PO-3']
+    assert df['Kuantum PO (Kg)'].tolist() == [100, '', 300]
+    assert df['Status'].tolist() == ['done', '', '']
+    # Header lalu kolom, masing-masing satu request
+    assert len(spreadsheet.requests) == 2
+    assert spreadsheet.requests[1][1]['majorDimension'] == 'COLUMNS'
+
+
+def test_sheet_names_with_quotes_and_empty_sheets():
+    spreadsheet = FakeSpreadsheet({"Target Kanwil": [['Kanwil', 'Target']], "Kanwil's": []})
+
+    frames = load_sheets(spreadsheet, ["Target Kanwil", "Kanwil's"], use_cache=False)
+
+    assert list(frames["Target Kanwil"].columns) == ['Kanwil', 'Target']
+    assert frames["Target Kanwil"].empty
+    assert frames["Kanwil's"].empty
+
+
+def test_duplicate_headers_are_rejected():
+    spreadsheet = FakeSpreadsheet({'Export': [['Nomor PO', 'Status', 'Status'], ['PO-1', 'a', 'b']]})
+
+    with pytest.raises(ValueError, match="Status"):
+        load_sheets(spreadsheet, ['Export'], use_cache=False)
+
+
+def test_serial_and_text_dates():
+    series = pd.Series([45658, 45658.5, '2025-01-15', '', 'bukan tanggal', None], dtype=object)
+
+    result = convert_serial_dates(series)
+
+    assert result.iloc[0] == pd.Timestamp('2025-01-01')
+    assert result.iloc[1] == pd.Timestamp('2025-01-01 12:00')
+    assert result.iloc[2] == pd.Timestamp('2025-01-15')
+    assert result.iloc[3:].isna().all()
+
+
+def test_same_revision_is_served_from_cache():
+    spreadsheet = FakeSpreadsheet({'Export': [['Nomor PO'], ['PO-1']]})
+
+    first = load_sheets(spreadsheet, ['Export'])['Export']
+    first.loc[0, 'Nomor PO'] = 'diubah pemanggil'
+    second = load_sheets(spreadsheet, ['Export'])['Export']
+
+    assert len(spreadsheet.requests) == 2
+    # Cache mengembalikan salinan, perubahan pemanggil tidak bocor
+    assert second['Nomor PO'].tolist() == ['PO-1']
+
+
+def test_new_revision_is_fetched_again():
+    spreadsheet = FakeSpreadsheet({'Export': [['Nomor PO'], ['PO-1']]})
+    load_sheets(spreadsheet, ['Export'])
+
+    spreadsheet.sheets['Export'].append(['PO-2'])
+    spreadsheet.revision = 'rev-2'
+    df = load_sheets(spreadsheet, ['Export'])['Export']
+
+    assert len(spreadsheet.requests) == 4
+    assert df['Nomor PO'].tolist() == ['PO-1', 'PO-2']
+
+
+def test_unreadable_revision_disables_cache():
+    spreadsheet = FakeSpreadsheet({'Export': [['Nomor PO'], ['PO-1']]})
+
+    def broken():
+        raise RuntimeError("Drive API tidak tersedia")
+
+    spreadsheet.get_lastUpdateTime = broken
+    load_sheets(spreadsheet, ['Export'])
+    load_sheets(spreadsheet, ['Export'])
+
+    assert len(spreadsheet.requests) == 4
@@ -0,0 +1,31 @@
+import pandas as pd
+
+from kanwil_registry import KANWIL, display_name, index_by_code, kanwil_options
+
+
+def test_index_by_code_keeps_leading_zero_from_numeric_codes():
+    # rpc_columnar.decode_csv menebak tipe: '08001' -> 8001, dengan NULL -> 8001.0
+    df = pd.DataFrame({'kode_kanwil': [8001, 13001, None], 'beras': [1.0, 2.0, 3.0]})
+
+    indexed = index_by_code(df)
+
+    assert list(indexed.index) == ['08001', '13001']
+    assert indexed.loc['08001', 'beras'] == 1.0
+
+
+def test_index_by_code_from_names():
+    df = pd.DataFrame({
+        'kanwil': ['16 - 15001 - KANTOR WILAYAH KALTIM KALTARA', '01001 - KANTOR WILAYAH ACEH', 'TANPA KODE'],
+        'beras': [1.0, 2.0, 3.0],
+    })
+
+    assert list(index_by_code(df).index) == ['15001', '01001']
+
+
+def test_kanwil_options_limited_to_database_kanwil():
+    db_kanwil = {'09 - 13001 - KANTOR WILAYAH JATIM': 1, '01 - 01001 - KANTOR WILAYAH ACEH': 2}
+
+    assert kanwil_options(db_kanwil) == [display_name('01001'), display_name('13001')]
+    # Tanpa nama database yang cocok: semua kanwil registry
+    assert len(kanwil_options({'PUSAT': 3})) == len(KANWIL)
+    assert kanwil_options() == [display_name(code) for code in sorted(KANWIL)]
@@ -0,0 +1,68 @@
+import pandas as pd
+
+from ingestion.jobs import JobStore, UploadLedger
+from ingestion.ledger import IDENTICAL, TAIL, match_upload, prefix_digest, row_hashes, set_digest
+
+COLUMNS = ['Nomor PO', 'Kuantum']
+
+
+def entry(df, upload_id=1):
+    hashes = row_hashes(df)
+    return {'upload_id': upload_id, 'row_count': len(hashes),
+            'prefix_hash': prefix_digest(COLUMNS, hashes), 'set_hash': set_digest(COLUMNS, hashes)}
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+OLD = frame([['PO1', '10'], ['PO2', '20'], ['PO3', '30']])
+
+
+def test_match_upload_identical():
+    kind, matched, count = match_upload([entry(OLD)], COLUMNS, row_hashes(OLD))
+
+    assert (kind, matched['upload_id'], count) == (IDENTICAL, 1, 3)
+
+
+def test_match_upload_identical_when_rows_reordered():
+    reordered = OLD.iloc[[2, 0, 1]]
+
+    kind, _, count = match_upload([entry(OLD)], COLUMNS, row_hashes(reordered))
+
+    assert (kind, count) == (IDENTICAL, 3)
+
+
+def test_match_upload_tail_picks_longest_prefix():
+    new = frame([['PO1', '10'], ['PO2', '20'], ['PO3', '30'], ['PO4', '40']])
+    entries = [entry(OLD.iloc[:2], upload_id=1), entry(OLD, upload_id=2)]
+
+    kind, matched, count = match_upload(entries, COLUMNS, row_hashes(new))
+
+    assert (kind, matched['upload_id'], count) == (TAIL, 2, 3)
+
+
+def test_match_upload_none():
+    changed = frame([['PO1', '10'], ['PO2', '21'], ['PO3', '30']])
+
+    assert match_upload([entry(OLD)], COLUMNS, row_hashes(changed)) == (None, None, 0)
+    assert match_upload([], COLUMNS, row_hashes(OLD)) == (None, None, 0)
+    # Header berbeda: hash baris sama tetapi bukan upload yang sama
+    assert match_upload([entry(OLD)], ['A', 'B'], row_hashes(OLD)) == (None, None, 0)
+
+
+def test_match_upload_ignores_longer_entries():
+    shorter = OLD.iloc[:2]
+
+    assert match_upload([entry(OLD)], COLUMNS, row_hashes(shorter)) == (None, None, 0)
+
+
+def test_upload_ledger_records_and_clears(tmp_path):
+    store = JobStore(str(tmp_path))
+    ledger = UploadLedger.from_frame(store, 'realisasi', OLD, source_name='export.xlsx')
+
+    ledger.table_matches('replace')
+    assert store.find_upload('realisasi', COLUMNS, row_hashes(OLD))[0] == IDENTICAL
+
+    UploadLedger(store, 'realisasi').table_changed()
+    assert store.completed_uploads('realisasi') == []
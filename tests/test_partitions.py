@@ -0,0 +1,44 @@
+from datetime import date
+
+import pandas as pd
+
+from ingestion.partitions import ensure_partitions, partition_ranges, record_months
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append((params['p_date_from'], params['p_date_to']))
+        return self
+
+    def execute(self):
+        return type('Response', (), {'data': 1})()
+
+
+def test_ranges_cover_only_months_present():
+    months = [pd.Period(m, freq='M') for m in ('2026-01', '2026-02', '2026-06')]
+
+    ranges, skipped = partition_ranges(months, today=pd.Timestamp('2026-10-01'))
+
+    assert ranges == [(date(2026, 1, 1), date(2026, 2, 28)), (date(2026, 6, 1), date(2026, 6, 30))]
+    assert skipped == []
+
+
+def test_ranges_skip_typo_years_and_cap_span():
+    months = list(pd.period_range('2024-01', '2026-12', freq='M')) + [pd.Period('1900-01', freq='M')]
+
+    ranges, skipped = partition_ranges(sorted(months), today=pd.Timestamp('2026-10-01'), max_span=24)
+
+    assert skipped == [pd.Period('1900-01', freq='M')]
+    assert ranges == [(date(2024, 1, 1), date(2025, 12, 31)), (date(2026, 1, 1), date(2026, 12, 31))]
+
+
+def test_ensure_partitions_calls_per_range():
+    client = FakeClient()
+    records = [{'t': '2026-01-15'}, {'t': '2026-03-02'}, {'t': None}]
+
+    assert record_months(records, 't') == [pd.Period('2026-01', freq='M'), pd.Period('2026-03', freq='M')]
+    assert ensure_partitions(client, ['x'], records, 't', log=lambda *args: None) == 2
+    assert client.calls == [('2026-01-01', '2026-01-31'), ('2026-03-01', '2026-03-31')]
@@ -0,0 +1,83 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from ingestion.records import RecordBatch, collapse_duplicates, date_values, decimal_values, map_unique
+
+
+def reference_float(value):
+    """float(clean_value(v)) seperti konversi per-baris lama di app.py"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    stripped = value.strip()
+    if stripped.lower() in ('', 'nan', 'none', 'null'):
+        return None
+    return float(stripped)
+
+
+def convert_to_date(value):
+    """Salinan convert_to_date di app.py (app.py tidak bisa diimport tanpa Streamlit)"""
+    if pd.isna(value):
+        return None
+    try:
+        if isinstance(value, str):
+            return pd.to_datetime(value).strftime('%Y-%m-%d')
+        return value.strftime('%Y-%m-%d') if hasattr(value, 'strftime') else str(value)
+    except Exception:
+        return None
+
+
+def test_decimal_values_match_float():
+    strings = ['12.5', '-3.25', '+7', '.5', '5.', '0.1', '-0.0', '123456789012345',
+               '1234567890123456789', ' 42.0 ', '1e3', '', '  ', 'nan', 'None', 'NULL', None]
+    invalid = {}
+
+    values = decimal_values(pd.Series(strings, dtype=object), invalid, 'kolom')
+
+    assert invalid == {}
+    for string, value in zip(strings, values):
+        expected = reference_float(string)
+        if expected is None:
+            assert value is None
+        else:
+            assert value == expected and math.copysign(1, value) == math.copysign(1, expected), string
+
+
+def test_decimal_values_rejects_thousands_separator_like_float():
+    series = pd.Series(['1,234.5', '1.234.567', '12.5'], index=[10, 11, 12], dtype=object)
+    invalid = {}
+
+    values = decimal_values(series, invalid, 'Harga')
+
+    # float('1,234.5') juga gagal: baris dicatat invalid, bukan dibaca sebagai angka lain
+    assert set(invalid) == {10, 11}
+    assert invalid[10].startswith('Harga: ')
+    assert list(values) == [None, None, 12.5]
+
+
+def test_map_unique_matches_convert_to_date():
+    series = pd.Series(['2024-01-05', '2024-01-05', pd.Timestamp('2024-02-01'), None,
+                        'bukan tanggal', '05/03/2024', np.nan], dtype=object)
+
+    assert list(map_unique(series, convert_to_date)) == [convert_to_date(v) for v in series]
+
+
+def test_date_values_records_invalid_rows():
+    series = pd.Series(['2024-01-05', 'bukan tanggal', None, '2024-01-05'], dtype=object)
+    invalid = {}
+
+    values = date_values(series, invalid, 'Tanggal PO')
+
+    assert list(values) == ['2024-01-05', None, None, '2024-01-05']
+    assert list(invalid) == [1]
+
+
+def test_collapse_duplicates_keeps_first_record():
+    batch = RecordBatch([{'row_hash': 'a', 'n': 1}, {'row_hash': 'b', 'n': 2},
+                         {'row_hash': 'a', 'n': 3}, {'row_hash': 'a', 'n': 4}])
+
+    assert collapse_duplicates(batch) == 2
+    assert batch.records == [{'row_hash': 'a', 'n': 1}, {'row_hash': 'b', 'n': 2}]
+    assert batch.collapsed == 2
+    assert collapse_duplicates(RecordBatch([])) == 0
@@ -0,0 +1,70 @@
+from ingestion.adaptive import FixedController
+from ingestion.writer import insert_batches, missing_ranges
+
+
+class FakeError(Exception):
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+class FakeClient:
+    """Tabel PostgREST palsu: batch > max_rows kena statement timeout, baris bad_value ditolak"""
+
+    def __init__(self, max_rows=4, bad_value=None):
+        self.max_rows = max_rows
+        self.bad_value = bad_value
+        self.rows = []
+
+    def table(self, name):
+        return self
+
+    def insert(self, batch):
+        self.pending = batch
+        return self
+
+    def execute(self):
+        batch = self.pending
+        if len(batch) > self.max_rows:
+            raise FakeError('57014')
+        if any(row['v'] == self.bad_value for row in batch):
+            raise FakeError('23505')
+        self.rows.extend(batch)
+
+
+def insert(client, records, **kwargs):
+    return insert_batches(client, 'x', records, batch_size=8, max_retries=0, retry_delay=0,
+                          controller=FixedController(8, 1), log=lambda *args: None, **kwargs)
+
+
+def test_split_batch_counts_committed_half_and_checkpoints_parts():
+    client = FakeClient(bad_value=13)
+    batches, parts = [], []
+
+    result = insert(client, [{'v': i} for i in range(20)],
+                    batch_callback=lambda num, count: batches.append((num, count)),
+                    part_callback=lambda num, start, count: parts.append((num, start, count)))
+
+    # Batch 2 (v 8..15) dipecah: 8..11 tersimpan, 12..15 gagal
+    assert result.inserted == 16
+    assert result.failed == 4
+    assert len(client.rows) == 16
+    assert batches == [(1, 8), (3, 4)]
+    assert parts == [(2, 0, 4)]
+
+
+def test_resume_sends_only_missing_parts():
+    client = FakeClient()
+
+    result = insert(client, [{'v': i} for i in range(20)],
+                    skip_batches={1, 3}, skip_parts={2: [(0, 4), (6, 2)]})
+
+    assert result.inserted == 2
+    assert result.failed == 0
+    assert client.rows == [{'v': 12}, {'v': 13}]
+
+
+def test_missing_ranges():
+    assert missing_ranges(8, [(0, 4), (6, 2)]) == [(4, 6)]
+    assert missing_ranges(8, []) == [(0, 8)]
+    assert missing_ranges(8, [(2, 2)]) == [(0, 2), (4, 8)]